@@ -1,7 +1,8 @@
 """Base LLM interface for adapters."""
 
+import asyncio
 from abc import ABC, abstractmethod
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Generator
 
 
 class BaseLLM(ABC):
@@ -30,6 +31,41 @@ class BaseLLM(ABC):
         """
         pass
     
+    async def agenerate(
+        self,
+        prompt: str,
+        system: Optional[str] = None,
+        max_tokens: int = 4096,
+        temperature: float = 0.7,
+        **kwargs
+    ) -> Any:
+        """Async version of generate().
+        
+        Default runs generate() in a worker thread so any adapter can be
+        awaited concurrently; adapters with a native async client override it.
+        """
+        return await asyncio.to_thread(
+            self.generate, prompt, system=system, max_tokens=max_tokens, temperature=temperature, **kwargs
+        )
+    
+    def stream(
+        self,
+        prompt: str,
+        system: Optional[str] = None,
+        max_tokens: int = 4096,
+        temperature: float = 0.7,
+        **kwargs
+    ) -> Generator[str, None, Dict[str, Any]]:
+        """Stream response text as deltas.
+        
+        Default yields the full generate() content as a single chunk;
+        adapters with native streaming override it. The generator returns
+        the token usage (StopIteration.value) once exhausted.
+        """
+        response = self.generate(prompt, system=system, max_tokens=max_tokens, temperature=temperature, **kwargs)
+        yield response.content if hasattr(response, "content") else str(response)
+        return getattr(response, "usage", None) or {}
+    
     def filter_providers(self, rules: str, candidates: list, patient: dict, appointment: dict) -> list:
         """Filter providers based on rules (for mock compatibility).
         
@@ -0,0 +1,322 @@
+"""Token budget governor for LLM calls.
+
+Enforces config/cost_limits.yaml:
+- Every response's usage is priced (per_model_budgets.cost_per_1k_tokens)
+  and added to a per-day ledger persisted as JSON
+- Each call is routed down optimization.fallback_chain to the first model
+  whose daily_limit and the total daily budget can absorb the call's
+  worst-case cost (prompt estimate + max_tokens)
+- reserve() holds that worst-case cost until the call is settled, so
+  concurrent calls routed against the same headroom can't overshoot it
+- Calls stop with BudgetExceededError once daily_budget.total_limit is hit
+- Models not listed in per_model_budgets (e.g. a self-hosted model) are
+  unmetered: never priced, blocked or downgraded
+
+Configured via config/llm_settings.py (LLM_BUDGET_* env vars).
+"""
+
+import json
+import threading
+from datetime import date
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Tuple
+
+import yaml
+
+
+class BudgetExceededError(RuntimeError):
+    """Raised when no model in the fallback chain fits today's budget."""
+
+
+class BudgetHold:
+    """Worst-case cost held for one routed call until it is settled."""
+    __slots__ = ("model", "key", "amount", "settled")
+
+    def __init__(self, model: str, key: Optional[str], amount: float):
+        self.model = model
+        self.key = key
+        self.amount = amount
+        self.settled = False
+
+
+def load_cost_limits(path: str) -> Dict[str, Any]:
+    """Load cost_limits.yaml (empty dict if missing)."""
+    path = Path(path)
+    if not path.exists():
+        print(f"[LLM BUDGET] Warning: {path} not found, budget not enforced")
+        return {}
+    with open(path) as f:
+        return yaml.safe_load(f) or {}
+
+
+def estimate_tokens(text: Optional[str]) -> int:
+    """Rough token count (~4 characters per token)."""
+    return len(text or "") // 4 + 1
+
+
+class BudgetGovernor:
+    """Per-day token/cost accounting with fallback-chain routing."""
+
+    # Days of history kept in the ledger file
+    KEEP_DAYS = 31
+
+    def __init__(self, limits: Dict[str, Any], ledger_path: Optional[str] = None):
+        """
+        Args:
+            limits: Parsed cost_limits.yaml
+            ledger_path: JSON file for daily spend (None = in memory only)
+        """
+        daily = limits.get("daily_budget") or {}
+        self.total_limit = float(daily.get("total_limit", 0) or 0)
+        self.alert_threshold = float(daily.get("alert_threshold", 0) or 0)
+        self.models: Dict[str, Dict[str, Any]] = limits.get("per_model_budgets") or {}
+
+        chain = (limits.get("optimization") or {}).get("fallback_chain") or {}
+        self.chain: List[str] = [chain["primary"]] if chain.get("primary") else []
+        self.chain += [chain[k] for k in sorted(chain) if k.startswith("fallback")]
+
+        self.ledger_path = Path(ledger_path) if ledger_path else None
+        self._lock = threading.Lock()
+        self._ledger = self._load_ledger()
+        self._alerted = False
+        # Worst-case cost of calls routed but not yet settled (in memory only)
+        self._held: Dict[str, float] = {}
+        self._held_total = 0.0
+
+        self.downgrades = 0
+        self.blocked = 0
+
+    # ===== model lookup =====
+
+    def resolve(self, model: str) -> Optional[str]:
+        """Map a LiteLLM model string to its cost_limits.yaml key."""
+        if not model:
+            return None
+        if model in self.models:
+            return model
+        bare = model.split("/")[-1]
+        for key, config in self.models.items():
+            if config.get("litellm_model") == model or key == bare:
+                return key
+        return None
+
+    def litellm_model(self, key: str) -> str:
+        """Model string to pass to LiteLLM for a budget key."""
+        return self.models.get(key, {}).get("litellm_model", key)
+
+    def price(self, key: Optional[str]) -> Tuple[float, float]:
+        """(input, output) USD per 1k tokens; models not in cost_limits.yaml are free."""
+        config = self.models.get(key) if key else None
+        rates = (config or {}).get("cost_per_1k_tokens") or {}
+        return float(rates.get("input", 0) or 0), float(rates.get("output", 0) or 0)
+
+    def cost(self, key: Optional[str], prompt_tokens: int, completion_tokens: int) -> float:
+        input_rate, output_rate = self.price(key)
+        return (prompt_tokens * input_rate + completion_tokens * output_rate) / 1000
+
+    # ===== routing =====
+
+    def route(self, model: str, prompt_tokens: int, max_tokens: int, allow_downgrade: bool = True) -> str:
+        """
+        Pick the model for a call without holding its cost (see reserve()).
+
+        Args:
+            model: Requested LiteLLM model
+            prompt_tokens: Estimated prompt tokens
+            max_tokens: Completion cap (worst-case output)
+            allow_downgrade: False when a Router owns the model names
+
+        Returns:
+            LiteLLM model string to call (unmetered models are returned as is)
+
+        Raises:
+            BudgetExceededError: total_limit reached or no model fits
+        """
+        return self._route(model, prompt_tokens, max_tokens, allow_downgrade, hold=False).model
+
+    def reserve(self, model: str, prompt_tokens: int, max_tokens: int, allow_downgrade: bool = True) -> BudgetHold:
+        """
+        Pick the model for a call and hold its worst-case cost until settle().
+
+        Args:
+            Same as route()
+
+        Returns:
+            BudgetHold whose .model is the LiteLLM model string to call
+
+        Raises:
+            BudgetExceededError: total_limit reached or no model fits
+        """
+        return self._route(model, prompt_tokens, max_tokens, allow_downgrade, hold=True)
+
+    def settle(self, hold: Optional[BudgetHold]) -> None:
+        """Release a hold (idempotent; record(hold=...) settles it too)."""
+        if hold is None:
+            return
+        with self._lock:
+            self._release(hold)
+
+    def _route(self, model: str, prompt_tokens: int, max_tokens: int,
+               allow_downgrade: bool, hold: bool) -> BudgetHold:
+        requested = self.resolve(model)
+        if requested is None:
+            # Not in cost_limits.yaml (e.g. the local default) - nothing to charge or downgrade
+            return BudgetHold(model, None, 0.0)
+        with self._lock:
+            today = self._today()
+            if self.total_limit and today["total_cost"] >= self.total_limit:
+                self.blocked += 1
+                raise BudgetExceededError(
+                    f"Daily LLM budget exhausted (${today['total_cost']:.2f} of ${self.total_limit:.2f})"
+                )
+
+            candidates = [requested]
+            if allow_downgrade:
+                requested_cost = self.cost(requested, prompt_tokens, max_tokens)
+                candidates += [
+                    key for key in self.chain
+                    if key != requested and key in self.models
+                    and self.cost(key, prompt_tokens, max_tokens) < requested_cost
+                ]
+
+            for key in candidates:
+                estimated_cost = self.cost(key, prompt_tokens, max_tokens)
+                if self._fits(today, key, estimated_cost):
+                    routed = model
+                    if key != requested:
+                        self.downgrades += 1
+                        routed = self.litellm_model(key)
+                        print(f"💸 [LLM BUDGET] Routing {model} → {routed} to stay within budget")
+                    if not hold:
+                        return BudgetHold(routed, key, 0.0)
+                    self._held[key] = self._held.get(key, 0.0) + estimated_cost
+                    self._held_total += estimated_cost
+                    return BudgetHold(routed, key, estimated_cost)
+
+            self.blocked += 1
+            raise BudgetExceededError(
+                f"No model in fallback chain fits today's budget "
+                f"(${today['total_cost']:.2f} of ${self.total_limit:.2f} spent)"
+            )
+
+    def _fits(self, today: Dict[str, Any], key: Optional[str], estimated_cost: float) -> bool:
+        if self.total_limit and today["total_cost"] + self._held_total + estimated_cost > self.total_limit:
+            return False
+        daily_limit = (self.models.get(key) or {}).get("daily_limit") if key else None
+        if daily_limit is not None:
+            spent = today["models"].get(key, {}).get("cost", 0.0) + self._held.get(key, 0.0)
+            if spent + estimated_cost > float(daily_limit):
+                return False
+        return True
+
+    def _release(self, hold: BudgetHold) -> None:
+        if hold.settled:
+            return
+        hold.settled = True
+        if hold.amount:
+            self._held[hold.key] = max(0.0, self._held.get(hold.key, 0.0) - hold.amount)
+            self._held_total = max(0.0, self._held_total - hold.amount)
+
+    # ===== accounting =====
+
+    def record(self, model: str, usage: Dict[str, Any], hold: Optional[BudgetHold] = None) -> float:
+        """
+        Add a response's usage to today's ledger; returns its cost in USD.
+
+        Args:
+            model: Model that answered (may differ from hold.model for hedges)
+            usage: prompt_tokens / completion_tokens
+            hold: Reservation from reserve(), replaced by the actual cost
+        """
+        prompt_tokens = usage.get("prompt_tokens", 0) or 0
+        completion_tokens = usage.get("completion_tokens", 0) or 0
+        if not prompt_tokens and not completion_tokens:
+            self.settle(hold)
+            return 0.0
+
+        key = self.resolve(model)
+        call_cost = self.cost(key, prompt_tokens, completion_tokens)
+        with self._lock:
+            if hold is not None:
+                self._release(hold)
+            today = self._today()
+            entry = today["models"].setdefault(key or model, {
+                "cost": 0.0, "prompt_tokens": 0, "completion_tokens": 0, "calls": 0
+            })
+            entry["cost"] += call_cost
+            entry["prompt_tokens"] += prompt_tokens
+            entry["completion_tokens"] += completion_tokens
+            entry["calls"] += 1
+            today["total_cost"] += call_cost
+            today["total_tokens"] += prompt_tokens + completion_tokens
+            self._save_ledger()
+
+            if self.alert_threshold and today["total_cost"] >= self.alert_threshold and not self._alerted:
+                self._alerted = True
+                print(f"⚠️  [LLM BUDGET] Daily spend ${today['total_cost']:.2f} passed alert threshold "
+                      f"${self.alert_threshold:.2f} (limit ${self.total_limit:.2f})")
+        return call_cost
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Today's spend, remaining budget and routing counters."""
+        with self._lock:
+            today = self._today()
+            return {
+                "date": date.today().isoformat(),
+                "total_cost": round(today["total_cost"], 6),
+                "total_tokens": today["total_tokens"],
+                "total_limit": self.total_limit,
+                "remaining": round(max(0.0, self.total_limit - today["total_cost"]), 6) if self.total_limit else None,
+                "models": {k: dict(v, cost=round(v["cost"], 6)) for k, v in today["models"].items()},
+                "reserved": round(self._held_total, 6),
+                "downgrades": self.downgrades,
+                "blocked": self.blocked
+            }
+
+    # ===== ledger =====
+
+    def _today(self) -> Dict[str, Any]:
+        day = date.today().isoformat()
+        if day not in self._ledger:
+            self._ledger[day] = {"total_cost": 0.0, "total_tokens": 0, "models": {}}
+            self._alerted = False
+            for old in sorted(self._ledger)[:-self.KEEP_DAYS]:
+                del self._ledger[old]
+        return self._ledger[day]
+
+    def _load_ledger(self) -> Dict[str, Any]:
+        if self.ledger_path and self.ledger_path.exists():
+            try:
+                with open(self.ledger_path) as f:
+                    return json.load(f)
+            except (OSError, json.JSONDecodeError) as e:
+                print(f"[LLM BUDGET] Warning: could not read ledger ({e}), starting fresh")
+        return {}
+
+    def _save_ledger(self) -> None:
+        if not self.ledger_path:
+            return
+        try:
+            self.ledger_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.ledger_path.with_suffix(".tmp")
+            with open(tmp, "w") as f:
+                json.dump(self._ledger, f, indent=2)
+            tmp.replace(self.ledger_path)
+        except OSError as e:
+            print(f"[LLM BUDGET] Warning: could not write ledger ({e})")
+
+
+# Shared so every adapter in the process draws from one budget
+_default_governor: Optional[BudgetGovernor] = None
+
+
+def get_budget_governor() -> BudgetGovernor:
+    """Return the process-wide budget governor (configured from LLMSettings)."""
+    global _default_governor
+    if _default_governor is None:
+        from config.llm_settings import settings
+        _default_governor = BudgetGovernor(
+            load_cost_limits(settings.COST_LIMITS_PATH),
+            ledger_path=settings.BUDGET_LEDGER_PATH or None
+        )
+    return _default_governor
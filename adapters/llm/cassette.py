@@ -0,0 +1,313 @@
+"""Record/replay LLM adapter for offline benchmarks and regression tests.
+
+CassetteLLM sits in front of a real adapter:
+- record: every call goes to the real LLM and the request/response pair
+  (content, usage, latency) is appended to a cassette file
+- replay: calls are answered from the cassette by request hash; no network.
+  A request that was never recorded raises CassetteMissError, which callers
+  treat like any other LLM failure (rule-based fallback)
+- auto: replay when recorded, otherwise record
+
+Recording bypasses the inner adapter's response cache so every entry is a
+real completion with its real latency.
+
+Requests are keyed like the response cache (system, prompt, temperature,
+max_tokens, tools - not the model, so a cassette recorded against Azure can
+be replayed by any adapter). Repeated identical requests replay their
+recordings in order. With simulate_latency the recorded latency is slept
+(scaled by latency_scale) so throughput benchmarks stay realistic.
+
+Cassettes are JSON lines, one interaction per line.
+
+Configured via config/llm_settings.py (LLM_CASSETTE_* env vars); see
+wrap_with_cassette().
+"""
+
+import asyncio
+import json
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Generator
+
+from adapters.llm.base import BaseLLM
+from adapters.llm.litellm_adapter import LLMResponse
+from adapters.llm.response_cache import make_cache_key
+
+CASSETTE_MODES = ("record", "replay", "auto")
+
+
+class CassetteMissError(KeyError):
+    """Replay requested for a request that is not on the cassette."""
+
+
+class Cassette:
+    """Interactions of one cassette file, indexed by request key."""
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._interactions: Dict[str, List[Dict[str, Any]]] = {}
+        self._play_index: Dict[str, int] = {}
+        if self.path.exists():
+            with open(self.path) as f:
+                for line in f:
+                    if line.strip():
+                        entry = json.loads(line)
+                        self._interactions.setdefault(entry["key"], []).append(entry)
+
+    def __len__(self) -> int:
+        return sum(len(entries) for entries in self._interactions.values())
+
+    def next_for(self, key: str) -> Optional[Dict[str, Any]]:
+        """Next recorded interaction for key (repeats the last one once exhausted)."""
+        with self._lock:
+            entries = self._interactions.get(key)
+            if not entries:
+                return None
+            index = self._play_index.get(key, 0)
+            self._play_index[key] = index + 1
+            return entries[min(index, len(entries) - 1)]
+
+    def append(self, entry: Dict[str, Any]) -> None:
+        """Add an interaction and persist it."""
+        with self._lock:
+            self._interactions.setdefault(entry["key"], []).append(entry)
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, "a") as f:
+                f.write(json.dumps(entry, default=str) + "\n")
+
+
+class CassetteLLM(BaseLLM):
+    """BaseLLM that records a real adapter's calls or replays them offline."""
+
+    def __init__(
+        self,
+        cassette: Cassette,
+        inner: Optional[BaseLLM] = None,
+        mode: str = "replay",
+        simulate_latency: bool = False,
+        latency_scale: float = 1.0
+    ):
+        """
+        Args:
+            cassette: Cassette to read/append
+            inner: Real LLM (required for record/auto)
+            mode: "record", "replay" or "auto"
+            simulate_latency: Sleep the recorded latency on replay
+            latency_scale: Multiplier for simulated latency (e.g. 0.1 = 10x faster)
+        """
+        if mode not in CASSETTE_MODES:
+            raise ValueError(f"Unknown cassette mode '{mode}' (use one of {CASSETTE_MODES})")
+        if mode != "replay" and inner is None:
+            raise ValueError(f"Cassette mode '{mode}' needs a real LLM to record from")
+        self.cassette = cassette
+        self.inner = inner
+        self.mode = mode
+        self.simulate_latency = simulate_latency
+        self.latency_scale = latency_scale
+        self.model = getattr(inner, "model", None) or "cassette"
+
+        self.hits = 0
+        self.misses = 0
+        self.recorded = 0
+        self.replayed_latency_ms = 0.0
+        self.simulated_latency_ms = 0.0
+
+    def generate(
+        self,
+        prompt: str,
+        system: Optional[str] = None,
+        max_tokens: int = 4096,
+        temperature: float = 0.7,
+        tools: Optional[List[Dict[str, Any]]] = None,
+        **kwargs
+    ) -> LLMResponse:
+        """Replay the recorded response, or call the real LLM and record it."""
+        key = make_cache_key("", system, prompt, temperature, max_tokens, tools)
+        entry = self._lookup(key)
+        if entry is not None:
+            self._sleep(entry)
+            return self._to_response(entry)
+
+        started = time.perf_counter()
+        # Record what the backend returns now, not a response-cache hit (its latency would be ~0)
+        response = self.inner.generate(prompt=prompt, system=system, max_tokens=max_tokens,
+                                       temperature=temperature, tools=tools, **dict(kwargs, use_cache=False))
+        self._record(key, prompt, response.content, getattr(response, "usage", None),
+                     getattr(response, "tool_calls", None), getattr(response, "stop_reason", None),
+                     getattr(response, "model", None), started)
+        return response
+
+    async def agenerate(
+        self,
+        prompt: str,
+        system: Optional[str] = None,
+        max_tokens: int = 4096,
+        temperature: float = 0.7,
+        tools: Optional[List[Dict[str, Any]]] = None,
+        **kwargs
+    ) -> LLMResponse:
+        """Async version of generate() (simulated latency doesn't block the loop)."""
+        key = make_cache_key("", system, prompt, temperature, max_tokens, tools)
+        entry = self._lookup(key)
+        if entry is not None:
+            delay = self._latency_seconds(entry)
+            if delay:
+                await asyncio.sleep(delay)
+            return self._to_response(entry)
+
+        started = time.perf_counter()
+        response = await self.inner.agenerate(prompt=prompt, system=system, max_tokens=max_tokens,
+                                              temperature=temperature, tools=tools, **dict(kwargs, use_cache=False))
+        self._record(key, prompt, response.content, getattr(response, "usage", None),
+                     getattr(response, "tool_calls", None), getattr(response, "stop_reason", None),
+                     getattr(response, "model", None), started)
+        return response
+
+    def stream(
+        self,
+        prompt: str,
+        system: Optional[str] = None,
+        max_tokens: int = 4096,
+        temperature: float = 0.7,
+        **kwargs
+    ) -> Generator[str, None, Dict[str, Any]]:
+        """Replay recorded text in chunks (latency spread across them), or record a live stream.
+        
+        Returns the recorded (or live) token usage once exhausted, like the inner stream.
+        """
+        key = make_cache_key("", system, prompt, temperature, max_tokens, None)
+        entry = self._lookup(key)
+        if entry is not None:
+            content = entry["response"]["content"] or ""
+            chunks = [content[i:i + 40] for i in range(0, len(content), 40)] or [""]
+            delay = self._latency_seconds(entry) / len(chunks)
+            for chunk in chunks:
+                if delay:
+                    time.sleep(delay)
+                yield chunk
+            return entry["response"].get("usage") or {}
+
+        started = time.perf_counter()
+        parts = []
+        deltas = self.inner.stream(prompt=prompt, system=system, max_tokens=max_tokens,
+                                   temperature=temperature, **dict(kwargs, use_cache=False))
+        while True:
+            try:
+                delta = next(deltas)
+            except StopIteration as done:
+                usage = done.value
+                break
+            parts.append(delta)
+            yield delta
+        self._record(key, prompt, "".join(parts), usage, None, "stop", None, started)
+        return usage or {}
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get hit/miss/record counts and latency saved or simulated."""
+        return {
+            "mode": self.mode,
+            "cassette": str(self.cassette.path),
+            "interactions": len(self.cassette),
+            "hits": self.hits,
+            "misses": self.misses,
+            "recorded": self.recorded,
+            "recorded_latency_replayed_ms": round(self.replayed_latency_ms, 1),
+            "simulated_latency_ms": round(self.simulated_latency_ms, 1)
+        }
+
+    # ===== internal =====
+
+    def _lookup(self, key: str) -> Optional[Dict[str, Any]]:
+        if self.mode == "record":
+            return None
+        entry = self.cassette.next_for(key)
+        if entry is not None:
+            self.hits += 1
+            self.replayed_latency_ms += entry.get("latency_ms", 0.0)
+            return entry
+        self.misses += 1
+        if self.mode == "replay":
+            raise CassetteMissError(f"No recorded response for request {key[:12]} in {self.cassette.path}")
+        return None
+
+    def _record(self, key, prompt, content, usage, tool_calls, stop_reason, model, started) -> None:
+        latency_ms = (time.perf_counter() - started) * 1000
+        self.cassette.append({
+            "key": key,
+            "prompt_preview": prompt[:200],
+            "response": {
+                "content": content,
+                "stop_reason": stop_reason,
+                "usage": usage or {},
+                "tool_calls": tool_calls or [],
+                "model": model or self.model
+            },
+            "latency_ms": round(latency_ms, 1),
+            "recorded_at": datetime.now().isoformat()
+        })
+        self.recorded += 1
+        print(f"📼 [CASSETTE] Recorded {key[:12]} ({latency_ms:.0f}ms)")
+
+    def _latency_seconds(self, entry: Dict[str, Any]) -> float:
+        if not self.simulate_latency:
+            return 0.0
+        seconds = entry.get("latency_ms", 0.0) / 1000 * self.latency_scale
+        self.simulated_latency_ms += seconds * 1000
+        return seconds
+
+    def _sleep(self, entry: Dict[str, Any]) -> None:
+        delay = self._latency_seconds(entry)
+        if delay:
+            time.sleep(delay)
+
+    @staticmethod
+    def _to_response(entry: Dict[str, Any]) -> LLMResponse:
+        recorded = entry["response"]
+        return LLMResponse(
+            content=recorded.get("content", ""),
+            stop_reason=recorded.get("stop_reason"),
+            usage=dict(recorded.get("usage") or {}),
+            tool_calls=list(recorded.get("tool_calls") or []),
+            model=recorded.get("model")
+        )
+
+
+# One Cassette per file so every wrapper in the process shares play order and writes
+_cassettes: Dict[str, Cassette] = {}
+_cassettes_lock = threading.Lock()
+
+
+def get_cassette(path: str) -> Cassette:
+    """Return the shared Cassette for a file."""
+    resolved = str(Path(path).resolve())
+    with _cassettes_lock:
+        if resolved not in _cassettes:
+            _cassettes[resolved] = Cassette(resolved)
+        return _cassettes[resolved]
+
+
+def wrap_with_cassette(llm: Optional[BaseLLM]) -> Optional[BaseLLM]:
+    """
+    Wrap llm in a CassetteLLM if LLM_CASSETTE_MODE is set.
+
+    In replay mode llm may be None (nothing is ever called). Returns llm
+    unchanged when cassettes are off.
+    """
+    from config.llm_settings import settings
+    mode = settings.CASSETTE_MODE
+    if mode not in CASSETTE_MODES or isinstance(llm, CassetteLLM):
+        return llm
+    if mode != "replay" and llm is None:
+        print(f"[CASSETTE] Warning: mode '{mode}' needs a real LLM - cassette disabled")
+        return llm
+    print(f"[CASSETTE] {mode.upper()} {settings.CASSETTE_PATH}")
+    return CassetteLLM(
+        get_cassette(settings.CASSETTE_PATH),
+        inner=llm,
+        mode=mode,
+        simulate_latency=settings.CASSETTE_SIMULATE_LATENCY,
+        latency_scale=settings.CASSETTE_LATENCY_SCALE
+    )
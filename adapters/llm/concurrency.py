@@ -0,0 +1,321 @@
+"""Request coalescing and per-model concurrency limits for LLM calls.
+
+SingleFlight: concurrent identical requests (same cache key) share one
+upstream call - the first caller runs it, the rest wait for its result.
+
+ModelLimiter: caps in-flight requests per model at the provider's rate
+limit. Callers over the cap queue FIFO (sync threads and async tasks share
+the same queue) and a released slot is handed directly to the next waiter.
+Queue depth and wait times are reported per model.
+
+Configured via config/llm_settings.py (LLM_SINGLE_FLIGHT_ENABLED,
+LLM_MAX_CONCURRENT_REQUESTS, LLM_MODEL_CONCURRENCY).
+"""
+
+import asyncio
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager, asynccontextmanager
+from typing import Dict, Any, Callable, Optional, Tuple
+
+
+class _Call:
+    """One in-flight upstream call that followers can wait on."""
+    __slots__ = ("event", "result", "error", "followers")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+        self.followers = 0
+
+
+class SingleFlight:
+    """Deduplicate concurrent calls with the same key."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[str, _Call] = {}
+        self._async_calls: Dict[Tuple[int, str], asyncio.Future] = {}
+        self.leaders = 0
+        self.coalesced = 0
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Tuple[Any, bool]:
+        """Run fn once per key among concurrent callers.
+
+        Returns:
+            (result, shared) - shared is True for callers that reused
+            another caller's in-flight result
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+                self.leaders += 1
+            else:
+                call.followers += 1
+                self.coalesced += 1
+
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = fn()
+            return call.result, False
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.event.set()
+
+    async def ado(self, key: str, coro_fn: Callable[[], Any]) -> Tuple[Any, bool]:
+        """Async version of do(); coalesces tasks on the same event loop."""
+        loop_key = (id(asyncio.get_running_loop()), key)
+        with self._lock:
+            future = self._async_calls.get(loop_key)
+            leader = future is None
+            if leader:
+                future = asyncio.get_running_loop().create_future()
+                self._async_calls[loop_key] = future
+                self.leaders += 1
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            return await asyncio.shield(future), True
+
+        try:
+            result = await coro_fn()
+            future.set_result(result)
+            return result, False
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            future.exception()  # Mark retrieved when nobody was waiting
+            raise
+        finally:
+            with self._lock:
+                self._async_calls.pop(loop_key, None)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get coalescing statistics."""
+        total = self.leaders + self.coalesced
+        return {
+            "upstream_calls": self.leaders,
+            "coalesced": self.coalesced,
+            "coalesce_rate": round(self.coalesced / total, 3) if total else 0.0,
+            "in_flight": len(self._calls) + len(self._async_calls)
+        }
+
+
+class _ModelState:
+    __slots__ = ("limit", "in_flight", "queue", "acquired", "queued",
+                 "max_queue_depth", "total_wait_ms", "max_wait_ms")
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.in_flight = 0
+        self.queue = deque()
+        self.acquired = 0
+        self.queued = 0
+        self.max_queue_depth = 0
+        self.total_wait_ms = 0.0
+        self.max_wait_ms = 0.0
+
+
+class _Waiter:
+    """Queued caller: a thread (event) or an async task (loop + future)."""
+    __slots__ = ("event", "loop", "future")
+
+    def __init__(self, event=None, loop=None, future=None):
+        self.event = event
+        self.loop = loop
+        self.future = future
+
+
+class ModelLimiter:
+    """Fair (FIFO) per-model cap on in-flight LLM requests."""
+
+    def __init__(self, default_limit: int = 8, limits: Optional[Dict[str, int]] = None):
+        """
+        Args:
+            default_limit: Max concurrent requests for models not in limits
+            limits: Per-model overrides {model: max_concurrent}
+        """
+        self.default_limit = max(1, default_limit)
+        self.limits = {model: max(1, n) for model, n in (limits or {}).items()}
+        self._lock = threading.Lock()
+        self._models: Dict[str, _ModelState] = {}
+
+    def limit_for(self, model: str) -> int:
+        return self.limits.get(model, self.default_limit)
+
+    def _state(self, model: str) -> _ModelState:
+        state = self._models.get(model)
+        if state is None:
+            state = _ModelState(self.limit_for(model))
+            self._models[model] = state
+        return state
+
+    def _try_acquire(self, state: _ModelState) -> bool:
+        # Never jump the queue, even if a slot is momentarily free
+        if state.in_flight < state.limit and not state.queue:
+            state.in_flight += 1
+            state.acquired += 1
+            return True
+        return False
+
+    def _enqueue(self, state: _ModelState, waiter: _Waiter) -> None:
+        state.queue.append(waiter)
+        state.queued += 1
+        state.max_queue_depth = max(state.max_queue_depth, len(state.queue))
+
+    def _record_wait(self, model: str, started: float) -> None:
+        waited_ms = (time.perf_counter() - started) * 1000
+        with self._lock:
+            state = self._state(model)
+            state.acquired += 1
+            state.total_wait_ms += waited_ms
+            state.max_wait_ms = max(state.max_wait_ms, waited_ms)
+
+    def acquire(self, model: str) -> None:
+        """Block until a slot for model is free."""
+        with self._lock:
+            state = self._state(model)
+            if self._try_acquire(state):
+                return
+            waiter = _Waiter(event=threading.Event())
+            self._enqueue(state, waiter)
+
+        started = time.perf_counter()
+        waiter.event.wait()  # Slot is handed over by release()
+        self._record_wait(model, started)
+
+    async def aacquire(self, model: str) -> None:
+        """Await a slot for model without blocking the event loop."""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            state = self._state(model)
+            if self._try_acquire(state):
+                return
+            waiter = _Waiter(loop=loop, future=loop.create_future())
+            self._enqueue(state, waiter)
+
+        started = time.perf_counter()
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            with self._lock:
+                try:
+                    state.queue.remove(waiter)
+                    granted = False
+                except ValueError:
+                    granted = True
+            if granted and waiter.future.done() and not waiter.future.cancelled():
+                self.release(model)
+            raise
+        self._record_wait(model, started)
+
+    def release(self, model: str) -> None:
+        """Free a slot; the longest-waiting caller gets it next."""
+        with self._lock:
+            state = self._state(model)
+            if not state.queue:
+                state.in_flight -= 1
+                return
+            waiter = state.queue.popleft()
+
+        # in_flight is unchanged: the slot moves to the waiter
+        if waiter.event is not None:
+            waiter.event.set()
+        else:
+            waiter.loop.call_soon_threadsafe(self._grant_async, model, waiter.future)
+
+    def _grant_async(self, model: str, future: asyncio.Future) -> None:
+        if future.done():
+            # Waiter was cancelled after being picked - pass the slot on
+            self.release(model)
+        else:
+            future.set_result(True)
+
+    @contextmanager
+    def slot(self, model: str):
+        self.acquire(model)
+        try:
+            yield
+        finally:
+            self.release(model)
+
+    @asynccontextmanager
+    async def aslot(self, model: str):
+        await self.aacquire(model)
+        try:
+            yield
+        finally:
+            self.release(model)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Per-model in-flight count, queue depth and wait times."""
+        with self._lock:
+            return {
+                model: {
+                    "limit": s.limit,
+                    "in_flight": s.in_flight,
+                    "queue_depth": len(s.queue),
+                    "max_queue_depth": s.max_queue_depth,
+                    "acquired": s.acquired,
+                    "queued": s.queued,
+                    "avg_wait_ms": round(s.total_wait_ms / s.queued, 1) if s.queued else 0.0,
+                    "max_wait_ms": round(s.max_wait_ms, 1)
+                }
+                for model, s in self._models.items()
+            }
+
+
+def parse_model_limits(spec: str) -> Dict[str, int]:
+    """Parse "model=n,model=n" into {model: n}."""
+    limits = {}
+    for item in (spec or "").split(","):
+        if "=" not in item:
+            continue
+        model, _, value = item.rpartition("=")
+        try:
+            limits[model.strip()] = int(value)
+        except ValueError:
+            print(f"[LLM LIMITER] Warning: ignoring invalid limit '{item}'")
+    return limits
+
+
+# Shared so every adapter instance in the process coalesces and queues together
+_single_flight: Optional[SingleFlight] = None
+_model_limiter: Optional[ModelLimiter] = None
+
+
+def get_single_flight() -> SingleFlight:
+    """Return the process-wide single-flight group."""
+    global _single_flight
+    if _single_flight is None:
+        _single_flight = SingleFlight()
+    return _single_flight
+
+
+def get_model_limiter() -> ModelLimiter:
+    """Return the process-wide per-model limiter (configured from LLMSettings)."""
+    global _model_limiter
+    if _model_limiter is None:
+        from config.llm_settings import settings
+        _model_limiter = ModelLimiter(
+            default_limit=settings.MAX_CONCURRENT_REQUESTS,
+            limits=parse_model_limits(settings.MODEL_CONCURRENCY_LIMITS)
+        )
+    return _model_limiter
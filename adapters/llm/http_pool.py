@@ -0,0 +1,138 @@
+"""Shared HTTP connection pools for LLM calls.
+
+Creating an OpenAI/Azure client per call pays TCP + TLS setup every time.
+These long-lived httpx clients keep connections alive so repeated and
+concurrent LLM calls reuse them:
+- get_http_client(): sync client (LiteLLM completion, OpenAI/Azure SDKs)
+- get_async_http_client(): async client, one per event loop (acompletion)
+- get_async_openai_client(): AsyncOpenAI on that pool, passed per call to
+  acompletion so concurrent calls never share a process-global session
+- get_azure_openai_client(): shared Azure OpenAI client on the sync pool
+
+Pool limits come from config/llm_settings.py (LLM_HTTP_* env vars).
+"""
+
+import asyncio
+import threading
+import weakref
+from typing import Optional
+
+try:
+    import httpx
+    HTTPX_AVAILABLE = True
+except ImportError:
+    HTTPX_AVAILABLE = False
+
+from config.llm_settings import settings
+
+_lock = threading.Lock()
+_sync_client = None
+# httpx.AsyncClient connections belong to the loop that opened them
+_async_clients: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+_async_openai_clients: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+_azure_clients = {}
+
+
+def _limits():
+    return httpx.Limits(
+        max_connections=settings.HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE,
+        keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY
+    )
+
+
+def _timeout():
+    return httpx.Timeout(settings.HTTP_TIMEOUT_SECONDS, connect=settings.CONNECTION_TIMEOUT)
+
+
+def get_http_client() -> Optional["httpx.Client"]:
+    """Return the process-wide keep-alive HTTP client (None if httpx missing)."""
+    global _sync_client
+    if not HTTPX_AVAILABLE:
+        return None
+    with _lock:
+        if _sync_client is None or _sync_client.is_closed:
+            _sync_client = httpx.Client(limits=_limits(), timeout=_timeout())
+        return _sync_client
+
+
+def get_async_http_client() -> Optional["httpx.AsyncClient"]:
+    """Return the keep-alive async HTTP client for the running event loop."""
+    if not HTTPX_AVAILABLE:
+        return None
+    loop = asyncio.get_running_loop()
+    with _lock:
+        client = _async_clients.get(loop)
+        if client is None or client.is_closed:
+            client = httpx.AsyncClient(limits=_limits(), timeout=_timeout())
+            _async_clients[loop] = client
+        return client
+
+
+def get_async_openai_client(api_base: Optional[str], api_key: str):
+    """Return an AsyncOpenAI client for the running loop's pool (None if httpx missing).
+
+    One client per loop and endpoint/key; pass it to acompletion(client=...).
+    """
+    http_client = get_async_http_client()
+    if http_client is None:
+        return None
+    loop = asyncio.get_running_loop()
+    key = (api_base, api_key)
+    with _lock:
+        clients = _async_openai_clients.setdefault(loop, {})
+        client = clients.get(key)
+        if client is not None and client._client is http_client:
+            return client
+
+    from openai import AsyncOpenAI
+    client = AsyncOpenAI(base_url=api_base, api_key=api_key, http_client=http_client)
+    with _lock:
+        clients[key] = client
+        return client
+
+
+def get_azure_openai_client(azure_endpoint: str, api_key: str, api_version: str = "2024-02-01"):
+    """Return a shared (Langfuse-wrapped if available) Azure OpenAI client.
+
+    One client per endpoint/key/version, all using the pooled HTTP client.
+    """
+    key = (azure_endpoint, api_key, api_version)
+    with _lock:
+        client = _azure_clients.get(key)
+    if client is not None:
+        return client
+
+    try:
+        from langfuse.openai import AzureOpenAI
+    except ImportError:
+        from openai import AzureOpenAI
+
+    client = AzureOpenAI(
+        azure_endpoint=azure_endpoint,
+        api_key=api_key,
+        api_version=api_version,
+        http_client=get_http_client()
+    )
+    with _lock:
+        return _azure_clients.setdefault(key, client)
+
+
+async def aclose_async_http_client() -> None:
+    """Close the running loop's async client (call on app shutdown)."""
+    loop = asyncio.get_running_loop()
+    with _lock:
+        client = _async_clients.pop(loop, None)
+        _async_openai_clients.pop(loop, None)
+    if client is not None:
+        await client.aclose()
+
+
+def close_http_clients() -> None:
+    """Close the sync pool and drop shared SDK clients."""
+    global _sync_client
+    with _lock:
+        if _sync_client is not None:
+            _sync_client.close()
+            _sync_client = None
+        _azure_clients.clear()
@@ -0,0 +1,116 @@
+"""Incremental JSON parsing of streamed LLM output.
+
+StreamingArrayParser watches a streamed JSON document for one array (e.g.
+"assignments") and returns each object element as soon as its closing brace
+arrives, so callers can act on element 1 while element 2 is still being
+generated:
+
+    parser = StreamingArrayParser("assignments")
+    for delta in llm.stream(prompt):
+        for assignment in parser.feed(delta):
+            execute(assignment)
+    document = parser.finish()   # full JSON, or None if truncated/invalid
+
+A truncated or malformed tail only loses the element that was still open;
+everything emitted before it is kept (parser.items).
+"""
+
+import json
+import re
+from typing import Dict, Any, List, Optional
+
+
+class StreamingArrayParser:
+    """Emit completed objects of a named JSON array from streamed text."""
+
+    def __init__(self, key: str):
+        """
+        Args:
+            key: Name of the array to watch (first occurrence in the document)
+        """
+        self.key = key
+        self.items: List[Dict[str, Any]] = []
+        self.errors = 0           # Elements that closed but were not valid JSON
+        self.array_closed = False
+
+        self._key_pattern = re.compile(r'"' + re.escape(key) + r'"\s*:\s*\[')
+        self._text = ""
+        self._pos = 0             # Next character to scan
+        self._in_array = False
+        self._element_start = None
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+
+    def feed(self, delta: str) -> List[Dict[str, Any]]:
+        """Add streamed text; returns elements completed by it (may be empty)."""
+        self._text += delta
+        completed = []
+
+        if not self._in_array and not self.array_closed:
+            match = self._key_pattern.search(self._text, self._pos)
+            if not match:
+                # Keep scanning from near the end (the key may be split across deltas)
+                self._pos = max(self._pos, len(self._text) - len(self.key) - 8)
+                return completed
+            self._in_array = True
+            self._pos = match.end()
+
+        while self._in_array and self._pos < len(self._text):
+            char = self._text[self._pos]
+            if self._element_start is None:
+                if char == "{":
+                    self._element_start = self._pos
+                    self._depth = 1
+                elif char == "]":
+                    self._in_array = False
+                    self.array_closed = True
+            elif self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char in "{[":
+                self._depth += 1
+            elif char in "}]":
+                self._depth -= 1
+                if self._depth == 0:
+                    element = self._text[self._element_start:self._pos + 1]
+                    self._element_start = None
+                    try:
+                        item = json.loads(element)
+                        self.items.append(item)
+                        completed.append(item)
+                    except json.JSONDecodeError:
+                        self.errors += 1
+            self._pos += 1
+
+        return completed
+
+    def finish(self) -> Optional[Dict[str, Any]]:
+        """
+        End of stream.
+
+        Returns:
+            The whole document if it is valid JSON (code fences and text around
+            the outer object are ignored), else None; completed elements stay
+            available in self.items either way.
+        """
+        text = self._text.strip()
+        start, end = text.find("{"), text.rfind("}")
+        if start == -1 or end <= start:
+            return None
+        try:
+            document = json.loads(text[start:end + 1])
+        except json.JSONDecodeError:
+            return None
+        return document if isinstance(document, dict) else None
+
+    @property
+    def truncated(self) -> bool:
+        """True if the array was opened but never closed."""
+        return self._element_start is not None or (self._in_array and not self.array_closed)
@@ -1,11 +1,13 @@
 """LiteLLM adapter with optional LangFuse integration for observability."""
 
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple, Generator, AsyncIterator
+import asyncio
 import os
 
 # Try to import LiteLLM components
 try:
-    from litellm import completion
+    import litellm
+    from litellm import completion, acompletion
     LITELLM_AVAILABLE = True
 except ImportError:
     LITELLM_AVAILABLE = False
@@ -25,15 +27,25 @@ except ImportError:
         return decorator if args and callable(args[0]) else decorator
 
 from adapters.llm.base import BaseLLM
+from adapters.llm.budget import BudgetGovernor, BudgetHold, estimate_tokens, get_budget_governor
+from adapters.llm.concurrency import SingleFlight, ModelLimiter, get_single_flight, get_model_limiter
+from adapters.llm.http_pool import get_http_client, get_async_openai_client
+from adapters.llm.resilience import ResilientCaller, get_resilient_caller
+from adapters.llm.response_cache import ResponseCache, make_cache_key, get_response_cache
+from config.llm_settings import settings as llm_settings
 
 
 class LLMResponse:
     """Simple response object."""
-    def __init__(self, content: str, stop_reason: str = None, usage: dict = None, tool_calls: list = None):
+    def __init__(self, content: str, stop_reason: str = None, usage: dict = None, tool_calls: list = None,
+                 cached: bool = False, coalesced: bool = False, model: str = None):
         self.content = content
         self.stop_reason = stop_reason
         self.usage = usage or {}
         self.tool_calls = tool_calls or []
+        self.cached = cached
+        self.coalesced = coalesced
+        self.model = model
 
 
 class LiteLLMAdapter(BaseLLM):
@@ -45,6 +57,12 @@ class LiteLLMAdapter(BaseLLM):
     - Automatic fallbacks and retries
     - LangFuse tracing and prompt management
     - Cost tracking across providers
+    - Response cache for identical low-temperature requests
+    - Sync and async generation over a shared keep-alive connection pool
+    - Coalescing of identical in-flight requests and per-model concurrency caps
+    - Daily budget enforcement with downgrade along the fallback chain
+    - Streaming (stream/astream) for token-by-token output
+    - Per-call deadlines, backoff retries, optional hedging and circuit breaking
     """
     
     def __init__(
@@ -53,7 +71,12 @@ class LiteLLMAdapter(BaseLLM):
         api_base: str = None,
         api_key: str = None,
         config_path: Optional[str] = None,
-        enable_langfuse: bool = False
+        enable_langfuse: bool = False,
+        response_cache: Optional[ResponseCache] = None,
+        single_flight: Optional[SingleFlight] = None,
+        limiter: Optional[ModelLimiter] = None,
+        budget: Optional[BudgetGovernor] = None,
+        resilience: Optional[ResilientCaller] = None
     ):
         """
         Initialize LiteLLM adapter.
@@ -64,6 +87,14 @@ class LiteLLMAdapter(BaseLLM):
             api_key: API key for authentication
             config_path: Path to litellm_config.yaml (optional)
             enable_langfuse: Enable LangFuse tracing (requires langfuse package)
+            response_cache: Response cache (default: shared cache if
+                LLM_RESPONSE_CACHE_ENABLED)
+            single_flight: Coalescing group (default: shared if
+                LLM_SINGLE_FLIGHT_ENABLED)
+            limiter: Per-model concurrency limiter (default: shared)
+            budget: Budget governor (default: shared if LLM_BUDGET_ENABLED)
+            resilience: Deadline/retry/hedge/circuit policy (default: shared,
+                configured from LLMSettings)
         """
         if not LITELLM_AVAILABLE:
             raise ImportError("litellm package not installed. Run: pip install litellm")
@@ -83,6 +114,29 @@ class LiteLLMAdapter(BaseLLM):
         else:
             self.langfuse = None
         
+        # Response cache (shared across adapters unless one is passed in)
+        if response_cache is None and llm_settings.RESPONSE_CACHE_ENABLED:
+            response_cache = get_response_cache()
+        self.response_cache = response_cache
+        
+        # Request coalescing + per-model concurrency cap (shared process-wide)
+        if single_flight is None and llm_settings.SINGLE_FLIGHT_ENABLED:
+            single_flight = get_single_flight()
+        self.single_flight = single_flight
+        self.limiter = limiter or get_model_limiter()
+        
+        # Daily token budget (cost_limits.yaml); may route to cheaper models
+        if budget is None and llm_settings.BUDGET_ENABLED:
+            budget = get_budget_governor()
+        self.budget = budget
+        
+        # Timeouts, retries, hedging and circuit breaker (shared breaker state)
+        self.resilience = resilience or get_resilient_caller()
+        
+        # Reuse keep-alive connections across calls and adapter instances
+        if litellm.client_session is None:
+            litellm.client_session = get_http_client()
+        
         # Initialize LiteLLM Router (if config provided)
         self.router = None
         if config_path:
@@ -112,11 +166,405 @@ class LiteLLMAdapter(BaseLLM):
             max_tokens: Maximum tokens to generate
             temperature: Sampling temperature
             metadata: Additional metadata for LangFuse (e.g., user_id, session_id)
+            use_cache: Set False to force a fresh completion (default True)
+            timeout: Per-attempt timeout in seconds (default LLM_REQUEST_TIMEOUT)
         
         Returns:
             LLMResponse with content and optional tool calls
+        
+        Raises:
+            CircuitOpenError: Backend marked unhealthy (callers use their rule-based path)
+            DeadlineExceededError: No attempt succeeded within LLM_CALL_DEADLINE
+        """
+        cache_key, cached = self._lookup_cache(prompt, system, tools, max_tokens, temperature, kwargs)
+        if cached is not None:
+            return cached
+        
+        model, hold = self._route_model(prompt, system, max_tokens)
+        completion_kwargs = self._build_completion_kwargs(model, prompt, system, tools, max_tokens, temperature, metadata)
+        
+        def attempt(target: str, timeout: float) -> LLMResponse:
+            attempt_kwargs = self._attempt_kwargs(completion_kwargs, target, timeout)
+            # Wait for a free slot under this model's concurrency cap
+            with self.limiter.slot(target):
+                try:
+                    print(f"🚀 [LLM CALL] Making request to {target}...")
+                    if self.router:
+                        # Use router for fallbacks
+                        response = self.router.completion(**attempt_kwargs)
+                    else:
+                        # Direct completion
+                        response = completion(**attempt_kwargs)
+                except Exception as e:
+                    self._record_error(e)
+                    raise
+            return self._parse_response(response, cache_key, target, hold)
+        
+        def call() -> LLMResponse:
+            return self.resilience.call(model, attempt, timeout=kwargs.get("timeout"))
+        
+        try:
+            flight_key = self._flight_key(cache_key, prompt, system, tools, max_tokens, temperature)
+            if flight_key is None:
+                return call()
+            result, shared = self.single_flight.do(flight_key, call)
+            return self._coalesced_response(result) if shared else result
+        finally:
+            self._settle(hold)
+    
+    def generate_with_tools(
+        self,
+        messages: List[Dict[str, Any]],
+        tools: List[Dict[str, Any]],
+        max_tokens: int = 4096,
+        temperature: float = 0.7,
+        **kwargs
+    ) -> LLMResponse:
+        """
+        One turn of a multi-message tool-calling conversation.
+        
+        Budget routing, the concurrency cap and retries/circuit breaker apply
+        as in generate(); the response cache does not (every turn differs).
+        
+        Args:
+            messages: OpenAI-style conversation (system/user/assistant/tool)
+            tools: OpenAI-style tool definitions
+            max_tokens: Maximum tokens to generate
+            temperature: Sampling temperature
+            timeout: Per-attempt timeout in seconds (default LLM_REQUEST_TIMEOUT)
+        
+        Returns:
+            LLMResponse whose tool_calls are in OpenAI message format
+            ({"id", "type", "function": {"name", "arguments"}}) so they can be
+            appended to messages as-is
         """
-        # Build messages
+        conversation = "\n".join(str(m.get("content") or "") for m in messages)
+        model, hold = self._route_model(conversation, None, max_tokens)
+        completion_kwargs = {
+            "model": model,
+            "messages": messages,
+            "tools": tools,
+            "max_tokens": max_tokens,
+            "temperature": temperature,
+        }
+        if self.api_base:
+            completion_kwargs["api_base"] = self.api_base
+        if self.api_key:
+            completion_kwargs["api_key"] = self.api_key
+        print(f"🤖 [LLM CALL] Model: {model} ({len(messages)} messages, {len(tools)} tools)")
+        
+        def attempt(target: str, timeout: float) -> LLMResponse:
+            attempt_kwargs = self._attempt_kwargs(completion_kwargs, target, timeout)
+            with self.limiter.slot(target):
+                try:
+                    print(f"🚀 [LLM CALL] Making tool-calling request to {target}...")
+                    if self.router:
+                        response = self.router.completion(**attempt_kwargs)
+                    else:
+                        response = completion(**attempt_kwargs)
+                except Exception as e:
+                    self._record_error(e)
+                    raise
+            return self._parse_response(response, None, target, hold)
+        
+        try:
+            response = self.resilience.call(model, attempt, timeout=kwargs.get("timeout"))
+        finally:
+            self._settle(hold)
+        response.tool_calls = [
+            {"id": tc["id"], "type": "function",
+             "function": {"name": tc["name"], "arguments": tc["arguments"]}}
+            for tc in response.tool_calls
+        ]
+        return response
+    
+    async def agenerate(
+        self,
+        prompt: str,
+        system: Optional[str] = None,
+        tools: Optional[List[Dict[str, Any]]] = None,
+        max_tokens: int = 4096,
+        temperature: float = 0.7,
+        metadata: Optional[Dict[str, Any]] = None,
+        **kwargs
+    ) -> LLMResponse:
+        """
+        Async version of generate() using litellm.acompletion.
+        
+        Connections come from a keep-alive pool shared by every adapter on
+        the running event loop, so many calls can be awaited concurrently
+        (e.g. asyncio.gather) without per-call TLS setup.
+        
+        Args:
+            Same as generate()
+        
+        Returns:
+            LLMResponse with content and optional tool calls
+        """
+        cache_key, cached = self._lookup_cache(prompt, system, tools, max_tokens, temperature, kwargs)
+        if cached is not None:
+            return cached
+        
+        model, hold = self._route_model(prompt, system, max_tokens)
+        completion_kwargs = self._build_completion_kwargs(model, prompt, system, tools, max_tokens, temperature, metadata)
+        
+        async def attempt(target: str, timeout: float) -> LLMResponse:
+            attempt_kwargs = self._attempt_kwargs(completion_kwargs, target, timeout)
+            async with self.limiter.aslot(target):
+                try:
+                    print(f"🚀 [LLM CALL] Making async request to {target}...")
+                    if self.router:
+                        response = await self.router.acompletion(**attempt_kwargs)
+                    else:
+                        response = await acompletion(**self._with_async_client(attempt_kwargs))
+                except Exception as e:
+                    self._record_error(e)
+                    raise
+            return self._parse_response(response, cache_key, target, hold)
+        
+        async def call() -> LLMResponse:
+            return await self.resilience.acall(model, attempt, timeout=kwargs.get("timeout"))
+        
+        try:
+            flight_key = self._flight_key(cache_key, prompt, system, tools, max_tokens, temperature)
+            if flight_key is None:
+                return await call()
+            result, shared = await self.single_flight.ado(flight_key, call)
+            return self._coalesced_response(result) if shared else result
+        finally:
+            self._settle(hold)
+    
+    def stream(
+        self,
+        prompt: str,
+        system: Optional[str] = None,
+        max_tokens: int = 4096,
+        temperature: float = 0.7,
+        metadata: Optional[Dict[str, Any]] = None,
+        **kwargs
+    ) -> Generator[str, None, Dict[str, Any]]:
+        """
+        Stream a completion, yielding text deltas as they arrive.
+        
+        Budget, concurrency cap and response cache apply as in generate();
+        a cache hit yields the stored text in one chunk.
+        
+        Args:
+            Same as generate() (tools are not supported when streaming)
+        
+        Yields:
+            Text deltas
+        
+        Returns:
+            Token usage, as in LLMResponse.usage (StopIteration.value once exhausted)
+        """
+        cache_key, cached = self._lookup_cache(prompt, system, None, max_tokens, temperature, kwargs)
+        if cached is not None:
+            yield cached.content
+            return cached.usage
+        
+        routed, hold = self._route_model(prompt, system, max_tokens)
+        try:
+            # Streams aren't retried (deltas are already out); the breaker still applies
+            model = self.resilience.check_circuit(routed)
+            completion_kwargs = self._build_completion_kwargs(routed, prompt, system, None, max_tokens, temperature, metadata)
+            completion_kwargs = self._attempt_kwargs(completion_kwargs, model,
+                                                     kwargs.get("timeout") or self.resilience.request_timeout)
+            completion_kwargs["stream"] = True
+            
+            parts = []
+            usage = {}
+            with self.limiter.slot(model):
+                try:
+                    print(f"🚀 [LLM STREAM] Streaming from {model}...")
+                    if self.router:
+                        response = self.router.completion(**completion_kwargs)
+                    else:
+                        response = completion(**completion_kwargs)
+                    for chunk in response:
+                        delta = self._chunk_text(chunk)
+                        if delta:
+                            parts.append(delta)
+                            yield delta
+                        usage = self._chunk_usage(chunk) or usage
+                except GeneratorExit:
+                    self.resilience.breaker(model).release_trial()
+                    raise
+                except Exception as e:
+                    self._record_error(e)
+                    self.resilience.record(model, e)
+                    raise
+            self.resilience.record(model)
+            return self._finish_stream(model, prompt, system, "".join(parts), usage, cache_key, hold)
+        finally:
+            self._settle(hold)
+    
+    async def astream(
+        self,
+        prompt: str,
+        system: Optional[str] = None,
+        max_tokens: int = 4096,
+        temperature: float = 0.7,
+        metadata: Optional[Dict[str, Any]] = None,
+        **kwargs
+    ) -> AsyncIterator[str]:
+        """Async version of stream() using litellm.acompletion."""
+        cache_key, cached = self._lookup_cache(prompt, system, None, max_tokens, temperature, kwargs)
+        if cached is not None:
+            yield cached.content
+            return
+        
+        routed, hold = self._route_model(prompt, system, max_tokens)
+        try:
+            model = self.resilience.check_circuit(routed)
+            completion_kwargs = self._build_completion_kwargs(routed, prompt, system, None, max_tokens, temperature, metadata)
+            completion_kwargs = self._attempt_kwargs(completion_kwargs, model,
+                                                     kwargs.get("timeout") or self.resilience.request_timeout)
+            completion_kwargs["stream"] = True
+            
+            parts = []
+            usage = {}
+            async with self.limiter.aslot(model):
+                try:
+                    print(f"🚀 [LLM STREAM] Streaming async from {model}...")
+                    if self.router:
+                        response = await self.router.acompletion(**completion_kwargs)
+                    else:
+                        response = await acompletion(**self._with_async_client(completion_kwargs))
+                    async for chunk in response:
+                        delta = self._chunk_text(chunk)
+                        if delta:
+                            parts.append(delta)
+                            yield delta
+                        usage = self._chunk_usage(chunk) or usage
+                except (GeneratorExit, asyncio.CancelledError):
+                    self.resilience.breaker(model).release_trial()
+                    raise
+                except Exception as e:
+                    self._record_error(e)
+                    self.resilience.record(model, e)
+                    raise
+            self.resilience.record(model)
+            self._finish_stream(model, prompt, system, "".join(parts), usage, cache_key, hold)
+        finally:
+            self._settle(hold)
+    
+    @staticmethod
+    def _chunk_text(chunk) -> str:
+        choices = getattr(chunk, "choices", None)
+        if not choices:
+            return ""
+        delta = getattr(choices[0], "delta", None)
+        return (getattr(delta, "content", None) or "") if delta else ""
+    
+    @staticmethod
+    def _chunk_usage(chunk) -> Dict[str, Any]:
+        usage = getattr(chunk, "usage", None)
+        if not usage or not getattr(usage, "total_tokens", None):
+            return {}
+        return {
+            "prompt_tokens": usage.prompt_tokens,
+            "completion_tokens": usage.completion_tokens,
+            "total_tokens": usage.total_tokens
+        }
+    
+    def _finish_stream(self, model, prompt, system, content, usage, cache_key, hold=None) -> Dict[str, Any]:
+        """Charge the budget and cache a completed stream; returns its usage."""
+        if not usage:
+            # Provider sent no usage chunk - estimate from text
+            prompt_tokens = estimate_tokens(prompt) + estimate_tokens(system)
+            completion_tokens = estimate_tokens(content)
+            usage = {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                     "total_tokens": prompt_tokens + completion_tokens}
+        print(f"🏁 [LLM STREAM] Completed: {len(content)} chars, {usage['total_tokens']} tokens")
+        if self.budget is not None:
+            usage["cost_usd"] = round(self.budget.record(model, usage, hold), 6)
+        if cache_key and content and model == self.model:
+            self.response_cache.put(cache_key, {
+                "content": content, "stop_reason": "stop", "usage": usage, "tool_calls": []
+            })
+        return usage
+    
+    def _lookup_cache(self, prompt, system, tools, max_tokens, temperature, kwargs):
+        """Return (cache_key, cached LLMResponse or None)."""
+        # Serve identical low-temperature requests from the cache
+        if self.response_cache is None or not kwargs.pop("use_cache", True):
+            return None, None
+        if self.response_cache.should_bypass(temperature):
+            self.response_cache.bypassed += 1
+            return None, None
+        
+        cache_key = make_cache_key(self.model, system, prompt, temperature, max_tokens, tools, self.api_base)
+        cached = self.response_cache.get(cache_key)
+        if cached is None:
+            return cache_key, None
+        
+        saved = cached.get("usage", {}).get("total_tokens", 0)
+        print(f"💾 [LLM CACHE] Hit for {self.model} ({saved} tokens saved)")
+        return cache_key, LLMResponse(
+            content=cached.get("content", ""),
+            stop_reason=cached.get("stop_reason"),
+            # Nothing was spent on this call
+            usage={"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0,
+                   "cached_total_tokens": saved},
+            tool_calls=cached.get("tool_calls", []),
+            cached=True
+        )
+    
+    def _route_model(self, prompt: str, system: Optional[str], max_tokens: int) -> Tuple[str, Optional[BudgetHold]]:
+        """
+        Model to call under today's budget, and the hold on its worst-case cost.
+        
+        The hold is settled when the response is charged (or by _settle() if the
+        call fails), so concurrent calls can't all spend the same headroom.
+        
+        Raises:
+            BudgetExceededError: No model fits today's budget
+        """
+        if self.budget is None:
+            return self.model, None
+        hold = self.budget.reserve(
+            self.model,
+            estimate_tokens(prompt) + estimate_tokens(system),
+            max_tokens,
+            # Router model names are aliases; only enforce the hard stop there
+            allow_downgrade=self.router is None
+        )
+        return hold.model, hold
+    
+    def _settle(self, hold: Optional[BudgetHold]) -> None:
+        """Release a budget hold the response didn't settle (failed/cancelled call)."""
+        if self.budget is not None:
+            self.budget.settle(hold)
+    
+    def _flight_key(self, cache_key, prompt, system, tools, max_tokens, temperature) -> Optional[str]:
+        """Key for coalescing identical in-flight requests (None = don't coalesce)."""
+        if self.single_flight is None:
+            return None
+        if cache_key:
+            return cache_key
+        # High-temperature callers expect distinct outputs
+        if temperature > llm_settings.RESPONSE_CACHE_MAX_TEMPERATURE:
+            return None
+        return make_cache_key(self.model, system, prompt, temperature, max_tokens, tools, self.api_base)
+    
+    def _coalesced_response(self, shared: LLMResponse) -> LLMResponse:
+        """Copy of another caller's response; no tokens were spent on this one."""
+        saved = shared.usage.get("total_tokens", 0) or shared.usage.get("cached_total_tokens", 0)
+        print(f"🔗 [LLM COALESCE] Reused in-flight response for {self.model} ({saved} tokens saved)")
+        return LLMResponse(
+            content=shared.content,
+            stop_reason=shared.stop_reason,
+            usage={"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0,
+                   "coalesced_total_tokens": saved},
+            tool_calls=list(shared.tool_calls),
+            cached=shared.cached,
+            coalesced=True,
+            model=shared.model
+        )
+    
+    def _build_completion_kwargs(self, model, prompt, system, tools, max_tokens, temperature, metadata) -> Dict[str, Any]:
+        """Build messages + kwargs for completion()/acompletion()."""
         messages = []
         if system:
             messages.append({"role": "system", "content": system})
@@ -134,89 +582,126 @@ class LiteLLMAdapter(BaseLLM):
             except:
                 pass  # Ignore LangFuse errors
         
+        completion_kwargs = {
+            "model": model,
+            "messages": messages,
+            "max_tokens": max_tokens,
+            "temperature": temperature,
+        }
+        
+        # Log LLM call details
+        print(f"🤖 [LLM CALL] Model: {model}")
+        print(f"🤖 [LLM CALL] API Base: {self.api_base}")
+        print(f"🤖 [LLM CALL] Messages: {len(messages)} messages")
+        print(f"🤖 [LLM CALL] Prompt length: {len(messages[-1]['content']) if messages else 0} chars")
+        print(f"🤖 [LLM CALL] Temperature: {temperature}")
+        print(f"🤖 [LLM CALL] Max tokens: {max_tokens}")
+        
+        # Add API base and key if provided
+        if self.api_base:
+            completion_kwargs["api_base"] = self.api_base
+        if self.api_key:
+            completion_kwargs["api_key"] = self.api_key
+        
+        # Add tools if provided
+        if tools:
+            completion_kwargs["tools"] = tools
+        
+        return completion_kwargs
+    
+    def _attempt_kwargs(self, completion_kwargs: Dict[str, Any], target: str, timeout: float) -> Dict[str, Any]:
+        """completion() kwargs for one attempt against target (configured, budget-routed or hedge model)."""
+        attempt_kwargs = dict(completion_kwargs, model=target, timeout=timeout)
+        if target != self.model:
+            # api_base/api_key belong to the configured model; any other model's
+            # endpoint and key come from LiteLLM's env config
+            attempt_kwargs.pop("api_base", None)
+            attempt_kwargs.pop("api_key", None)
+        return attempt_kwargs
+    
+    @staticmethod
+    def _with_async_client(completion_kwargs: Dict[str, Any]) -> Dict[str, Any]:
+        """acompletion() kwargs with this loop's pooled client for OpenAI-compatible targets.
+        
+        The client goes with the call rather than through litellm.aclient_session,
+        which is process-global and would race between concurrent calls. Other
+        providers (or calls without an explicit key) use LiteLLM's own clients.
+        """
+        api_key = completion_kwargs.get("api_key")
+        if not api_key:
+            return completion_kwargs
         try:
-            # Build kwargs for completion call
-            completion_kwargs = {
-                "model": self.model,
-                "messages": messages,
-                "max_tokens": max_tokens,
-                "temperature": temperature,
+            _, provider, _, _ = litellm.get_llm_provider(completion_kwargs["model"],
+                                                         api_base=completion_kwargs.get("api_base"))
+        except Exception:
+            return completion_kwargs
+        if provider != "openai":
+            return completion_kwargs
+        client = get_async_openai_client(completion_kwargs.get("api_base"), api_key)
+        return dict(completion_kwargs, client=client) if client is not None else completion_kwargs
+    
+    def _parse_response(self, response, cache_key: Optional[str], model: str,
+                        hold: Optional[BudgetHold] = None) -> LLMResponse:
+        """Convert a LiteLLM response to LLMResponse (cache it, charge the budget)."""
+        print(f"✅ [LLM RESPONSE] Received response from {model}")
+        
+        # Extract content and tool calls
+        message = response.choices[0].message
+        content = message.content or ""
+        
+        # Parse tool calls if present
+        tool_calls = []
+        if hasattr(message, "tool_calls") and message.tool_calls:
+            for tc in message.tool_calls:
+                tool_calls.append({
+                    "id": tc.id,
+                    "name": tc.function.name,
+                    "arguments": tc.function.arguments
+                })
+        
+        # Extract usage
+        usage = {}
+        if hasattr(response, "usage"):
+            usage = {
+                "prompt_tokens": response.usage.prompt_tokens,
+                "completion_tokens": response.usage.completion_tokens,
+                "total_tokens": response.usage.total_tokens
             }
-            
-            # Log LLM call details
-            print(f"🤖 [LLM CALL] Model: {self.model}")
-            print(f"🤖 [LLM CALL] API Base: {self.api_base}")
-            print(f"🤖 [LLM CALL] Messages: {len(messages)} messages")
-            print(f"🤖 [LLM CALL] Prompt length: {len(messages[-1]['content']) if messages else 0} chars")
-            print(f"🤖 [LLM CALL] Temperature: {temperature}")
-            print(f"🤖 [LLM CALL] Max tokens: {max_tokens}")
-            
-            # Add API base and key if provided
-            if self.api_base:
-                completion_kwargs["api_base"] = self.api_base
-            if self.api_key:
-                completion_kwargs["api_key"] = self.api_key
-            
-            # Add tools if provided
-            if tools:
-                completion_kwargs["tools"] = tools
-            
-            # Call LiteLLM
-            print(f"🚀 [LLM CALL] Making request to {self.model}...")
-            if self.router:
-                # Use router for fallbacks
-                response = self.router.completion(**completion_kwargs)
-            else:
-                # Direct completion
-                response = completion(**completion_kwargs)
-            
-            print(f"✅ [LLM RESPONSE] Received response from {self.model}")
-            
-            # Extract content and tool calls
-            message = response.choices[0].message
-            content = message.content or ""
-            
-            # Parse tool calls if present
-            tool_calls = []
-            if hasattr(message, "tool_calls") and message.tool_calls:
-                for tc in message.tool_calls:
-                    tool_calls.append({
-                        "id": tc.id,
-                        "name": tc.function.name,
-                        "arguments": tc.function.arguments
-                    })
-            
-            # Extract usage
-            usage = {}
-            if hasattr(response, "usage"):
-                usage = {
-                    "prompt_tokens": response.usage.prompt_tokens,
-                    "completion_tokens": response.usage.completion_tokens,
-                    "total_tokens": response.usage.total_tokens
-                }
-                print(f"📊 [LLM USAGE] Tokens: {usage['prompt_tokens']} + {usage['completion_tokens']} = {usage['total_tokens']}")
-            
-            print(f"📝 [LLM CONTENT] Response length: {len(content)} chars")
-            print(f"🏁 [LLM CALL] Completed successfully")
-            
-            return LLMResponse(
-                content=content,
-                tool_calls=tool_calls,
-                stop_reason=response.choices[0].finish_reason,
-                usage=usage
-            )
+            print(f"📊 [LLM USAGE] Tokens: {usage['prompt_tokens']} + {usage['completion_tokens']} = {usage['total_tokens']}")
+            if self.budget is not None:
+                usage["cost_usd"] = round(self.budget.record(model, usage, hold), 6)
         
-        except Exception as e:
-            # Log error to LangFuse
-            if self.enable_langfuse and LANGFUSE_AVAILABLE:
-                try:
-                    langfuse_context.update_current_observation(
-                        level="ERROR",
-                        status_message=str(e)
-                    )
-                except:
-                    pass  # Ignore LangFuse errors
-            raise
+        print(f"📝 [LLM CONTENT] Response length: {len(content)} chars")
+        print(f"🏁 [LLM CALL] Completed successfully")
+        
+        # The key is for the configured model and endpoint: answers from a
+        # budget-routed, hedge or fallback model are not stored under it
+        if cache_key and (content or tool_calls) and model == self.model:
+            self.response_cache.put(cache_key, {
+                "content": content,
+                "stop_reason": response.choices[0].finish_reason,
+                "usage": usage,
+                "tool_calls": tool_calls
+            })
+        
+        return LLMResponse(
+            content=content,
+            tool_calls=tool_calls,
+            stop_reason=response.choices[0].finish_reason,
+            usage=usage,
+            model=model
+        )
+    
+    def _record_error(self, error: Exception) -> None:
+        """Log error to LangFuse."""
+        if self.enable_langfuse and LANGFUSE_AVAILABLE:
+            try:
+                langfuse_context.update_current_observation(
+                    level="ERROR",
+                    status_message=str(error)
+                )
+            except:
+                pass  # Ignore LangFuse errors
     
     def parse_document(self, file_path: str) -> str:
         """
@@ -271,6 +756,29 @@ class LiteLLMAdapter(BaseLLM):
         """Return the configured model name."""
         return self.model
     
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """Get response cache hit rate and tokens saved."""
+        if self.response_cache is None:
+            return {"enabled": False}
+        return {"enabled": True, **self.response_cache.get_stats()}
+    
+    def get_budget_stats(self) -> Dict[str, Any]:
+        """Get today's spend, remaining budget and downgrade counts."""
+        if self.budget is None:
+            return {"enabled": False}
+        return {"enabled": True, **self.budget.get_stats()}
+    
+    def get_concurrency_stats(self) -> Dict[str, Any]:
+        """Get coalescing stats and this model's queue depth / wait times."""
+        return {
+            "single_flight": self.single_flight.get_stats() if self.single_flight else {"enabled": False},
+            "limiter": self.limiter.get_stats().get(self.model, {"limit": self.limiter.limit_for(self.model)})
+        }
+    
+    def get_resilience_stats(self) -> Dict[str, Any]:
+        """Get retries, hedges, latency percentiles and circuit breaker states."""
+        return self.resilience.get_stats()
+    
     def flush_langfuse(self):
         """Flush LangFuse traces (call at end of session)."""
         if self.enable_langfuse:
@@ -63,6 +63,10 @@ class MockLLM:
         else:
             return self._mock_generic_response(prompt, context)
     
+    async def agenerate(self, prompt: str, context: Dict[str, Any] = None, **kwargs) -> Dict[str, Any]:
+        """Mock: Async version of generate() (no I/O, returns immediately)."""
+        return self.generate(prompt, context, **kwargs)
+    
     def _mock_filtering_response(self, context: Dict[str, Any]) -> Dict[str, Any]:
         """Mock filtering decision - eliminates P003 for location."""
         print(f"[MOCK LLM] Detected: FILTERING request")
@@ -0,0 +1,467 @@
+"""Deadlines, retries, hedging and circuit breaking for LLM calls.
+
+ResilientCaller wraps one logical LLM request:
+- Deadline: the whole request (all attempts + backoff) finishes within
+  CALL_DEADLINE seconds; each attempt gets min(REQUEST_TIMEOUT, time left)
+- Retries: transient failures (timeouts, connection errors, 429/5xx) are
+  retried up to MAX_RETRIES times with exponential backoff from RETRY_DELAY
+- Hedging (optional): if an attempt runs past the model's recent p95 latency,
+  a duplicate goes to HEDGE_MODEL and the first success wins
+- Circuit breaker: after CIRCUIT_FAILURE_THRESHOLD consecutive transient
+  failures a model is skipped for CIRCUIT_RESET_SECONDS; calls fail fast with
+  CircuitOpenError (or go to the hedge model), so workflows drop to their
+  rule-based path immediately instead of waiting on a dead backend
+
+Configured via config/llm_settings.py (LLM_* env vars).
+"""
+
+import asyncio
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout, as_completed
+from typing import Dict, Any, Callable, Optional, Awaitable
+
+# HTTP statuses worth retrying (and counted against backend health)
+RETRYABLE_STATUS = {408, 409, 425, 429, 500, 502, 503, 504}
+RETRYABLE_ERROR_NAMES = {
+    "Timeout", "APITimeoutError", "APIConnectionError", "ServiceUnavailableError",
+    "InternalServerError", "RateLimitError", "ConnectTimeout", "ReadTimeout"
+}
+
+
+class CircuitOpenError(RuntimeError):
+    """The model's circuit breaker is open (backend recently unhealthy)."""
+
+
+class DeadlineExceededError(TimeoutError):
+    """The request ran out of time before an attempt succeeded."""
+
+
+def is_retryable(error: Exception) -> bool:
+    """True for transient backend failures (timeouts, connection errors, 429/5xx)."""
+    if isinstance(error, (CircuitOpenError, DeadlineExceededError)):
+        return False
+    if isinstance(error, (TimeoutError, ConnectionError, asyncio.TimeoutError)):
+        return True
+    status = getattr(error, "status_code", None)
+    if isinstance(status, int):
+        return status in RETRYABLE_STATUS or status >= 500
+    return type(error).__name__ in RETRYABLE_ERROR_NAMES
+
+
+class CircuitBreaker:
+    """Closed → open after N consecutive failures → half-open trial after a cool-down."""
+
+    def __init__(self, failure_threshold: int = 5, reset_seconds: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._trial_in_flight = False
+        self.times_opened = 0
+        self.short_circuited = 0
+
+    @property
+    def state(self) -> str:
+        if self._opened_at is None:
+            return "closed"
+        if time.monotonic() - self._opened_at >= self.reset_seconds:
+            return "half_open"
+        return "open"
+
+    def allow(self) -> bool:
+        """True if a call may go through (one trial call while half-open)."""
+        with self._lock:
+            state = self.state
+            if state == "closed":
+                return True
+            if state == "half_open" and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            self.short_circuited += 1
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._trial_in_flight or self._failures >= self.failure_threshold:
+                if self._opened_at is None or self._trial_in_flight:
+                    self.times_opened += 1
+                self._opened_at = time.monotonic()
+            self._trial_in_flight = False
+
+    def release_trial(self) -> None:
+        """Give up a half-open trial slot without a verdict (cancelled call)."""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "consecutive_failures": self._failures,
+            "times_opened": self.times_opened,
+            "short_circuited": self.short_circuited
+        }
+
+
+class LatencyTracker:
+    """Recent successful-call latencies per model."""
+
+    def __init__(self, window: int = 200):
+        self._lock = threading.Lock()
+        self._samples: Dict[str, deque] = {}
+        self.window = window
+
+    def record(self, model: str, seconds: float) -> None:
+        with self._lock:
+            self._samples.setdefault(model, deque(maxlen=self.window)).append(seconds)
+
+    def percentile(self, model: str, pct: float, min_samples: int = 1) -> Optional[float]:
+        """Latency at pct (0-1), or None with fewer than min_samples samples."""
+        with self._lock:
+            samples = sorted(self._samples.get(model, ()))
+        if len(samples) < max(1, min_samples):
+            return None
+        index = min(len(samples) - 1, int(round(pct * (len(samples) - 1))))
+        return samples[index]
+
+    def get_stats(self) -> Dict[str, Any]:
+        stats = {}
+        for model in list(self._samples):
+            p50 = self.percentile(model, 0.5)
+            p95 = self.percentile(model, 0.95)
+            stats[model] = {
+                "samples": len(self._samples[model]),
+                "p50_ms": round(p50 * 1000, 1) if p50 is not None else None,
+                "p95_ms": round(p95 * 1000, 1) if p95 is not None else None
+            }
+        return stats
+
+
+class ResilientCaller:
+    """Run an LLM attempt function with deadline, retries, hedging and breaker."""
+
+    def __init__(
+        self,
+        request_timeout: float = 120.0,
+        call_deadline: float = 180.0,
+        max_retries: int = 3,
+        retry_delay: float = 2.0,
+        max_backoff: float = 30.0,
+        hedge_model: Optional[str] = None,
+        hedge_percentile: float = 0.95,
+        hedge_min_samples: int = 20,
+        failure_threshold: int = 5,
+        reset_seconds: float = 30.0
+    ):
+        """
+        Args:
+            request_timeout: Timeout of a single attempt (seconds)
+            call_deadline: Time budget for all attempts of one request (seconds)
+            max_retries: Retries after the first attempt (transient errors only)
+            retry_delay: First backoff delay; doubles per retry (with jitter)
+            max_backoff: Upper bound of one backoff delay
+            hedge_model: Model to send a duplicate to when an attempt is slow (None = no hedging)
+            hedge_percentile: Hedge once an attempt exceeds this latency percentile
+            hedge_min_samples: Latency samples needed before hedging kicks in
+            failure_threshold: Consecutive transient failures that open a breaker
+            reset_seconds: How long a breaker stays open before a trial call
+        """
+        self.request_timeout = request_timeout
+        self.call_deadline = call_deadline
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.max_backoff = max_backoff
+        self.hedge_model = hedge_model or None
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_samples = hedge_min_samples
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+
+        self.latency = LatencyTracker()
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+        self._pool: Optional[ThreadPoolExecutor] = None
+
+        self.calls = 0
+        self.retries = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.deadline_exceeded = 0
+        self.failures = 0
+
+    def breaker(self, model: str) -> CircuitBreaker:
+        with self._lock:
+            if model not in self._breakers:
+                self._breakers[model] = CircuitBreaker(self.failure_threshold, self.reset_seconds)
+            return self._breakers[model]
+
+    # ===== sync =====
+
+    def call(
+        self,
+        model: str,
+        attempt: Callable[[str, float], Any],
+        timeout: Optional[float] = None
+    ) -> Any:
+        """
+        Run attempt(model, timeout_seconds) until it succeeds or the request fails.
+
+        Args:
+            model: Primary model
+            attempt: Performs one upstream call for the given model and timeout
+            timeout: Per-attempt timeout override (default: request_timeout)
+
+        Raises:
+            CircuitOpenError: Primary (and hedge) breakers are open
+            DeadlineExceededError: Call deadline ran out
+            Exception: Last non-retryable or final attempt error
+        """
+        self.calls += 1
+        deadline = time.monotonic() + self.call_deadline
+        last_error: Optional[Exception] = None
+
+        for attempt_number in range(self.max_retries + 1):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            target = self._pick_model(model)
+            attempt_timeout = min(timeout or self.request_timeout, remaining)
+            try:
+                return self._run_hedged(target, attempt, attempt_timeout)
+            except Exception as e:
+                last_error = e
+                if not is_retryable(e) or attempt_number == self.max_retries:
+                    self.failures += 1
+                    raise
+            delay = self._backoff(attempt_number)
+            if time.monotonic() + delay >= deadline:
+                break
+            self.retries += 1
+            print(f"🔁 [LLM RETRY] {type(last_error).__name__}: retry {attempt_number + 1}/{self.max_retries} in {delay:.1f}s")
+            time.sleep(delay)
+
+        self.deadline_exceeded += 1
+        self.failures += 1
+        raise DeadlineExceededError(
+            f"LLM call to {model} exceeded its {self.call_deadline:.0f}s deadline"
+            + (f" (last error: {last_error})" if last_error else "")
+        )
+
+    def _run_hedged(self, model: str, attempt: Callable[[str, float], Any], timeout: float) -> Any:
+        hedge_after = self._hedge_delay(model, timeout)
+        if hedge_after is None:
+            return self._timed(model, attempt, timeout)
+
+        pool = self._get_pool()
+        primary = pool.submit(self._timed, model, attempt, timeout)
+        try:
+            return primary.result(timeout=hedge_after)
+        except FutureTimeout:
+            pass
+
+        self.hedges += 1
+        print(f"🪁 [LLM HEDGE] {model} slower than p{int(self.hedge_percentile * 100)} "
+              f"({hedge_after:.1f}s) - hedging to {self.hedge_model}")
+        hedge = pool.submit(self._timed, self.hedge_model, attempt, max(0.1, timeout - hedge_after))
+        first_error = None
+        for future in as_completed([primary, hedge]):
+            try:
+                result = future.result()
+            except Exception as e:
+                first_error = first_error or e
+                continue
+            if future is hedge:
+                self.hedge_wins += 1
+            return result
+        raise first_error
+
+    def _timed(self, model: str, attempt: Callable[[str, float], Any], timeout: float) -> Any:
+        """One attempt with latency and breaker bookkeeping."""
+        breaker = self.breaker(model)
+        start = time.monotonic()
+        try:
+            result = attempt(model, timeout)
+        except Exception as e:
+            if is_retryable(e):
+                breaker.record_failure()
+            else:
+                breaker.record_success()  # Backend answered (e.g. 4xx) - it's up
+            raise
+        breaker.record_success()
+        self.latency.record(model, time.monotonic() - start)
+        return result
+
+    # ===== async =====
+
+    async def acall(
+        self,
+        model: str,
+        attempt: Callable[[str, float], Awaitable[Any]],
+        timeout: Optional[float] = None
+    ) -> Any:
+        """Async version of call(); attempt is a coroutine function."""
+        self.calls += 1
+        deadline = time.monotonic() + self.call_deadline
+        last_error: Optional[Exception] = None
+
+        for attempt_number in range(self.max_retries + 1):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            target = self._pick_model(model)
+            attempt_timeout = min(timeout or self.request_timeout, remaining)
+            try:
+                return await self._arun_hedged(target, attempt, attempt_timeout)
+            except Exception as e:
+                last_error = e
+                if not is_retryable(e) or attempt_number == self.max_retries:
+                    self.failures += 1
+                    raise
+            delay = self._backoff(attempt_number)
+            if time.monotonic() + delay >= deadline:
+                break
+            self.retries += 1
+            print(f"🔁 [LLM RETRY] {type(last_error).__name__}: retry {attempt_number + 1}/{self.max_retries} in {delay:.1f}s")
+            await asyncio.sleep(delay)
+
+        self.deadline_exceeded += 1
+        self.failures += 1
+        raise DeadlineExceededError(
+            f"LLM call to {model} exceeded its {self.call_deadline:.0f}s deadline"
+            + (f" (last error: {last_error})" if last_error else "")
+        )
+
+    async def _arun_hedged(self, model: str, attempt, timeout: float) -> Any:
+        hedge_after = self._hedge_delay(model, timeout)
+        if hedge_after is None:
+            return await self._atimed(model, attempt, timeout)
+
+        primary = asyncio.ensure_future(self._atimed(model, attempt, timeout))
+        done, _ = await asyncio.wait({primary}, timeout=hedge_after)
+        if done:
+            return primary.result()
+
+        self.hedges += 1
+        print(f"🪁 [LLM HEDGE] {model} slower than p{int(self.hedge_percentile * 100)} "
+              f"({hedge_after:.1f}s) - hedging to {self.hedge_model}")
+        hedge = asyncio.ensure_future(self._atimed(self.hedge_model, attempt, max(0.1, timeout - hedge_after)))
+        pending = {primary, hedge}
+        first_error = None
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is not None:
+                    first_error = first_error or task.exception()
+                    continue
+                for other in pending:
+                    other.cancel()
+                if task is hedge:
+                    self.hedge_wins += 1
+                return task.result()
+        raise first_error
+
+    async def _atimed(self, model: str, attempt, timeout: float) -> Any:
+        breaker = self.breaker(model)
+        start = time.monotonic()
+        try:
+            result = await asyncio.wait_for(attempt(model, timeout), timeout=timeout)
+        except asyncio.CancelledError:
+            breaker.release_trial()  # Lost a hedge race; no verdict on the backend
+            raise
+        except Exception as e:
+            if is_retryable(e):
+                breaker.record_failure()
+            else:
+                breaker.record_success()  # Backend answered (e.g. 4xx) - it's up
+            raise
+        breaker.record_success()
+        self.latency.record(model, time.monotonic() - start)
+        return result
+
+    # ===== helpers =====
+
+    def check_circuit(self, model: str) -> str:
+        """Model to use right now, or raise CircuitOpenError (used by streaming calls)."""
+        return self._pick_model(model)
+
+    def record(self, model: str, error: Optional[Exception] = None) -> None:
+        """Report the outcome of a call made outside call()/acall() (streams)."""
+        breaker = self.breaker(model)
+        if error is not None and is_retryable(error):
+            breaker.record_failure()
+        else:
+            breaker.record_success()
+
+    def _pick_model(self, model: str) -> str:
+        if self.breaker(model).allow():
+            return model
+        if self.hedge_model and self.hedge_model != model and self.breaker(self.hedge_model).allow():
+            print(f"⚡ [LLM CIRCUIT] {model} unhealthy - sending to {self.hedge_model}")
+            return self.hedge_model
+        raise CircuitOpenError(f"Circuit open for {model} - backend marked unhealthy")
+
+    def _hedge_delay(self, model: str, timeout: float) -> Optional[float]:
+        """Seconds to wait before hedging (None = don't hedge this attempt)."""
+        if not self.hedge_model or model == self.hedge_model:
+            return None
+        threshold = self.latency.percentile(model, self.hedge_percentile, self.hedge_min_samples)
+        if threshold is None or threshold >= timeout:
+            return None
+        return threshold
+
+    def _backoff(self, attempt_number: int) -> float:
+        delay = min(self.max_backoff, self.retry_delay * (2 ** attempt_number))
+        return delay * random.uniform(0.8, 1.2)
+
+    def _get_pool(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=16, thread_name_prefix="llm-hedge")
+            return self._pool
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get retry/hedge counts, latency percentiles and breaker states."""
+        return {
+            "calls": self.calls,
+            "retries": self.retries,
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+            "deadline_exceeded": self.deadline_exceeded,
+            "failures": self.failures,
+            "latency": self.latency.get_stats(),
+            "circuits": {model: breaker.get_stats() for model, breaker in self._breakers.items()}
+        }
+
+
+# Shared so breaker state and latency history cover every adapter in the process
+_default_caller: Optional[ResilientCaller] = None
+
+
+def get_resilient_caller() -> ResilientCaller:
+    """Return the process-wide resilient caller (configured from LLMSettings)."""
+    global _default_caller
+    if _default_caller is None:
+        from config.llm_settings import settings
+        _default_caller = ResilientCaller(
+            request_timeout=settings.REQUEST_TIMEOUT,
+            call_deadline=settings.CALL_DEADLINE,
+            max_retries=settings.MAX_RETRIES,
+            retry_delay=settings.RETRY_DELAY,
+            max_backoff=settings.RETRY_MAX_BACKOFF,
+            hedge_model=settings.HEDGE_MODEL if settings.HEDGE_ENABLED else None,
+            hedge_percentile=settings.HEDGE_PERCENTILE,
+            hedge_min_samples=settings.HEDGE_MIN_SAMPLES,
+            failure_threshold=settings.CIRCUIT_FAILURE_THRESHOLD,
+            reset_seconds=settings.CIRCUIT_RESET_SECONDS
+        )
+    return _default_caller
@@ -0,0 +1,236 @@
+"""Two-tier LLM response cache.
+
+Identical requests (same model, endpoint, system, prompt, temperature,
+max_tokens and tools) return the stored response instead of calling the provider again:
+- Tier 1: in-memory LRU (per process)
+- Tier 2: SQLite file shared across processes/restarts, with TTL and
+  size-bounded eviction (least recently used rows go first)
+
+High-temperature requests (creative emails, etc.) bypass the cache since
+callers expect varied output.
+
+Configured via config/llm_settings.py (LLM_RESPONSE_CACHE_* env vars).
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+
+
+def _normalize_text(text: Optional[str]) -> str:
+    """Collapse trailing whitespace so formatting-only differences share a key."""
+    if not text:
+        return ""
+    return "\n".join(line.rstrip() for line in text.strip().splitlines())
+
+
+def make_cache_key(
+    model: str,
+    system: Optional[str],
+    prompt: str,
+    temperature: float,
+    max_tokens: int,
+    tools: Optional[List[Dict[str, Any]]] = None,
+    api_base: Optional[str] = None
+) -> str:
+    """Hash of the normalized request fields."""
+    payload = {
+        "model": (model or "").strip().lower(),
+        "api_base": (api_base or "").strip().rstrip("/").lower(),
+        "system": _normalize_text(system),
+        "prompt": _normalize_text(prompt),
+        "temperature": round(float(temperature), 3),
+        "max_tokens": int(max_tokens),
+        "tools": tools or []
+    }
+    canonical = json.dumps(payload, sort_keys=True, default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """In-memory LRU in front of a SQLite store."""
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        ttl_seconds: int = 3600,
+        max_memory_entries: int = 256,
+        max_disk_entries: int = 5000,
+        max_temperature: float = 0.5
+    ):
+        """
+        Args:
+            path: SQLite file (None = memory tier only)
+            ttl_seconds: Entry lifetime in both tiers
+            max_memory_entries: LRU size of the in-memory tier
+            max_disk_entries: Row limit of the SQLite tier
+            max_temperature: Requests above this temperature are not cached
+        """
+        self.ttl_seconds = ttl_seconds
+        self.max_memory_entries = max_memory_entries
+        self.max_disk_entries = max_disk_entries
+        self.max_temperature = max_temperature
+
+        self._memory: "OrderedDict[str, tuple]" = OrderedDict()  # key -> (created_at, payload)
+        self._lock = threading.Lock()
+        self._db = None
+
+        if path:
+            try:
+                Path(path).parent.mkdir(parents=True, exist_ok=True)
+                self._db = sqlite3.connect(path, check_same_thread=False, timeout=5)
+                self._db.execute(
+                    "CREATE TABLE IF NOT EXISTS responses ("
+                    " key TEXT PRIMARY KEY,"
+                    " payload TEXT NOT NULL,"
+                    " created_at REAL NOT NULL,"
+                    " last_access REAL NOT NULL,"
+                    " total_tokens INTEGER DEFAULT 0)"
+                )
+                self._db.execute("CREATE INDEX IF NOT EXISTS idx_last_access ON responses(last_access)")
+                self._db.commit()
+            except sqlite3.Error as e:
+                print(f"[LLM CACHE] Warning: disk tier disabled ({e})")
+                self._db = None
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.bypassed = 0
+        self.expired = 0
+        self.evictions = 0
+        self.tokens_saved = 0
+
+    def should_bypass(self, temperature: float) -> bool:
+        """True if a request at this temperature should skip the cache."""
+        return temperature is not None and temperature > self.max_temperature
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return the cached response payload, or None."""
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                created_at, payload = entry
+                if now - created_at <= self.ttl_seconds:
+                    self._memory.move_to_end(key)
+                    self.memory_hits += 1
+                    self.tokens_saved += payload.get("usage", {}).get("total_tokens", 0) or 0
+                    return payload
+                del self._memory[key]
+                self.expired += 1
+
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT payload, created_at FROM responses WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None:
+                    payload_json, created_at = row
+                    if now - created_at <= self.ttl_seconds:
+                        self._db.execute("UPDATE responses SET last_access = ? WHERE key = ?", (now, key))
+                        self._db.commit()
+                        payload = json.loads(payload_json)
+                        self._remember(key, created_at, payload)
+                        self.disk_hits += 1
+                        self.tokens_saved += payload.get("usage", {}).get("total_tokens", 0) or 0
+                        return payload
+                    self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+                    self._db.commit()
+                    self.expired += 1
+
+            self.misses += 1
+            return None
+
+    def put(self, key: str, payload: Dict[str, Any]) -> None:
+        """Store a response payload in both tiers."""
+        now = time.time()
+        with self._lock:
+            self._remember(key, now, payload)
+
+            if self._db is not None:
+                try:
+                    self._db.execute(
+                        "INSERT OR REPLACE INTO responses (key, payload, created_at, last_access, total_tokens)"
+                        " VALUES (?, ?, ?, ?, ?)",
+                        (key, json.dumps(payload, default=str), now, now,
+                         payload.get("usage", {}).get("total_tokens", 0) or 0)
+                    )
+                    self._evict_disk(now)
+                    self._db.commit()
+                except sqlite3.Error as e:
+                    print(f"[LLM CACHE] Warning: disk write failed ({e})")
+
+    def clear(self) -> None:
+        """Remove all entries from both tiers."""
+        with self._lock:
+            self._memory.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM responses")
+                self._db.commit()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get hit rate and tokens saved."""
+        hits = self.memory_hits + self.disk_hits
+        lookups = hits + self.misses
+        disk_entries = 0
+        if self._db is not None:
+            with self._lock:
+                disk_entries = self._db.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        return {
+            "hits": hits,
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "bypassed": self.bypassed,
+            "hit_rate": round(hits / lookups, 3) if lookups else 0.0,
+            "tokens_saved": self.tokens_saved,
+            "memory_entries": len(self._memory),
+            "disk_entries": disk_entries,
+            "expired": self.expired,
+            "evictions": self.evictions
+        }
+
+    # ===== internal =====
+
+    def _remember(self, key: str, created_at: float, payload: Dict[str, Any]) -> None:
+        self._memory[key] = (created_at, payload)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+
+    def _evict_disk(self, now: float) -> None:
+        """Drop expired rows, then least recently used rows over the size limit."""
+        self._db.execute("DELETE FROM responses WHERE created_at < ?", (now - self.ttl_seconds,))
+        count = self._db.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        overflow = count - self.max_disk_entries
+        if overflow > 0:
+            self._db.execute(
+                "DELETE FROM responses WHERE key IN ("
+                " SELECT key FROM responses ORDER BY last_access ASC LIMIT ?)",
+                (overflow,)
+            )
+            self.evictions += overflow
+
+
+# Shared cache so every adapter instance in the process uses the same tiers
+_default_cache: Optional[ResponseCache] = None
+
+
+def get_response_cache() -> ResponseCache:
+    """Return the process-wide response cache (configured from LLMSettings)."""
+    global _default_cache
+    if _default_cache is None:
+        from config.llm_settings import settings
+        _default_cache = ResponseCache(
+            path=settings.RESPONSE_CACHE_PATH or None,
+            ttl_seconds=settings.RESPONSE_CACHE_TTL_SECONDS,
+            max_memory_entries=settings.RESPONSE_CACHE_MAX_MEMORY_ENTRIES,
+            max_disk_entries=settings.RESPONSE_CACHE_MAX_DISK_ENTRIES,
+            max_temperature=settings.RESPONSE_CACHE_MAX_TEMPERATURE
+        )
+    return _default_cache
@@ -0,0 +1,113 @@
+"""Email Cleanup - post-processing for AI-generated patient emails.
+
+clean_email_body() applies the cleanup rules to a finished email:
+- Collapse runs of ** and keep bold only on short key terms
+- Strip confirmation requests, "click here" sentences, markdown links and URLs
+  (the UI adds the confirm/decline buttons itself)
+- Collapse triple+ line breaks
+
+StreamingEmailCleaner applies the same rules to a token stream. Text is
+released at sentence/line boundaries once no rule could still match across
+the boundary (open bold, a "[" that may start a confirm link, pending
+"please confirm"/"click here"), so the first cleaned sentence is available
+long before the completion ends.
+"""
+
+import re
+from typing import Iterable, Iterator
+
+_BOLD_RUN = re.compile(r'\*\*+')
+_BOLD_SPAN = re.compile(r'\*\*(.*?)\*\*')
+_CONFIRM_REQUEST = re.compile(r'[Pp]lease confirm.*?(?:clicking|link).*?[./]')
+_CLICK_HERE = re.compile(r'[Cc]lick here.*?[./]')
+_CONFIRM_LINK = re.compile(r'\[.*?[Cc]onfirm.*?\]\(.*?\)')
+_URL = re.compile(r'http[s]?://[^\s]+')
+_EXTRA_BREAKS = re.compile(r'\n\s*\n\s*\n')
+
+# Where a flushed segment may end: after a newline or end-of-sentence punctuation
+_BOUNDARY = re.compile(r'\n|(?<=[.!?])[ \t]')
+# Phrases whose removal rule can extend past the next sentence boundary
+_PENDING_TRIGGER = re.compile(r'[Pp]lease confirm|[Cc]lick here')
+
+
+def _clean_inline(text: str) -> str:
+    """Rules that act within a line (everything except whitespace handling)."""
+    # Reduce multiple consecutive ** to single **
+    text = _BOLD_RUN.sub('**', text)
+    # Limit bold formatting to key terms only
+    text = _BOLD_SPAN.sub(lambda m: f"**{m.group(1)}**" if len(m.group(1)) < 30 else m.group(1), text)
+
+    # Remove any confirmation links that might have been generated despite instructions
+    text = _CONFIRM_REQUEST.sub('', text)
+    text = _CLICK_HERE.sub('', text)
+    text = _CONFIRM_LINK.sub('', text)  # Remove markdown links
+    text = _URL.sub('', text)  # Remove any URLs
+    return text
+
+
+def clean_email_body(text: str) -> str:
+    """Clean a complete AI-generated email body."""
+    text = _clean_inline(text.strip())
+    # Clean up extra whitespace and line breaks
+    text = _EXTRA_BREAKS.sub('\n\n', text)
+    return text.strip()
+
+
+class StreamingEmailCleaner:
+    """Incremental clean_email_body() over streamed token deltas."""
+
+    def __init__(self):
+        self._pending = ""     # Raw text not yet safe to clean
+        self._held_space = ""  # Cleaned trailing whitespace, resolved by the next segment
+        self._started = False  # Leading whitespace is dropped
+
+    def feed(self, delta: str) -> str:
+        """Add a token delta; returns cleaned text ready to show (may be empty)."""
+        self._pending += delta
+        cut = self._safe_cut(self._pending)
+        if cut <= 0:
+            return ""
+        ready, self._pending = self._pending[:cut], self._pending[cut:]
+        return self._emit(ready, final=False)
+
+    def finish(self) -> str:
+        """Flush whatever is left at the end of the stream."""
+        ready, self._pending = self._pending, ""
+        return self._emit(ready, final=True)
+
+    def _safe_cut(self, text: str) -> int:
+        """Largest boundary index where no cleanup rule spans the cut."""
+        for match in reversed(list(_BOUNDARY.finditer(text))):
+            cut = match.end()
+            prefix = text[:cut]
+            line = prefix[prefix.rfind('\n') + 1:]
+            if len(_BOLD_RUN.findall(line)) % 2:
+                continue  # Bold still open (a run of 3+ asterisks is one marker; spans end at the line)
+            if not prefix.endswith('\n') and '[' in line:
+                continue  # A confirm link may start at any "[" and end later on the line
+            if not prefix.endswith('\n') and _PENDING_TRIGGER.search(line):
+                continue  # Confirmation sentence may run on until end of line
+            return cut
+        return 0
+
+    def _emit(self, raw: str, final: bool) -> str:
+        text = self._held_space + _clean_inline(raw)
+        body = text.rstrip()
+        # Hold trailing whitespace so line-break runs are collapsed across segments
+        self._held_space = "" if final else text[len(body):]
+        if not self._started:
+            body = body.lstrip()
+            self._started = bool(body)
+        return _EXTRA_BREAKS.sub('\n\n', body)
+
+
+def stream_clean(deltas: Iterable[str]) -> Iterator[str]:
+    """Clean a stream of token deltas, yielding non-empty cleaned chunks."""
+    cleaner = StreamingEmailCleaner()
+    for delta in deltas:
+        chunk = cleaner.feed(delta)
+        if chunk:
+            yield chunk
+    tail = cleaner.finish()
+    if tail:
+        yield tail
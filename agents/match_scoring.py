@@ -0,0 +1,243 @@
+"""Match Scoring - rule-based patient-provider score (165 points).
+
+Kept free of LLM/agent imports so it can run inside scoring worker
+processes (agents/parallel_scoring.py) as well as SmartSchedulingAgent.
+"""
+
+from typing import Dict, Any, Callable
+
+from mcp_servers.domain.geo import distance_limit
+
+
+# Maximum rule-based score (USE_CASES.md)
+MAX_SCORE = 165
+
+
+def to_percent(score: float) -> int:
+    """A 165-point rule score on the 0-100 scale LLM ranking scores use."""
+    return round(max(0, min(score, MAX_SCORE)) * 100 / MAX_SCORE)
+
+
+def compute_match_score(
+    patient: Dict[str, Any],
+    provider: Dict[str, Any],
+    original: Dict[str, Any] = None,
+    appointment: Dict[str, Any] = None,
+    distance_fn: Callable[[str, str], float] = None
+) -> Dict[str, Any]:
+    """
+    Rule-based 165-point match score for one patient-provider pair.
+    
+    Args:
+        patient: Patient record
+        provider: Candidate provider record
+        original: Original provider record (for experience/continuity comparison)
+        appointment: Appointment record (for preferred day matching)
+        distance_fn: (zip1, zip2) -> miles
+        
+    Returns:
+        Dict with total_score, breakdown, and recommendation
+    """
+    if distance_fn is None:
+        from mcp_servers.domain.geo import get_zip_geo
+        distance_fn = get_zip_geo().distance
+    
+    # Scoring logic per USE_CASES.md (Total: 165 points)
+    score = 0  # Start from 0
+    breakdown = {}
+    
+    # Factor 1: Continuity Score (40 points) - UC3: Prior provider continuity
+    if provider.get('provider_id') in patient.get('prior_providers', []):
+        score += 40
+        breakdown['prior_provider_continuity'] = 40
+    else:
+        breakdown['prior_provider_continuity'] = 0
+    
+    # Factor 2: Specialty Match (35 points)
+    patient_specialty = patient.get('condition_specialty_required', '')
+    provider_specialty = provider.get('specialty', '')
+    if patient_specialty and provider_specialty:
+        if patient_specialty.lower() in provider_specialty.lower():
+            score += 35
+            breakdown['specialty_match'] = 35
+        elif 'physical therapy' in provider_specialty.lower():
+            # Partial match for general PT
+            score += 25
+            breakdown['specialty_match'] = 25
+        else:
+            breakdown['specialty_match'] = 0
+    else:
+        breakdown['specialty_match'] = 0
+    
+    # Factor 3: Patient Preference Fit (30 points) - includes gender, location, etc.
+    preference_score = 0
+    # Gender preference (15 pts)
+    patient_gender_pref = patient.get('gender_preference', 'any').lower()
+    provider_gender = provider.get('gender', '').lower()
+    
+    if patient_gender_pref == 'any' or patient_gender_pref == '':
+        # Patient has no gender preference - award full points
+        preference_score += 15
+        breakdown['gender_preference'] = 15
+    elif patient_gender_pref == provider_gender:
+        # Gender matches patient's preference
+        preference_score += 15
+        breakdown['gender_preference'] = 15
+    else:
+        # Gender doesn't match preference
+        breakdown['gender_preference'] = 0
+    
+    # Location/Proximity (15 pts for same zip)
+    patient_zip = patient.get('zip', '')
+    provider_zip = provider.get('zip', '')
+    
+    if patient_zip == provider_zip:
+        preference_score += 15
+        breakdown['proximity_same_zip'] = 15
+    else:
+        breakdown['proximity_same_zip'] = 0
+        
+        # Check if patient has max distance restriction
+        max_distance = distance_limit(patient)
+        if max_distance is not None:
+            # Calculate approximate distance
+            estimated_distance = distance_fn(patient_zip, provider_zip)
+            
+            if estimated_distance > max_distance:
+                # Provider is too far - heavy penalty
+                # Deduct 50 points (makes most matches fail threshold)
+                score -= 50
+                breakdown['distance_penalty'] = -50
+                breakdown['estimated_distance'] = round(estimated_distance, 1)
+                breakdown['max_allowed_distance'] = max_distance
+    
+    score += preference_score
+    breakdown['patient_preference_fit'] = preference_score
+    
+    # Factor 4: Schedule Load Balance (25 points)
+    current_load = provider.get('current_patient_load', 0)
+    max_capacity = provider.get('max_patient_capacity', 25)
+    if max_capacity > 0:
+        utilization = current_load / max_capacity
+        if utilization < 0.6:  # < 60% capacity
+            score += 25
+            breakdown['schedule_load_balance'] = 25
+        elif utilization < 0.8:  # 60-80% capacity
+            score += 15
+            breakdown['schedule_load_balance'] = 15
+        else:  # > 80% capacity
+            score += 5
+            breakdown['schedule_load_balance'] = 5
+    else:
+        breakdown['schedule_load_balance'] = 0
+    
+    # Factor 5: Experience Match (20 points) - UC4
+    if original:
+        # Existing patient - compare to original provider
+        if provider.get('years_experience', 0) >= original.get('years_experience', 0):
+            score += 20
+            breakdown['experience_match'] = 20
+        elif provider.get('years_experience', 0) >= (original.get('years_experience', 0) - 2):
+            # Within 2 years of original
+            score += 15
+            breakdown['experience_match'] = 15
+        else:
+            breakdown['experience_match'] = 0
+    else:
+        # New patient - award points based on provider's experience level
+        provider_exp = provider.get('years_experience', 0)
+        if provider_exp >= 10:
+            # Senior provider (10+ years)
+            score += 20
+            breakdown['experience_match'] = 20
+        elif provider_exp >= 5:
+            # Mid-level provider (5-9 years)
+            score += 15
+            breakdown['experience_match'] = 15
+        elif provider_exp >= 2:
+            # Junior provider (2-4 years)
+            score += 10
+            breakdown['experience_match'] = 10
+        else:
+            # Very junior (<2 years)
+            score += 5
+            breakdown['experience_match'] = 5
+    
+    # Factor 6: Time Slot Priority (15 points, +30 if same provider) - UC2
+    slots = provider.get('available_slots', [])
+    if slots:
+        earliest = min([s.get('time', '23:59') for s in slots if s.get('available', True)])
+        # Same provider with earlier slot gets bonus
+        if original and provider.get('provider_id') == original.get('provider_id'):
+            score += 30
+            breakdown['same_provider_earlier_slot'] = 30
+        elif earliest < "10:00":  # Morning slot
+            score += 15
+            breakdown['time_slot_priority'] = 15
+        elif earliest < "14:00":  # Early afternoon
+            score += 10
+            breakdown['time_slot_priority'] = 10
+        else:
+            breakdown['time_slot_priority'] = 0
+    else:
+        breakdown['time_slot_priority'] = 0
+    
+    # Factor 7: Day/Time Match (10 points) - UC5: Preferred day
+    # Check if the ACTUAL appointment date matches patient's preferred days
+    patient_preferred_days = patient.get('preferred_days', '').split(',')
+    patient_preferred_days = [day.strip() for day in patient_preferred_days if day.strip()]
+    
+    # Check if patient has weekend-only restriction
+    weekend_days = {'Saturday', 'Sunday'}
+    provider_available_days = set(provider.get('available_days', []))
+    
+    if patient_preferred_days:
+        patient_days_set = set(patient_preferred_days)
+        
+        # If patient ONLY wants weekends but provider ONLY works weekdays → impossible match
+        weekday_days = {'Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday'}
+        if patient_days_set.issubset(weekend_days) and provider_available_days.issubset(weekday_days):
+            # Impossible to match - heavy penalty
+            score -= 40
+            breakdown['impossible_day_match'] = -40
+            breakdown['patient_wants_weekends_only'] = True
+            breakdown['preferred_day_match'] = 0
+            breakdown['matching_days'] = []
+        else:
+            # Get the day of week from the appointment date
+            from datetime import datetime
+            appointment_date_str = (appointment or {}).get('date', '')
+            try:
+                appointment_dt = datetime.fromisoformat(appointment_date_str.replace('Z', '+00:00'))
+                appointment_day = appointment_dt.strftime('%A')  # e.g., "Friday"
+                
+                # Check if appointment day matches patient's preferred days
+                if appointment_day in patient_preferred_days:
+                    score += 10
+                    breakdown['preferred_day_match'] = 10
+                    breakdown['matching_days'] = [appointment_day]
+                else:
+                    breakdown['preferred_day_match'] = 0
+                    breakdown['matching_days'] = []
+            except:
+                breakdown['preferred_day_match'] = 0
+                breakdown['matching_days'] = []
+    else:
+        breakdown['preferred_day_match'] = 0
+        breakdown['matching_days'] = []
+    
+    # Determine recommendation (based on 165 point max)
+    if score >= 100:  # 60% of max (excellent match)
+        recommendation = "EXCELLENT"
+    elif score >= 80:  # 48% of max (good match)
+        recommendation = "GOOD"
+    elif score >= 60:  # 36% of max (acceptable match)
+        recommendation = "ACCEPTABLE"
+    else:  # < 60 points (poor match - needs HOD review)
+        recommendation = "POOR"
+    
+    return {
+        "total_score": score,
+        "breakdown": breakdown,
+        "recommendation": recommendation
+    }
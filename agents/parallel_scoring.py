@@ -0,0 +1,332 @@
+"""Parallel Scoring - shard patient × provider scoring across processes.
+
+For network-wide outages (thousands of affected appointments × hundreds of
+providers) the rule-based scorer is CPU bound and runs single-threaded in the
+orchestrator. ParallelScorer splits the appointment list into shards and runs
+them on a ProcessPoolExecutor:
+
+- Patient/provider records are packed into compact feature rows and sent
+  ONCE per worker (pool initializer), not pickled with every task
+- Each task is just a (start, end) slice of the job list
+- Workers return only the top-K ranking per appointment, merged in the parent
+
+Small batches stay in-process; the pool start-up cost isn't worth it.
+
+Configuration:
+- SCORING_WORKERS: worker processes (default: CPU count, 1 = in-process)
+- SCORING_PARALLEL_MIN_PAIRS: minimum pairs before using the pool (default: 5000)
+"""
+
+import heapq
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Tuple
+
+# Add parent to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from agents.match_scoring import compute_match_score
+from mcp_servers.domain.geo import distance_limit
+
+
+# Only the fields compute_match_score reads are shipped to workers
+PATIENT_FIELDS = (
+    "patient_id", "zip", "max_distance_miles", "gender_preference",
+    "condition_specialty_required", "preferred_days", "prior_providers"
+)
+PROVIDER_FIELDS = (
+    "provider_id", "zip", "gender", "specialty", "years_experience",
+    "current_patient_load", "max_patient_capacity", "available_days", "available_slots"
+)
+
+
+def _pack(record: Dict[str, Any], fields: Tuple[str, ...]) -> tuple:
+    """Record → compact tuple in field order (missing fields → None)."""
+    row = []
+    for field in fields:
+        value = record.get(field)
+        if field == "available_slots" and value:
+            value = tuple((s.get("time", "23:59"), s.get("available", True)) for s in value)
+        elif isinstance(value, list):
+            value = tuple(value)
+        row.append(value)
+    return tuple(row)
+
+
+def _unpack(row: tuple, fields: Tuple[str, ...]) -> Dict[str, Any]:
+    """Compact tuple → minimal record (None fields omitted so scorer defaults apply)."""
+    record = {}
+    for field, value in zip(fields, row):
+        if value is None:
+            continue
+        if field == "available_slots":
+            value = [{"time": t, "available": a} for t, a in value]
+        elif isinstance(value, tuple):
+            value = list(value)
+        record[field] = value
+    return record
+
+
+def _build_state(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Rebuild records from the packed payload (runs once per worker)."""
+    from mcp_servers.domain.geo import get_zip_geo
+
+    return {
+        "patients": [_unpack(row, PATIENT_FIELDS) for row in payload["patients"]],
+        "providers": [_unpack(row, PROVIDER_FIELDS) for row in payload["providers"]],
+        "originals": {pid: _unpack(row, PROVIDER_FIELDS) for pid, row in payload["originals"].items()},
+        "jobs": payload["jobs"],
+        "top_k": payload["top_k"],
+        "distance": get_zip_geo().distance
+    }
+
+
+def _score_shard(state: Dict[str, Any], start: int, end: int) -> Tuple[Dict[str, List[Dict]], int, int]:
+    """Score jobs[start:end] against every provider.
+
+    Returns:
+        (rankings by appointment_id, pairs scored, pairs pruned by distance)
+    """
+    providers = state["providers"]
+    distance = state["distance"]
+    rankings = {}
+    scored = 0
+    pruned = 0
+
+    for appointment_id, patient_idx, appointment_date, original_id in state["jobs"][start:end]:
+        patient = state["patients"][patient_idx]
+        original = state["originals"].get(original_id)
+        appointment = {"date": appointment_date} if appointment_date else None
+        max_distance = distance_limit(patient)
+
+        results = []
+        for provider_idx, provider in enumerate(providers):
+            # Same distance pre-filter as JSONDomainServer.prune_candidates_by_distance
+            if max_distance is not None:
+                if distance(patient.get("zip"), provider.get("zip")) > max_distance:
+                    pruned += 1
+                    continue
+            result = compute_match_score(patient, provider, original, appointment, distance_fn=distance)
+            scored += 1
+            # Ties keep provider order, matching the sequential stable sort
+            results.append((-result["total_score"], provider_idx, result))
+
+        top = heapq.nsmallest(state["top_k"], results, key=lambda r: (r[0], r[1]))
+        rankings[appointment_id] = [
+            {
+                "provider_id": providers[idx]["provider_id"],
+                "total_score": result["total_score"],
+                "breakdown": result["breakdown"],
+                "recommendation": result["recommendation"]
+            }
+            for _, idx, result in top
+        ]
+
+    return rankings, scored, pruned
+
+
+# Per-process state set by the pool initializer
+_worker_state: Optional[Dict[str, Any]] = None
+
+
+def _init_worker(payload: Dict[str, Any]) -> None:
+    global _worker_state
+    _worker_state = _build_state(payload)
+
+
+def _run_shard(bounds: Tuple[int, int]):
+    return _score_shard(_worker_state, *bounds)
+
+
+class ParallelScorer:
+    """Score many appointments against a provider pool using worker processes."""
+
+    def __init__(self, max_workers: int = None, min_parallel_pairs: int = None, shards_per_worker: int = 4):
+        """
+        Args:
+            max_workers: Worker processes (default: SCORING_WORKERS or CPU count)
+            min_parallel_pairs: Below this many pairs, score in-process
+            shards_per_worker: Shards per worker (smaller shards balance uneven pruning)
+        """
+        if max_workers is None:
+            max_workers = int(os.getenv("SCORING_WORKERS", "0")) or os.cpu_count() or 1
+        if min_parallel_pairs is None:
+            min_parallel_pairs = int(os.getenv("SCORING_PARALLEL_MIN_PAIRS", "5000"))
+
+        self.max_workers = max(1, max_workers)
+        self.min_parallel_pairs = min_parallel_pairs
+        self.shards_per_worker = max(1, shards_per_worker)
+
+    def should_parallelize(self, pair_count: int) -> bool:
+        """True if a batch of this size is worth the process pool."""
+        return self.max_workers > 1 and pair_count >= self.min_parallel_pairs
+
+    def score_and_rank(
+        self,
+        jobs: List[Dict[str, Any]],
+        providers: List[Dict[str, Any]],
+        originals: Dict[str, Dict[str, Any]] = None,
+        top_k: int = 5
+    ) -> Dict[str, Any]:
+        """
+        Rank providers for every appointment.
+
+        Args:
+            jobs: One per appointment: {"appointment_id", "patient", "appointment_date",
+                "original_provider_id"}
+            providers: Candidate provider pool (same for every job)
+            originals: Original provider records by ID (for experience comparison)
+            top_k: Rankings kept per appointment
+
+        Returns:
+            Dict with "rankings" {appointment_id: [top_k scores, best first]} and "stats"
+        """
+        started = time.perf_counter()
+
+        # Pack each distinct patient once; jobs reference them by index
+        patient_rows = []
+        patient_index = {}
+        packed_jobs = []
+        for job in jobs:
+            patient = job["patient"]
+            patient_id = patient.get("patient_id")
+            if patient_id not in patient_index:
+                patient_index[patient_id] = len(patient_rows)
+                patient_rows.append(_pack(patient, PATIENT_FIELDS))
+            packed_jobs.append((
+                job["appointment_id"],
+                patient_index[patient_id],
+                job.get("appointment_date"),
+                job.get("original_provider_id")
+            ))
+
+        payload = {
+            "patients": patient_rows,
+            "providers": [_pack(p, PROVIDER_FIELDS) for p in providers],
+            "originals": {pid: _pack(p, PROVIDER_FIELDS) for pid, p in (originals or {}).items() if p},
+            "jobs": packed_jobs,
+            "top_k": top_k
+        }
+
+        pair_count = len(packed_jobs) * len(providers)
+        use_pool = self.should_parallelize(pair_count)
+        workers = min(self.max_workers, max(1, len(packed_jobs))) if use_pool else 1
+
+        rankings = {}
+        scored = 0
+        pruned = 0
+
+        if workers == 1:
+            state = _build_state(payload)
+            rankings, scored, pruned = _score_shard(state, 0, len(packed_jobs))
+            shard_count = 1
+        else:
+            shard_count = min(len(packed_jobs), workers * self.shards_per_worker)
+            step = -(-len(packed_jobs) // shard_count)  # ceil
+            bounds = [(i, min(i + step, len(packed_jobs))) for i in range(0, len(packed_jobs), step)]
+            shard_count = len(bounds)
+
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(payload,)) as pool:
+                for shard_rankings, shard_scored, shard_pruned in pool.map(_run_shard, bounds):
+                    rankings.update(shard_rankings)
+                    scored += shard_scored
+                    pruned += shard_pruned
+
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        return {
+            "rankings": rankings,
+            "stats": {
+                "mode": "process-pool" if workers > 1 else "in-process",
+                "workers": workers,
+                "shards": shard_count,
+                "appointments": len(packed_jobs),
+                "providers": len(providers),
+                "pairs_scored": scored,
+                "pairs_pruned": pruned,
+                "elapsed_ms": round(elapsed_ms, 1)
+            }
+        }
+
+
+def create_parallel_scorer(max_workers: int = None) -> ParallelScorer:
+    """Factory function to create a parallel scorer."""
+    return ParallelScorer(max_workers=max_workers)
+
+
+def _synthetic_network(n_appointments: int, n_providers: int, seed: int = 42):
+    """Random multi-clinic network for benchmarking."""
+    import random
+    rng = random.Random(seed)
+    specialties = ["Orthopedic", "Sports Medicine", "Neurological", "Pediatric", "Geriatric"]
+    days = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday"]
+
+    providers = [
+        {
+            "provider_id": f"P{i:04d}",
+            "zip": str(12340 + rng.randint(0, 20)),
+            "gender": rng.choice(["male", "female"]),
+            "specialty": f"{rng.choice(specialties)} Physical Therapy",
+            "years_experience": rng.randint(1, 25),
+            "current_patient_load": rng.randint(0, 30),
+            "max_patient_capacity": 30,
+            "available_days": rng.sample(days, 4),
+            "available_slots": [{"time": f"{h:02d}:00", "available": True} for h in rng.sample(range(8, 18), 3)]
+        }
+        for i in range(n_providers)
+    ]
+    jobs = [
+        {
+            "appointment_id": f"A{i:05d}",
+            "patient": {
+                "patient_id": f"PAT{i:05d}",
+                "zip": str(12340 + rng.randint(0, 20)),
+                "max_distance_miles": rng.choice([5, 10, 15, 25]),
+                "gender_preference": rng.choice(["any", "male", "female"]),
+                "condition_specialty_required": rng.choice(specialties),
+                "preferred_days": ",".join(rng.sample(days, 2)),
+                "prior_providers": [f"P{rng.randrange(n_providers):04d}"]
+            },
+            "appointment_date": f"2025-12-{rng.randint(1, 28):02d}T09:00:00",
+            "original_provider_id": "P0000"
+        }
+        for i in range(n_appointments)
+    ]
+    return jobs, providers
+
+
+if __name__ == "__main__":
+    # Benchmark: scaling from 1 to N worker processes
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Parallel scoring benchmark")
+    parser.add_argument("--appointments", type=int, default=2000)
+    parser.add_argument("--providers", type=int, default=300)
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    jobs, providers = _synthetic_network(args.appointments, args.providers)
+    originals = {"P0000": providers[0]}
+    pairs = len(jobs) * len(providers)
+
+    print(f"\n{'='*60}")
+    print(f"PARALLEL SCORING BENCHMARK: {len(jobs)} appointments × {len(providers)} providers = {pairs:,} pairs")
+    print(f"{'='*60}")
+
+    worker_counts = sorted({1, 2, 4, 8, args.max_workers} & set(range(1, args.max_workers + 1)))
+    baseline_ms = None
+    baseline_rankings = None
+    for workers in worker_counts:
+        scorer = ParallelScorer(max_workers=workers, min_parallel_pairs=0)
+        result = scorer.score_and_rank(jobs, providers, originals)
+        elapsed = result["stats"]["elapsed_ms"]
+        if baseline_ms is None:
+            baseline_ms = elapsed
+            baseline_rankings = result["rankings"]
+        assert result["rankings"] == baseline_rankings, "Parallel rankings differ from single-process run"
+        print(f"  workers={workers:<3} {elapsed:>9.1f} ms   speedup {baseline_ms / elapsed:>5.2f}x   "
+              f"({result['stats']['pairs_scored']:,} scored, {result['stats']['pairs_pruned']:,} pruned)")
+
+    print(f"\n✅ Rankings identical across worker counts")
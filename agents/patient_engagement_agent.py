@@ -6,7 +6,7 @@ Handles:
 Uses real LLM by default (LM Studio or cloud API), with mock as fallback.
 """
 
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Iterator, Tuple
 import sys
 import os
 import time as time_module
@@ -17,6 +17,7 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from adapters.llm.base import BaseLLM
 from adapters.llm.mock_llm import MockLLM
+from agents.email_cleanup import stream_clean
 from mcp_servers.domain.json_server import JSONDomainServer, create_json_domain_server
 from config.email_templates import EmailTemplates
 from demo.email_preview import mock_send_email
@@ -318,46 +319,10 @@ Metro Physical Therapy"""
         # Check if LangFuse prompt should be used
         if use_ai and self.use_langfuse_prompt and self.langfuse and self.llm:
             try:
-                # Get original provider from appointment
-                appointment = self.domain.get_appointment(appointment_id)
-                original_provider_id = appointment.get('provider_id') if appointment else None
-                original_provider = self.domain.get_provider(original_provider_id) if original_provider_id else None
-                original_provider_name = original_provider.get('name', 'Your therapist') if original_provider else 'Your therapist'
-                
-                # Fetch prompt from LangFuse
-                prompt_obj = self.langfuse.get_prompt(
-                    "patient-engagement-message",
-                    label="production"
-                )
-                
-                # Compile prompt with comprehensive variables for better personalization
-                compiled_prompt = prompt_obj.compile(
-                    message_type="APPOINTMENT_OFFER",
-                    patient_name=patient.get("name", "Patient"),
-                    patient_condition=patient.get("condition", "N/A"),
-                    patient_gender_preference=patient.get("gender_preference", "any"),
-                    patient_preferred_days=patient.get("preferred_days", "any"),
-                    patient_max_distance=f"{patient.get('max_distance_miles', 'N/A')} miles" if patient.get('max_distance_miles') else "N/A",
-                    original_provider=original_provider_name,
-                    new_provider=provider.get("name", "Provider"),
-                    provider_specialty=provider.get("specialty", "Physical Therapy"),
-                    provider_experience=str(provider.get("years_experience", "N/A")),
-                    provider_available_days=", ".join(provider.get("available_days", [])),
-                    appointment_date=date,
-                    appointment_time=time,
-                    location=provider.get("primary_location", "Main Clinic"),
-                    channel=patient.get("communication_channel_primary", "email"),
-                    match_reasoning="Provider matches patient's specialty requirements and preferences",
-                    match_quality="EXCELLENT"  # Could be enhanced with actual match quality from appointment
-                )
+                compiled_prompt, system_prompt = self._build_offer_prompt(patient, provider, date, time, appointment_id)
                 
                 # Call LLM with the compiled prompt
                 print(f"[EMAIL] Calling LLM for personalized message...")
-                system_prompt = """You are a healthcare communication assistant. Generate friendly, professional patient messages.
-
-IMPORTANT: Do NOT include any links, URLs, or clickable buttons in your message. 
-The links will be added separately after your message. Just provide the message content only."""
-                
                 response = self.llm.generate(
                     prompt=compiled_prompt,
                     system=system_prompt,
@@ -394,6 +359,88 @@ The links will be added separately after your message. Just provide the message
         # This should never be reached since we're LangFuse-only now
         raise Exception("LangFuse is required for patient engagement messages. No local fallback available.")
     
+    def stream_offer_message(
+        self,
+        patient: Dict[str, Any],
+        provider: Dict[str, Any],
+        date: str,
+        time: str,
+        appointment_id: str
+    ) -> Iterator[str]:
+        """Stream the AI offer message as cleaned text chunks.
+        
+        Same prompt as _compose_offer_message(use_ai=True), but text is
+        yielded sentence by sentence while the LLM is still generating.
+        
+        Yields:
+            Cleaned message chunks
+        """
+        if not (self.use_langfuse_prompt and self.langfuse and self.llm):
+            raise Exception("LangFuse is required for patient engagement messages. No local fallback available.")
+        
+        compiled_prompt, system_prompt = self._build_offer_prompt(patient, provider, date, time, appointment_id)
+        print(f"[EMAIL] Streaming LLM personalized message...")
+        deltas = self.llm.stream(
+            prompt=compiled_prompt,
+            system=system_prompt,
+            max_tokens=500,
+            temperature=0.7
+        )
+        yield from stream_clean(deltas)
+    
+    def _build_offer_prompt(
+        self,
+        patient: Dict[str, Any],
+        provider: Dict[str, Any],
+        date: str,
+        time: str,
+        appointment_id: str
+    ) -> Tuple[str, str]:
+        """Compile the LangFuse offer prompt.
+        
+        Returns:
+            (compiled_prompt, system_prompt)
+        """
+        # Get original provider from appointment
+        appointment = self.domain.get_appointment(appointment_id)
+        original_provider_id = appointment.get('provider_id') if appointment else None
+        original_provider = self.domain.get_provider(original_provider_id) if original_provider_id else None
+        original_provider_name = original_provider.get('name', 'Your therapist') if original_provider else 'Your therapist'
+        
+        # Fetch prompt from LangFuse
+        prompt_obj = self.langfuse.get_prompt(
+            "patient-engagement-message",
+            label="production"
+        )
+        
+        # Compile prompt with comprehensive variables for better personalization
+        compiled_prompt = prompt_obj.compile(
+            message_type="APPOINTMENT_OFFER",
+            patient_name=patient.get("name", "Patient"),
+            patient_condition=patient.get("condition", "N/A"),
+            patient_gender_preference=patient.get("gender_preference", "any"),
+            patient_preferred_days=patient.get("preferred_days", "any"),
+            patient_max_distance=f"{patient.get('max_distance_miles', 'N/A')} miles" if patient.get('max_distance_miles') else "N/A",
+            original_provider=original_provider_name,
+            new_provider=provider.get("name", "Provider"),
+            provider_specialty=provider.get("specialty", "Physical Therapy"),
+            provider_experience=str(provider.get("years_experience", "N/A")),
+            provider_available_days=", ".join(provider.get("available_days", [])),
+            appointment_date=date,
+            appointment_time=time,
+            location=provider.get("primary_location", "Main Clinic"),
+            channel=patient.get("communication_channel_primary", "email"),
+            match_reasoning="Provider matches patient's specialty requirements and preferences",
+            match_quality="EXCELLENT"  # Could be enhanced with actual match quality from appointment
+        )
+        
+        system_prompt = """You are a healthcare communication assistant. Generate friendly, professional patient messages.
+
+IMPORTANT: Do NOT include any links, URLs, or clickable buttons in your message. 
+The links will be added separately after your message. Just provide the message content only."""
+        
+        return compiled_prompt, system_prompt
+    
     def send_confirmation(
         self,
         patient_id: str,
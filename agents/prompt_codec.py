@@ -0,0 +1,190 @@
+"""Prompt Codec - compact, token-efficient encoding of matching payloads.
+
+Verbose prompts spell out every attribute as a prose line per entity
+("- Specialty: ...", "- Gender: ..."), or interpolate raw dict reprs. The
+compact encoding sends one header line plus one "|"-separated row per
+entity, keeps only the fields the matching rules use, abbreviates weekdays
+and lists each provider once:
+
+    PROVIDERS (id|name|specialty|gender|exp_yrs|zip|days|load|slots)
+    P001|Sarah Johnson|Orthopedic Physical Therapy|female|8|12345|Tue,Thu|12/20|09:00,14:00
+
+count_tokens() / compare_prompt_sizes() report the prompt size in tokens
+(tiktoken if its encoding is available locally, else ~4 chars/token).
+
+Mode is set by PROMPT_ENCODING in config/llm_settings.py ("compact" or
+"verbose").
+"""
+
+import importlib.util
+import os
+from pathlib import Path
+from typing import Dict, Any, List, Callable, Iterable, Optional, Tuple
+
+try:
+    import tiktoken
+    TIKTOKEN_AVAILABLE = True
+except ImportError:
+    TIKTOKEN_AVAILABLE = False
+
+# (column label, value getter)
+Column = Tuple[str, Callable[[Dict[str, Any]], Any]]
+
+_DAY_ABBREVIATIONS = {
+    "monday": "Mon", "tuesday": "Tue", "wednesday": "Wed", "thursday": "Thu",
+    "friday": "Fri", "saturday": "Sat", "sunday": "Sun"
+}
+
+
+# ===== cell formatting =====
+
+def abbreviate_days(days: Any) -> List[str]:
+    """'Monday,Tuesday' or ['Monday', 'Tuesday'] -> ['Mon', 'Tue']."""
+    if not days:
+        return []
+    if isinstance(days, str):
+        days = days.split(",")
+    return [_DAY_ABBREVIATIONS.get(d.strip().lower(), d.strip()) for d in days if d and d.strip()]
+
+
+def available_slot_times(provider: Dict[str, Any]) -> List[str]:
+    """Times of a provider's open slots."""
+    return [s.get("time", "") for s in provider.get("available_slots", []) or [] if s.get("available", True)]
+
+
+def format_cell(value: Any) -> str:
+    """Render one value for a compact row."""
+    if value is None or value == "" or value == []:
+        return "-"
+    if isinstance(value, bool):
+        return "Y" if value else "N"
+    if isinstance(value, float):
+        return f"{value:g}"
+    if isinstance(value, (list, tuple, set)):
+        return ",".join(format_cell(v) for v in value)
+    # Keep rows on one line and the separator unambiguous
+    return str(value).replace("|", "/").replace("\n", " ").strip()
+
+
+# ===== standard columns =====
+
+PATIENT_COLUMNS: List[Column] = [
+    ("id", lambda p: p.get("patient_id")),
+    ("name", lambda p: p.get("name")),  # Copied into each decision's patient_name
+    ("condition", lambda p: p.get("condition")),
+    ("specialty_needed", lambda p: p.get("condition_specialty_required")),
+    ("gender_pref", lambda p: p.get("gender_preference", "any")),
+    ("days", lambda p: abbreviate_days(p.get("preferred_days"))),
+    ("prior", lambda p: p.get("prior_providers", [])),
+    ("zip", lambda p: p.get("zip")),
+    ("max_mi", lambda p: p.get("max_distance_miles")),
+    ("insurance", lambda p: p.get("insurance_provider")),
+]
+
+PROVIDER_COLUMNS: List[Column] = [
+    ("id", lambda p: p.get("provider_id")),
+    ("name", lambda p: p.get("name")),
+    ("specialty", lambda p: p.get("specialty")),
+    ("gender", lambda p: p.get("gender")),
+    ("exp_yrs", lambda p: p.get("years_experience")),
+    ("zip", lambda p: p.get("zip")),
+    ("days", lambda p: abbreviate_days(p.get("available_days"))),
+    ("load", lambda p: f"{p.get('current_patient_load', 0)}/{p.get('max_patient_capacity', 0)}"
+        if p.get("max_patient_capacity") else p.get("capacity_utilization")),
+    ("slots", available_slot_times),
+]
+
+
+def encode_table(
+    title: str,
+    rows: Iterable[Dict[str, Any]],
+    columns: List[Column],
+    key: Optional[Callable[[Dict[str, Any]], Any]] = None
+) -> str:
+    """
+    Encode entities as one header line plus one row each.
+
+    Args:
+        title: Section title (e.g. "PROVIDERS")
+        rows: Entity dicts
+        columns: (label, getter) pairs
+        key: Deduplicate rows by this key (first occurrence wins)
+
+    Returns:
+        Compact table text
+    """
+    lines = [f"{title} ({'|'.join(label for label, _ in columns)})"]
+    seen = set()
+    for row in rows:
+        if not row:
+            continue
+        if key is not None:
+            row_key = key(row)
+            if row_key in seen:
+                continue
+            seen.add(row_key)
+        lines.append("|".join(format_cell(getter(row)) for _, getter in columns))
+    return "\n".join(lines)
+
+
+def encode_patients(patients: Iterable[Dict[str, Any]], extra_columns: List[Column] = None, title: str = "PATIENTS") -> str:
+    """Compact patient table (matching fields only)."""
+    return encode_table(title, patients, (extra_columns or []) + PATIENT_COLUMNS)
+
+
+def encode_providers(providers: Iterable[Dict[str, Any]], extra_columns: List[Column] = None, title: str = "PROVIDERS") -> str:
+    """Compact provider table, each provider listed once."""
+    return encode_table(title, providers, PROVIDER_COLUMNS + (extra_columns or []),
+                        key=lambda p: p.get("provider_id"))
+
+
+def encode_record(title: str, record: Dict[str, Any], fields: List[str]) -> str:
+    """One-line key=value encoding of a single record (e.g. an appointment)."""
+    if not record:
+        return f"{title}: -"
+    return f"{title}: " + " ".join(f"{f}={format_cell(record.get(f))}" for f in fields if record.get(f) not in (None, ""))
+
+
+# ===== token counting =====
+
+_encoder = None
+_encoder_failed = False
+
+
+def _get_encoder():
+    """tiktoken cl100k_base, loaded from a local cache only (never blocks on network twice)."""
+    global _encoder, _encoder_failed
+    if _encoder is not None or _encoder_failed or not TIKTOKEN_AVAILABLE:
+        return _encoder
+    if "TIKTOKEN_CACHE_DIR" not in os.environ:
+        # LiteLLM ships the cl100k_base file; reuse it so counting works offline
+        spec = importlib.util.find_spec("litellm")
+        if spec and spec.origin:
+            bundled = Path(spec.origin).parent / "litellm_core_utils" / "tokenizers"
+            if bundled.exists():
+                os.environ["TIKTOKEN_CACHE_DIR"] = str(bundled)
+    try:
+        _encoder = tiktoken.get_encoding("cl100k_base")
+    except Exception as e:
+        print(f"[PROMPT] Warning: tiktoken encoding unavailable ({e}), estimating tokens")
+        _encoder_failed = True
+    return _encoder
+
+
+def count_tokens(text: Optional[str]) -> int:
+    """Token count of a prompt (tiktoken cl100k_base, or ~4 chars/token)."""
+    if not text:
+        return 0
+    encoder = _get_encoder()
+    if encoder is not None:
+        return len(encoder.encode(text, disallowed_special=()))
+    return len(text) // 4 + 1
+
+
+def compare_prompt_sizes(verbose: str, compact: str, label: str = "prompt") -> Dict[str, Any]:
+    """Report prompt tokens before/after compact encoding."""
+    before = count_tokens(verbose)
+    after = count_tokens(compact)
+    reduction = round(1 - after / before, 3) if before else 0.0
+    print(f"[PROMPT] {label}: {before} → {after} tokens ({reduction:.0%} smaller)")
+    return {"verbose_tokens": before, "compact_tokens": after, "tokens_saved": before - after, "reduction": reduction}
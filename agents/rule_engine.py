@@ -0,0 +1,264 @@
+"""Rule Engine - deterministic pre-filter for provider candidates.
+
+Hard constraints from the scheduling policy (knowledge/sources/clinic/
+scheduling_policy.txt) usually decide a candidate without any reasoning:
+- Status: provider must be active
+- Distance: within patient's max_distance_miles (policy 1.2)
+- Specialty: provider specialty covers the patient's condition (policy 1.1)
+- Gender: patient's gender preference (policy 2.1)
+- Days: provider works at least one of the patient's preferred days (policy 1.3)
+
+Each rule returns PASS, FAIL or UNKNOWN. A candidate that FAILs any rule is
+eliminated, one that PASSes every rule is qualified, and only candidates
+left UNKNOWN on some rule are sent to the LLM.
+
+Rules are compiled once per patient (normalized strings, day sets, distance
+limit) and then applied to every candidate.
+"""
+
+from typing import Dict, Any, List, Callable, Optional, Tuple
+
+from mcp_servers.domain.geo import distance_limit
+
+PASS = "PASS"
+FAIL = "FAIL"
+UNKNOWN = "UNKNOWN"
+
+# Verdict + human-readable reason
+RuleResult = Tuple[str, str]
+
+
+class RuleEngine:
+    """Compiled PASS/FAIL/UNKNOWN filter over provider candidates."""
+
+    # (filter name shown in filters_applied, description)
+    RULES = [
+        ("Status", "Provider must be active"),
+        ("Distance", "Must be within patient's max travel distance"),
+        ("Specialty", "Provider specialty must cover patient's condition"),
+        ("Gender Preference", "Honor patient's gender preference"),
+        ("Day Availability", "Provider must work one of patient's preferred days"),
+    ]
+
+    def __init__(
+        self,
+        distance_fn: Callable[[str, str], float] = None,
+        locate_fn: Callable[[str], Optional[Tuple[float, float]]] = None
+    ):
+        """
+        Args:
+            distance_fn: (zip1, zip2) -> miles
+            locate_fn: zip -> (lat, lon) or None; distances involving a zip
+                without a centroid are only estimates, so they stay UNKNOWN
+        """
+        if distance_fn is None or locate_fn is None:
+            from mcp_servers.domain.geo import get_zip_geo
+            geo = get_zip_geo()
+            distance_fn = distance_fn or geo.distance
+            locate_fn = locate_fn or geo.locate
+
+        self.distance_fn = distance_fn
+        self.locate_fn = locate_fn
+
+        # Cumulative counters across runs
+        self.candidates_evaluated = 0
+        self.decided_by_rules = 0
+        self.llm_calls_made = 0
+        self.llm_calls_avoided = 0
+
+    # ===== compilation =====
+
+    def compile(self, patient: Dict[str, Any], candidates: List[Dict[str, Any]] = None) -> List[Callable]:
+        """Build rule checks for one patient.
+
+        Args:
+            patient: Patient record
+            candidates: Full candidate list (a "preferred" gender preference is
+                only binding if some candidate passing the other rules satisfies it)
+
+        Returns:
+            List of provider -> (verdict, reason) callables in RULES order
+        """
+        patient = patient or {}
+        candidates = candidates or []
+
+        max_distance = distance_limit(patient)
+        patient_zip = patient.get("zip")
+        patient_located = self.locate_fn(patient_zip) is not None
+
+        required_specialty = (patient.get("condition_specialty_required") or "").strip().lower()
+
+        gender_pref = (patient.get("gender_preference") or "any").strip().lower()
+        gender_required = (patient.get("gender_preference_strength") or "preferred").lower() == "required"
+
+        preferred_days = {d.strip() for d in (patient.get("preferred_days") or "").split(",") if d.strip()}
+
+        def status_rule(provider):
+            status = provider.get("status")
+            if status == "active":
+                return PASS, "Active"
+            if not status:
+                return UNKNOWN, "Status not recorded"
+            return FAIL, f"Provider status is '{status}'"
+
+        def distance_rule(provider):
+            if max_distance is None:
+                return PASS, "No distance limit"
+            miles = self.distance_fn(patient_zip, provider.get("zip"))
+            if not patient_located or self.locate_fn(provider.get("zip")) is None:
+                return UNKNOWN, f"Distance estimated (~{miles:.1f} mi), zip not in centroid table"
+            if miles <= max_distance:
+                return PASS, f"{miles:.1f} mi"
+            return FAIL, f"Too far ({miles:.1f} mi > {max_distance} mi max)"
+
+        def specialty_rule(provider):
+            if not required_specialty:
+                return PASS, "No specialty required"
+            specialty = (provider.get("specialty") or "").lower()
+            if not specialty:
+                return UNKNOWN, "Provider specialty not recorded"
+            if required_specialty in specialty:
+                return PASS, provider.get("specialty")
+            if "physical therapy" in specialty:
+                # Policy 1.1 allows general/adjacent PT in some cases - needs judgment
+                return UNKNOWN, f"{provider.get('specialty')} vs required '{required_specialty}'"
+            return FAIL, f"Specialty '{provider.get('specialty')}' does not cover '{required_specialty}'"
+
+        def gender_rule(provider):
+            if gender_pref in ("any", ""):
+                return PASS, "No preference"
+            gender = (provider.get("gender") or "").lower()
+            if not gender:
+                return UNKNOWN, "Provider gender not recorded"
+            if gender == gender_pref:
+                return PASS, f"Matches {gender_pref} preference"
+            if gender_required or gender_available:
+                return FAIL, f"Patient prefers {gender_pref} provider"
+            return PASS, f"No {gender_pref} provider available (preference waived)"
+
+        def day_rule(provider):
+            if not preferred_days:
+                return PASS, "No day preference"
+            available_days = set(provider.get("available_days") or [])
+            if not available_days:
+                return UNKNOWN, "Provider schedule not recorded"
+            shared = preferred_days & available_days
+            if shared:
+                return PASS, ", ".join(sorted(shared))
+            return FAIL, f"Works {', '.join(sorted(available_days))}; patient wants {', '.join(sorted(preferred_days))}"
+
+        # Policy 2.1: the preference is waived only if no otherwise-viable candidate meets it
+        other_rules = [status_rule, distance_rule, specialty_rule, day_rule]
+        gender_available = gender_pref not in ("any", "") and any(
+            (c.get("gender") or "").lower() == gender_pref
+            and all(rule(c)[0] != FAIL for rule in other_rules)
+            for c in candidates
+        )
+
+        return [status_rule, distance_rule, specialty_rule, gender_rule, day_rule]
+
+    # ===== evaluation =====
+
+    def evaluate(self, patient: Dict[str, Any], candidates: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Apply compiled rules to every candidate.
+
+        Rules run in order; a candidate stops at its first FAIL, so each
+        elimination is attributed to exactly one rule.
+
+        Returns:
+            Dict with qualified / ambiguous provider IDs, eliminated_providers,
+            filters_applied (one entry per rule) and per-candidate verdicts
+        """
+        candidates = [c for c in candidates if c]
+        rules = self.compile(patient, candidates)
+
+        qualified = []
+        ambiguous = []
+        eliminated = {}
+        verdicts = {}
+        per_rule = [{"passed": [], "eliminated": [], "undecided": []} for _ in self.RULES]
+
+        for provider in candidates:
+            provider_id = provider.get("provider_id")
+            verdicts[provider_id] = {}
+            undecided = []
+            failed = False
+
+            for (name, _), rule, bucket in zip(self.RULES, rules, per_rule):
+                verdict, reason = rule(provider)
+                verdicts[provider_id][name] = {"verdict": verdict, "reason": reason}
+
+                if verdict == FAIL:
+                    bucket["eliminated"].append(provider_id)
+                    eliminated[provider_id] = {"reason": reason, "rule": name}
+                    failed = True
+                    break
+                elif verdict == UNKNOWN:
+                    bucket["undecided"].append(provider_id)
+                    undecided.append(name)
+                else:
+                    bucket["passed"].append(provider_id)
+
+            if failed:
+                continue
+            if undecided:
+                ambiguous.append(provider_id)
+            else:
+                qualified.append(provider_id)
+
+        filters_applied = [
+            {
+                "filter": name,
+                "passed": bucket["passed"],
+                "eliminated": bucket["eliminated"],
+                "undecided": bucket["undecided"],
+                "reason": description,
+                "method": "rule"
+            }
+            for (name, description), bucket in zip(self.RULES, per_rule)
+        ]
+
+        decided = len(candidates) - len(ambiguous)
+        self.candidates_evaluated += len(candidates)
+        self.decided_by_rules += decided
+
+        return {
+            "qualified": qualified,
+            "ambiguous": ambiguous,
+            "eliminated_providers": eliminated,
+            "filters_applied": filters_applied,
+            "verdicts": verdicts,
+            "decided": decided,
+            "llm_avoidance_rate": round(decided / len(candidates), 3) if candidates else 1.0
+        }
+
+    def record_llm_call(self, called: bool) -> None:
+        """Track whether the LLM was still needed after the rules ran."""
+        if called:
+            self.llm_calls_made += 1
+        else:
+            self.llm_calls_avoided += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cumulative rule engine statistics."""
+        runs = self.llm_calls_made + self.llm_calls_avoided
+        return {
+            "candidates_evaluated": self.candidates_evaluated,
+            "decided_by_rules": self.decided_by_rules,
+            "candidate_avoidance_rate": round(self.decided_by_rules / self.candidates_evaluated, 3)
+            if self.candidates_evaluated else 0.0,
+            "llm_calls_made": self.llm_calls_made,
+            "llm_calls_avoided": self.llm_calls_avoided,
+            "llm_call_avoidance_rate": round(self.llm_calls_avoided / runs, 3) if runs else 0.0
+        }
+
+
+def create_rule_engine(domain_server=None) -> RuleEngine:
+    """Factory function to create a rule engine (uses the domain server's distances if given)."""
+    if domain_server is not None and hasattr(domain_server, "geo"):
+        return RuleEngine(
+            distance_fn=domain_server.calculate_distance_between_zips,
+            locate_fn=domain_server.geo.locate
+        )
+    return RuleEngine()
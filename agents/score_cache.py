@@ -0,0 +1,204 @@
+"""Score Cache - memoized patient-provider match scores.
+
+The same patient-provider pair is scored many times in one session:
+- LangGraph loop: score → consent → next_provider → score
+- Template orchestrator fallbacks (rule-based and missing-patient paths)
+- LLM tool calls to ToolRegistry.calculate_match_score
+
+Scores are keyed by (patient_id, patient_version, provider_id, provider_version,
+appointment date). A record's version is its explicit "version" field when
+present, otherwise a fingerprint of its contents, so editing either record
+automatically produces a new key and drops the stale entries.
+"""
+
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Tuple
+
+
+def record_version(record: Optional[Dict[str, Any]]) -> str:
+    """Return a version string for a domain record.
+
+    Uses the record's own "version" field if it has one, otherwise a short
+    hash of its canonical JSON form.
+    """
+    if not record:
+        return ""
+
+    if record.get("version") is not None:
+        return str(record["version"])
+
+    canonical = json.dumps(record, sort_keys=True, default=str)
+    return hashlib.sha1(canonical.encode("utf-8")).hexdigest()[:12]
+
+
+class ScoreCache:
+    """Thread-safe LRU cache of match scores with version-based invalidation."""
+
+    def __init__(self, max_entries: int = None):
+        """
+        Args:
+            max_entries: Maximum cached scores (default: SCORE_CACHE_MAX_ENTRIES or 5000)
+        """
+        if max_entries is None:
+            max_entries = int(os.getenv("SCORE_CACHE_MAX_ENTRIES", "5000"))
+
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple, Dict[str, Any]]" = OrderedDict()
+        self._latest_versions: Dict[Tuple[str, str], str] = {}
+        self._keys_by_record: Dict[Tuple[str, str], set] = {}
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def make_key(
+        self,
+        patient: Dict[str, Any],
+        provider: Dict[str, Any],
+        appointment_date: Optional[str] = None,
+        context: Tuple = ()
+    ) -> Tuple:
+        """Build a cache key for a patient-provider pair.
+
+        Args:
+            patient: Patient record
+            provider: Provider record
+            appointment_date: Appointment date (only the YYYY-MM-DD part is used)
+            context: Extra key parts that change the score (scorer name,
+                original provider, ...)
+        """
+        date_part = (appointment_date or "").split("T")[0]
+        return (
+            patient.get("patient_id"), record_version(patient),
+            provider.get("provider_id"), record_version(provider),
+            date_part,
+            tuple(context)
+        )
+
+    def get(self, key: Tuple) -> Optional[Dict[str, Any]]:
+        """Return a copy of the cached score, or None on a miss."""
+        with self._lock:
+            self._observe_versions(key)
+
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return json.loads(json.dumps(entry))
+
+    def put(self, key: Tuple, score: Dict[str, Any]) -> None:
+        """Store a score result."""
+        with self._lock:
+            self._observe_versions(key)
+
+            self._entries[key] = json.loads(json.dumps(score, default=str))
+            self._entries.move_to_end(key)
+            for record_id in self._record_ids(key):
+                self._keys_by_record.setdefault(record_id, set()).add(key)
+
+            while len(self._entries) > self.max_entries:
+                old_key, _ = self._entries.popitem(last=False)
+                self._forget(old_key)
+                self.evictions += 1
+
+    def invalidate(self, patient_id: str = None, provider_id: str = None) -> int:
+        """Drop every cached score involving a patient and/or provider.
+
+        Version keys already handle edits made through the JSON files; this
+        is for callers that know a record changed before re-reading it.
+
+        Returns:
+            Number of entries removed
+        """
+        with self._lock:
+            removed = 0
+            targets = []
+            if patient_id:
+                targets.append(("patient", patient_id))
+            if provider_id:
+                targets.append(("provider", provider_id))
+
+            for record_id in targets:
+                for key in list(self._keys_by_record.get(record_id, ())):
+                    if self._entries.pop(key, None) is not None:
+                        removed += 1
+                    self._forget(key)
+
+            self.invalidations += removed
+            return removed
+
+    def clear(self) -> None:
+        """Remove all entries (counters are kept)."""
+        with self._lock:
+            self._entries.clear()
+            self._latest_versions.clear()
+            self._keys_by_record.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache hit/miss statistics."""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations
+        }
+
+    def reset_stats(self) -> None:
+        """Reset hit/miss counters."""
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    # ===== internal =====
+
+    @staticmethod
+    def _record_ids(key: Tuple):
+        return (("patient", key[0]), ("provider", key[2]))
+
+    def _observe_versions(self, key: Tuple) -> None:
+        """Purge entries built from an older version of either record."""
+        versions = (key[1], key[3])
+        for record_id, version in zip(self._record_ids(key), versions):
+            previous = self._latest_versions.get(record_id)
+            if previous is not None and previous != version:
+                stale = [k for k in self._keys_by_record.get(record_id, ())
+                         if (k[1] if record_id[0] == "patient" else k[3]) == previous]
+                for stale_key in stale:
+                    if self._entries.pop(stale_key, None) is not None:
+                        self.invalidations += 1
+                    self._forget(stale_key)
+            self._latest_versions[record_id] = version
+
+    def _forget(self, key: Tuple) -> None:
+        for record_id in self._record_ids(key):
+            keys = self._keys_by_record.get(record_id)
+            if keys:
+                keys.discard(key)
+                if not keys:
+                    del self._keys_by_record[record_id]
+
+
+# Shared cache so agents, orchestrator fallbacks and tool calls reuse each other's work
+_default_cache: Optional[ScoreCache] = None
+
+
+def get_score_cache() -> ScoreCache:
+    """Return the process-wide score cache."""
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = ScoreCache()
+    return _default_cache
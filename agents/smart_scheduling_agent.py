@@ -11,17 +11,27 @@ Uses real LLM by default (LM Studio or cloud API), with mock as fallback.
 """
 
 from typing import List, Dict, Any
+import json
 import sys
 import os
+import time
 from pathlib import Path
+from types import SimpleNamespace
 
 # Add parent to path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from adapters.llm.base import BaseLLM
 from adapters.llm.mock_llm import MockLLM
+from adapters.llm.resilience import CircuitOpenError, DeadlineExceededError
+from adapters.llm.cassette import CassetteMissError, wrap_with_cassette
 from mcp_servers.knowledge.file_knowledge_server import FileKnowledgeServer, create_file_knowledge_server
 from mcp_servers.domain.json_server import JSONDomainServer, create_json_domain_server
+from agents.score_cache import ScoreCache, get_score_cache, record_version
+from agents.match_scoring import compute_match_score, to_percent
+from agents.rule_engine import create_rule_engine
+from agents.prompt_codec import encode_patients, encode_providers, encode_record, count_tokens
+from config.llm_settings import settings as llm_settings
 
 
 # Import LiteLLM adapter if available
@@ -32,6 +42,37 @@ except ImportError:
     LITELLM_AVAILABLE = False
 
 
+# Scoring guidance shared by the scoring and fused filter+score prompts
+SCORING_FACTORS = """COMPREHENSIVE SCORING FACTORS (6 Use Cases):
+
+1. GENDER PREFERENCE (UC1): +15 points
+   - If patient prefers female → female provider gets bonus
+   
+2. TIME SLOT PRIORITY (UC2): +15 to +30 points
+   - Earlier available time slots = +15 points
+   - Same provider with earlier slot = +30 bonus (strong continuity!)
+   
+3. PRIOR PROVIDER CONTINUITY (UC3): +25 points
+   - Patient has seen this provider before = relationship bonus
+   
+4. EXPERIENCE MATCH (UC4): +20 points
+   - New provider has >= same years_experience as original provider
+   - Compare experience_level (junior < mid-level < senior)
+   
+5. PREFERRED DAY MATCH (UC5): +10 points
+   - Provider available on patient's preferred days
+   
+6. PROXIMITY (Distance): +20 to -10 points
+   - Same zip code = +20 points
+   - Adjacent zip codes (1-5 apart) = +10 points
+   - Far zip codes (10+ apart) = -10 points
+   - Exceeds max_distance_miles = disqualify (score = 0)
+
+ADDITIONAL FACTORS:
+- Specialty match = +30 points
+- Lower capacity utilization = +10 points (more availability)"""
+
+
 class SmartSchedulingAgent:
     """Smart Scheduling Agent - handles provider matching, scoring, and assignment.
     
@@ -46,7 +87,8 @@ class SmartSchedulingAgent:
         self,
         llm: BaseLLM = None,
         knowledge_server: FileKnowledgeServer = None,
-        domain_server: JSONDomainServer = None
+        domain_server: JSONDomainServer = None,
+        score_cache: ScoreCache = None
     ):
         """Initialize agent with service dependencies."""
         # Determine which LLM to use
@@ -91,8 +133,19 @@ class SmartSchedulingAgent:
                 self.llm = MockLLM()
                 llm_type = "Mock LLM (No LiteLLM config)"
         
+        # Record/replay real LLM calls through a cassette when LLM_CASSETTE_MODE is set
+        if not isinstance(self.llm, MockLLM):
+            self.llm = wrap_with_cassette(self.llm)
+        
         self.knowledge = knowledge_server or create_file_knowledge_server()
         self.domain = domain_server or create_json_domain_server()
+        self.score_cache = score_cache or get_score_cache()
+        self.rule_engine = create_rule_engine(self.domain)
+        self.llm_stats = {"calls": 0, "prompt_tokens": 0, "completion_tokens": 0, "latency_ms": 0.0, "unavailable": 0}
+        
+        # Compact prompt encoding + running before/after size of encoded sections
+        self.prompt_encoding = llm_settings.PROMPT_ENCODING
+        self.prompt_size = {"verbose_tokens": 0, "compact_tokens": 0}
         
         print(f"\n[AGENT] Smart Scheduling Agent initialized")
         print(f"[AGENT] LLM: {llm_type}")
@@ -157,7 +210,8 @@ class SmartSchedulingAgent:
         """
         UC2: Filter candidate providers based on compliance rules.
         
-        Uses LLM to apply filtering rules from knowledge base.
+        Hard constraints are decided by the deterministic rule engine first;
+        only candidates the rules can't decide are sent to the LLM.
         
         Args:
             patient_id: Patient ID
@@ -177,73 +231,106 @@ class SmartSchedulingAgent:
                            if a.get("appointment_id") == appointment_id), None)
         
         # Get candidate provider details
-        candidates = [self.domain.get_provider(pid) for pid in candidate_ids]
-        
-        # Get filtering rules from knowledge base
-        print(f"[REAL MCP] search_knowledge(query='provider matching filters', source='all')")
-        filter_rules = self.knowledge.search_knowledge(
-            query="provider matching filters",
-            source="all"
-        )
-        
-        # Use LLM to apply filters
-        if isinstance(self.llm, MockLLM):
-            # Mock mode - simple filtering logic
-            # Filter by specialty match
-            qualified = [c.get('provider_id') for c in candidates 
-                        if c.get('specialty') == patient.get('condition_specialty_required') 
-                        and c.get('status') == 'active']
-            print(f"  [Mock] Simple filtering: {len(qualified)} qualified")
-        else:
-            # Real LLM mode - use AI reasoning
-            prompt = f"""You are a healthcare scheduling assistant. Apply these filtering rules to find qualified providers.
+        candidates = [c for c in (self.domain.get_provider(pid) for pid in candidate_ids) if c]
+        
+        # Fast path: compiled policy rules (status, distance, specialty, gender, days)
+        rules = self.rule_engine.evaluate(patient, candidates)
+        qualified = list(rules["qualified"])
+        ambiguous = rules["ambiguous"]
+        eliminated = dict(rules["eliminated_providers"])
+        filters_applied = list(rules["filters_applied"])
+        print(f"  [RULES] {len(qualified)} passed, {len(eliminated)} eliminated, "
+              f"{len(ambiguous)} need review ({rules['llm_avoidance_rate']:.0%} decided by rules)")
+        
+        llm_called = False
+        if ambiguous:
+            pending = [c for c in candidates if c.get('provider_id') in ambiguous]
+            
+            # Use LLM to apply filters
+            if isinstance(self.llm, MockLLM):
+                # Mock mode - simple filtering logic
+                # Filter by specialty match
+                approved = [c.get('provider_id') for c in pending 
+                            if c.get('specialty') == patient.get('condition_specialty_required') 
+                            and c.get('status') == 'active']
+                print(f"  [Mock] Simple filtering: {len(approved)} of {len(pending)} ambiguous qualified")
+            else:
+                # Real LLM mode - only the undecided candidates and the rules they were undecided on
+                llm_called = True
+                
+                # Get filtering rules from knowledge base
+                print(f"[REAL MCP] search_knowledge(query='provider matching filters', source='all')")
+                filter_rules = self.knowledge.search_knowledge(
+                    query="provider matching filters",
+                    source="all"
+                )
+                
+                undecided = {
+                    pid: {rule: v["reason"] for rule, v in rules["verdicts"][pid].items() if v["verdict"] == "UNKNOWN"}
+                    for pid in ambiguous
+                }
+                sections = self._prompt_sections(patient, appointment, pending,
+                                                 "CANDIDATES (already passed all other hard rules)")
+                prompt = f"""You are a healthcare scheduling assistant. Apply these filtering rules to find qualified providers.
 
 FILTERING RULES:
 {filter_rules}
 
-PATIENT:
-{patient}
+{sections['patient']}
 
-APPOINTMENT:
-{appointment}
+{sections['appointment']}
 
-CANDIDATES:
-{candidates}
+{sections['providers']}
+
+UNDECIDED RULES PER CANDIDATE:
+{undecided}
 
 Return only the provider IDs that pass ALL filters, as a JSON array like ["P001", "P002"].
 """
-            response = self.llm.generate(
-                prompt=prompt,
-                system="You are a healthcare scheduling assistant. Be concise and return only valid JSON.",
-                max_tokens=500,
-                temperature=0.3
-            )
+                response = self._generate(prompt, max_tokens=500)
+                
+                # Parse response
+                try:
+                    approved = [pid for pid in json.loads(response.content.strip()) if pid in ambiguous]
+                except:
+                    # Fallback if JSON parsing fails
+                    print(f"[AGENT] Warning: Failed to parse LLM response, using all ambiguous candidates")
+                    approved = list(ambiguous)
             
-            # Parse response
-            import json
-            try:
-                qualified = json.loads(response.content.strip())
-            except:
-                # Fallback if JSON parsing fails
-                print(f"[AGENT] Warning: Failed to parse LLM response, using all candidates")
-                qualified = candidate_ids
+            rejected = [pid for pid in ambiguous if pid not in approved]
+            for pid in rejected:
+                eliminated[pid] = {"reason": "Did not meet all filters", "rule": "Policy Review"}
+            qualified.extend(approved)
+            filters_applied.append({
+                "filter": "Policy Review",
+                "passed": approved,
+                "eliminated": rejected,
+                "undecided": [],
+                "reason": "Candidates the rules could not decide",
+                "method": "llm" if llm_called else "mock"
+            })
+        
+        self.rule_engine.record_llm_call(llm_called)
         
         print(f"  ✓ Qualified: {qualified}")
         print(f"[UC2: FILTERING] {len(qualified)} provider(s) passed filters")
         
+        # Providers that couldn't be loaded at all
+        for pid in candidate_ids:
+            if pid not in qualified and pid not in eliminated:
+                eliminated[pid] = {"reason": "Provider not found", "rule": "Lookup"}
+        
         # Return structured result for UI
         return {
             "qualified_providers": qualified,
-            "eliminated_providers": {pid: {"reason": "Did not meet all filters"} 
-                                    for pid in candidate_ids if pid not in qualified},
-            "filters_applied": [
-                {
-                    "filter": "Specialty & Status",
-                    "passed": qualified,
-                    "eliminated": [pid for pid in candidate_ids if pid not in qualified],
-                    "reason": "Must match specialty and be active"
-                }
-            ]
+            "eliminated_providers": eliminated,
+            "filters_applied": filters_applied,
+            "rule_engine": {
+                "decided_by_rules": rules["decided"],
+                "sent_to_llm": len(ambiguous) if llm_called else 0,
+                "llm_called": llm_called,
+                "llm_avoidance_rate": rules["llm_avoidance_rate"]
+            }
         }
     
     def calculate_match_score(
@@ -287,205 +374,34 @@ Return only the provider IDs that pass ALL filters, as a JSON array like ["P001"
                 "error": "Patient or provider not found"
             }
         
-        # Scoring logic per USE_CASES.md (Total: 165 points)
-        score = 0  # Start from 0
-        breakdown = {}
-        
-        # Factor 1: Continuity Score (40 points) - UC3: Prior provider continuity
-        if provider.get('provider_id') in patient.get('prior_providers', []):
-            score += 40
-            breakdown['prior_provider_continuity'] = 40
-        else:
-            breakdown['prior_provider_continuity'] = 0
-        
-        # Factor 2: Specialty Match (35 points)
-        patient_specialty = patient.get('condition_specialty_required', '')
-        provider_specialty = provider.get('specialty', '')
-        if patient_specialty and provider_specialty:
-            if patient_specialty.lower() in provider_specialty.lower():
-                score += 35
-                breakdown['specialty_match'] = 35
-            elif 'physical therapy' in provider_specialty.lower():
-                # Partial match for general PT
-                score += 25
-                breakdown['specialty_match'] = 25
-            else:
-                breakdown['specialty_match'] = 0
-        else:
-            breakdown['specialty_match'] = 0
-        
-        # Factor 3: Patient Preference Fit (30 points) - includes gender, location, etc.
-        preference_score = 0
-        # Gender preference (15 pts)
-        patient_gender_pref = patient.get('gender_preference', 'any').lower()
-        provider_gender = provider.get('gender', '').lower()
-        
-        if patient_gender_pref == 'any' or patient_gender_pref == '':
-            # Patient has no gender preference - award full points
-            preference_score += 15
-            breakdown['gender_preference'] = 15
-        elif patient_gender_pref == provider_gender:
-            # Gender matches patient's preference
-            preference_score += 15
-            breakdown['gender_preference'] = 15
-        else:
-            # Gender doesn't match preference
-            breakdown['gender_preference'] = 0
-        
-        # Location/Proximity (15 pts for same zip)
-        patient_zip = patient.get('zip', '')
-        provider_zip = provider.get('zip', '')
-        
-        if patient_zip == provider_zip:
-            preference_score += 15
-            breakdown['proximity_same_zip'] = 15
-        else:
-            breakdown['proximity_same_zip'] = 0
-            
-            # Check if patient has max distance restriction
-            max_distance = patient.get('max_distance_miles', float('inf'))
-            if max_distance < 999:  # Only check if reasonable restriction
-                # Calculate approximate distance
-                estimated_distance = self.domain.calculate_distance_between_zips(patient_zip, provider_zip)
-                
-                if estimated_distance > max_distance:
-                    # Provider is too far - heavy penalty
-                    # Deduct 50 points (makes most matches fail threshold)
-                    score -= 50
-                    breakdown['distance_penalty'] = -50
-                    breakdown['estimated_distance'] = round(estimated_distance, 1)
-                    breakdown['max_allowed_distance'] = max_distance
-        
-        score += preference_score
-        breakdown['patient_preference_fit'] = preference_score
-        
-        # Factor 4: Schedule Load Balance (25 points)
-        current_load = provider.get('current_patient_load', 0)
-        max_capacity = provider.get('max_patient_capacity', 25)
-        if max_capacity > 0:
-            utilization = current_load / max_capacity
-            if utilization < 0.6:  # < 60% capacity
-                score += 25
-                breakdown['schedule_load_balance'] = 25
-            elif utilization < 0.8:  # 60-80% capacity
-                score += 15
-                breakdown['schedule_load_balance'] = 15
-            else:  # > 80% capacity
-                score += 5
-                breakdown['schedule_load_balance'] = 5
-        else:
-            breakdown['schedule_load_balance'] = 0
-        
-        # Factor 5: Experience Match (20 points) - UC4
-        if original:
-            # Existing patient - compare to original provider
-            if provider.get('years_experience', 0) >= original.get('years_experience', 0):
-                score += 20
-                breakdown['experience_match'] = 20
-            elif provider.get('years_experience', 0) >= (original.get('years_experience', 0) - 2):
-                # Within 2 years of original
-                score += 15
-                breakdown['experience_match'] = 15
-            else:
-                breakdown['experience_match'] = 0
-        else:
-            # New patient - award points based on provider's experience level
-            provider_exp = provider.get('years_experience', 0)
-            if provider_exp >= 10:
-                # Senior provider (10+ years)
-                score += 20
-                breakdown['experience_match'] = 20
-            elif provider_exp >= 5:
-                # Mid-level provider (5-9 years)
-                score += 15
-                breakdown['experience_match'] = 15
-            elif provider_exp >= 2:
-                # Junior provider (2-4 years)
-                score += 10
-                breakdown['experience_match'] = 10
-            else:
-                # Very junior (<2 years)
-                score += 5
-                breakdown['experience_match'] = 5
-        
-        # Factor 6: Time Slot Priority (15 points, +30 if same provider) - UC2
-        slots = provider.get('available_slots', [])
-        if slots:
-            earliest = min([s.get('time', '23:59') for s in slots if s.get('available', True)])
-            # Same provider with earlier slot gets bonus
-            if original and provider.get('provider_id') == original.get('provider_id'):
-                score += 30
-                breakdown['same_provider_earlier_slot'] = 30
-            elif earliest < "10:00":  # Morning slot
-                score += 15
-                breakdown['time_slot_priority'] = 15
-            elif earliest < "14:00":  # Early afternoon
-                score += 10
-                breakdown['time_slot_priority'] = 10
-            else:
-                breakdown['time_slot_priority'] = 0
-        else:
-            breakdown['time_slot_priority'] = 0
-        
-        # Factor 7: Day/Time Match (10 points) - UC5: Preferred day
-        # Check if the ACTUAL appointment date matches patient's preferred days
-        patient_preferred_days = patient.get('preferred_days', '').split(',')
-        patient_preferred_days = [day.strip() for day in patient_preferred_days if day.strip()]
-        
-        # Check if patient has weekend-only restriction
-        weekend_days = {'Saturday', 'Sunday'}
-        provider_available_days = set(provider.get('available_days', []))
-        
-        if patient_preferred_days:
-            patient_days_set = set(patient_preferred_days)
-            
-            # If patient ONLY wants weekends but provider ONLY works weekdays → impossible match
-            weekday_days = {'Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday'}
-            if patient_days_set.issubset(weekend_days) and provider_available_days.issubset(weekday_days):
-                # Impossible to match - heavy penalty
-                score -= 40
-                breakdown['impossible_day_match'] = -40
-                breakdown['patient_wants_weekends_only'] = True
-                breakdown['preferred_day_match'] = 0
-                breakdown['matching_days'] = []
-            else:
-                # Get the day of week from the appointment date
-                from datetime import datetime
-                appointment_date_str = appointment.get('date', '')
-                try:
-                    appointment_dt = datetime.fromisoformat(appointment_date_str.replace('Z', '+00:00'))
-                    appointment_day = appointment_dt.strftime('%A')  # e.g., "Friday"
-                    
-                    # Check if appointment day matches patient's preferred days
-                    if appointment_day in patient_preferred_days:
-                        score += 10
-                        breakdown['preferred_day_match'] = 10
-                        breakdown['matching_days'] = [appointment_day]
-                    else:
-                        breakdown['preferred_day_match'] = 0
-                        breakdown['matching_days'] = []
-                except:
-                    breakdown['preferred_day_match'] = 0
-                    breakdown['matching_days'] = []
-        else:
-            breakdown['preferred_day_match'] = 0
-            breakdown['matching_days'] = []
-        
-        # Determine recommendation (based on 165 point max)
-        if score >= 100:  # 60% of max (excellent match)
-            recommendation = "EXCELLENT"
-        elif score >= 80:  # 48% of max (good match)
-            recommendation = "GOOD"
-        elif score >= 60:  # 36% of max (acceptable match)
-            recommendation = "ACCEPTABLE"
-        else:  # < 60 points (poor match - needs HOD review)
-            recommendation = "POOR"
+        # Memoized by record versions - repeat lookups (LangGraph retry loop,
+        # orchestrator fallbacks) skip the rescoring
+        cache_key = self.score_cache.make_key(
+            patient,
+            provider,
+            appointment_date=(appointment or {}).get('date'),
+            context=("rules", original_provider_id or "", record_version(original))
+        )
+        cached = self.score_cache.get(cache_key)
+        if cached is not None:
+            return cached
         
-        return {
-            "total_score": score,
-            "breakdown": breakdown,
-            "recommendation": recommendation
-        }
+        result = self._compute_match_score(patient, provider, original, appointment)
+        self.score_cache.put(cache_key, result)
+        return result
+    
+    def _compute_match_score(
+        self,
+        patient: Dict[str, Any],
+        provider: Dict[str, Any],
+        original: Dict[str, Any] = None,
+        appointment: Dict[str, Any] = None
+    ) -> Dict[str, Any]:
+        """Rule-based 165-point score for already-loaded records (uncached)."""
+        return compute_match_score(
+            patient, provider, original, appointment,
+            distance_fn=self.domain.calculate_distance_between_zips
+        )
     
     def score_and_rank_providers(
         self,
@@ -518,130 +434,375 @@ Return only the provider IDs that pass ALL filters, as a JSON array like ["P001"
         # Get provider details
         providers = [self.domain.get_provider(pid) for pid in qualified_ids]
         
-        # Get scoring rules from knowledge base
-        print(f"[REAL MCP] search_knowledge(query='scoring weights continuity specialty', source='all')")
-        scoring_rules = self.knowledge.search_knowledge(
-            query="scoring weights continuity specialty",
-            source="all"
-        )
-        
         # Get original provider info for experience/continuity checks
         original_provider = None
         if appointment and appointment.get('provider_id'):
             original_provider = self.domain.get_provider(appointment.get('provider_id'))
         
-        # Use LLM to score providers
-        if isinstance(self.llm, MockLLM):
+        # Reuse pair scores from earlier passes (e.g. next_provider → score loop)
+        pair_keys = self._rank_cache_keys(patient, appointment, providers, original_provider)
+        scores = self._cached_rank_scores(pair_keys)
+        pending = [p for p in providers if p.get('provider_id') not in scores]
+        
+        # Use LLM to score providers (only pairs not already cached)
+        if pending and isinstance(self.llm, MockLLM):
             # Mock mode - simple scoring logic
-            scores = {}
-            for provider in providers:
-                score = 50  # Base score
-                # Bonus for specialty match
-                if provider.get('specialty') == patient.get('condition_specialty_required'):
-                    score += 30
-                # Bonus for gender match
-                if provider.get('gender') == patient.get('gender_preference'):
-                    score += 15
-                # Bonus for low capacity
-                if provider.get('capacity_utilization', 1.0) < 0.7:
-                    score += 10
-                # Bonus for prior provider continuity
-                if provider.get('provider_id') in patient.get('prior_providers', []):
-                    score += 25
-                # Bonus for experience match (UC4)
-                if original_provider and provider.get('years_experience', 0) >= original_provider.get('years_experience', 0):
-                    score += 20
-                # Bonus for earlier time slots (UC2)
-                if provider.get('available_slots'):
-                    earliest_slot = min([s.get('time', '23:59') for s in provider.get('available_slots', []) if s.get('available')])
-                    if earliest_slot < "10:00":
-                        score += 15  # Earlier slot bonus
-                    # Extra bonus if same provider with earlier slot
-                    if original_provider and provider.get('provider_id') == original_provider.get('provider_id'):
-                        score += 30  # Strong continuity + convenience
+            for provider in pending:
+                score = self._mock_provider_score(patient, provider, original_provider)
                 scores[provider.get('provider_id')] = score
+                self.score_cache.put(pair_keys[provider.get('provider_id')], {"total_score": score})
             print(f"  [Mock] Enhanced scoring: {scores}")
-        else:
+        elif pending:
             # Real LLM mode - use AI reasoning with zip-based proximity
-            original_provider_info = ""
-            if original_provider:
-                original_provider_info = f"""
-ORIGINAL PROVIDER (for comparison):
-- ID: {original_provider.get('provider_id')}
-- Name: {original_provider.get('name')}
-- Experience: {original_provider.get('years_experience', 'N/A')} years ({original_provider.get('experience_level', 'N/A')})
-- Specialty: {original_provider.get('specialty')}
-"""
+            # Get scoring rules from knowledge base
+            print(f"[REAL MCP] search_knowledge(query='scoring weights continuity specialty', source='all')")
+            scoring_rules = self.knowledge.search_knowledge(
+                query="scoring weights continuity specialty",
+                source="all"
+            )
             
+            sections = self._prompt_sections(patient, appointment, pending,
+                                             "PROVIDERS (with experience, time slots, and zip codes)",
+                                             original_provider)
             prompt = f"""You are a healthcare scheduling assistant. Score these providers using ALL 6 priority matching rules.
 
 SCORING RULES:
 {scoring_rules}
 
-PATIENT:
-- Name: {patient.get('name')}
-- Zip Code: {patient.get('zip')}
-- Max Distance: {patient.get('max_distance_miles', 10)} miles
-- Gender Preference: {patient.get('gender_preference', 'any')}
-- Condition: {patient.get('condition')}
-- Prior Providers: {patient.get('prior_providers', [])}
-- Preferred Days: {patient.get('preferred_days', 'any')}
+{sections['patient']}
 
-APPOINTMENT:
-{appointment}
+{sections['appointment']}
 
-{original_provider_info}
+{sections['original_provider']}
 
-PROVIDERS (with experience, time slots, and zip codes):
-{providers}
+{sections['providers']}
 
-COMPREHENSIVE SCORING FACTORS (6 Use Cases):
+{SCORING_FACTORS}
 
-1. GENDER PREFERENCE (UC1): +15 points
-   - If patient prefers female → female provider gets bonus
-   
-2. TIME SLOT PRIORITY (UC2): +15 to +30 points
-   - Earlier available time slots = +15 points
-   - Same provider with earlier slot = +30 bonus (strong continuity!)
-   
-3. PRIOR PROVIDER CONTINUITY (UC3): +25 points
-   - Patient has seen this provider before = relationship bonus
-   
-4. EXPERIENCE MATCH (UC4): +20 points
-   - New provider has >= same years_experience as original provider
-   - Compare experience_level (junior < mid-level < senior)
-   
-5. PREFERRED DAY MATCH (UC5): +10 points
-   - Provider available on patient's preferred days
-   
-6. PROXIMITY (Distance): +20 to -10 points
-   - Same zip code = +20 points
-   - Adjacent zip codes (1-5 apart) = +10 points
-   - Far zip codes (10+ apart) = -10 points
-   - Exceeds max_distance_miles = disqualify (score = 0)
+Score each provider from 0 to 100. Return scores as JSON object like {{"P001": 85, "P004": 40}}.
+"""
+            response = self._generate(prompt, max_tokens=1000)
+            
+            # Parse response
+            try:
+                llm_scores = json.loads(response.content.strip())
+            except:
+                # Fallback if JSON parsing fails (not cached)
+                print(f"[AGENT] Warning: Failed to parse LLM response, using default scores")
+                llm_scores = None
+            
+            self._store_rank_scores(pending, llm_scores, pair_keys, scores,
+                                    patient, appointment, original_provider)
+        
+        return self._build_ranking(patient, providers, scores)
+    
+    def filter_and_score(
+        self,
+        patient_id: str,
+        appointment_id: str,
+        candidate_ids: List[str]
+    ) -> Dict[str, Any]:
+        """
+        UC2 + UC3 fused: qualify and score candidates in ONE LLM round-trip.
+        
+        Same output as filter_candidates followed by score_and_rank_providers,
+        but patient, appointment, provider and knowledge payloads are sent once.
+        Rule-decided candidates and cached pair scores skip the LLM entirely.
+        
+        Args:
+            patient_id: Patient ID
+            appointment_id: Appointment ID
+            candidate_ids: List of candidate provider IDs
+            
+        Returns:
+            Dict with filter_result, score_result and llm usage for this call
+        """
+        print(f"\n{'='*60}")
+        print(f"[UC2+UC3: FUSED] Filtering and scoring {len(candidate_ids)} candidates")
+        print(f"{'='*60}")
+        
+        usage_before = dict(self.llm_stats)
+        
+        patient = self.domain.get_patient(patient_id)
+        appointment = next((a for a in self.domain.get_affected_appointments("ALL") 
+                           if a.get("appointment_id") == appointment_id), None)
+        candidates = [c for c in (self.domain.get_provider(pid) for pid in candidate_ids) if c]
+        original_provider = None
+        if appointment and appointment.get('provider_id'):
+            original_provider = self.domain.get_provider(appointment.get('provider_id'))
+        
+        # Rules decide what they can
+        rules = self.rule_engine.evaluate(patient, candidates)
+        qualified = list(rules["qualified"])
+        ambiguous = rules["ambiguous"]
+        eliminated = dict(rules["eliminated_providers"])
+        filters_applied = list(rules["filters_applied"])
+        print(f"  [RULES] {len(qualified)} passed, {len(eliminated)} eliminated, {len(ambiguous)} need review")
+        
+        # Everyone still in play needs a score (unless cached)
+        in_play = [c for c in candidates if c.get('provider_id') in qualified or c.get('provider_id') in ambiguous]
+        pair_keys = self._rank_cache_keys(patient, appointment, in_play, original_provider)
+        scores = self._cached_rank_scores(pair_keys)
+        unscored = [c for c in in_play if c.get('provider_id') not in scores]
+        
+        llm_called = False
+        approved = []
+        if isinstance(self.llm, MockLLM):
+            approved = [c.get('provider_id') for c in in_play
+                        if c.get('provider_id') in ambiguous
+                        and c.get('specialty') == patient.get('condition_specialty_required')
+                        and c.get('status') == 'active']
+            for provider in unscored:
+                score = self._mock_provider_score(patient, provider, original_provider)
+                scores[provider.get('provider_id')] = score
+                self.score_cache.put(pair_keys[provider.get('provider_id')], {"total_score": score})
+        elif ambiguous or unscored:
+            llm_called = True
+            print(f"[REAL MCP] search_knowledge(query='provider matching filters scoring weights', source='all')")
+            policy = self.knowledge.search_knowledge(
+                query="provider matching filters scoring weights",
+                source="all"
+            )
+            undecided = {
+                pid: {rule: v["reason"] for rule, v in rules["verdicts"][pid].items() if v["verdict"] == "UNKNOWN"}
+                for pid in ambiguous
+            }
+            sections = self._prompt_sections(patient, appointment,
+                                             [c for c in in_play if c.get('provider_id') in ambiguous or c in unscored],
+                                             "PROVIDERS (with experience, time slots, and zip codes)",
+                                             original_provider)
+            prompt = f"""You are a healthcare scheduling assistant. In ONE pass, decide which undecided candidates qualify and score every listed provider.
 
-ADDITIONAL FACTORS:
-- Specialty match = +30 points
-- Lower capacity utilization = +10 points (more availability)
+POLICY (filters and scoring):
+{policy}
+
+{sections['patient']}
+
+{sections['appointment']}
 
-Return scores as JSON object like {{"P001": 85, "P004": 40}}.
+{sections['original_provider']}
+
+{sections['providers']}
+
+UNDECIDED RULES PER CANDIDATE (qualify only if they pass):
+{undecided or "none"}
+
+PROVIDERS TO SCORE:
+{[c.get('provider_id') for c in unscored] or "none"}
+
+{SCORING_FACTORS}
+
+Score each provider from 0 to 100. Return JSON only, like {{"qualified": ["P001"], "scores": {{"P001": 85, "P004": 40}}}}.
 """
+            response = self._generate(prompt, max_tokens=1000)
+            
+            try:
+                parsed = json.loads(response.content.strip())
+                approved = [pid for pid in parsed.get("qualified", []) if pid in ambiguous]
+                llm_scores = parsed.get("scores")
+            except:
+                print(f"[AGENT] Warning: Failed to parse fused LLM response, keeping ambiguous candidates")
+                approved = list(ambiguous)
+                llm_scores = None
+            
+            self._store_rank_scores(unscored, llm_scores, pair_keys, scores,
+                                    patient, appointment, original_provider)
+        
+        if ambiguous:
+            rejected = [pid for pid in ambiguous if pid not in approved]
+            for pid in rejected:
+                eliminated[pid] = {"reason": "Did not meet all filters", "rule": "Policy Review"}
+            qualified.extend(approved)
+            filters_applied.append({
+                "filter": "Policy Review",
+                "passed": approved,
+                "eliminated": rejected,
+                "undecided": [],
+                "reason": "Candidates the rules could not decide",
+                "method": "llm" if llm_called else "mock"
+            })
+        self.rule_engine.record_llm_call(llm_called)
+        
+        for pid in candidate_ids:
+            if pid not in qualified and pid not in eliminated:
+                eliminated[pid] = {"reason": "Provider not found", "rule": "Lookup"}
+        
+        filter_result = {
+            "qualified_providers": qualified,
+            "eliminated_providers": eliminated,
+            "filters_applied": filters_applied,
+            "rule_engine": {
+                "decided_by_rules": rules["decided"],
+                "sent_to_llm": len(ambiguous) if llm_called else 0,
+                "llm_called": llm_called,
+                "llm_avoidance_rate": rules["llm_avoidance_rate"]
+            }
+        }
+        score_result = self._build_ranking(
+            patient, [c for c in in_play if c.get('provider_id') in qualified], scores
+        )
+        
+        return {
+            "filter_result": filter_result,
+            "score_result": score_result,
+            "llm_usage": {k: round(self.llm_stats[k] - usage_before[k], 1) for k in self.llm_stats}
+        }
+    
+    # ===== scoring helpers =====
+    
+    def _generate(self, prompt: str, max_tokens: int):
+        """LLM call with latency/token accounting (see llm_stats)."""
+        started = time.perf_counter()
+        try:
             response = self.llm.generate(
                 prompt=prompt,
                 system="You are a healthcare scheduling assistant. Be concise and return only valid JSON.",
-                max_tokens=1000,
+                max_tokens=max_tokens,
                 temperature=0.3
             )
-            
-            # Parse response
-            import json
-            try:
-                scores = json.loads(response.content.strip())
-            except:
-                # Fallback if JSON parsing fails
-                print(f"[AGENT] Warning: Failed to parse LLM response, using default scores")
-                scores = {pid: 50 for pid in qualified_ids}
-        
+        except (CircuitOpenError, DeadlineExceededError, CassetteMissError) as e:
+            # Backend unhealthy, out of time or not on the replay cassette: empty response → callers' rule-based fallback
+            print(f"[AGENT] LLM unavailable ({e}) - using rule-based fallback")
+            self.llm_stats["unavailable"] += 1
+            return SimpleNamespace(content="", usage={})
+        usage = getattr(response, "usage", None) or {}
+        self.llm_stats["calls"] += 1
+        self.llm_stats["prompt_tokens"] += usage.get("prompt_tokens", 0) or 0
+        self.llm_stats["completion_tokens"] += usage.get("completion_tokens", 0) or 0
+        self.llm_stats["latency_ms"] += (time.perf_counter() - started) * 1000
+        return response
+    
+    def _rank_cache_keys(self, patient, appointment, providers, original_provider) -> Dict[str, Any]:
+        """Score-cache keys for ranking scores (per scorer and original provider)."""
+        scorer = "mock" if isinstance(self.llm, MockLLM) else "llm"
+        original_id = original_provider.get('provider_id') if original_provider else ""
+        return {
+            provider.get('provider_id'): self.score_cache.make_key(
+                patient,
+                provider,
+                appointment_date=(appointment or {}).get('date'),
+                context=("rank", scorer, original_id, record_version(original_provider))
+            )
+            for provider in providers
+        }
+    
+    def _cached_rank_scores(self, pair_keys: Dict[str, Any]) -> Dict[str, Any]:
+        """Look up cached ranking scores; returns {provider_id: score} for hits."""
+        scores = {}
+        for provider_id, key in pair_keys.items():
+            cached = self.score_cache.get(key)
+            if cached is not None:
+                scores[provider_id] = cached["total_score"]
+        if scores:
+            print(f"  [CACHE] Reused {len(scores)} score(s), {len(pair_keys) - len(scores)} to compute")
+        return scores
+    
+    def _store_rank_scores(self, pending, llm_scores, pair_keys, scores,
+                           patient, appointment, original_provider) -> None:
+        """Merge LLM scores into scores and cache them.
+        
+        Providers the LLM did not score (unparseable or unavailable response)
+        get the rule-based match score instead, as a 0-100 percentage so it
+        ranks on the LLM's scale, uncached so a later LLM pass can still
+        score them.
+        """
+        llm_scores = llm_scores if isinstance(llm_scores, dict) else {}
+        for provider in pending:
+            provider_id = provider.get('provider_id')
+            if provider_id in llm_scores:
+                scores[provider_id] = llm_scores[provider_id]
+                self.score_cache.put(pair_keys[provider_id], {"total_score": llm_scores[provider_id]})
+            else:
+                scores[provider_id] = to_percent(self._compute_match_score(
+                    patient, provider, original_provider, appointment
+                )["total_score"])
+    
+    def _mock_provider_score(self, patient, provider, original_provider) -> int:
+        """Mock-mode ranking score (no LLM)."""
+        score = 50  # Base score
+        # Bonus for specialty match
+        if provider.get('specialty') == patient.get('condition_specialty_required'):
+            score += 30
+        # Bonus for gender match
+        if provider.get('gender') == patient.get('gender_preference'):
+            score += 15
+        # Bonus for low capacity
+        if provider.get('capacity_utilization', 1.0) < 0.7:
+            score += 10
+        # Bonus for prior provider continuity
+        if provider.get('provider_id') in patient.get('prior_providers', []):
+            score += 25
+        # Bonus for experience match (UC4)
+        if original_provider and provider.get('years_experience', 0) >= original_provider.get('years_experience', 0):
+            score += 20
+        # Bonus for earlier time slots (UC2)
+        if provider.get('available_slots'):
+            earliest_slot = min([s.get('time', '23:59') for s in provider.get('available_slots', []) if s.get('available')])
+            if earliest_slot < "10:00":
+                score += 15  # Earlier slot bonus
+            # Extra bonus if same provider with earlier slot
+            if original_provider and provider.get('provider_id') == original_provider.get('provider_id'):
+                score += 30  # Strong continuity + convenience
+        return score
+    
+    def _prompt_sections(
+        self,
+        patient: Dict[str, Any],
+        appointment: Dict[str, Any],
+        providers: List[Dict[str, Any]],
+        providers_title: str,
+        original_provider: Dict[str, Any] = None
+    ) -> Dict[str, str]:
+        """Encode the patient/appointment/provider payload of a prompt.
+        
+        Compact mode sends one header + one row per entity; the verbose form
+        is also measured so prompt_size shows the tokens saved.
+        """
+        verbose = {
+            "patient": self._format_patient_summary(patient),
+            "appointment": f"APPOINTMENT:\n{appointment}",
+            "original_provider": self._format_original_provider(original_provider),
+            "providers": f"{providers_title}:\n{providers}"
+        }
+        if self.prompt_encoding != "compact":
+            return verbose
+        
+        compact = {
+            "patient": encode_patients([patient], title="PATIENT"),
+            "appointment": encode_record("APPOINTMENT", appointment, ["appointment_id", "date", "time", "provider_id"]),
+            "original_provider": encode_record(
+                "ORIGINAL PROVIDER (for comparison)", original_provider,
+                ["provider_id", "name", "years_experience", "experience_level", "specialty"]
+            ) if original_provider else "",
+            "providers": encode_providers(providers, title=providers_title)
+        }
+        self.prompt_size["verbose_tokens"] += count_tokens("\n\n".join(verbose.values()))
+        self.prompt_size["compact_tokens"] += count_tokens("\n\n".join(compact.values()))
+        return compact
+    
+    def _format_patient_summary(self, patient: Dict[str, Any]) -> str:
+        return f"""PATIENT:
+- Name: {patient.get('name')}
+- Zip Code: {patient.get('zip')}
+- Max Distance: {patient.get('max_distance_miles', 10)} miles
+- Gender Preference: {patient.get('gender_preference', 'any')}
+- Condition: {patient.get('condition')}
+- Prior Providers: {patient.get('prior_providers', [])}
+- Preferred Days: {patient.get('preferred_days', 'any')}"""
+    
+    def _format_original_provider(self, original_provider: Dict[str, Any]) -> str:
+        if not original_provider:
+            return ""
+        return f"""
+ORIGINAL PROVIDER (for comparison):
+- ID: {original_provider.get('provider_id')}
+- Name: {original_provider.get('name')}
+- Experience: {original_provider.get('years_experience', 'N/A')} years ({original_provider.get('experience_level', 'N/A')})
+- Specialty: {original_provider.get('specialty')}
+"""
+    
+    def _build_ranking(self, patient, providers, scores) -> Dict[str, Any]:
+        """Combine providers with scores into the ranked result used by the UI."""
         # Combine providers with scores
         ranked = []
         for provider in providers:
@@ -683,7 +844,8 @@ Return scores as JSON object like {{"P001": 85, "P004": 40}}.
             "ranked_providers": ranked,
             "recommended_provider_id": ranked[0]["provider_id"] if ranked else None,
             "recommended_provider_name": ranked[0]["provider_name"] if ranked else None,
-            "total_candidates": len(ranked)
+            "total_candidates": len(ranked),
+            "score_cache": self.score_cache.get_stats()
         }
     
     def create_audit_log(
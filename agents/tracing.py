@@ -0,0 +1,218 @@
+"""Tracing - nested timing spans for workflow runs.
+
+Every orchestrator records where a run spends its time as a tree of spans
+(metadata prep, prompt compilation, LLM calls, booking I/O, LangGraph nodes,
+the six stages of the simple workflow). Each span has:
+
+- wall_ms: elapsed time
+- cpu_ms: CPU time of the thread that ran it (low CPU + high wall = waiting
+  on the LLM or I/O)
+- attributes: counts, tokens, ids set by the code being timed
+
+When a root span ends it is folded into per-span-name totals served by
+/metrics, and, if TRACE_EXPORT_PATH is set, its tree is appended to that
+JSONL file (one trace per line; export is off by default so nothing grows
+unbounded). Workflow results carry their own tree under "trace".
+
+The current span is a contextvar: spans opened in worker threads attach to
+the right parent when the worker function is wrapped with Tracer.bind().
+"""
+
+import contextvars
+import functools
+import json
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+
+_current_span: contextvars.ContextVar = contextvars.ContextVar("current_span", default=None)
+
+
+def default_trace_path() -> str:
+    """TRACE_EXPORT_PATH (unset or "" disables export)."""
+    return os.getenv("TRACE_EXPORT_PATH", "")
+
+
+class Span:
+    """One timed operation; children are the spans opened while it ran."""
+
+    def __init__(self, name: str, attributes: Dict[str, Any], parent: Optional["Span"] = None):
+        self.name = name
+        self.attributes = dict(attributes)
+        self.parent = parent
+        self.trace_id = parent.trace_id if parent else uuid.uuid4().hex[:12]
+        self.children: List["Span"] = []
+        self.started_at = datetime.now().isoformat()
+        self._wall_start = time.perf_counter()
+        self._cpu_start = time.thread_time()
+        self.wall_ms: Optional[float] = None
+        self.cpu_ms: Optional[float] = None
+
+    def set(self, **attributes) -> None:
+        """Add or update attributes (counts, tokens, ...)."""
+        self.attributes.update(attributes)
+
+    def finish(self) -> None:
+        self.wall_ms = round((time.perf_counter() - self._wall_start) * 1000, 2)
+        self.cpu_ms = round((time.thread_time() - self._cpu_start) * 1000, 2)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Span tree as plain JSON-serializable dicts."""
+        return {
+            "name": self.name,
+            "trace_id": self.trace_id,
+            "started_at": self.started_at,
+            "wall_ms": self.wall_ms,
+            "cpu_ms": self.cpu_ms,
+            "attributes": self.attributes,
+            "children": [child.to_dict() for child in list(self.children)]
+        }
+
+
+class Tracer:
+    """Creates spans, exports finished traces and keeps per-name totals."""
+
+    def __init__(self, export_path: Optional[str] = None, recent_traces: int = 20):
+        """
+        Args:
+            export_path: JSONL file for finished traces (default: default_trace_path(); "" disables)
+            recent_traces: Root span summaries kept for get_stats()
+        """
+        if export_path is None:
+            export_path = default_trace_path()
+        self.export_path = Path(export_path) if export_path else None
+        self._lock = threading.Lock()
+        self._totals: Dict[str, Dict[str, float]] = {}
+        self._recent = deque(maxlen=recent_traces)
+        self.traces = 0
+        self.exported = 0
+        self.export_errors = 0
+
+    @contextmanager
+    def span(self, name: str, **attributes):
+        """
+        Time a block as a child of the current span (or as a new trace).
+
+        Usage:
+            with tracer.span("metadata", provider_id=provider_id) as span:
+                ...
+                span.set(appointments=len(appointments))
+        """
+        parent = _current_span.get()
+        span = Span(name, attributes, parent)
+        if parent is not None:
+            with self._lock:
+                parent.children.append(span)
+        token = _current_span.set(span)
+        try:
+            yield span
+        except Exception as e:
+            span.set(error=f"{type(e).__name__}: {e}"[:200])
+            raise
+        finally:
+            span.finish()
+            _current_span.reset(token)
+            self._record(span)
+
+    def current(self) -> Optional[Span]:
+        """Innermost open span in this context, or None."""
+        return _current_span.get()
+
+    def bind(self, fn):
+        """Wrap fn so spans it opens (e.g. in a thread pool) nest under the current span."""
+        context = contextvars.copy_context()
+
+        @functools.wraps(fn)
+        def run(*args, **kwargs):
+            return context.copy().run(fn, *args, **kwargs)
+        return run
+
+    def _record(self, span: Span) -> None:
+        with self._lock:
+            totals = self._totals.setdefault(
+                span.name, {"count": 0, "wall_ms": 0.0, "cpu_ms": 0.0, "max_wall_ms": 0.0, "errors": 0}
+            )
+            totals["count"] += 1
+            totals["wall_ms"] += span.wall_ms
+            totals["cpu_ms"] += span.cpu_ms
+            totals["max_wall_ms"] = max(totals["max_wall_ms"], span.wall_ms)
+            totals["errors"] += 1 if "error" in span.attributes else 0
+            if span.parent is None:
+                self.traces += 1
+                self._recent.append({"trace_id": span.trace_id, "name": span.name,
+                                     "started_at": span.started_at, "wall_ms": span.wall_ms,
+                                     "cpu_ms": span.cpu_ms})
+        if span.parent is None:
+            self._export(span)
+
+    def _export(self, span: Span) -> None:
+        if self.export_path is None:
+            return
+        try:
+            line = json.dumps(span.to_dict(), default=str)
+            with self._lock:
+                self.export_path.parent.mkdir(parents=True, exist_ok=True)
+                with open(self.export_path, "a") as f:
+                    f.write(line + "\n")
+                self.exported += 1
+        except OSError as e:
+            self.export_errors += 1
+            print(f"[TRACE] ⚠️  Could not export trace to {self.export_path}: {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Per-span-name totals and the most recent traces."""
+        with self._lock:
+            spans = {
+                name: dict(
+                    {k: round(v, 2) for k, v in totals.items()},
+                    avg_wall_ms=round(totals["wall_ms"] / totals["count"], 2)
+                )
+                for name, totals in self._totals.items()
+            }
+            return {
+                "traces": self.traces,
+                "exported": self.exported,
+                "export_errors": self.export_errors,
+                "export_path": str(self.export_path) if self.export_path else None,
+                "spans": spans,
+                "recent": list(self._recent)
+            }
+
+    def reset(self) -> None:
+        """Clear totals (the export file is left as is)."""
+        with self._lock:
+            self._totals.clear()
+            self._recent.clear()
+            self.traces = self.exported = self.export_errors = 0
+
+
+def traced(name: str):
+    """Run a workflow entry point in a span and attach its span tree to the result as "trace"."""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def run(*args, **kwargs):
+            with get_tracer().span(name) as span:
+                result = fn(*args, **kwargs)
+            if isinstance(result, dict):
+                result["trace"] = span.to_dict()
+            return result
+        return run
+    return decorator
+
+
+# Process-wide tracer
+_default_tracer: Optional[Tracer] = None
+
+
+def get_tracer() -> Tracer:
+    """Return the process-wide tracer."""
+    global _default_tracer
+    if _default_tracer is None:
+        _default_tracer = Tracer()
+    return _default_tracer
@@ -7,13 +7,32 @@ Files:
 - data/appointments.json
 - data/providers.json
 - data/patients.json
+
+Read-modify-write updates are serialized process-wide (bookings, status
+changes and background writers such as decision-first explanations share
+one lock), and files are replaced atomically so readers never see a
+half-written file.
 """
 
+import functools
 import json
 import os
+import threading
 from typing import List, Dict, Any, Optional
 from pathlib import Path
 
+# Shared by every JSONClient in the process - they may point at the same files
+_WRITE_LOCK = threading.RLock()
+
+
+def _serialized(method):
+    """Run a read-modify-write method under the process-wide write lock."""
+    @functools.wraps(method)
+    def run(*args, **kwargs):
+        with _WRITE_LOCK:
+            return method(*args, **kwargs)
+    return run
+
 
 class JSONClient:
     """Simple JSON file client for reading appointment/provider/patient data."""
@@ -59,10 +78,12 @@ class JSONClient:
             return []
     
     def _save_json(self, file_path: Path, data: List[Dict[str, Any]]) -> bool:
-        """Save JSON file."""
+        """Save JSON file (written to a temp file, then swapped in)."""
         try:
-            with open(file_path, 'w') as f:
+            tmp = file_path.with_suffix(f".{threading.get_ident()}.tmp")
+            with open(tmp, 'w') as f:
                 json.dump(data, f, indent=2)
+            tmp.replace(file_path)
             return True
         except Exception as e:
             print(f"❌ Error saving {file_path}: {str(e)}")
@@ -110,6 +131,7 @@ class JSONClient:
         print(f"⚠️  Appointment {appointment_id} not found")
         return None
     
+    @_serialized
     def book_appointment(self, appointment_data: Dict[str, Any]) -> Dict[str, Any]:
         """Book/update an appointment.
         
@@ -190,6 +212,7 @@ class JSONClient:
         print(f"👥 Found {len(filtered)} {status} providers")
         return filtered
     
+    @_serialized
     def update_provider_status(self, provider_id: str, status: str, unavailable_dates: List[str] = None) -> bool:
         """Update provider status and unavailable dates.
         
@@ -223,6 +246,7 @@ class JSONClient:
     
     # ===== PATIENTS =====
     
+    @_serialized
     def update_appointment(self, appointment_id: str, updates: dict) -> bool:
         """Update an appointment with new data."""
         try:
@@ -290,6 +314,26 @@ class JSONClient:
         print(f"⚠️  Patient {patient_id} not found")
         return None
     
+    def get_patients(self, patient_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Get several patients with one file read.
+        
+        Args:
+            patient_ids: Patient IDs (duplicates allowed)
+        
+        Returns:
+            Dict of patient_id -> patient dictionary (missing IDs are omitted)
+        """
+        wanted = set(patient_ids)
+        patients = {
+            patient.get("patient_id"): patient
+            for patient in self._load_json(self.patients_file)
+            if patient.get("patient_id") in wanted
+        }
+        missing = wanted - patients.keys()
+        if missing:
+            print(f"⚠️  Patients not found: {', '.join(sorted(missing))}")
+        return patients
+    
     def get_all_patients(self) -> List[Dict[str, Any]]:
         """Get all patients.
         
@@ -327,6 +371,7 @@ class JSONClient:
         print(f"📋 Found {len(filtered)} waitlist entries")
         return filtered
     
+    @_serialized
     def add_to_waitlist(self, waitlist_entry: Dict[str, Any]) -> Dict[str, Any]:
         """Add patient to waitlist.
         
@@ -363,6 +408,7 @@ class JSONClient:
         else:
             return {"status": "ERROR", "message": "Failed to save waitlist"}
     
+    @_serialized
     def remove_from_waitlist(self, waitlist_id: str) -> bool:
         """Remove patient from waitlist.
         
@@ -403,6 +449,7 @@ class JSONClient:
         print(f"📅 Found {len(filtered)} {status} freed slots")
         return filtered
     
+    @_serialized
     def add_freed_slot(self, slot_data: Dict[str, Any]) -> Dict[str, Any]:
         """Add a freed appointment slot.
         
@@ -431,6 +478,7 @@ class JSONClient:
         else:
             return {"status": "ERROR", "message": "Failed to save freed slot"}
     
+    @_serialized
     def backfill_slot(self, slot_id: str, patient_id: str, appointment_id: str) -> bool:
         """Mark a freed slot as backfilled.
         
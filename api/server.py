@@ -18,6 +18,7 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from api.json_client import JSONClient
+from workflows.plan_store import PlanStore, default_plan_path
 
 # Define paths
 PROJECT_ROOT = Path(__file__).parent.parent
@@ -196,6 +197,21 @@ async def health_check():
         message="Healthcare Operations Assistant API is running"
     )
 
+@app.get(
+    "/metrics",
+    tags=["System"],
+    summary="Workflow Metrics",
+    description="Per-span timing totals (wall/CPU ms) of workflow runs in this process, plus cache stats"
+)
+async def metrics():
+    """Tracing totals by span name and the most recent traces (full trees are in the JSONL export)."""
+    from agents.tracing import get_tracer
+    from agents.score_cache import get_score_cache
+    return {
+        "tracing": get_tracer().get_stats(),
+        "score_cache": get_score_cache().get_stats()
+    }
+
 @app.get(
     "/",
     response_class=HTMLResponse,
@@ -691,9 +707,15 @@ async def reassign_appointment(appointment_id: str, request: AppointmentReassign
 # Workflow Trigger Endpoint
 # ============================================================
 
+class ProviderOutage(BaseModel):
+    provider_id: str
+    start_date: str
+    end_date: Optional[str] = None  # Defaults to start_date
+
 class WorkflowTriggerRequest(BaseModel):
     trigger_type: str  # provider_unavailable, patient_request, etc.
     provider_id: Optional[str] = None
+    outages: Optional[List[ProviderOutage]] = None  # NEW: several providers in one planning pass (clinic closure)
     patient_id: Optional[str] = None
     reason: Optional[str] = None
     date: Optional[str] = None  # Deprecated: use start_date/end_date
@@ -797,13 +819,39 @@ async def trigger_workflow(request: WorkflowTriggerRequest):
         )
         
         # Prepare input based on trigger type
-        if request.trigger_type == "provider_unavailable":
+        if request.trigger_type == "provider_unavailable" and request.outages:
+            # Clinic closure: all providers planned together with shared capacity
+            result = orchestrator.execute_multi_provider_workflow(
+                outages=[outage.model_dump() for outage in request.outages],
+                reason=request.reason or "unavailable"
+            )
+            assignment_method = result.get("assignment_method", "llm-template-driven")
+            used_fallback = result.get("used_fallback", False)
+            workflow_type = "provider_unavailable (MULTI-PROVIDER" + (", RULE-BASED FALLBACK)" if used_fallback else ")")
+            
+            return {
+                "success": True,
+                "workflow_type": workflow_type,
+                "assignment_method": assignment_method,
+                "used_fallback": used_fallback,
+                "provider_ids": result.get("provider_ids", []),
+                "affected_appointments_count": result.get("total_affected", 0),
+                "assignments": result.get("assignments", []),
+                "emails_sent": result.get("successful_assignments", 0),
+                "waitlist_count": result.get("waitlist_entries", 0),
+                "by_provider": result.get("by_provider", {}),
+                "message": f"✅ {len(request.outages)} providers, {result.get('total_affected', 0)} appointments processed in one pass",
+                "details": result,
+                "metadata": result.get("metadata", {})
+            }
+        elif request.trigger_type == "provider_unavailable":
             # Support date range (start_date/end_date) or single date (backward compatibility)
             start_date = request.start_date or request.date or datetime.now().date().isoformat()
             end_date = request.end_date or start_date
             
             # Execute template-driven workflow with date range
-            result = orchestrator.execute_workflow(
+            # (a changed window for the same provider only processes the new dates)
+            result = orchestrator.replan(
                 provider_id=request.provider_id,
                 start_date=start_date,
                 end_date=end_date,
@@ -1209,6 +1257,9 @@ async def reset_demo(request: DemoResetRequest):
         with open(providers_file, 'w') as f:
             json.dump(providers, f, indent=2)
         
+        # Forget stored re-plan windows (they describe the data just replaced)
+        PlanStore(default_plan_path()).clear()
+        
         return {
             "success": True,
             "message": "Demo data reset successfully",
@@ -34,6 +34,9 @@ class LLMSettings:
     # Connection timeout in seconds
     CONNECTION_TIMEOUT = int(os.getenv("LLM_CONNECTION_TIMEOUT", "30"))  # 30 seconds
     
+    # Deadline for one logical call including retries and backoff
+    CALL_DEADLINE = float(os.getenv("LLM_CALL_DEADLINE", "180"))  # 3 minutes
+    
     
     # ============================================================
     # Token Settings
@@ -73,6 +76,30 @@ class LLMSettings:
     # Retry delay in seconds
     RETRY_DELAY = int(os.getenv("LLM_RETRY_DELAY", "2"))
     
+    # Upper bound of one backoff delay (delay doubles per retry)
+    RETRY_MAX_BACKOFF = float(os.getenv("LLM_RETRY_MAX_BACKOFF", "30"))
+    
+    
+    # ============================================================
+    # Hedging / Circuit Breaker Settings (adapters/llm/resilience.py)
+    # ============================================================
+    
+    # Send a duplicate request to HEDGE_MODEL when a call runs past p95 latency
+    HEDGE_ENABLED = os.getenv("LLM_HEDGE_ENABLED", "false").lower() == "true"
+    
+    # Fallback model for hedged requests (LiteLLM model name; endpoint/key from LiteLLM env vars)
+    HEDGE_MODEL = os.getenv("LLM_HEDGE_MODEL", "")
+    
+    # Latency percentile that triggers a hedge, and samples needed first
+    HEDGE_PERCENTILE = float(os.getenv("LLM_HEDGE_PERCENTILE", "0.95"))
+    HEDGE_MIN_SAMPLES = int(os.getenv("LLM_HEDGE_MIN_SAMPLES", "20"))
+    
+    # Consecutive transient failures before a model is marked unhealthy
+    CIRCUIT_FAILURE_THRESHOLD = int(os.getenv("LLM_CIRCUIT_FAILURE_THRESHOLD", "5"))
+    
+    # Seconds an unhealthy model is skipped before a trial call
+    CIRCUIT_RESET_SECONDS = float(os.getenv("LLM_CIRCUIT_RESET_SECONDS", "30"))
+    
     
     # ============================================================
     # Model Settings
@@ -88,6 +115,151 @@ class LLMSettings:
     LITELLM_API_KEY = os.getenv("LITELLM_API_KEY", "sk-1234")
     
     
+    # ============================================================
+    # Prompt Encoding Settings
+    # ============================================================
+    
+    # "compact" = header + one row per entity (agents/prompt_codec.py)
+    # "verbose" = one prose line per attribute
+    PROMPT_ENCODING = os.getenv("LLM_PROMPT_ENCODING", "compact").lower()
+    
+    
+    # ============================================================
+    # Sharding / Streaming Settings (TemplateDrivenOrchestrator)
+    # ============================================================
+    
+    # Prompt token budget per shard (patients + providers + instructions)
+    SHARD_INPUT_TOKENS = int(os.getenv("LLM_SHARD_INPUT_TOKENS", "12000"))
+    
+    # Expected output tokens per assignment (caps shard size by ORCHESTRATOR_MAX_TOKENS)
+    SHARD_OUTPUT_TOKENS_PER_APPOINTMENT = int(os.getenv("LLM_SHARD_OUTPUT_TOKENS_PER_APPOINTMENT", "200"))
+    
+    # Allowance for the prompt template's instructions (not counted by the codec)
+    SHARD_TEMPLATE_TOKENS = int(os.getenv("LLM_SHARD_TEMPLATE_TOKENS", "2500"))
+    
+    # Shards planned concurrently
+    SHARD_MAX_PARALLEL = int(os.getenv("LLM_SHARD_MAX_PARALLEL", "4"))
+    
+    # Stream the orchestrator response and execute assignments as they arrive
+    ORCHESTRATOR_STREAMING = os.getenv("LLM_ORCHESTRATOR_STREAMING", "true").lower() == "true"
+    
+    
+    # ============================================================
+    # Decision-First Settings (TemplateDrivenOrchestrator)
+    # ============================================================
+    
+    # Commit assignments from the deterministic scorer right away;
+    # LLM narratives for the audit trail / UI are written in the background
+    ORCHESTRATOR_DECISION_FIRST = os.getenv("LLM_ORCHESTRATOR_DECISION_FIRST", "false").lower() == "true"
+    
+    # Decisions explained per background LLM call
+    EXPLANATION_BATCH_SIZE = int(os.getenv("LLM_EXPLANATION_BATCH_SIZE", "20"))
+    
+    
+    # ============================================================
+    # Tool Calling Settings (workflows/prompt_driven_orchestrator.py)
+    # ============================================================
+    
+    # Independent read-only tool calls from one LLM turn run concurrently (threads)
+    TOOL_MAX_PARALLEL = int(os.getenv("LLM_TOOL_MAX_PARALLEL", "8"))
+    
+    # Bounded conversation context (workflows/tool_context.py)
+    TOOL_RESULT_MAX_CHARS = int(os.getenv("LLM_TOOL_RESULT_MAX_CHARS", "4000"))  # larger results are summarized
+    TOOL_CONTEXT_KEEP_TURNS = int(os.getenv("LLM_TOOL_CONTEXT_KEEP_TURNS", "2"))  # turns sent verbatim
+    TOOL_CONTEXT_SUMMARY_LINES = int(os.getenv("LLM_TOOL_CONTEXT_SUMMARY_LINES", "40"))  # folded read calls / actions kept
+    
+    
+    # ============================================================
+    # Response Cache Settings
+    # ============================================================
+    
+    # Cache identical LLM requests (see config/cost_limits.yaml optimization.caching)
+    RESPONSE_CACHE_ENABLED = os.getenv("LLM_RESPONSE_CACHE_ENABLED", "true").lower() == "true"
+    
+    # How long a cached response stays valid (seconds)
+    RESPONSE_CACHE_TTL_SECONDS = int(os.getenv("LLM_RESPONSE_CACHE_TTL_SECONDS", "3600"))  # 1 hour
+    
+    # In-memory LRU size (entries)
+    RESPONSE_CACHE_MAX_MEMORY_ENTRIES = int(os.getenv("LLM_RESPONSE_CACHE_MAX_MEMORY_ENTRIES", "256"))
+    
+    # On-disk (SQLite) size limit (entries)
+    RESPONSE_CACHE_MAX_DISK_ENTRIES = int(os.getenv("LLM_RESPONSE_CACHE_MAX_DISK_ENTRIES", "5000"))
+    
+    # SQLite file for the on-disk tier (empty = memory only)
+    RESPONSE_CACHE_PATH = os.getenv(
+        "LLM_RESPONSE_CACHE_PATH",
+        str(Path(__file__).parent.parent / ".cache" / "llm_responses.sqlite")
+    )
+    
+    # Requests above this temperature are never cached (creative output)
+    RESPONSE_CACHE_MAX_TEMPERATURE = float(os.getenv("LLM_RESPONSE_CACHE_MAX_TEMPERATURE", "0.5"))
+    
+    
+    # ============================================================
+    # Cassette Settings (adapters/llm/cassette.py)
+    # ============================================================
+    
+    # Record real LLM calls to a cassette or replay them offline: off, record, replay, auto
+    CASSETTE_MODE = os.getenv("LLM_CASSETTE_MODE", "off").lower()
+    
+    # Cassette file (JSON lines)
+    CASSETTE_PATH = os.getenv(
+        "LLM_CASSETTE_PATH",
+        str(Path(__file__).parent.parent / ".cache" / "llm_cassette.jsonl")
+    )
+    
+    # Sleep the recorded latency on replay (realistic throughput benchmarks)
+    CASSETTE_SIMULATE_LATENCY = os.getenv("LLM_CASSETTE_SIMULATE_LATENCY", "false").lower() == "true"
+    
+    # Multiplier for simulated latency (e.g. 0.1 = 10x faster than recorded)
+    CASSETTE_LATENCY_SCALE = float(os.getenv("LLM_CASSETTE_LATENCY_SCALE", "1.0"))
+    
+    
+    # ============================================================
+    # HTTP Connection Pool Settings
+    # ============================================================
+    
+    # Shared keep-alive pool used by all LLM adapters (adapters/llm/http_pool.py)
+    HTTP_MAX_CONNECTIONS = int(os.getenv("LLM_HTTP_MAX_CONNECTIONS", "50"))
+    HTTP_MAX_KEEPALIVE = int(os.getenv("LLM_HTTP_MAX_KEEPALIVE", "20"))
+    HTTP_KEEPALIVE_EXPIRY = float(os.getenv("LLM_HTTP_KEEPALIVE_EXPIRY", "60"))  # seconds
+    HTTP_TIMEOUT_SECONDS = float(os.getenv("LLM_HTTP_TIMEOUT_SECONDS", "60"))
+    
+    
+    # ============================================================
+    # Concurrency Settings
+    # ============================================================
+    
+    # Share one upstream call among concurrent identical requests
+    SINGLE_FLIGHT_ENABLED = os.getenv("LLM_SINGLE_FLIGHT_ENABLED", "true").lower() == "true"
+    
+    # Max in-flight requests per model (match the provider's rate limit)
+    MAX_CONCURRENT_REQUESTS = int(os.getenv("LLM_MAX_CONCURRENT_REQUESTS", "8"))
+    
+    # Per-model overrides, e.g. "gpt-4o-mini=20,azure/gpt-5-chat=5"
+    MODEL_CONCURRENCY_LIMITS = os.getenv("LLM_MODEL_CONCURRENCY", "")
+    
+    
+    # ============================================================
+    # Budget Settings
+    # ============================================================
+    
+    # Enforce config/cost_limits.yaml (daily limits + fallback chain routing)
+    BUDGET_ENABLED = os.getenv("LLM_BUDGET_ENABLED", "true").lower() == "true"
+    
+    # Cost limits file
+    COST_LIMITS_PATH = os.getenv(
+        "LLM_COST_LIMITS_PATH",
+        str(Path(__file__).parent / "cost_limits.yaml")
+    )
+    
+    # Daily spend ledger (JSON, persisted across restarts)
+    BUDGET_LEDGER_PATH = os.getenv(
+        "LLM_BUDGET_LEDGER_PATH",
+        str(Path(__file__).parent.parent / ".cache" / "llm_budget.json")
+    )
+    
+    
     # ============================================================
     # Fallback Settings
     # ============================================================
@@ -117,6 +289,7 @@ class LLMSettings:
             "timeouts": {
                 "request_timeout": cls.REQUEST_TIMEOUT,
                 "connection_timeout": cls.CONNECTION_TIMEOUT,
+                "call_deadline": cls.CALL_DEADLINE,
             },
             "tokens": {
                 "orchestrator_max_tokens": cls.ORCHESTRATOR_MAX_TOKENS,
@@ -131,11 +304,68 @@ class LLMSettings:
             "retry": {
                 "max_retries": cls.MAX_RETRIES,
                 "retry_delay": cls.RETRY_DELAY,
+                "retry_max_backoff": cls.RETRY_MAX_BACKOFF,
+            },
+            "resilience": {
+                "hedge_enabled": cls.HEDGE_ENABLED,
+                "hedge_model": cls.HEDGE_MODEL,
+                "hedge_percentile": cls.HEDGE_PERCENTILE,
+                "hedge_min_samples": cls.HEDGE_MIN_SAMPLES,
+                "circuit_failure_threshold": cls.CIRCUIT_FAILURE_THRESHOLD,
+                "circuit_reset_seconds": cls.CIRCUIT_RESET_SECONDS,
             },
             "model": {
                 "orchestrator_model": cls.ORCHESTRATOR_MODEL,
                 "litellm_base_url": cls.LITELLM_BASE_URL,
             },
+            "prompt_encoding": cls.PROMPT_ENCODING,
+            "sharding": {
+                "input_tokens": cls.SHARD_INPUT_TOKENS,
+                "output_tokens_per_appointment": cls.SHARD_OUTPUT_TOKENS_PER_APPOINTMENT,
+                "template_tokens": cls.SHARD_TEMPLATE_TOKENS,
+                "max_parallel": cls.SHARD_MAX_PARALLEL,
+                "orchestrator_streaming": cls.ORCHESTRATOR_STREAMING,
+            },
+            "decision_first": {
+                "enabled": cls.ORCHESTRATOR_DECISION_FIRST,
+                "explanation_batch_size": cls.EXPLANATION_BATCH_SIZE,
+            },
+            "tool_calling": {
+                "max_parallel": cls.TOOL_MAX_PARALLEL,
+                "result_max_chars": cls.TOOL_RESULT_MAX_CHARS,
+                "context_keep_turns": cls.TOOL_CONTEXT_KEEP_TURNS,
+                "context_summary_lines": cls.TOOL_CONTEXT_SUMMARY_LINES,
+            },
+            "response_cache": {
+                "enabled": cls.RESPONSE_CACHE_ENABLED,
+                "ttl_seconds": cls.RESPONSE_CACHE_TTL_SECONDS,
+                "max_memory_entries": cls.RESPONSE_CACHE_MAX_MEMORY_ENTRIES,
+                "max_disk_entries": cls.RESPONSE_CACHE_MAX_DISK_ENTRIES,
+                "path": cls.RESPONSE_CACHE_PATH,
+                "max_temperature": cls.RESPONSE_CACHE_MAX_TEMPERATURE,
+            },
+            "cassette": {
+                "mode": cls.CASSETTE_MODE,
+                "path": cls.CASSETTE_PATH,
+                "simulate_latency": cls.CASSETTE_SIMULATE_LATENCY,
+                "latency_scale": cls.CASSETTE_LATENCY_SCALE,
+            },
+            "http_pool": {
+                "max_connections": cls.HTTP_MAX_CONNECTIONS,
+                "max_keepalive": cls.HTTP_MAX_KEEPALIVE,
+                "keepalive_expiry": cls.HTTP_KEEPALIVE_EXPIRY,
+                "timeout_seconds": cls.HTTP_TIMEOUT_SECONDS,
+            },
+            "concurrency": {
+                "single_flight_enabled": cls.SINGLE_FLIGHT_ENABLED,
+                "max_concurrent_requests": cls.MAX_CONCURRENT_REQUESTS,
+                "model_limits": cls.MODEL_CONCURRENCY_LIMITS,
+            },
+            "budget": {
+                "enabled": cls.BUDGET_ENABLED,
+                "cost_limits_path": cls.COST_LIMITS_PATH,
+                "ledger_path": cls.BUDGET_LEDGER_PATH,
+            },
             "fallback": {
                 "enable_fallback": cls.ENABLE_FALLBACK,
                 "auto_assign_threshold": cls.AUTO_ASSIGN_THRESHOLD,
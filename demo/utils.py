@@ -1,10 +1,14 @@
 """Utility functions for the chat UI."""
 
+from mcp_servers.domain.geo import get_zip_geo
+
+
 def calculate_zip_distance(zip1: str, zip2: str) -> float:
     """
     Calculate estimated distance between two zip codes.
     
-    Uses simple numeric difference heuristic for demo.
+    Straight-line miles between zip centroids (same table and cache the
+    domain server uses), so the UI shows the distance the matcher scored.
     In production, would call Google Maps Distance API.
     
     Args:
@@ -14,22 +18,7 @@ def calculate_zip_distance(zip1: str, zip2: str) -> float:
     Returns:
         Estimated distance in miles
     """
-    try:
-        z1 = int(zip1)
-        z2 = int(zip2)
-        zip_diff = abs(z1 - z2)
-        
-        # Rough approximation for demo
-        if zip_diff == 0:
-            return 0.0
-        elif zip_diff <= 5:
-            return min(zip_diff * 0.5, 3.0)
-        elif zip_diff <= 10:
-            return min(zip_diff * 1.2, 12.0)
-        else:
-            return min(zip_diff * 1.5, 15.0)
-    except:
-        return 10.0
+    return get_zip_geo().distance(zip1, zip2)
 
 
 def get_distance_color(distance: float, max_distance: float) -> str:
@@ -0,0 +1,163 @@
+"""Shared fakes for the orchestrator tests.
+
+Template-driven tests run against a real JSONDomainServer over temp JSON
+files (make_domain) with fake scoring, booking, engagement and explainer
+agents; LangGraph tests use in-memory scheduling and domain fakes. Each
+test module keeps only its scenario data (appointments, providers, scores)
+and the fakes whose behaviour is the point of the test.
+"""
+
+import re
+import sys
+import json
+import time
+import tempfile
+import threading
+from pathlib import Path
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from api.json_client import JSONClient
+from adapters.llm.litellm_adapter import LLMResponse
+from mcp_servers.domain.json_server import JSONDomainServer
+from workflows.template_driven_orchestrator import TemplateDrivenOrchestrator
+
+
+# ===== TEMPLATE-DRIVEN ORCHESTRATOR =====
+
+def make_domain(appointments, providers):
+    """JSONDomainServer over a temp data dir (one "Knee" patient per appointment, empty waitlist)."""
+    data_dir = Path(tempfile.mkdtemp())
+    patients = [{"patient_id": a["patient_id"], "name": f"Patient {a['patient_id']}", "condition": "Knee"}
+                for a in appointments]
+    for name, rows in (("appointments", appointments), ("providers", providers),
+                       ("patients", patients), ("waitlist", [])):
+        (data_dir / f"{name}.json").write_text(json.dumps(rows))
+
+    domain = JSONDomainServer()
+    domain.json_client = JSONClient(str(data_dir))
+    return domain
+
+
+class FakeScheduler:
+    """Scores by provider (patient_scores override per patient); records what was scored."""
+
+    def __init__(self, scores, patient_scores=None):
+        self.scores = scores
+        self.patient_scores = patient_scores or {}
+        self.scored = set()
+        self.originals = {}
+
+    def calculate_match_score(self, patient_id, provider_id, original_provider_id=None, appointment_id=None):
+        self.scored.add(patient_id)
+        self.originals[appointment_id] = original_provider_id
+        score = self.patient_scores.get(patient_id, self.scores.get(provider_id, 0))
+        return {"total_score": score,
+                "breakdown": {"specialty": {"score": 35, "max": 35}, "continuity": {"score": score - 35, "max": 40}}}
+
+
+class FakeBooking:
+    def __init__(self, domain, events=None):
+        self.domain = domain
+        self.events = events if events is not None else []
+
+    def book_appointment(self, appointment_id, provider_id, status=None, match_score=None,
+                         match_factors=None, match_quality=None, reasoning=None):
+        self.events.append(("book", appointment_id, time.monotonic()))
+        return self.domain.update_appointment(appointment_id, {"provider_id": provider_id, "reasoning": reasoning})
+
+
+class FakeEngagement:
+    def __init__(self, events=None):
+        self.events = events if events is not None else []
+
+    def send_offer(self, patient_id, appointment_id, new_provider_id, date, time):
+        self.events.append(("offer", appointment_id))
+
+
+class ExplainerLLM:
+    """Writes one narrative per appointment id in the prompt (optionally slowly, or failing)."""
+
+    def __init__(self, events=None, delay=0, fail=False):
+        self.events = events if events is not None else []
+        self.delay = delay
+        self.fail = fail
+        self.calls = 0
+        self.lock = threading.Lock()
+
+    def generate(self, prompt, **kwargs):
+        with self.lock:
+            self.calls += 1
+        self.events.append(("llm", None, time.monotonic()))
+        time.sleep(self.delay)
+        if self.fail:
+            raise TimeoutError("LLM timed out")
+        ids = re.findall(r"^- (\w+):", prompt, flags=re.MULTILINE)
+        return LLMResponse(content=json.dumps({apt_id: f"Narrative for {apt_id}." for apt_id in ids}))
+
+
+def make_template_orchestrator(domain, scheduler, llm=None, events=None, **kwargs):
+    """Decision-first TemplateDrivenOrchestrator wired to the fakes above.
+
+    Plans are not persisted unless the test passes its own plan_path, so
+    nothing lands in the shared .cache/ plan store.
+    """
+    events = events if events is not None else []
+    kwargs.setdefault("decision_first", True)
+    kwargs.setdefault("plan_path", "")
+    return TemplateDrivenOrchestrator(
+        domain, FakeEngagement(events), FakeBooking(domain, events), scheduler,
+        llm=llm or ExplainerLLM(events), use_langfuse=False, **kwargs
+    )
+
+
+# ===== LANGGRAPH ORCHESTRATOR =====
+
+class FakeCache:
+    def get_stats(self):
+        return {}
+
+
+class FakeSchedulingAgent:
+    """Affected appointments per therapist; every patient gets the same ranked providers."""
+
+    def __init__(self, appointments, provider_ids, **ranked_fields):
+        """
+        Args:
+            appointments: List of appointments, or therapist_id -> list
+            provider_ids: Qualified providers, best first
+            ranked_fields: Extra fields for each ranked provider (score, reasoning, ...)
+        """
+        self.appointments = appointments
+        self.provider_ids = list(provider_ids)
+        self.ranked_fields = ranked_fields
+        self.llm_stats = {"calls": 0}
+        self.score_cache = FakeCache()
+
+    def trigger_handler(self, therapist_id):
+        appointments = self.appointments(therapist_id) if callable(self.appointments) else self.appointments
+        return {"appointments": [dict(a) for a in appointments]}
+
+    def filter_and_score(self, patient_id, appointment_id, candidate_ids):
+        ranked = [dict(self.ranked_fields, provider_id=pid, provider_name=f"Dr. {pid}") for pid in self.provider_ids]
+        return {"filter_result": {"qualified_providers": list(self.provider_ids), "eliminated_providers": []},
+                "score_result": {"ranked_providers": ranked}}
+
+    def create_audit_log(self, audit_data):
+        return {"session_id": audit_data["session_id"]}
+
+
+class FakeDomain:
+    """In-memory providers; bookings always succeed and are recorded."""
+
+    def __init__(self, providers):
+        self.providers = providers
+        self.bookings = []
+
+    def get_available_providers(self):
+        return [dict(p) for p in self.providers]
+
+    def book_appointment(self, booking):
+        self.bookings.append(booking)
+        return {"status": "SUCCESS", "confirmation_number": f"CONF-{booking['appointment_id']}"}
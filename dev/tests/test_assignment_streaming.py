@@ -0,0 +1,141 @@
+"""Test Streaming Assignment Parsing.
+
+Tests:
+1. Assignments are emitted as soon as each object closes (any chunking)
+2. A truncated response keeps the completed assignments
+3. The orchestrator executes assignment 1 before assignment 2 is generated
+4. Nothing usable in the stream → existing fallbacks
+"""
+
+import sys
+import json
+import random
+from pathlib import Path
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from adapters.llm.json_stream import StreamingArrayParser
+from workflows.template_driven_orchestrator import TemplateDrivenOrchestrator
+
+
+ASSIGNMENTS = [
+    {"appointment_id": "A001", "patient_id": "PAT001", "action": "assign", "assigned_to": "P001",
+     "match_quality": "EXCELLENT", "reasoning": "Prefers {mornings} and said \"yes\" to [female] PT"},
+    {"appointment_id": "A002", "patient_id": "PAT002", "action": "waitlist",
+     "match_factors": {"specialty_match": True, "notes": ["a}", "b]"]}, "reasoning": "No slot \\ left"},
+    {"appointment_id": "A003", "patient_id": "PAT003", "action": "assign", "assigned_to": "P004",
+     "match_quality": "GOOD"},
+]
+RESPONSE = "```json\n" + json.dumps({"assignments": ASSIGNMENTS, "summary": {"total": 3}}, indent=2) + "\n```"
+
+
+def chunks_of(text, rng):
+    out, i = [], 0
+    while i < len(text):
+        n = rng.randint(1, 12)
+        out.append(text[i:i + n])
+        i += n
+    return out
+
+
+class StreamingLLM:
+    """Fake LLM whose stream() records how many chunks were sent."""
+
+    def __init__(self, text, fail_after=None):
+        self.chunks = chunks_of(text, random.Random(7))
+        self.fail_after = fail_after
+        self.sent = 0
+
+    def stream(self, prompt, **kwargs):
+        for chunk in self.chunks:
+            if self.fail_after is not None and self.sent >= self.fail_after:
+                raise TimeoutError("stream timed out")
+            self.sent += 1
+            yield chunk
+
+
+def make_orchestrator(llm):
+    orchestrator = TemplateDrivenOrchestrator(None, None, None, None, llm=llm, use_langfuse=False)
+    executed_at = []
+
+    def record(assignment, metadata, executed, waitlist):
+        executed_at.append((assignment["appointment_id"], llm.sent))
+        executed.append(assignment)
+
+    orchestrator._execute_assignment = record
+    orchestrator._fallback_assignment = lambda metadata: {"assignments": [], "summary": {"method": "rule-based-fallback"}}
+    orchestrator._create_hardcoded_llm_response = lambda metadata: {}
+    return orchestrator, executed_at
+
+
+def test_parser_emits_each_assignment():
+    for seed in range(20):
+        parser = StreamingArrayParser("assignments")
+        emitted = []
+        for chunk in chunks_of(RESPONSE, random.Random(seed)):
+            emitted.extend(parser.feed(chunk))
+        assert emitted == ASSIGNMENTS
+        assert parser.finish()["summary"] == {"total": 3}
+        assert not parser.truncated and parser.errors == 0
+    print("✓ Assignments emitted incrementally for any chunking")
+
+
+def test_truncated_tail_salvaged():
+    cut = RESPONSE.index('"A003"') + 10
+    parser = StreamingArrayParser("assignments")
+    emitted = []
+    for chunk in chunks_of(RESPONSE[:cut], random.Random(1)):
+        emitted.extend(parser.feed(chunk))
+    assert [a["appointment_id"] for a in emitted] == ["A001", "A002"]
+    assert parser.finish() is None
+    assert parser.truncated
+    print("✓ Truncated response keeps completed assignments")
+
+
+def test_orchestrator_pipelines_execution():
+    llm = StreamingLLM(RESPONSE)
+    orchestrator, executed_at = make_orchestrator(llm)
+    executed, waitlist = [], []
+
+    decisions, count = orchestrator._stream_assignments({}, "prompt", executed, waitlist)
+
+    assert count == 3 and len(executed) == 3
+    assert decisions["summary"] == {"total": 3}
+    assert executed[0]["match_score"] == 100 and executed[1]["match_factors"]["specialty_match"]
+    # Assignment 1 ran while the rest of the response was still streaming
+    assert executed_at[0][1] < executed_at[1][1] < len(llm.chunks)
+    print(f"✓ Executed A001 after {executed_at[0][1]}/{len(llm.chunks)} chunks")
+
+
+def test_stream_failure_salvage_and_fallback():
+    # Stream dies after the first two assignments
+    cut_chunk = None
+    llm = StreamingLLM(RESPONSE)
+    sent = 0
+    for i, chunk in enumerate(llm.chunks):
+        sent += len(chunk)
+        if sent > RESPONSE.index('"A003"'):
+            cut_chunk = i
+            break
+    llm.fail_after = cut_chunk
+    orchestrator, executed_at = make_orchestrator(llm)
+    decisions, count = orchestrator._stream_assignments({}, "prompt", [], [])
+    assert count == 2
+    assert [a["appointment_id"] for a in decisions["assignments"]] == ["A001", "A002"]
+
+    # Nothing usable: unparseable text, then an immediate failure
+    for llm in (StreamingLLM("Sorry, I cannot help with that."), StreamingLLM(RESPONSE, fail_after=0)):
+        orchestrator, executed_at = make_orchestrator(llm)
+        decisions, count = orchestrator._stream_assignments({}, "prompt", [], [])
+        assert count == 0 and not executed_at
+        assert decisions["summary"]["method"] == "rule-based-fallback"
+    print("✓ Partial streams salvaged, empty streams fall back")
+
+
+if __name__ == "__main__":
+    test_parser_emits_each_assignment()
+    test_truncated_tail_salvaged()
+    test_orchestrator_pipelines_execution()
+    test_stream_failure_salvage_and_fallback()
+    print("\n✅ ALL ASSIGNMENT STREAMING TESTS PASSED!")
@@ -0,0 +1,174 @@
+"""Test LLM Budget Governor.
+
+Tests:
+1. config/cost_limits.yaml loads (fallback chain, prices, litellm models)
+2. Usage is priced and persisted per day
+3. Calls downgrade along the fallback chain when a model's daily limit is near
+4. Hard stop at total_limit
+5. LiteLLMAdapter calls the routed model (without the configured api_base) and charges the budget
+6. Models not in cost_limits.yaml are unmetered and never downgraded
+7. Concurrent calls hold their worst-case cost, so they can't share the same headroom
+"""
+
+import sys
+import tempfile
+from pathlib import Path
+from types import SimpleNamespace
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from adapters.llm import litellm_adapter
+from adapters.llm.budget import BudgetGovernor, BudgetExceededError, load_cost_limits
+from adapters.llm.litellm_adapter import LiteLLMAdapter
+
+COST_LIMITS = Path(__file__).parent.parent.parent / "config" / "cost_limits.yaml"
+
+LIMITS = {
+    "daily_budget": {"total_limit": 1.00, "alert_threshold": 0.80},
+    "per_model_budgets": {
+        "big": {"litellm_model": "vendor/big-v1", "daily_limit": 0.50,
+                "cost_per_1k_tokens": {"input": 0.01, "output": 0.02}},
+        "small": {"litellm_model": "vendor/small-v1", "daily_limit": 0.80,
+                  "cost_per_1k_tokens": {"input": 0.001, "output": 0.002}},
+    },
+    "optimization": {"fallback_chain": {"primary": "big", "fallback_1": "small", "note": "cheaper"}},
+}
+
+
+def test_loads_repo_cost_limits():
+    governor = BudgetGovernor(load_cost_limits(str(COST_LIMITS)))
+    assert governor.total_limit == 5.00
+    assert governor.chain == ["claude-sonnet-4", "claude-haiku-3.5", "gpt-4o-mini"]
+    assert governor.resolve("gpt-4o-mini") == "gpt-4o-mini"
+    assert governor.resolve("anthropic/claude-3-5-haiku-20241022") == "claude-haiku-3.5"
+    # 1k in + 1k out on gpt-4o = 0.0025 + 0.010
+    assert abs(governor.cost("gpt-4o", 1000, 1000) - 0.0125) < 1e-9
+
+
+def test_accounting_persists_per_day():
+    with tempfile.TemporaryDirectory() as tmp:
+        ledger = str(Path(tmp) / "budget.json")
+        governor = BudgetGovernor(LIMITS, ledger_path=ledger)
+        cost = governor.record("vendor/big-v1", {"prompt_tokens": 1000, "completion_tokens": 500})
+        assert abs(cost - 0.02) < 1e-9
+
+        reloaded = BudgetGovernor(LIMITS, ledger_path=ledger)
+        stats = reloaded.get_stats()
+        assert abs(stats["total_cost"] - 0.02) < 1e-9
+        assert stats["models"]["big"]["calls"] == 1
+        assert stats["total_tokens"] == 1500
+
+
+def test_downgrade_then_hard_stop():
+    governor = BudgetGovernor(LIMITS)
+    assert governor.route("vendor/big-v1", 1000, 1000) == "vendor/big-v1"
+
+    # Spend most of big's $0.50: a $0.03 call no longer fits → small
+    governor.record("vendor/big-v1", {"prompt_tokens": 48000, "completion_tokens": 0})
+    assert governor.route("vendor/big-v1", 1000, 1000) == "vendor/small-v1"
+    assert governor.get_stats()["downgrades"] == 1
+
+    # Exhaust the total budget → every call is refused
+    governor.record("vendor/small-v1", {"prompt_tokens": 600000, "completion_tokens": 0})
+    try:
+        governor.route("vendor/big-v1", 10, 10)
+        assert False, "expected BudgetExceededError"
+    except BudgetExceededError as e:
+        print(f"✅ Blocked: {e}")
+    assert governor.get_stats()["blocked"] == 1
+
+
+def test_adapter_routes_and_charges():
+    calls = []
+
+    def fake_completion(**kwargs):
+        calls.append(kwargs)
+        message = SimpleNamespace(content="ok", tool_calls=None)
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=message, finish_reason="stop")],
+            usage=SimpleNamespace(prompt_tokens=1000, completion_tokens=1000, total_tokens=2000)
+        )
+
+    original = litellm_adapter.completion
+    litellm_adapter.completion = fake_completion
+    try:
+        governor = BudgetGovernor(LIMITS)
+        governor.record("vendor/big-v1", {"prompt_tokens": 49000, "completion_tokens": 0})
+        adapter = LiteLLMAdapter(model="vendor/big-v1", api_base="http://localhost:4000",
+                                 api_key="test", budget=governor)
+        adapter.response_cache = None
+
+        response = adapter.generate("Score providers", max_tokens=1000, temperature=0.3)
+        assert [c["model"] for c in calls] == ["vendor/small-v1"]
+        # The configured endpoint/key belong to big-v1, not the routed model
+        assert "api_base" not in calls[0] and "api_key" not in calls[0]
+        assert response.model == "vendor/small-v1"
+        assert abs(response.usage["cost_usd"] - 0.003) < 1e-9
+        assert adapter.get_budget_stats()["models"]["small"]["calls"] == 1
+    finally:
+        litellm_adapter.completion = original
+
+
+def test_unlisted_model_is_unmetered():
+    governor = BudgetGovernor(LIMITS)
+    assert governor.price(governor.resolve("openai/gpt-oss-20b")) == (0.0, 0.0)
+    assert governor.record("openai/gpt-oss-20b", {"prompt_tokens": 90000, "completion_tokens": 0}) == 0.0
+
+    # Even with the metered budget spent, the local model is neither blocked nor downgraded
+    governor.record("vendor/small-v1", {"prompt_tokens": 1000000, "completion_tokens": 0})
+    assert governor.route("openai/gpt-oss-20b", 100000, 4096) == "openai/gpt-oss-20b"
+    stats = governor.get_stats()
+    assert stats["downgrades"] == 0 and stats["blocked"] == 0
+    assert stats["models"]["openai/gpt-oss-20b"]["calls"] == 1
+    print("✅ Unlisted model is unmetered")
+
+
+def test_reservations_hold_headroom():
+    calls = []
+    governor = BudgetGovernor(LIMITS)
+    # $0.04 of big's $0.50 left: room for one $0.03 worst case, not two
+    governor.record("vendor/big-v1", {"prompt_tokens": 46000, "completion_tokens": 0})
+    first = governor.reserve("vendor/big-v1", 1000, 1000)
+    second = governor.reserve("vendor/big-v1", 1000, 1000)
+    assert (first.model, second.model) == ("vendor/big-v1", "vendor/small-v1")
+    assert abs(governor.get_stats()["reserved"] - 0.033) < 1e-9
+
+    # Settling replaces the hold with the actual cost; a second settle is a no-op
+    governor.record("vendor/big-v1", {"prompt_tokens": 500, "completion_tokens": 0}, first)
+    governor.settle(first)
+    governor.settle(second)
+    stats = governor.get_stats()
+    assert stats["reserved"] == 0 and abs(stats["models"]["big"]["cost"] - 0.465) < 1e-9
+    assert governor.reserve("vendor/big-v1", 1000, 1000).model == "vendor/big-v1"
+
+    # A failed adapter call releases its hold
+    def failing_completion(**kwargs):
+        calls.append(kwargs)
+        raise ValueError("bad request")
+
+    original = litellm_adapter.completion
+    litellm_adapter.completion = failing_completion
+    try:
+        governor = BudgetGovernor(LIMITS)
+        adapter = LiteLLMAdapter(model="vendor/big-v1", api_key="test", budget=governor)
+        adapter.response_cache = None
+        try:
+            adapter.generate("Score providers", max_tokens=1000, temperature=0.3)
+            assert False, "expected ValueError"
+        except ValueError:
+            pass
+        assert calls and governor.get_stats()["reserved"] == 0
+    finally:
+        litellm_adapter.completion = original
+    print("✅ Reservations hold headroom until settled")
+
+
+if __name__ == "__main__":
+    test_loads_repo_cost_limits()
+    test_accounting_persists_per_day()
+    test_downgrade_then_hard_stop()
+    test_adapter_routes_and_charges()
+    test_unlisted_model_is_unmetered()
+    test_reservations_hold_headroom()
+    print("\n✅ ALL BUDGET GOVERNOR TESTS PASSED!")
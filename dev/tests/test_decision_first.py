@@ -0,0 +1,139 @@
+"""Test Decision-First Mode in TemplateDrivenOrchestrator.
+
+Tests:
+1. Assignments are booked and offers sent before any LLM call
+2. Deterministic decisions respect provider capacity and the score threshold
+   (and carry the patient's name)
+3. LLM narratives are generated in the background and attached when ready
+4. A failed explanation call keeps the deterministic reasoning
+5. Background explanation writes do not lose concurrent booking writes
+"""
+
+import sys
+import time
+import threading
+from pathlib import Path
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from config.llm_settings import settings as llm_settings
+from dev.tests.fakes import ExplainerLLM, FakeScheduler, make_domain, make_template_orchestrator
+
+
+DAY = "2025-11-05"
+SCORES = {"P1": 90, "P2": 70}
+
+# P_OUT has 5 appointments on DAY; P1 has room for 2 patients, P2 is unlimited
+APPOINTMENTS = [
+    {"appointment_id": f"A{i}", "patient_id": f"PAT00{i}", "provider_id": "P_OUT",
+     "date": DAY, "time": f"{9 + i:02d}:00", "status": "scheduled"}
+    for i in range(4)
+] + [{"appointment_id": "A_LOW", "patient_id": "PAT_LOW", "provider_id": "P_OUT",
+      "date": DAY, "time": "15:00", "status": "scheduled"}]
+PROVIDERS = [
+    {"provider_id": "P_OUT", "name": "Dr. Out", "status": "active"},
+    {"provider_id": "P1", "name": "Dr. One", "status": "active", "specialty": "Orthopedic",
+     "max_patient_capacity": 3, "current_patient_load": 1},
+    {"provider_id": "P2", "name": "Dr. Two", "status": "active", "specialty": "Orthopedic"},
+]
+
+
+def make_orchestrator(**llm_kwargs):
+    domain, events = make_domain(APPOINTMENTS, PROVIDERS), []
+    llm = ExplainerLLM(events, **llm_kwargs)
+    scheduler = FakeScheduler(SCORES, patient_scores={"PAT_LOW": 40})
+    orchestrator = make_template_orchestrator(domain, scheduler, llm=llm, events=events)
+    return orchestrator, domain, llm, events
+
+
+def test_commits_before_llm():
+    orchestrator, domain, llm, events = make_orchestrator(delay=0.5)
+    started = time.monotonic()
+    result = orchestrator.execute_workflow("P_OUT", start_date=DAY, end_date=DAY)
+    elapsed = time.monotonic() - started
+
+    assert result["assignment_method"] == "decision-first"
+    assert result["successful_assignments"] == 4 and result["waitlist_entries"] == 1
+    assert result["explanations"] == {"status": "pending", "pending": 5}
+    assert elapsed < 0.5, elapsed  # did not wait for the 0.5s LLM call
+    assert len([e for e in events if e[0] == "offer"]) == 4
+
+    orchestrator.wait_for_explanations(timeout=5)
+    first_llm = min(e[2] for e in events if e[0] == "llm")
+    assert all(e[2] < first_llm for e in events if e[0] == "book")
+    print(f"✅ 4 bookings committed in {elapsed * 1000:.0f}ms, before the first LLM call")
+
+
+def test_decisions_respect_capacity():
+    orchestrator, domain, llm, events = make_orchestrator(delay=0)
+    result = orchestrator.execute_workflow("P_OUT", start_date=DAY, end_date=DAY)
+    orchestrator.wait_for_explanations(timeout=5)
+
+    by_appointment = {a["appointment_id"]: a["assigned_to"] for a in result["assignments"]}
+    assert list(by_appointment.values()).count("P1") == 2  # capacity 3 - load 1
+    assert list(by_appointment.values()).count("P2") == 2
+    assert [w["appointment_id"] for w in result["waitlist"]] == ["A_LOW"]  # best score 40 < 60
+    assert domain.get_appointment("A0")["provider_id"] == "P1"
+    assert {a["patient_name"] for a in result["assignments"]} == {f"Patient PAT00{i}" for i in range(4)}
+    print(f"✅ Deterministic plan within capacity: {by_appointment}")
+
+
+def test_narratives_attached_when_ready():
+    orchestrator, domain, llm, events = make_orchestrator(delay=0.1)
+    original = llm_settings.EXPLANATION_BATCH_SIZE
+    llm_settings.EXPLANATION_BATCH_SIZE = 2
+    try:
+        result = orchestrator.execute_workflow("P_OUT", start_date=DAY, end_date=DAY)
+        assert domain.get_appointment("A1")["reasoning"].endswith("Explanation pending.")
+        stats = orchestrator.wait_for_explanations(timeout=5)
+    finally:
+        llm_settings.EXPLANATION_BATCH_SIZE = original
+
+    assert stats == {"pending": 0, "ready": 5, "failed": 0} and llm.calls == 3
+    assert domain.get_appointment("A1")["reasoning"] == "Narrative for A1."
+    assert orchestrator.explanations["A_LOW"] == {"status": "ready", "narrative": "Narrative for A_LOW."}
+    assert all(a["reasoning"] == f"Narrative for {a['appointment_id']}." for a in result["assignments"])
+    print(f"✅ Narratives attached in background ({llm.calls} LLM calls)")
+
+
+def test_failed_explanations_keep_reasoning():
+    orchestrator, domain, llm, events = make_orchestrator(delay=0, fail=True)
+    orchestrator.execute_workflow("P_OUT", start_date=DAY, end_date=DAY)
+    stats = orchestrator.wait_for_explanations(timeout=5)
+
+    assert stats["failed"] == 5
+    reasoning = domain.get_appointment("A0")["reasoning"]
+    assert reasoning.startswith("Best available match (score 55; continuity, specialty)")  # 90/165 points
+    print(f"✅ LLM failure keeps deterministic reasoning: {reasoning}")
+
+
+def test_explanation_writes_do_not_lose_bookings():
+    domain = make_domain(APPOINTMENTS, PROVIDERS)
+    ids = [a["appointment_id"] for a in APPOINTMENTS]
+
+    def explain():
+        for _ in range(40):
+            for apt_id in ids:
+                domain.update_appointment(apt_id, {"reasoning": f"Narrative for {apt_id}."})
+
+    explainer = threading.Thread(target=explain)
+    explainer.start()
+    for round_ in range(40):
+        for apt_id in ids:
+            domain.book_appointment({"appointment_id": apt_id, "provider_id": f"P{round_}"})
+    explainer.join()
+
+    for apt_id in ids:
+        appointment = domain.get_appointment(apt_id)
+        assert appointment["provider_id"] == "P39" and appointment["reasoning"] == f"Narrative for {apt_id}."
+    print("✅ Explanation and booking writes serialized")
+
+
+if __name__ == "__main__":
+    test_commits_before_llm()
+    test_decisions_respect_capacity()
+    test_narratives_attached_when_ready()
+    test_failed_explanations_keep_reasoning()
+    test_explanation_writes_do_not_lose_bookings()
+    print("\n✅ ALL DECISION-FIRST TESTS PASSED!")
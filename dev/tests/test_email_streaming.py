@@ -0,0 +1,172 @@
+"""Test Streaming Email Generation.
+
+Tests:
+1. Incremental cleanup matches batch cleanup for any chunking (and random emails,
+   including stray brackets before a confirm link)
+2. Cleaned text is released before the stream ends
+3. LiteLLMAdapter.stream yields deltas, charges the budget and returns the usage
+4. /api/emails/draft/stream sends SSE deltas (template fallback on LLM failure)
+"""
+
+import sys
+import json
+import random
+from pathlib import Path
+from types import SimpleNamespace
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from agents.email_cleanup import clean_email_body, stream_clean, StreamingEmailCleaner
+from adapters.llm import litellm_adapter
+from adapters.llm.budget import BudgetGovernor
+from adapters.llm.litellm_adapter import LiteLLMAdapter
+
+
+EMAIL = """  Dear **Maria**,
+
+I hope you're doing well. Dr. Smith is unavailable on **Tuesday, December 9th at 9:00 AM due to an unexpected conflict**.
+
+
+
+We've arranged for ***Sarah Johnson, PT*** to see you. Please confirm your new time by clicking the link below. Click here to confirm. [Confirm appointment](https://clinic.example.com/confirm?x=1) Visit https://renew.example.com/info for details.
+
+Warm regards,
+Renew Physical Therapy, (555) 123-4567  """
+
+
+def random_chunks(text, rng):
+    chunks, i = [], 0
+    while i < len(text):
+        n = rng.randint(1, 8)
+        chunks.append(text[i:i + n])
+        i += n
+    return chunks
+
+
+def test_streamed_cleanup_matches_batch():
+    rng = random.Random(7)
+    expected = clean_email_body(EMAIL)
+    assert "http" not in expected and "Click here" not in expected and "***" not in expected
+    for _ in range(200):
+        assert "".join(stream_clean(random_chunks(EMAIL, rng))) == expected
+
+
+# Pieces that exercise every rule, including odd-length asterisk runs
+FRAGMENTS = [
+    "Dear **Maria**,", "\n", "\n\n\n", " ", "Dr. Smith is out.", " **Tuesday**", "***Sarah***", "****",
+    "**a bold phrase well over thirty characters**", " Please confirm by clicking the link.",
+    " Click here to confirm.", " [Confirm](https://clinic.example.com/c)", " https://clinic.example.com/info",
+    " See you soon!", " Questions?", "**", "*", " Warm regards,",
+]
+
+
+def test_random_emails_match_batch():
+    rng = random.Random(11)
+    for _ in range(2000):
+        text = "".join(rng.choice(FRAGMENTS) for _ in range(rng.randint(1, 12)))
+        assert "".join(stream_clean(random_chunks(text, rng))) == clean_email_body(text), repr(text)
+    print("✅ 2000 random emails: streamed == batch")
+
+
+# A confirm link match may start at any earlier "[" on its line
+BRACKET_FRAGMENTS = FRAGMENTS + [" See [1].", " [note]", "[", "]", "](", ")", " (x)", " confirm"]
+
+
+def test_stray_brackets_match_batch():
+    rng = random.Random(5)
+    for _ in range(5000):
+        text = "".join(rng.choice(BRACKET_FRAGMENTS) for _ in range(rng.randint(1, 12)))
+        assert "".join(stream_clean(random_chunks(text, rng))) == clean_email_body(text), repr(text)
+    text = "Questions? See [1]. [Confirm](https://clinic.example.com/c) Bye."
+    assert "".join(stream_clean(random_chunks(text, rng))) == clean_email_body(text) == "Questions? See  Bye."
+    print("✅ 5000 emails with stray brackets: streamed == batch")
+
+
+def test_first_sentence_released_early():
+    cleaner = StreamingEmailCleaner()
+    assert cleaner.feed("Dear Maria,") == ""
+    assert cleaner.feed("\nI hope you're well. Dr") == "Dear Maria,\nI hope you're well."
+    # An open bold span holds text back until it closes
+    assert cleaner.feed(". Smith is **out. this") == " Dr."
+    assert cleaner.feed(" week**. ") == " Smith is **out. this week**."
+    assert cleaner.finish() == ""
+
+
+def test_adapter_stream_yields_deltas():
+    pieces = ["Dear ", "Maria,", " see you", " soon."]
+
+    def fake_completion(**kwargs):
+        assert kwargs["stream"] is True
+        for piece in pieces:
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=piece))], usage=None)
+
+    original = litellm_adapter.completion
+    litellm_adapter.completion = fake_completion
+    try:
+        budget = BudgetGovernor({})
+        adapter = LiteLLMAdapter(model="gpt-4o-mini", api_key="test", budget=budget)
+        adapter.response_cache = None
+        stream = adapter.stream("Write an email", temperature=0.7)
+        received = []
+        while True:
+            try:
+                received.append(next(stream))
+            except StopIteration as done:
+                usage = done.value
+                break
+        assert received == pieces
+        assert budget.get_stats()["models"]["gpt-4o-mini"]["calls"] == 1
+        assert usage["total_tokens"] > 0  # estimated (no usage chunk) and returned once exhausted
+    finally:
+        litellm_adapter.completion = original
+
+
+def read_sse(text):
+    events = []
+    for block in text.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.splitlines())
+        events.append((lines.get("event", "message"), json.loads(lines["data"])))
+    return events
+
+
+def test_draft_stream_endpoint():
+    from fastapi.testclient import TestClient
+    import web_server
+
+    original = web_server._stream_ai_personalized_email
+    try:
+        web_server._stream_ai_personalized_email = lambda *args: iter(random_chunks(EMAIL, random.Random(1)))
+        client = TestClient(web_server.app)
+        response = client.get("/api/emails/draft/stream", params={"appointment_id": "A001", "provider_id": "P001"})
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/event-stream")
+        events = read_sse(response.text)
+        assert len(events) > 3  # Sentence-sized chunks, not one blob
+        assert "".join(d["delta"] for e, d in events if e == "message") == clean_email_body(EMAIL)
+        assert events[-1] == ("done", {"template": "ai_personalized", "chars": len(clean_email_body(EMAIL))})
+
+        def failing(*args):
+            raise RuntimeError("LLM down")
+            yield
+
+        web_server._stream_ai_personalized_email = failing
+        events = read_sse(client.get("/api/emails/draft/stream",
+                                     params={"appointment_id": "A001", "provider_id": "P001"}).text)
+        assert events[-1][1]["template"] == "template"
+        assert events[0][1]["delta"]
+
+        assert client.get("/api/emails/draft/stream",
+                          params={"appointment_id": "NOPE", "provider_id": "P001"}).status_code == 404
+    finally:
+        web_server._stream_ai_personalized_email = original
+
+
+if __name__ == "__main__":
+    test_streamed_cleanup_matches_batch()
+    test_random_emails_match_batch()
+    test_stray_brackets_match_batch()
+    test_first_sentence_released_early()
+    test_adapter_stream_yields_deltas()
+    test_draft_stream_endpoint()
+    print("\n✅ ALL EMAIL STREAMING TESTS PASSED!")
@@ -0,0 +1,150 @@
+"""Test Fused Filter + Score.
+
+Tests:
+1. Fused mode makes one LLM call where separate mode makes two
+2. Fused mode sends fewer prompt tokens than filter + score
+3. Fused and separate modes produce the same qualification and ranking
+4. An unparseable LLM response falls back to the rule-based match score
+"""
+
+import sys
+import json
+from pathlib import Path
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from agents.match_scoring import to_percent
+from agents.smart_scheduling_agent import SmartSchedulingAgent
+from agents.score_cache import ScoreCache
+
+
+PATIENT = {
+    "patient_id": "PAT001", "name": "Maria", "zip": "12340", "max_distance_miles": 10,
+    "condition_specialty_required": "orthopedic", "gender_preference": "any",
+    "preferred_days": "Tuesday,Thursday", "prior_providers": []
+}
+
+PROVIDERS = {
+    "T001": {"provider_id": "T001", "name": "Original", "zip": "12340", "status": "active",
+             "specialty": "Orthopedic Physical Therapy", "years_experience": 10,
+             "available_days": ["Tuesday"]},
+    "P001": {"provider_id": "P001", "name": "Sports", "zip": "12340", "status": "active",
+             "specialty": "Sports Physical Therapy", "years_experience": 8,
+             "available_days": ["Tuesday", "Thursday"]},
+    "P005": {"provider_id": "P005", "name": "Ortho", "zip": "12340", "status": "active",
+             "specialty": "Orthopedic Physical Therapy", "years_experience": 12,
+             "available_days": ["Thursday"]},
+}
+
+SCORES = {"P001": 70, "P005": 90}
+
+
+class FakeLLM:
+    """Deterministic LLM: answers by prompt type, reports ~4 chars/token usage."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def generate(self, prompt, **kwargs):
+        self.calls += 1
+        if "In ONE pass" in prompt:
+            content = json.dumps({"qualified": ["P001"], "scores": SCORES})
+        elif "Score these providers" in prompt:
+            content = json.dumps(SCORES)
+        else:
+            content = json.dumps(["P001"])
+
+        class Response:
+            pass
+        response = Response()
+        response.content = content
+        response.usage = {"prompt_tokens": len(prompt) // 4, "completion_tokens": len(content) // 4}
+        return response
+
+
+class StubKnowledge:
+    def search_knowledge(self, query, source="all"):
+        return "SCHEDULING POLICY " * 200  # Knowledge text is the bulk of each prompt
+
+
+class StubDomain:
+    def get_patient(self, patient_id):
+        return dict(PATIENT)
+
+    def get_provider(self, provider_id):
+        return dict(PROVIDERS[provider_id]) if provider_id in PROVIDERS else None
+
+    def get_affected_appointments(self, provider_id):
+        return [{"appointment_id": "A001", "patient_id": "PAT001", "provider_id": "T001",
+                 "date": "2025-12-09T09:00:00"}]
+
+    def calculate_distance_between_zips(self, zip1, zip2):
+        return 0.0
+
+
+def make_agent():
+    return SmartSchedulingAgent(llm=FakeLLM(), knowledge_server=StubKnowledge(),
+                                domain_server=StubDomain(), score_cache=ScoreCache())
+
+
+def test_fused_halves_llm_calls_and_tokens():
+    """One structured call replaces filter + score round-trips."""
+    separate = make_agent()
+    filter_result = separate.filter_candidates("PAT001", "A001", ["P001", "P005"])
+    score_result = separate.score_and_rank_providers("PAT001", "A001", filter_result["qualified_providers"])
+
+    fused_agent = make_agent()
+    fused = fused_agent.filter_and_score("PAT001", "A001", ["P001", "P005"])
+
+    assert separate.llm_stats["calls"] == 2
+    assert fused_agent.llm_stats["calls"] == 1
+    assert fused["llm_usage"]["calls"] == 1
+    assert fused_agent.llm_stats["prompt_tokens"] < 0.65 * separate.llm_stats["prompt_tokens"]
+
+    # Same decisions either way
+    assert sorted(fused["filter_result"]["qualified_providers"]) == sorted(filter_result["qualified_providers"])
+    assert [p["provider_id"] for p in fused["score_result"]["ranked_providers"]] == \
+           [p["provider_id"] for p in score_result["ranked_providers"]]
+    print(f"✅ Separate: {separate.llm_stats}")
+    print(f"✅ Fused:    {fused_agent.llm_stats}")
+
+
+def test_fused_repeat_uses_cache():
+    """A second pass for the same appointment needs no LLM call when rules decide everything."""
+    agent = make_agent()
+    agent.filter_and_score("PAT001", "A001", ["P005"])
+    calls = agent.llm_stats["calls"]
+    agent.filter_and_score("PAT001", "A001", ["P005"])
+    assert agent.llm_stats["calls"] == calls
+
+
+class GarbledLLM(FakeLLM):
+    def generate(self, prompt, **kwargs):
+        response = super().generate(prompt, **kwargs)
+        response.content = "Sure! Here are the scores you asked for."
+        return response
+
+
+def test_unparseable_scores_use_rule_based_scorer():
+    """No flat 50s: providers are ranked by compute_match_score (as 0-100) when the LLM reply is unusable."""
+    agent = make_agent()
+    agent.llm = GarbledLLM()
+    result = agent.score_and_rank_providers("PAT001", "A001", ["P001", "P005"])
+
+    appointment = StubDomain().get_affected_appointments("ALL")[0]
+    expected = {
+        pid: to_percent(agent._compute_match_score(PATIENT, PROVIDERS[pid], PROVIDERS["T001"], appointment)["total_score"])
+        for pid in ("P001", "P005")
+    }
+    assert {p["provider_id"]: p["total_score"] for p in result["ranked_providers"]} == expected
+    assert result["ranked_providers"][0]["provider_id"] == max(expected, key=expected.get)
+    assert expected["P001"] != expected["P005"]
+    print(f"✅ Rule-based fallback scores: {expected}")
+
+
+if __name__ == "__main__":
+    test_fused_halves_llm_calls_and_tokens()
+    test_fused_repeat_uses_cache()
+    test_unparseable_scores_use_rule_based_scorer()
+    print("\n✅ ALL FUSED SCORING TESTS PASSED!")
@@ -0,0 +1,144 @@
+"""Test Zip Geodistance & Spatial Candidate Pruning.
+
+Tests:
+1. Haversine distance against known city pairs
+2. Demo centroid table loads and distances are cached
+3. Grid index returns exactly the providers a brute-force scan would
+4. Candidate pruning drops out-of-range providers (prune rate)
+5. The index covers providers.json and is rebuilt only when the file changes
+"""
+
+import sys
+import json
+import random
+import tempfile
+from pathlib import Path
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from api.json_client import JSONClient
+from mcp_servers.domain.geo import ZipGeo, ProviderSpatialIndex, haversine_miles, load_zip_centroids
+from mcp_servers.domain.json_server import JSONDomainServer
+
+
+def test_haversine_known_distance():
+    """NYC → LA is ~2445 miles straight-line."""
+    miles = haversine_miles(40.7128, -74.0060, 34.0522, -118.2437)
+    assert 2430 < miles < 2460
+    assert haversine_miles(42.8, -73.9, 42.8, -73.9) == 0.0
+    print(f"✅ NYC → LA: {miles:.0f} mi")
+
+
+def test_demo_centroids_and_cache():
+    """Shipped table covers the demo zips; repeat lookups hit the cache."""
+    geo = ZipGeo(load_zip_centroids())
+    for zip_code in ["12340", "12342", "12345", "12347", "12348", "12350", "12355"]:
+        assert geo.locate(zip_code) is not None, zip_code
+
+    d1 = geo.distance("12340", "12345")
+    d2 = geo.distance("12345", "12340")
+    assert d1 == d2
+    assert 0 < d1 < 5.0
+    assert geo.get_stats()["cache_hits"] == 1
+
+    # Unknown zip falls back to the legacy heuristic
+    assert geo.distance("12340", "99999") == 15.0
+    print(f"✅ Centroids loaded: {geo.get_stats()}")
+
+
+def test_grid_index_matches_brute_force():
+    """Radius queries return the same set as checking every provider."""
+    rng = random.Random(7)
+    centroids = {}
+    providers = []
+    for i in range(300):
+        zip_code = f"{10000 + i:05d}"
+        centroids[zip_code] = (40.0 + rng.uniform(-1.5, 1.5), -74.0 + rng.uniform(-1.5, 1.5))
+        providers.append({"provider_id": f"P{i:03d}", "zip": zip_code})
+    geo = ZipGeo(centroids)
+    index = ProviderSpatialIndex(geo, providers, cell_miles=8.0)
+
+    for patient_zip in rng.sample(sorted(centroids), 25):
+        for radius in (5.0, 15.0, 40.0):
+            expected = {p["provider_id"] for p in providers
+                        if geo.distance(patient_zip, p["zip"]) <= radius}
+            got = {pid for pid, _ in index.query(patient_zip, radius)}
+            assert got == expected, (patient_zip, radius)
+    print("✅ Grid index matches brute force")
+
+
+def test_candidate_pruning_rate():
+    """Providers beyond max_distance_miles are pruned before scoring."""
+    domain = JSONDomainServer()
+    domain.geo = ZipGeo({
+        "00001": (42.80, -73.90),
+        "00002": (42.82, -73.90),   # ~1.4 mi
+        "00003": (42.95, -73.90),   # ~10.4 mi
+        "00004": (43.50, -73.90),   # ~48 mi
+    })
+    providers = [
+        {"provider_id": "NEAR", "zip": "00002"},
+        {"provider_id": "MID", "zip": "00003"},
+        {"provider_id": "FAR", "zip": "00004"},
+        {"provider_id": "SAME", "zip": "00001"},
+    ]
+
+    result = domain.prune_candidates_by_distance({"zip": "00001", "max_distance_miles": 5}, providers)
+    assert [p["provider_id"] for p in result["kept"]] == ["SAME", "NEAR"]
+    assert set(result["pruned"]) == {"MID", "FAR"}
+
+    # No limit → nothing pruned
+    result = domain.prune_candidates_by_distance({"zip": "00001"}, providers)
+    assert len(result["kept"]) == 4
+
+    stats = domain.get_geo_stats()
+    assert stats["candidates_checked"] == 8
+    assert stats["candidates_pruned"] == 2
+    assert stats["prune_rate"] == 0.25
+    print(f"✅ Pruning: {stats}")
+
+
+def test_index_per_providers_file_version():
+    """One index per providers.json version; hits are filtered to the candidates."""
+    data_dir = Path(tempfile.mkdtemp())
+    providers_file = data_dir / "providers.json"
+    providers = [
+        {"provider_id": "NEAR", "zip": "00002"},
+        {"provider_id": "MID", "zip": "00003"},
+        {"provider_id": "SAME", "zip": "00001"},
+    ]
+    providers_file.write_text(json.dumps(providers))
+
+    domain = JSONDomainServer()
+    domain.json_client = JSONClient(str(data_dir))
+    domain.geo = ZipGeo({"00001": (42.80, -73.90), "00002": (42.82, -73.90), "00003": (42.95, -73.90)})
+    patient = {"zip": "00001", "max_distance_miles": 15}
+
+    # Only two candidates asked about - MID is in range but not a candidate
+    result = domain.prune_candidates_by_distance(patient, [providers[0], providers[2]])
+    assert [p["provider_id"] for p in result["kept"]] == ["SAME", "NEAR"]
+    index = domain._provider_index
+    domain.prune_candidates_by_distance(patient, providers)
+    assert domain._provider_index is index
+
+    # Candidates outside providers.json are still checked
+    result = domain.prune_candidates_by_distance(patient, [{"provider_id": "NEW", "zip": "00003"}])
+    assert [p["provider_id"] for p in result["kept"]] == ["NEW"]
+
+    # A new providers.json version gets a new index
+    providers[1]["zip"] = "00001"
+    providers_file.write_text(json.dumps(providers, indent=2))
+    result = domain.prune_candidates_by_distance(patient, providers)
+    assert domain._provider_index is not index
+    assert [p["provider_id"] for p in result["kept"]] == ["MID", "SAME", "NEAR"]
+    print("✅ Index rebuilt only when providers.json changes")
+
+
+if __name__ == "__main__":
+    test_haversine_known_distance()
+    test_demo_centroids_and_cache()
+    test_grid_index_matches_brute_force()
+    test_candidate_pruning_rate()
+    test_index_per_providers_file_version()
+    print("\n✅ ALL GEO TESTS PASSED!")
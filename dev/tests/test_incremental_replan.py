@@ -0,0 +1,154 @@
+"""Test Incremental Re-Planning in TemplateDrivenOrchestrator.
+
+Tests:
+1. Extending a window (2 -> 5 days) marks and decides only the new dates
+2. Capacity consumed by the earlier run is respected by the new decisions
+3. Re-running the same window is a no-op
+4. No stored plan / a disjoint window falls back to a full run
+5. A plan the data no longer reflects (demo reset) is discarded for a full run
+"""
+
+import sys
+import tempfile
+from pathlib import Path
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from dev.tests.fakes import FakeScheduler, make_domain, make_template_orchestrator
+from workflows.plan_store import PlanStore
+
+
+DAYS = ["2025-11-03", "2025-11-04", "2025-11-05", "2025-11-06", "2025-11-07"]
+SCORES = {"P1": 90, "P2": 70}
+
+# P_OUT has one appointment per day (plus a low-match one on day 1); P1 has room for 2 patients
+APPOINTMENTS = [
+    {"appointment_id": f"A{i}", "patient_id": f"PAT00{i}", "provider_id": "P_OUT",
+     "date": day, "time": "10:00", "status": "scheduled"}
+    for i, day in enumerate(DAYS)
+] + [{"appointment_id": "A_LOW", "patient_id": "PAT_LOW", "provider_id": "P_OUT",
+      "date": DAYS[0], "time": "15:00", "status": "scheduled"}]
+PROVIDERS = [
+    {"provider_id": "P_OUT", "name": "Dr. Out", "status": "active"},
+    {"provider_id": "P1", "name": "Dr. One", "status": "active", "specialty": "Orthopedic",
+     "max_patient_capacity": 3, "current_patient_load": 1},
+    {"provider_id": "P2", "name": "Dr. Two", "status": "active", "specialty": "Orthopedic"},
+]
+
+
+def make_scheduler():
+    return FakeScheduler(SCORES, patient_scores={"PAT_LOW": 40})
+
+
+def make_orchestrator(plan_path=None):
+    domain, scheduler = make_domain(APPOINTMENTS, PROVIDERS), make_scheduler()
+    plan_path = plan_path or str(Path(tempfile.mkdtemp()) / "plans.json")
+    orchestrator = make_template_orchestrator(domain, scheduler, plan_path=plan_path)
+    marked = []
+    mark = orchestrator._mark_provider_unavailable_range
+    orchestrator._mark_provider_unavailable_range = lambda pid, s, e, r: marked.append((s, e)) or mark(pid, s, e, r)
+    return orchestrator, domain, scheduler, marked, plan_path
+
+
+def test_extension_processes_only_new_dates():
+    orchestrator, domain, scheduler, marked, plan_path = make_orchestrator()
+    first = orchestrator.execute_workflow("P_OUT", start_date=DAYS[0], end_date=DAYS[1])
+    assert first["successful_assignments"] == 2 and first["waitlist_entries"] == 1
+
+    marked.clear()
+    scheduler.scored.clear()
+    result = orchestrator.replan("P_OUT", DAYS[0], DAYS[4])
+    orchestrator.wait_for_explanations(timeout=5)
+
+    assert marked == [(DAYS[2], DAYS[4])]
+    assert result["total_affected"] == 3 and scheduler.scored == {"PAT002", "PAT003", "PAT004"}
+    assert result["incremental"] == {"new_dates": DAYS[2:], "dropped_dates": [],
+                                     "reused_decisions": 3, "new_decisions": 3}
+    assert domain.json_client._load_json(domain.json_client.providers_file)[0]["unavailable_dates"] == DAYS
+
+    plan = PlanStore(plan_path).get("P_OUT")
+    assert plan["dates"] == DAYS and plan["end_date"] == DAYS[4]
+    assert sorted(plan["decisions"]) == ["A0", "A1", "A2", "A3", "A4", "A_LOW"]
+    assert plan["decisions"]["A_LOW"]["action"] == "waitlist"
+    assert len(plan["reservations"]) == 5
+    print(f"✅ Extension processed {result['total_affected']} new appointments, marked {marked}")
+
+
+def test_earlier_bookings_consume_capacity():
+    orchestrator, domain, scheduler, marked, plan_path = make_orchestrator()
+    orchestrator.execute_workflow("P_OUT", start_date=DAYS[0], end_date=DAYS[1])
+    result = orchestrator.replan("P_OUT", DAYS[0], DAYS[4])
+    orchestrator.wait_for_explanations(timeout=5)
+
+    # P1's 2 free slots went to A0 / A1 in the first run
+    assert {a["appointment_id"]: a["assigned_to"] for a in result["assignments"]} == {
+        "A2": "P2", "A3": "P2", "A4": "P2"}
+    assert [domain.get_appointment(f"A{i}")["provider_id"] for i in range(5)] == ["P1", "P1", "P2", "P2", "P2"]
+    print("✅ New decisions respect capacity used by earlier bookings")
+
+
+def test_same_window_is_noop():
+    orchestrator, domain, scheduler, marked, plan_path = make_orchestrator()
+    orchestrator.execute_workflow("P_OUT", start_date=DAYS[0], end_date=DAYS[1])
+    marked.clear()
+    scheduler.scored.clear()
+    result = orchestrator.replan("P_OUT", DAYS[0], DAYS[1])
+
+    assert result["assignment_method"] == "incremental-no-change"
+    assert result["total_affected"] == 0 and not marked and not scheduler.scored
+    assert result["incremental"]["reused_decisions"] == 3
+    print("✅ Same window re-plan is a no-op")
+
+
+def test_full_run_without_overlapping_plan():
+    orchestrator, domain, scheduler, marked, plan_path = make_orchestrator()
+    result = orchestrator.replan("P_OUT", DAYS[0], DAYS[0])
+    assert "incremental" not in result and result["total_affected"] == 2
+
+    # Disjoint window (a gap day in between) is a new outage, not an extension
+    marked.clear()
+    result = orchestrator.replan("P_OUT", DAYS[2], DAYS[4])
+    assert "incremental" not in result and marked == [(DAYS[2], DAYS[4])]
+    assert result["total_affected"] == 3
+
+    # Disabled plan store: always a full run
+    disabled = make_template_orchestrator(domain, make_scheduler(), plan_path="")
+    assert disabled.plans is None
+    assert "incremental" not in disabled.replan("P_OUT", DAYS[0], DAYS[1])
+    orchestrator.wait_for_explanations(timeout=5)
+    disabled.wait_for_explanations(timeout=5)
+    print("✅ No overlapping plan falls back to a full run")
+
+
+def test_stale_plan_after_reset_runs_full():
+    orchestrator, domain, scheduler, marked, plan_path = make_orchestrator()
+    orchestrator.execute_workflow("P_OUT", start_date=DAYS[0], end_date=DAYS[1])
+    orchestrator.wait_for_explanations(timeout=5)
+
+    # Demo reset: appointments back on P_OUT, dates unmarked (plan file left behind)
+    client = domain.json_client
+    for i in (0, 1):
+        client.update_appointment(f"A{i}", {"provider_id": "P_OUT"})
+    client.update_provider_status("P_OUT", "active", unavailable_dates=[])
+
+    marked.clear()
+    result = orchestrator.replan("P_OUT", DAYS[0], DAYS[1])
+    orchestrator.wait_for_explanations(timeout=5)
+    assert "incremental" not in result and marked == [(DAYS[0], DAYS[1])]
+    assert result["total_affected"] == 3
+    assert PlanStore(plan_path).get("P_OUT")["dates"] == DAYS[:2]
+
+    # Clearing the store (what /api/demo/reset does) forgets every plan
+    PlanStore(plan_path).clear()
+    assert PlanStore(plan_path).get("P_OUT") is None
+    print("✅ Stale plan discarded; full run after reset")
+
+
+if __name__ == "__main__":
+    test_extension_processes_only_new_dates()
+    test_earlier_bookings_consume_capacity()
+    test_same_window_is_noop()
+    test_full_run_without_overlapping_plan()
+    test_stale_plan_after_reset_runs_full()
+    print("\n✅ ALL INCREMENTAL RE-PLAN TESTS PASSED!")
@@ -0,0 +1,224 @@
+"""Test Durable LangGraph Checkpointing.
+
+Tests:
+1. A sent offer ends the run as AWAITING_CONSENT with the session only on disk
+2. A fresh orchestrator (restart) resumes on accept and books
+3. Decline offers the next provider and waits again
+4. Consent waits past patient_consent_hours go to manual review
+5. Memory holds no waiting sessions, however many are outstanding
+6. Fan-out reservations are checkpointed: a resumed branch never takes a slot
+   another waiting branch holds
+7. /confirm decline on a waiting session offers the next provider instead of
+   cancelling and waitlisting; the periodic sweep expires old waits
+"""
+
+import sys
+import json
+import sqlite3
+import tempfile
+from pathlib import Path
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from dev.tests.fakes import FakeDomain, FakeSchedulingAgent
+from orchestrator.langgraph_workflow import LangGraphWorkflowOrchestrator
+
+
+PROVIDERS = [{"provider_id": pid, "status": "active"} for pid in ("P1", "P2", "P3")]
+
+
+def departure_appointments(therapist_id):
+    return [{"appointment_id": f"A{therapist_id}-{i}", "patient_id": f"PAT00{i}",
+             "date": "2025-11-05", "time": f"0{i + 8}:00"} for i in range(3)]
+
+
+def make_scheduling_agent(appointments=departure_appointments):
+    return FakeSchedulingAgent(appointments, ("P2", "P3"), score=90, reasoning="x" * 500)
+
+
+class EmailEngagementAgent:
+    """Real-agent behaviour: the offer is emailed, the answer comes later."""
+
+    def __init__(self):
+        self.offers = []
+
+    def send_offer(self, patient_id, appointment_id, new_provider_id, date, time):
+        self.offers.append((appointment_id, new_provider_id))
+        return {"status": "sent", "confirmation_token": f"{appointment_id}_{patient_id}_{new_provider_id}"}
+
+    def send_confirmation(self, **kwargs):
+        pass
+
+
+class FakeBackfill:
+    def handle_slot_freed(self, appointment, reason):
+        return {"status": "NO_MATCH"}
+
+    def reschedule_declined_patient(self, original_patient_id, original_appointment):
+        return {"status": "WAITLISTED"}
+
+
+def make_orchestrator(path, **kwargs):
+    engagement, domain = EmailEngagementAgent(), FakeDomain(PROVIDERS)
+    orchestrator = LangGraphWorkflowOrchestrator(
+        smart_scheduling_agent=make_scheduling_agent(),
+        patient_engagement_agent=engagement,
+        backfill_agent=FakeBackfill(),
+        domain_server=domain,
+        fused_scoring=True,
+        checkpoint_path=path,
+        **kwargs
+    )
+    return orchestrator, engagement, domain
+
+
+def temp_path():
+    return str(Path(tempfile.mkdtemp()) / "sessions.sqlite")
+
+
+def test_offer_waits_on_disk():
+    path = temp_path()
+    orchestrator, engagement, domain = make_orchestrator(path)
+    result = orchestrator.process_therapist_departure("T001")
+
+    assert result["final_status"] == "AWAITING_CONSENT"
+    assert engagement.offers == [("AT001-0", "P2")] and not domain.bookings
+    assert orchestrator.get_session_stats()["active_in_memory"] == 0
+
+    row = sqlite3.connect(path).execute("SELECT node, status, state FROM sessions").fetchone()
+    state = json.loads(row[2])
+    assert row[:2] == ("consent", "awaiting_consent")
+    assert "appointments" not in state and "reasoning" not in state["ranked_providers"][0]
+    print(f"✅ Waiting session checkpointed ({len(row[2])} bytes)")
+
+
+def test_resume_after_restart():
+    path = temp_path()
+    orchestrator, _, _ = make_orchestrator(path)
+    session_id = orchestrator.process_therapist_departure("T001")["session_id"]
+
+    # New process: nothing in memory, state comes from SQLite
+    restarted, engagement, domain = make_orchestrator(path)
+    result = restarted.resume_consent("AT001-0", accepted=True)
+    assert result["final_status"] == "SUCCESS" and result["session_id"] == session_id
+    assert domain.bookings[0]["provider_id"] == "P2"
+    assert [e["stage"] for e in result["events"]][-2:] == ["consent_received", "book"]
+    assert restarted.get_session_stats()["checkpoints"]["sessions"] == {}
+    assert restarted.resume_consent("AT001-0", accepted=True) is None  # nothing waiting anymore
+    print("✅ Resumed after restart and booked")
+
+
+def test_decline_offers_next_provider():
+    path = temp_path()
+    orchestrator, engagement, domain = make_orchestrator(path)
+    orchestrator.process_therapist_departure("T001")
+
+    result = orchestrator.resume_consent("AT001-0", accepted=False)
+    assert result["final_status"] == "AWAITING_CONSENT"
+    assert engagement.offers == [("AT001-0", "P2"), ("AT001-0", "P3")]
+
+    result = orchestrator.resume_consent("AT001-0", accepted=True)
+    assert result["final_status"] == "SUCCESS"
+    assert domain.bookings[0]["provider_id"] == "P3"
+    print("✅ Decline → next provider offered → accepted")
+
+
+def test_expired_wait_goes_to_manual_review():
+    path = temp_path()
+    orchestrator, _, _ = make_orchestrator(path)
+    orchestrator.process_therapist_departure("T001")
+    assert orchestrator.expire_consent_waits() == []  # within patient_consent_hours
+
+    orchestrator.consent_timeout_hours = 0
+    results = orchestrator.expire_consent_waits()
+    assert [r["final_status"] for r in results] == ["MANUAL_REVIEW"]
+    print("✅ Expired consent wait → manual review")
+
+
+def test_memory_bounded_by_active_work():
+    path = temp_path()
+    orchestrator, _, _ = make_orchestrator(path)
+    for i in range(25):
+        assert orchestrator.process_therapist_departure(f"T{i:03d}")["final_status"] == "AWAITING_CONSENT"
+    stats = orchestrator.get_session_stats()
+    assert stats["active_in_memory"] == 0
+    assert stats["checkpoints"]["sessions"] == {"awaiting_consent": 25}
+
+    # Fan-out branches are checkpointed per appointment
+    orchestrator, _, _ = make_orchestrator(temp_path(), fan_out=True, max_concurrent_appointments=3)
+    result = orchestrator.process_therapist_departure("T900")
+    assert result["final_status"] == "AWAITING_CONSENT"
+    assert orchestrator.get_session_stats()["active_in_memory"] == 0
+    print(f"✅ 25 outstanding offers, {stats['active_in_memory']} sessions in memory")
+
+
+SAME_SLOT = [{"appointment_id": f"A{i}", "patient_id": f"PAT00{i}", "date": "2025-11-05", "time": "09:00"}
+             for i in range(2)]
+
+
+def test_decline_after_fan_out_keeps_waiting_slot():
+    """Decline after fan-out does not take a slot held by a waiting branch."""
+    path = temp_path()
+    orchestrator, engagement, _ = make_orchestrator(path, fan_out=True, max_concurrent_appointments=2)
+    orchestrator.scheduling_agent = make_scheduling_agent(SAME_SLOT)
+    result = orchestrator.process_therapist_departure("T001")
+    assert result["final_status"] == "AWAITING_CONSENT"
+    held = dict(engagement.offers)
+    assert sorted(held.values()) == ["P2", "P3"]  # same 09:00 slot, one provider each
+    assert not orchestrator._ledgers and orchestrator.get_session_stats()["checkpoints"]["ledgers"] == 1
+
+    # Restart; the patient offered P2 declines - P3's 09:00 slot is still held → HOD, not P3
+    restarted, engagement, domain = make_orchestrator(path)
+    declining = next(apt for apt, provider in held.items() if provider == "P2")
+    waiting = next(apt for apt in held if apt != declining)
+    restarted.resume_consent(declining, accepted=False)
+    assert engagement.offers == []
+
+    assert restarted.resume_consent(waiting, accepted=True)["final_status"] == "SUCCESS"
+    assert [(b["appointment_id"], b["provider_id"]) for b in domain.bookings] == [(declining, "P001"), (waiting, "P3")]
+    stats = restarted.get_session_stats()
+    assert stats["checkpoints"]["sessions"] == {} and stats["checkpoints"]["ledgers"] == 0
+    assert not restarted._ledgers
+    print(f"✅ Declined {declining} skipped the slot {waiting} holds")
+
+
+def test_confirm_decline_resumes_session():
+    from fastapi.testclient import TestClient
+    import web_server
+
+    orchestrator, engagement, _ = make_orchestrator(temp_path())
+    orchestrator.process_therapist_departure("T001")
+    data_dir = Path(tempfile.mkdtemp())
+    appointment = dict(departure_appointments("T001")[0], status="scheduled")
+    (data_dir / "appointments.json").write_text(json.dumps([appointment]))
+    (data_dir / "patients.json").write_text(json.dumps([{"patient_id": "PAT000", "name": "Pat"}]))
+
+    original = (web_server.DATA_DIR, web_server._langgraph_orchestrator)
+    web_server.DATA_DIR, web_server._langgraph_orchestrator = data_dir, orchestrator
+    try:
+        response = TestClient(web_server.app).get("/confirm", params={"token": "AT001-0", "action": "decline"})
+        assert response.status_code == 200 and "another provider" in response.text
+        assert engagement.offers == [("AT001-0", "P2"), ("AT001-0", "P3")]
+        saved = json.loads((data_dir / "appointments.json").read_text())[0]
+        assert saved["status"] == "scheduled" and saved["confirmation_status"] == "declined"
+        assert not (data_dir / "waitlist.json").exists()
+
+        # The sweep leaves fresh waits alone and times out stale ones
+        assert web_server._expire_workflow_sessions() == []
+        orchestrator.checkpoints._db.execute("UPDATE sessions SET updated_at = 0")
+        assert [r["final_status"] for r in web_server._expire_workflow_sessions()] == ["MANUAL_REVIEW"]
+    finally:
+        web_server.DATA_DIR, web_server._langgraph_orchestrator = original
+    print("✅ /confirm decline → next provider offered, nothing cancelled")
+
+
+if __name__ == "__main__":
+    test_offer_waits_on_disk()
+    test_resume_after_restart()
+    test_decline_offers_next_provider()
+    test_expired_wait_goes_to_manual_review()
+    test_memory_bounded_by_active_work()
+    test_decline_after_fan_out_keeps_waiting_slot()
+    test_confirm_decline_resumes_session()
+    print("\n✅ ALL CHECKPOINT TESTS PASSED!")
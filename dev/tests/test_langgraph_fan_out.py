@@ -0,0 +1,163 @@
+"""Test LangGraph Fan-Out Mode.
+
+Tests:
+1. Every affected appointment is processed, concurrently up to the configured bound
+2. The shared capacity ledger prevents double-booking a provider slot
+3. Declined offers release their reservation for other branches
+4. max_concurrent_appointments defaults to workflow_config.yaml
+5. HOD fallbacks claim the HOD's slot in the ledger (a second one goes to manual review)
+"""
+
+import sys
+import time
+import threading
+from time import sleep
+from pathlib import Path
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from dev.tests.fakes import FakeDomain, FakeSchedulingAgent
+from orchestrator.langgraph_workflow import LangGraphWorkflowOrchestrator, load_workflow_config
+
+
+APPOINTMENTS = [
+    {"appointment_id": "A1", "patient_id": "PAT1", "date": "2025-11-05", "time": "09:00"},
+    {"appointment_id": "A2", "patient_id": "PAT2", "date": "2025-11-05", "time": "09:00"},
+    {"appointment_id": "A3", "patient_id": "PAT3", "date": "2025-11-05", "time": "10:00"},
+    {"appointment_id": "A4", "patient_id": "PAT4", "date": "2025-11-05", "time": "11:00"},
+    {"appointment_id": "A5", "patient_id": "PAT_NO", "date": "2025-11-05", "time": "12:00"},
+]
+PROVIDERS = [
+    {"provider_id": "P1", "status": "active", "max_patient_capacity": 3, "current_patient_load": 1},
+    {"provider_id": "P2", "status": "active"},
+    {"provider_id": "P3", "status": "active"},
+]
+
+
+class FakeEngagementAgent:
+    """Patients take a moment to reply; PAT_NO declines the first offer."""
+
+    def __init__(self, delay=0.1):
+        self.delay = delay
+        self.lock = threading.Lock()
+        self.active = 0
+        self.peak = 0
+        self.offers = []
+
+    def send_offer(self, patient_id, appointment_id, new_provider_id, date, time):
+        provider_id = new_provider_id
+        with self.lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+            declined = patient_id == "PAT_NO" and not any(p == "PAT_NO" for p, _ in self.offers)
+            self.offers.append((patient_id, provider_id))
+        sleep(self.delay)
+        with self.lock:
+            self.active -= 1
+        response = "NO" if declined else "YES"
+        return {"patient_response": response, "consent_granted": response == "YES"}
+
+    def send_confirmation(self, **kwargs):
+        pass
+
+
+class FakeBackfillAgent:
+    def __init__(self):
+        self.rescheduled = []
+
+    def handle_slot_freed(self, appointment, reason):
+        return {"status": "NO_CANDIDATES"}
+
+    def reschedule_declined_patient(self, original_patient_id, original_appointment):
+        self.rescheduled.append(original_appointment["appointment_id"])
+        return {"status": "WAITLISTED"}
+
+
+def make_orchestrator(provider_ids=("P1", "P2", "P3"), **kwargs):
+    engagement, domain = FakeEngagementAgent(), FakeDomain(PROVIDERS)
+    orchestrator = LangGraphWorkflowOrchestrator(
+        smart_scheduling_agent=FakeSchedulingAgent(APPOINTMENTS, provider_ids),
+        patient_engagement_agent=engagement,
+        backfill_agent=FakeBackfillAgent(),
+        domain_server=domain,
+        fused_scoring=True,
+        checkpoint_path="",
+        **kwargs
+    )
+    return orchestrator, engagement, domain
+
+
+def test_fan_out_is_concurrent_and_bounded():
+    orchestrator, engagement, domain = make_orchestrator(fan_out=True, max_concurrent_appointments=3)
+    started = time.monotonic()
+    result = orchestrator.process_therapist_departure("T001")
+    elapsed = time.monotonic() - started
+
+    assert result["final_status"] == "SUCCESS", result
+    assert {a["appointment_id"] for a in result["appointments"]} == {a["appointment_id"] for a in APPOINTMENTS}
+    assert len(domain.bookings) == len(APPOINTMENTS)
+    assert engagement.peak == 3
+    # 6 offers of 0.1s sequentially would take >= 0.6s
+    assert elapsed < 0.5, elapsed
+    print(f"✅ {len(APPOINTMENTS)} appointments in {elapsed:.2f}s (peak {engagement.peak} concurrent)")
+
+
+def test_ledger_prevents_double_booking():
+    orchestrator, engagement, domain = make_orchestrator(fan_out=True, max_concurrent_appointments=5)
+    result = orchestrator.process_therapist_departure("T001")
+
+    slots = [(b["provider_id"], b["date"], b["time"]) for b in domain.bookings]
+    assert len(slots) == len(set(slots)), slots
+    assert sum(1 for b in domain.bookings if b["provider_id"] == "P1") <= 2  # capacity 3 - load 1
+    by_appointment = {b["appointment_id"]: b["provider_id"] for b in domain.bookings}
+    assert by_appointment["A1"] != by_appointment["A2"]  # same 09:00 slot
+    assert not orchestrator._ledgers  # per-session ledger cleaned up
+    print(f"✅ No double booking: {by_appointment} ({result['capacity']})")
+
+
+def test_decline_releases_reservation():
+    orchestrator, engagement, domain = make_orchestrator(fan_out=True, max_concurrent_appointments=5)
+    result = orchestrator.process_therapist_departure("T001")
+
+    offers_to_declining = [p for patient, p in engagement.offers if patient == "PAT_NO"]
+    assert len(offers_to_declining) == 2 and offers_to_declining[0] != offers_to_declining[1]
+    assert result["capacity"]["released"] == 1
+    assert result["capacity"]["reserved"] == len(domain.bookings)
+    print(f"✅ Declined offer released: {offers_to_declining}")
+
+
+def test_concurrency_from_workflow_config():
+    expected = load_workflow_config()["workflow"]["session"]["max_concurrent_appointments"]
+    orchestrator, _, _ = make_orchestrator(fan_out=True)
+    assert orchestrator.max_concurrent_appointments == expected
+
+    # Sequential mode is unchanged: one appointment per run, no ledger
+    orchestrator, engagement, domain = make_orchestrator(fan_out=False)
+    result = orchestrator.process_therapist_departure("T001")
+    assert result["final_status"] == "SUCCESS" and len(domain.bookings) == 1
+    assert "appointments" not in result
+    print(f"✅ max_concurrent_appointments={expected} from workflow_config.yaml")
+
+
+def test_hod_fallback_claims_slot():
+    # Nobody qualifies, so every appointment escalates to the HOD; A1 and A2 share 09:00
+    orchestrator, engagement, domain = make_orchestrator(provider_ids=(), fan_out=True,
+                                                         max_concurrent_appointments=5, hod_provider_id="P2")
+    result = orchestrator.process_therapist_departure("T001")
+
+    booked = sorted(b["appointment_id"] for b in domain.bookings)
+    assert all(b["provider_id"] == "P2" for b in domain.bookings) and not engagement.offers
+    assert len(booked) == 4 and ("A1" in booked) != ("A2" in booked)
+    assert orchestrator.backfill_agent.rescheduled == [{"A1", "A2"}.difference(booked).pop()]
+    assert result["capacity"]["reserved"] == 4 and result["capacity"]["rejected_slot"] == 1
+    print(f"✅ HOD booked {booked}, second 09:00 appointment sent to manual review")
+
+
+if __name__ == "__main__":
+    test_fan_out_is_concurrent_and_bounded()
+    test_ledger_prevents_double_booking()
+    test_decline_releases_reservation()
+    test_concurrency_from_workflow_config()
+    test_hod_fallback_claims_slot()
+    print("\n✅ ALL FAN-OUT TESTS PASSED!")
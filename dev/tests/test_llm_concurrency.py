@@ -0,0 +1,166 @@
+"""Test LLM Request Coalescing + Concurrency Limits.
+
+Tests:
+1. Concurrent identical requests share one upstream call (threads and asyncio)
+2. Different prompts and high-temperature requests are not coalesced
+3. Per-model limiter caps in-flight calls and serves waiters FIFO
+4. Queue depth and wait time are reported
+"""
+
+import sys
+import time
+import asyncio
+import threading
+from pathlib import Path
+from types import SimpleNamespace
+from concurrent.futures import ThreadPoolExecutor
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from adapters.llm import litellm_adapter
+from adapters.llm.concurrency import SingleFlight, ModelLimiter, parse_model_limits
+from adapters.llm.budget import BudgetGovernor
+from adapters.llm.litellm_adapter import LiteLLMAdapter
+
+
+def fake_response(content):
+    message = SimpleNamespace(content=content, tool_calls=None)
+    return SimpleNamespace(
+        choices=[SimpleNamespace(message=message, finish_reason="stop")],
+        usage=SimpleNamespace(prompt_tokens=100, completion_tokens=10, total_tokens=110)
+    )
+
+
+def make_adapter(limit=8):
+    adapter = LiteLLMAdapter(model="gpt-4o-mini", api_key="test", single_flight=SingleFlight(),
+                             limiter=ModelLimiter(default_limit=limit), budget=BudgetGovernor({}))
+    adapter.response_cache = None  # Isolate coalescing from the response cache
+    return adapter
+
+
+def test_identical_requests_coalesce_threads():
+    calls = []
+
+    def fake_completion(**kwargs):
+        calls.append(kwargs)
+        time.sleep(0.2)
+        return fake_response("shared answer")
+
+    original = litellm_adapter.completion
+    litellm_adapter.completion = fake_completion
+    try:
+        adapter = make_adapter()
+        with ThreadPoolExecutor(max_workers=5) as pool:
+            responses = list(pool.map(lambda _: adapter.generate("Score P001", temperature=0.3), range(5)))
+
+        assert len(calls) == 1
+        assert all(r.content == "shared answer" for r in responses)
+        assert sum(r.coalesced for r in responses) == 4
+        assert sum(r.usage["total_tokens"] for r in responses) == 110  # Spent once
+        assert adapter.get_concurrency_stats()["single_flight"]["coalesced"] == 4
+
+        # Distinct prompts and high temperature are independent calls
+        with ThreadPoolExecutor(max_workers=3) as pool:
+            list(pool.map(lambda i: adapter.generate(f"Score P00{i}", temperature=0.3), range(3)))
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            list(pool.map(lambda _: adapter.generate("Write an email", temperature=0.9), range(2)))
+        assert len(calls) == 6
+        print(f"✅ Coalescing: {adapter.get_concurrency_stats()}")
+    finally:
+        litellm_adapter.completion = original
+
+
+def test_identical_requests_coalesce_async():
+    calls = []
+
+    async def fake_acompletion(**kwargs):
+        calls.append(kwargs)
+        await asyncio.sleep(0.1)
+        return fake_response("async answer")
+
+    original = litellm_adapter.acompletion
+    litellm_adapter.acompletion = fake_acompletion
+    try:
+        adapter = make_adapter()
+
+        async def run():
+            return await asyncio.gather(*(adapter.agenerate("Score P001", temperature=0.3) for _ in range(4)))
+
+        responses = asyncio.run(run())
+        assert len(calls) == 1
+        assert [r.content for r in responses] == ["async answer"] * 4
+    finally:
+        litellm_adapter.acompletion = original
+
+
+def test_limiter_caps_in_flight_fifo():
+    """Limit 2: never more than 2 running; queued callers start in arrival order."""
+    limiter = ModelLimiter(default_limit=2)
+    lock = threading.Lock()
+    running = [0]
+    peak = [0]
+    started = []
+
+    def work(i):
+        with limiter.slot("m"):
+            with lock:
+                running[0] += 1
+                peak[0] = max(peak[0], running[0])
+                started.append(i)
+            time.sleep(0.05)
+            with lock:
+                running[0] -= 1
+
+    threads = []
+    for i in range(6):
+        t = threading.Thread(target=work, args=(i,))
+        t.start()
+        threads.append(t)
+        time.sleep(0.005)  # Deterministic arrival order
+    for t in threads:
+        t.join()
+
+    stats = limiter.get_stats()["m"]
+    assert peak[0] == 2
+    assert started[2:] == [2, 3, 4, 5]
+    assert stats["in_flight"] == 0 and stats["queue_depth"] == 0
+    assert stats["max_queue_depth"] == 4
+    assert stats["queued"] == 4 and stats["acquired"] == 6
+    assert stats["avg_wait_ms"] > 0
+    print(f"✅ Limiter: {stats}")
+
+
+def test_async_limiter_and_cancellation():
+    limiter = ModelLimiter(default_limit=1)
+
+    async def run():
+        async def hold(seconds):
+            async with limiter.aslot("m"):
+                await asyncio.sleep(seconds)
+
+        first = asyncio.create_task(hold(0.05))
+        await asyncio.sleep(0)
+        cancelled = asyncio.create_task(hold(0.05))
+        waiting = asyncio.create_task(hold(0.01))
+        await asyncio.sleep(0.01)
+        cancelled.cancel()
+        await asyncio.gather(first, waiting, return_exceptions=True)
+        return cancelled.cancelled()
+
+    assert asyncio.run(run())
+    stats = limiter.get_stats()["m"]
+    assert stats["in_flight"] == 0 and stats["queue_depth"] == 0
+
+
+def test_parse_model_limits():
+    assert parse_model_limits("gpt-4o-mini=20, azure/gpt-5-chat=5,bad") == {"gpt-4o-mini": 20, "azure/gpt-5-chat": 5}
+
+
+if __name__ == "__main__":
+    test_identical_requests_coalesce_threads()
+    test_identical_requests_coalesce_async()
+    test_limiter_caps_in_flight_fifo()
+    test_async_limiter_and_cancellation()
+    test_parse_model_limits()
+    print("\n✅ ALL LLM CONCURRENCY TESTS PASSED!")
@@ -0,0 +1,199 @@
+"""Test LLM Resilience (deadlines, retries, hedging, circuit breaker).
+
+Tests:
+1. Transient errors are retried with backoff; permanent errors are not
+2. The call deadline bounds total time across attempts
+3. A slow attempt is hedged to the fallback model (threads and asyncio)
+4. The circuit breaker fails fast while a backend is unhealthy, then recovers
+5. LiteLLMAdapter passes per-attempt timeouts and retries transient failures
+6. SmartSchedulingAgent falls back to rules when the circuit is open
+"""
+
+import sys
+import time
+import asyncio
+from pathlib import Path
+from types import SimpleNamespace
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from adapters.llm import litellm_adapter
+from adapters.llm.budget import BudgetGovernor
+from adapters.llm.litellm_adapter import LiteLLMAdapter
+from adapters.llm.resilience import (
+    ResilientCaller, CircuitOpenError, DeadlineExceededError, is_retryable
+)
+from agents.smart_scheduling_agent import SmartSchedulingAgent
+
+
+class ServiceUnavailable(Exception):
+    status_code = 503
+
+
+class BadRequest(Exception):
+    status_code = 400
+
+
+def fake_response(content):
+    message = SimpleNamespace(content=content, tool_calls=None)
+    return SimpleNamespace(
+        choices=[SimpleNamespace(message=message, finish_reason="stop")],
+        usage=SimpleNamespace(prompt_tokens=10, completion_tokens=5, total_tokens=15)
+    )
+
+
+def test_retries_with_backoff():
+    caller = ResilientCaller(max_retries=3, retry_delay=0.01)
+    attempts = []
+
+    def flaky(model, timeout):
+        attempts.append(timeout)
+        if len(attempts) < 3:
+            raise ServiceUnavailable("busy")
+        return "ok"
+
+    assert caller.call("m", flaky, timeout=5) == "ok"
+    assert len(attempts) == 3 and attempts[0] == 5
+    assert caller.get_stats()["retries"] == 2
+
+    def bad(model, timeout):
+        attempts.append(timeout)
+        raise BadRequest("invalid prompt")
+
+    attempts.clear()
+    try:
+        caller.call("m", bad)
+        assert False, "should raise"
+    except BadRequest:
+        pass
+    assert len(attempts) == 1
+    assert is_retryable(TimeoutError()) and not is_retryable(ValueError())
+    print("✅ Transient errors retried, permanent errors raised")
+
+
+def test_deadline_bounds_latency():
+    caller = ResilientCaller(request_timeout=10, call_deadline=0.3, max_retries=10, retry_delay=0.05)
+
+    def hanging(model, timeout):
+        time.sleep(min(timeout, 0.12))
+        raise TimeoutError("request timed out")
+
+    start = time.monotonic()
+    try:
+        caller.call("m", hanging)
+        assert False, "should raise"
+    except (DeadlineExceededError, TimeoutError):
+        pass
+    elapsed = time.monotonic() - start
+    assert elapsed < 0.5, elapsed
+    print(f"✅ Deadline held: gave up after {elapsed:.2f}s")
+
+
+def test_hedging_sync_and_async():
+    caller = ResilientCaller(hedge_model="backup", hedge_min_samples=3, max_retries=0)
+    for _ in range(3):
+        caller.call("primary", lambda model, timeout: "fast")
+
+    def slow_primary(model, timeout):
+        time.sleep(0.5 if model == "primary" else 0.01)
+        return model
+
+    start = time.monotonic()
+    assert caller.call("primary", slow_primary) == "backup"
+    assert time.monotonic() - start < 0.3
+    assert caller.hedges == 1 and caller.hedge_wins == 1
+
+    async def aslow_primary(model, timeout):
+        await asyncio.sleep(0.5 if model == "primary" else 0.01)
+        return model
+
+    async def run():
+        return await caller.acall("primary", aslow_primary)
+
+    start = time.monotonic()
+    assert asyncio.run(run()) == "backup"
+    assert time.monotonic() - start < 0.3
+    assert caller.hedges == 2
+    print(f"✅ Hedged slow calls: {caller.get_stats()['latency']}")
+
+
+def test_circuit_breaker():
+    caller = ResilientCaller(max_retries=0, failure_threshold=3, reset_seconds=0.2)
+    calls = []
+
+    def down(model, timeout):
+        calls.append(model)
+        raise ConnectionError("connection refused")
+
+    for _ in range(3):
+        try:
+            caller.call("m", down)
+        except ConnectionError:
+            pass
+    assert caller.breaker("m").state == "open"
+
+    start = time.monotonic()
+    try:
+        caller.call("m", down)
+        assert False, "should short-circuit"
+    except CircuitOpenError:
+        pass
+    assert len(calls) == 3 and time.monotonic() - start < 0.05
+
+    time.sleep(0.25)
+    assert caller.breaker("m").state == "half_open"
+    assert caller.call("m", lambda model, timeout: "recovered") == "recovered"
+    assert caller.breaker("m").state == "closed"
+    print(f"✅ Circuit breaker: {caller.breaker('m').get_stats()}")
+
+
+def test_adapter_timeouts_and_retries():
+    calls = []
+
+    def fake_completion(**kwargs):
+        calls.append(kwargs)
+        if len(calls) == 1:
+            raise ServiceUnavailable("overloaded")
+        return fake_response("done")
+
+    original = litellm_adapter.completion
+    litellm_adapter.completion = fake_completion
+    try:
+        adapter = LiteLLMAdapter(model="gpt-4o-mini", api_key="test", budget=BudgetGovernor({}),
+                                 resilience=ResilientCaller(request_timeout=42, retry_delay=0.01))
+        adapter.response_cache = None
+        response = adapter.generate("Score P001", temperature=0.2)
+        assert response.content == "done"
+        assert len(calls) == 2 and calls[0]["timeout"] == 42
+        adapter.generate("Score P002", temperature=0.2, timeout=7)
+        assert calls[-1]["timeout"] == 7
+        assert adapter.get_resilience_stats()["retries"] == 1
+    finally:
+        litellm_adapter.completion = original
+    print("✅ Adapter applies timeouts and retries")
+
+
+class OpenCircuitLLM:
+    def generate(self, **kwargs):
+        raise CircuitOpenError("Circuit open for gpt-4o")
+
+
+def test_agent_falls_back_when_circuit_open():
+    agent = SmartSchedulingAgent.__new__(SmartSchedulingAgent)
+    agent.llm = OpenCircuitLLM()
+    agent.llm_stats = {"calls": 0, "prompt_tokens": 0, "completion_tokens": 0, "latency_ms": 0.0, "unavailable": 0}
+    response = agent._generate("Score these providers", max_tokens=100)
+    assert response.content == ""
+    assert agent.llm_stats["unavailable"] == 1
+    print("✅ Agent short-circuits to rule-based path")
+
+
+if __name__ == "__main__":
+    test_retries_with_backoff()
+    test_deadline_bounds_latency()
+    test_hedging_sync_and_async()
+    test_circuit_breaker()
+    test_adapter_timeouts_and_retries()
+    test_agent_falls_back_when_circuit_open()
+    print("\n✅ ALL RESILIENCE TESTS PASSED!")
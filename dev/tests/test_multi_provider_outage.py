@@ -0,0 +1,193 @@
+"""Test Multi-Provider Outage Planning in One Pass.
+
+Tests:
+1. A clinic closure is planned as one problem with shared replacement capacity
+2. Providers in the outage set are never used as replacements
+3. Each appointment is scored against its own original provider; plans saved per provider
+4. LLM decisions (decision_first=False) are merged against the same shared capacity
+5. A closure extends a provider's stored plan instead of overwriting it
+6. A provider repeated in the outages is rejected before anything is marked
+7. The prompt-driven orchestrator handles all outages in one tool-calling session
+"""
+
+import sys
+import json
+import tempfile
+from pathlib import Path
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from adapters.llm.litellm_adapter import LLMResponse
+from dev.tests.fakes import FakeBooking, FakeScheduler, make_domain, make_template_orchestrator
+from workflows.plan_store import PlanStore
+from workflows.prompt_driven_orchestrator import PromptDrivenOrchestrator
+
+
+DAY = "2025-11-05"
+NEXT_DAY = "2025-11-06"
+# P_B would be the best match for P_A's patients if it were not also out
+SCORES = {"P_B": 95, "P1": 90, "P2": 70}
+
+# P_A and P_B are both out; P1 has room for 2 patients, P2 is unlimited
+APPOINTMENTS = [
+    {"appointment_id": "A1", "patient_id": "PAT001", "provider_id": "P_A", "date": DAY, "time": "09:00"},
+    {"appointment_id": "A2", "patient_id": "PAT002", "provider_id": "P_A", "date": NEXT_DAY, "time": "09:00"},
+    {"appointment_id": "B1", "patient_id": "PAT003", "provider_id": "P_B", "date": DAY, "time": "10:00"},
+    {"appointment_id": "B2", "patient_id": "PAT004", "provider_id": "P_B", "date": DAY, "time": "11:00"},
+    {"appointment_id": "B3", "patient_id": "PAT005", "provider_id": "P_B", "date": NEXT_DAY, "time": "11:00"},
+]
+for apt in APPOINTMENTS:
+    apt["status"] = "scheduled"
+PROVIDERS = [
+    {"provider_id": "P_A", "name": "Dr. A", "status": "active"},
+    {"provider_id": "P_B", "name": "Dr. B", "status": "active", "specialty": "Orthopedic"},
+    {"provider_id": "P1", "name": "Dr. One", "status": "active", "specialty": "Orthopedic",
+     "max_patient_capacity": 3, "current_patient_load": 1},
+    {"provider_id": "P2", "name": "Dr. Two", "status": "active", "specialty": "Orthopedic"},
+]
+
+OUTAGES = [
+    {"provider_id": "P_A", "start_date": DAY, "end_date": NEXT_DAY},
+    {"provider_id": "P_B", "start_date": DAY, "end_date": NEXT_DAY},
+]
+
+
+class GreedyLLM:
+    """Sends every patient in the prompt to P1, ignoring its capacity."""
+
+    def generate(self, prompt, **kwargs):
+        assignments = [{"appointment_id": apt_id, "patient_id": patient_id, "action": "assign",
+                        "assigned_to": "P1", "match_score": 90} for apt_id, patient_id in json.loads(prompt)]
+        return LLMResponse(content=json.dumps({"assignments": assignments}))
+
+
+def make_orchestrator(domain, scheduler, plan_path, llm=None, decision_first=True):
+    orchestrator = make_template_orchestrator(domain, scheduler, llm=llm, decision_first=decision_first,
+                                              plan_path=plan_path)
+    orchestrator.get_prompt_with_variables = lambda metadata: json.dumps(
+        [[p["appointment_id"], p["patient"]["patient_id"]] for p in metadata["patients"]]
+    )
+    return orchestrator
+
+
+def run_closure(llm=None, decision_first=True):
+    domain, scheduler = make_domain(APPOINTMENTS, PROVIDERS), FakeScheduler(SCORES)
+    plan_path = str(Path(tempfile.mkdtemp()) / "plans.json")
+    orchestrator = make_orchestrator(domain, scheduler, plan_path, llm=llm, decision_first=decision_first)
+    result = orchestrator.execute_multi_provider_workflow(OUTAGES, reason="weather")
+    orchestrator.wait_for_explanations(timeout=5)
+    return result, domain, scheduler, plan_path
+
+
+def test_closure_shares_capacity():
+    result, domain, scheduler, plan_path = run_closure()
+
+    assert result["total_affected"] == 5 and result["provider_ids"] == ["P_A", "P_B"]
+    assigned = {a["appointment_id"]: a["assigned_to"] for a in result["assignments"]}
+    assert list(assigned.values()).count("P1") == 2  # capacity 3 - load 1, across BOTH providers
+    assert list(assigned.values()).count("P2") == 3
+    assert result["by_provider"] == {
+        "P_A": {"total_affected": 2, "successful_assignments": 2, "waitlist_entries": 0},
+        "P_B": {"total_affected": 3, "successful_assignments": 3, "waitlist_entries": 0},
+    }
+    print(f"✅ One pass, shared capacity: {assigned}")
+
+
+def test_outage_providers_not_replacements():
+    result, domain, scheduler, plan_path = run_closure()
+
+    assert not {a["assigned_to"] for a in result["assignments"]} & {"P_A", "P_B"}
+    assert [p["provider_id"] for p in result["metadata"]["available_providers"]] == ["P1", "P2"]
+    providers = {p["provider_id"]: p for p in domain.get_providers(["P_A", "P_B"])}
+    assert all(providers[pid]["unavailable_dates"] == [DAY, NEXT_DAY] for pid in ("P_A", "P_B"))
+    print("✅ Providers in the closure are never used as replacements")
+
+
+def test_original_provider_per_appointment():
+    result, domain, scheduler, plan_path = run_closure()
+
+    assert scheduler.originals == {"A1": "P_A", "A2": "P_A", "B1": "P_B", "B2": "P_B", "B3": "P_B"}
+    store = PlanStore(plan_path)
+    assert sorted(store.get("P_A")["decisions"]) == ["A1", "A2"]
+    assert sorted(store.get("P_B")["decisions"]) == ["B1", "B2", "B3"]
+    print("✅ Scored against each appointment's own provider; plans saved per provider")
+
+
+def test_llm_plan_shares_capacity():
+    result, domain, scheduler, plan_path = run_closure(llm=GreedyLLM(), decision_first=False)
+
+    assigned = {a["appointment_id"]: a["assigned_to"] for a in result["assignments"]}
+    assert len(assigned) == 5
+    assert list(assigned.values()).count("P1") == 2  # the other 3 are re-queued and go to P2
+    assert [domain.get_appointment(a)["provider_id"] for a in ("A1", "A2", "B1", "B2", "B3")].count("P1") == 2
+    print(f"✅ LLM plan merged against shared capacity: {assigned}")
+
+
+def test_closure_extends_stored_plan():
+    domain, scheduler = make_domain(APPOINTMENTS, PROVIDERS), FakeScheduler(SCORES)
+    plan_path = str(Path(tempfile.mkdtemp()) / "plans.json")
+    orchestrator = make_orchestrator(domain, scheduler, plan_path)
+
+    # P_A was already out on DAY; the closure then covers both days
+    orchestrator.execute_workflow("P_A", start_date=DAY, end_date=DAY)
+    orchestrator.wait_for_explanations(timeout=5)
+    first = PlanStore(plan_path).get("P_A")
+    assert first["dates"] == [DAY] and sorted(first["decisions"]) == ["A1"]
+
+    result = orchestrator.execute_multi_provider_workflow(OUTAGES, reason="weather")
+    orchestrator.wait_for_explanations(timeout=5)
+
+    assert result["by_provider"]["P_A"]["total_affected"] == 1  # A1 was moved by the first run
+    plan = PlanStore(plan_path).get("P_A")
+    assert plan["dates"] == [DAY, NEXT_DAY]
+    assert sorted(plan["decisions"]) == ["A1", "A2"]
+    assert first["reservations"][0] in plan["reservations"] and len(plan["reservations"]) == 2
+    print("✅ Closure extends the stored plan: decisions A1 (earlier) + A2 (closure)")
+
+
+def test_repeated_provider_rejected():
+    domain, scheduler = make_domain(APPOINTMENTS, PROVIDERS), FakeScheduler(SCORES)
+    orchestrator = make_orchestrator(domain, scheduler, plan_path="")
+    outages = OUTAGES + [{"provider_id": "P_A", "start_date": "2025-11-10"}]
+
+    try:
+        orchestrator.execute_multi_provider_workflow(outages)
+        assert False, "expected ValueError"
+    except ValueError as e:
+        assert "P_A" in str(e)
+    assert not any(p.get("unavailable_dates") for p in domain.get_providers(["P_A", "P_B"]))
+    print("✅ Repeated provider rejected before anything is marked")
+
+
+class RecordingToolLLM:
+    def __init__(self):
+        self.tasks = []
+
+    def generate_with_tools(self, messages, tools, **kwargs):
+        self.tasks.append(messages[1]["content"])
+        return LLMResponse(content=json.dumps({"done": True}))
+
+
+def test_prompt_driven_single_session():
+    llm = RecordingToolLLM()
+    orchestrator = PromptDrivenOrchestrator(make_domain(APPOINTMENTS, PROVIDERS), None, FakeBooking(None),
+                                            llm=llm, use_langfuse=False)
+    result = orchestrator.execute_multi_provider_workflow(OUTAGES, reason="weather")
+
+    assert result.pop("trace")["name"] == "prompt.multi_provider"
+    assert result == {"done": True} and len(llm.tasks) == 1
+    assert f"Provider P_A: {DAY} to {NEXT_DAY}" in llm.tasks[0]
+    assert f"Provider P_B: {DAY} to {NEXT_DAY}" in llm.tasks[0]
+    print("✅ Prompt-driven orchestrator: one session for all outages")
+
+
+if __name__ == "__main__":
+    test_closure_shares_capacity()
+    test_outage_providers_not_replacements()
+    test_original_provider_per_appointment()
+    test_llm_plan_shares_capacity()
+    test_closure_extends_stored_plan()
+    test_repeated_provider_rejected()
+    test_prompt_driven_single_session()
+    print("\n✅ ALL MULTI-PROVIDER OUTAGE TESTS PASSED!")
@@ -0,0 +1,111 @@
+"""Test Parallel Scoring.
+
+Tests:
+1. Process-pool rankings match the in-process scorer exactly
+2. Rankings match compute_match_score (the scorer behind calculate_match_score)
+3. Small batches stay in-process
+4. The orchestrator keeps every in-range provider, not just the top few
+"""
+
+import sys
+from pathlib import Path
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from agents.parallel_scoring import ParallelScorer, _synthetic_network
+from agents.match_scoring import compute_match_score
+from mcp_servers.domain.geo import get_zip_geo
+
+
+def test_pool_matches_in_process():
+    """Sharding across workers doesn't change any ranking."""
+    jobs, providers = _synthetic_network(60, 40)
+    originals = {"P0000": providers[0]}
+
+    single = ParallelScorer(max_workers=1).score_and_rank(jobs, providers, originals)
+    pooled = ParallelScorer(max_workers=2, min_parallel_pairs=0).score_and_rank(jobs, providers, originals)
+
+    assert single["stats"]["mode"] == "in-process"
+    assert pooled["stats"]["mode"] == "process-pool"
+    assert pooled["stats"]["shards"] > 1
+    assert pooled["rankings"] == single["rankings"]
+    assert pooled["stats"]["pairs_scored"] + pooled["stats"]["pairs_pruned"] == 60 * 40
+    print(f"✅ Pool matches in-process: {pooled['stats']}")
+
+
+def test_rankings_match_reference_scorer():
+    """Top provider and score agree with scoring each pair directly."""
+    jobs, providers = _synthetic_network(20, 25, seed=3)
+    originals = {"P0000": providers[0]}
+    distance = get_zip_geo().distance
+
+    result = ParallelScorer(max_workers=2, min_parallel_pairs=0).score_and_rank(jobs, providers, originals, top_k=3)
+
+    for job in jobs:
+        patient = job["patient"]
+        expected = []
+        for provider in providers:
+            if distance(patient["zip"], provider["zip"]) > patient["max_distance_miles"]:
+                continue
+            score = compute_match_score(patient, provider, providers[0], {"date": job["appointment_date"]})
+            expected.append((provider["provider_id"], score["total_score"]))
+        expected.sort(key=lambda x: x[1], reverse=True)
+
+        got = [(r["provider_id"], r["total_score"]) for r in result["rankings"][job["appointment_id"]]]
+        assert got == expected[:3], job["appointment_id"]
+    print("✅ Rankings match reference scorer")
+
+
+def test_small_batch_stays_in_process():
+    """Pool is skipped below the pair threshold."""
+    scorer = ParallelScorer(max_workers=4, min_parallel_pairs=1000)
+    assert not scorer.should_parallelize(999)
+    assert scorer.should_parallelize(1000)
+    assert not ParallelScorer(max_workers=1, min_parallel_pairs=0).should_parallelize(10**6)
+
+
+class RankingDomain:
+    def __init__(self, jobs, providers):
+        self.patients = {job["patient"]["patient_id"]: job["patient"] for job in jobs}
+        self.providers = providers
+
+    def get_patient(self, patient_id):
+        return self.patients.get(patient_id)
+
+    def get_providers(self, provider_ids):
+        return [p for p in self.providers if p["provider_id"] in provider_ids]
+
+
+def test_orchestrator_keeps_all_in_range_providers():
+    """Fallbacks past the 5th choice survive when capacity runs out."""
+    from workflows.template_driven_orchestrator import TemplateDrivenOrchestrator
+
+    jobs, providers = _synthetic_network(4, 12, seed=5)
+    for job in jobs:
+        job["patient"]["max_distance_miles"] = 999
+    orchestrator = TemplateDrivenOrchestrator(
+        RankingDomain(jobs, providers), None, None, None, llm=object(), use_langfuse=False, plan_path=""
+    )
+    metadata = {
+        "provider_id": "P0000",
+        "available_providers": providers,
+        "affected_appointments": [
+            {"appointment_id": job["appointment_id"], "patient_id": job["patient"]["patient_id"],
+             "date": job["appointment_date"], "provider_id": "P0000"}
+            for job in jobs
+        ]
+    }
+
+    rankings = orchestrator._score_all_in_parallel(metadata)
+    assert sorted(rankings) == [job["appointment_id"] for job in jobs]
+    assert all(len(ranking) == len(providers) for ranking in rankings.values())
+    print("✅ Orchestrator rankings keep every in-range provider")
+
+
+if __name__ == "__main__":
+    test_pool_matches_in_process()
+    test_rankings_match_reference_scorer()
+    test_small_batch_stays_in_process()
+    test_orchestrator_keeps_all_in_range_providers()
+    print("\n✅ ALL PARALLEL SCORING TESTS PASSED!")
@@ -0,0 +1,230 @@
+"""Test Parallel Tool Execution in PromptDrivenOrchestrator.
+
+Tests:
+1. Independent read-only calls from one turn run concurrently, results in call order
+2. Mutating calls are ordered barriers (reads before them finish first)
+3. Batch tools (get_patients, score_matrix) match the single-entity tools
+4. The loop sends one assistant message per turn with every tool call
+5. generate_with_tools returns OpenAI-format tool calls
+"""
+
+import sys
+import json
+import time
+import threading
+from pathlib import Path
+from types import SimpleNamespace
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from adapters.llm import litellm_adapter
+from adapters.llm.budget import BudgetGovernor
+from adapters.llm.litellm_adapter import LiteLLMAdapter, LLMResponse
+from workflows.prompt_driven_orchestrator import ToolRegistry, PromptDrivenOrchestrator
+
+
+PATIENTS = {
+    f"PAT00{i}": {"patient_id": f"PAT00{i}", "gender_preference": "F" if i % 2 else "M",
+                  "zip": "02139", "prior_providers": ["P2"] if i == 1 else [],
+                  "condition_specialty_required": "Orthopedic"}
+    for i in range(1, 5)
+}
+PROVIDERS = {
+    "P1": {"provider_id": "P1", "gender": "F", "specialty": "Orthopedic", "zip": "02139",
+           "years_experience": 10, "status": "active"},
+    "P2": {"provider_id": "P2", "gender": "M", "specialty": "Orthopedic", "zip": "02140",
+           "years_experience": 12, "status": "active", "capacity_utilization": 0.5,
+           "available_slots": [{"time": "09:00", "available": True}]},
+    "P3": {"provider_id": "P3", "gender": "F", "specialty": "Sports", "zip": "02139",
+           "years_experience": 3, "status": "inactive"},
+}
+
+
+class FakeDomain:
+    """Each read takes `delay` seconds; events record read/write ordering."""
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.events = []
+        self.lock = threading.Lock()
+
+    def _read(self, name):
+        time.sleep(self.delay)
+        with self.lock:
+            self.events.append(name)
+
+    def get_patient(self, patient_id):
+        self._read(f"patient:{patient_id}")
+        return PATIENTS.get(patient_id)
+
+    def get_patients(self, patient_ids):
+        self._read("patients")
+        return {pid: PATIENTS[pid] for pid in patient_ids if pid in PATIENTS}
+
+    def get_provider(self, provider_id):
+        self._read(f"provider:{provider_id}")
+        return PROVIDERS.get(provider_id)
+
+    def get_providers(self, provider_ids=None):
+        self._read("providers")
+        return [p for pid, p in PROVIDERS.items() if provider_ids is None or pid in provider_ids]
+
+    def get_appointments_in_range(self, provider_id, start_date, end_date):
+        self._read("appointments")
+        return [{"appointment_id": "A1", "patient_id": "PAT001", "provider_id": provider_id, "date": start_date}]
+
+    def add_to_waitlist(self, patient_id, appointment_id, reason):
+        with self.lock:
+            self.events.append(f"waitlist:{patient_id}")
+        return True
+
+
+class FakeBooking:
+    def __init__(self, domain):
+        self.domain = domain
+
+    def book_appointment(self, appointment_id, new_provider_id):
+        with self.domain.lock:
+            self.domain.events.append(f"assign:{appointment_id}")
+        return True
+
+
+def make_registry(delay=0.0):
+    domain = FakeDomain(delay)
+    return ToolRegistry(domain, None, FakeBooking(domain), max_parallel=8), domain
+
+
+def test_reads_run_concurrently_in_order():
+    registry, domain = make_registry(delay=0.1)
+    calls = [{"name": "get_patient_details", "arguments": {"patient_id": pid}} for pid in PATIENTS]
+    calls.append({"name": "get_provider_details", "arguments": {"provider_id": "P1"}})
+
+    started = time.monotonic()
+    results = registry.execute_tools(calls)
+    elapsed = time.monotonic() - started
+
+    assert [r.get("patient_id") or r.get("provider_id") for r in results] == list(PATIENTS) + ["P1"]
+    # 5 reads of 0.1s sequentially would take >= 0.5s
+    assert elapsed < 0.3, elapsed
+    print(f"✅ {len(calls)} reads in {elapsed:.2f}s, results in call order")
+
+
+def test_mutating_calls_are_barriers():
+    registry, domain = make_registry(delay=0.05)
+    calls = [
+        {"name": "get_patient_details", "arguments": {"patient_id": "PAT001"}},
+        {"name": "get_patient_details", "arguments": {"patient_id": "PAT002"}},
+        {"name": "assign_appointment", "arguments": {"appointment_id": "A1", "new_provider_id": "P2"}},
+        {"name": "add_to_waitlist", "arguments": {"patient_id": "PAT003", "appointment_id": "A3", "reason": "none"}},
+        {"name": "get_patient_details", "arguments": {"patient_id": "PAT004"}},
+        {"name": "no_such_tool", "arguments": {}},
+    ]
+    results = registry.execute_tools(calls)
+
+    assert set(domain.events[:2]) == {"patient:PAT001", "patient:PAT002"}
+    assert domain.events[2:] == ["assign:A1", "waitlist:PAT003", "patient:PAT004"]
+    assert results[2]["success"] and results[5] == {"error": "Tool no_such_tool not found"}
+    print(f"✅ Writes ordered after preceding reads: {domain.events}")
+
+
+def test_batch_tools_match_single_tools():
+    registry, domain = make_registry()
+    batch = registry.execute_tool("get_patients", {"patient_ids": ["PAT001", "PAT002", "PAT999"]})
+    assert batch["patients"]["PAT001"] == registry.get_patient_details("PAT001")
+    assert batch["count"] == 2 and batch["missing"] == ["PAT999"]
+
+    domain.events.clear()
+    matrix = registry.execute_tool("score_matrix", {"patient_ids": list(PATIENTS), "provider_ids": ["P1", "P2"],
+                                                    "original_provider_id": "P3"})
+    assert domain.events == ["patients", "providers"]
+    assert matrix["count"] == len(PATIENTS) * 2
+    for entry in matrix["scores"]:
+        single = registry.calculate_match_score(entry["patient_id"], entry["provider_id"], "P3")
+        assert entry["score"] == single["score"] and entry["factors"] == single["factors"]
+
+    assert registry.get_available_providers("2025-11-05")["count"] == 2
+    assert registry.get_affected_appointments("P3", "2025-11-05")["count"] == 1
+    names = {t["function"]["name"] for t in registry.get_tool_definitions()}
+    assert {"get_patients", "score_matrix"} <= names and names == set(registry.tools)
+    print(f"✅ Batch tools: {matrix['count']} scores from 2 reads")
+
+
+class ToolCallingLLM:
+    """Turn 1: four reads in one turn. Turn 2: one assignment. Turn 3: done."""
+
+    def __init__(self):
+        self.requests = []
+
+    def generate_with_tools(self, messages, tools, **kwargs):
+        self.requests.append([dict(m) for m in messages])
+        turn = len(self.requests)
+        if turn == 1:
+            calls = [("get_affected_appointments", {"provider_id": "P3", "date": "2025-11-05"}),
+                     ("get_patients", {"patient_ids": ["PAT001"]}),
+                     ("get_available_providers", {"date": "2025-11-05"}),
+                     ("score_matrix", {"patient_ids": ["PAT001"], "provider_ids": ["P1", "P2"]})]
+        elif turn == 2:
+            calls = [("assign_appointment", {"appointment_id": "A1", "new_provider_id": "P2"})]
+        else:
+            return LLMResponse(content=json.dumps({"assigned": 1}))
+        return LLMResponse(content="", tool_calls=[
+            {"id": f"call_{turn}_{i}", "type": "function",
+             "function": {"name": name, "arguments": json.dumps(args)}}
+            for i, (name, args) in enumerate(calls)
+        ])
+
+
+def test_loop_batches_tool_calls_per_turn():
+    domain = FakeDomain()
+    llm = ToolCallingLLM()
+    orchestrator = PromptDrivenOrchestrator(domain, None, FakeBooking(domain), llm=llm, use_langfuse=False)
+    result = orchestrator.execute_workflow("P3", "2025-11-05")
+
+    assert result.pop("trace")["name"] == "prompt.execute_workflow"
+    assert result == {"assigned": 1} and len(llm.requests) == 3
+    second_turn = llm.requests[1]
+    roles = [m["role"] for m in second_turn]
+    assert roles == ["system", "user", "assistant", "tool", "tool", "tool", "tool"]
+    assert len(second_turn[2]["tool_calls"]) == 4
+    assert [m["tool_call_id"] for m in second_turn[3:]] == [f"call_1_{i}" for i in range(4)]
+    assert json.loads(second_turn[4]["content"])["count"] == 1
+    print("✅ One assistant message per turn, tool results in call order")
+
+
+def test_generate_with_tools_openai_format():
+    captured = {}
+
+    def fake_completion(**kwargs):
+        captured.update(kwargs)
+        tool_call = SimpleNamespace(id="call_1", function=SimpleNamespace(name="get_patients",
+                                                                          arguments='{"patient_ids": ["PAT001"]}'))
+        message = SimpleNamespace(content=None, tool_calls=[tool_call])
+        return SimpleNamespace(choices=[SimpleNamespace(message=message, finish_reason="tool_calls")],
+                               usage=SimpleNamespace(prompt_tokens=20, completion_tokens=5, total_tokens=25),
+                               model="gpt-4o-mini")
+
+    original = litellm_adapter.completion
+    litellm_adapter.completion = fake_completion
+    try:
+        adapter = LiteLLMAdapter(model="gpt-4o-mini", api_key="test", budget=BudgetGovernor({}))
+        adapter.response_cache = None
+        messages = [{"role": "system", "content": "Orchestrate"}, {"role": "user", "content": "P3 out"}]
+        tools = ToolRegistry(FakeDomain(), None, None).get_tool_definitions()
+        response = adapter.generate_with_tools(messages=messages, tools=tools, temperature=0.3)
+    finally:
+        litellm_adapter.completion = original
+
+    assert captured["messages"] == messages and captured["tools"] == tools
+    assert response.tool_calls == [{"id": "call_1", "type": "function",
+                                    "function": {"name": "get_patients", "arguments": '{"patient_ids": ["PAT001"]}'}}]
+    print("✅ generate_with_tools returns OpenAI-format tool calls")
+
+
+if __name__ == "__main__":
+    test_reads_run_concurrently_in_order()
+    test_mutating_calls_are_barriers()
+    test_batch_tools_match_single_tools()
+    test_loop_batches_tool_calls_per_turn()
+    test_generate_with_tools_openai_format()
+    print("\n✅ ALL PARALLEL TOOL TESTS PASSED!")
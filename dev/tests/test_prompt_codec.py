@@ -0,0 +1,141 @@
+"""Test Compact Prompt Encoding.
+
+Tests:
+1. Compact tables keep every matching field (ids, names, specialty, gender, days, zip)
+2. Providers are listed once even if passed several times
+3. A synthetic 50-patient outage prompt is substantially smaller than verbose
+4. SmartSchedulingAgent prompt sections honour PROMPT_ENCODING and count tokens
+"""
+
+import sys
+from pathlib import Path
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from agents.prompt_codec import (
+    encode_patients, encode_providers, encode_record, count_tokens, compare_prompt_sizes, abbreviate_days
+)
+from agents.smart_scheduling_agent import SmartSchedulingAgent
+from workflows.template_driven_orchestrator import TemplateDrivenOrchestrator
+
+
+def make_patient(i):
+    return {
+        "patient_id": f"PAT{i:03d}",
+        "name": f"Patient {i}",
+        "age": 30 + i % 40,
+        "phone": "+1-555-000-0000",
+        "email": f"patient{i}@email.com",
+        "zip": f"{12340 + i % 9}",
+        "condition": "post-surgical knee" if i % 2 else "lower back pain",
+        "condition_specialty_required": "orthopedic",
+        "gender_preference": "female" if i % 3 == 0 else "any",
+        "preferred_days": "Tuesday,Thursday",
+        "preferred_time_block": "morning",
+        "max_distance_miles": 10.0,
+        "communication_channel_primary": "email",
+        "no_show_risk": 0.05,
+        "prior_providers": ["T001"] if i % 5 == 0 else [],
+        "insurance_provider": "Blue Cross"
+    }
+
+
+def make_provider(i):
+    return {
+        "provider_id": f"T{i:03d}",
+        "name": f"Therapist {i}",
+        "specialty": "Orthopedic Physical Therapy",
+        "gender": "female" if i % 2 else "male",
+        "status": "active",
+        "primary_location": "Renew Physical Therapy",
+        "zip": f"{12340 + i}",
+        "certifications": ["Orthopedic Clinical Specialist (OCS)"],
+        "available_days": ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday"],
+        "years_experience": 3 + i,
+        "experience_level": "senior" if i > 3 else "mid",
+        "current_patient_load": 10 + i,
+        "max_patient_capacity": 30,
+        "available_slots": [{"time": t, "available": True} for t in ("09:00", "10:00", "14:00")]
+    }
+
+
+def test_compact_rows_keep_decision_fields():
+    patient = make_patient(3)
+    provider = make_provider(1)
+
+    patients = encode_patients([patient])
+    header, row = patients.splitlines()
+    assert header.startswith("PATIENTS (id|name|condition|specialty_needed|gender_pref|days|prior|zip")
+    cells = row.split("|")
+    assert cells[:2] == ["PAT003", "Patient 3"]
+    assert "orthopedic" in cells and "female" in cells and "Tue,Thu" in cells and "12343" in cells
+    assert "@" not in row and "555" not in row  # contact fields dropped
+
+    providers = encode_providers([provider])
+    row = providers.splitlines()[1]
+    assert row.startswith("T001|Therapist 1|Orthopedic Physical Therapy|female|4|12341|Mon,Tue,Wed,Thu,Fri|11/30|")
+    assert row.endswith("09:00,10:00,14:00")
+
+    assert abbreviate_days("Monday, Friday") == ["Mon", "Fri"]
+    assert encode_record("APPOINTMENT", {"appointment_id": "A1", "time": "09:00", "note": "x"},
+                         ["appointment_id", "date", "time"]) == "APPOINTMENT: appointment_id=A1 time=09:00"
+    print("✓ Compact rows keep matching fields")
+
+
+def test_providers_deduplicated():
+    providers = [make_provider(1), make_provider(2), make_provider(1)]
+    lines = encode_providers(providers).splitlines()
+    assert len(lines) == 3
+    assert [line.split("|")[0] for line in lines[1:]] == ["T001", "T002"]
+    print("✓ Duplicate providers listed once")
+
+
+def test_outage_prompt_reduction():
+    orchestrator = TemplateDrivenOrchestrator(None, None, None, None, use_langfuse=False)
+    patients_data = [
+        {"patient": make_patient(i), "appointment_id": f"A{i:03d}", "original_time": "09:00"}
+        for i in range(50)
+    ]
+    providers = [make_provider(i) for i in range(1, 6)]
+
+    verbose = (orchestrator._format_patients_section_verbose(patients_data) +
+               orchestrator._format_providers_section_verbose(providers))
+    orchestrator.prompt_encoding = "compact"
+    compact = orchestrator._format_patients_section(patients_data) + orchestrator._format_providers_section(providers)
+
+    size = compare_prompt_sizes(verbose, compact, label="50-patient outage")
+    assert size["compact_tokens"] < size["verbose_tokens"]
+    assert size["reduction"] >= 0.4, size
+    assert size["tokens_saved"] == size["verbose_tokens"] - size["compact_tokens"]
+    assert all(f"A{i:03d}" in compact for i in range(50))
+    print(f"✓ Outage prompt {size['verbose_tokens']} → {size['compact_tokens']} tokens")
+
+
+def test_agent_prompt_sections():
+    agent = SmartSchedulingAgent.__new__(SmartSchedulingAgent)
+    agent.prompt_size = {"verbose_tokens": 0, "compact_tokens": 0}
+    patient, providers = make_patient(1), [make_provider(1), make_provider(2)]
+    appointment = {"appointment_id": "A001", "date": "2025-11-20", "time": "09:00", "provider_id": "T009"}
+
+    agent.prompt_encoding = "verbose"
+    verbose = agent._prompt_sections(patient, appointment, providers, "PROVIDERS", providers[0])
+    assert verbose["appointment"].startswith("APPOINTMENT:\n{")
+    assert agent.prompt_size["verbose_tokens"] == 0
+
+    agent.prompt_encoding = "compact"
+    compact = agent._prompt_sections(patient, appointment, providers, "PROVIDERS", providers[0])
+    assert compact["patient"].startswith("PATIENT (")
+    assert compact["providers"].count("\n") == 2
+    assert compact["original_provider"].startswith("ORIGINAL PROVIDER (for comparison): provider_id=T001")
+    assert 0 < agent.prompt_size["compact_tokens"] < agent.prompt_size["verbose_tokens"]
+    assert count_tokens("") == 0
+    print("✓ Agent prompt sections encoded compactly")
+
+
+if __name__ == "__main__":
+    test_compact_rows_keep_decision_fields()
+    test_providers_deduplicated()
+    test_outage_prompt_reduction()
+    test_agent_prompt_sections()
+    print("\n✅ ALL PROMPT CODEC TESTS PASSED!")
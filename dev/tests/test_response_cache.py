@@ -0,0 +1,178 @@
+"""Test LLM Response Cache.
+
+Tests:
+1. Identical requests are served from cache (memory, then disk after restart)
+2. Normalization: whitespace-only prompt differences share a key
+3. High-temperature requests bypass the cache
+4. TTL expiry and size-bounded disk eviction
+5. Hit rate and tokens saved are reported
+6. Keys include the endpoint; answers from a budget-routed model are not cached for the configured one
+"""
+
+import sys
+import time
+import tempfile
+from pathlib import Path
+from types import SimpleNamespace
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from adapters.llm import litellm_adapter
+from adapters.llm.budget import BudgetGovernor
+from adapters.llm.litellm_adapter import LiteLLMAdapter
+from adapters.llm.response_cache import ResponseCache, make_cache_key
+
+
+def fake_completion_factory(calls):
+    """Stand-in for litellm.completion that counts calls."""
+    def fake_completion(**kwargs):
+        calls.append(kwargs)
+        message = SimpleNamespace(content=f"answer #{len(calls)}", tool_calls=None)
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=message, finish_reason="stop")],
+            usage=SimpleNamespace(prompt_tokens=100, completion_tokens=20, total_tokens=120)
+        )
+    return fake_completion
+
+
+def make_adapter(cache):
+    return LiteLLMAdapter(model="gpt-4o-mini", api_key="test", response_cache=cache,
+                          budget=BudgetGovernor({}))
+
+
+def test_identical_requests_hit_cache():
+    """Second identical call makes no completion() request and reports tokens saved."""
+    calls = []
+    original = litellm_adapter.completion if hasattr(litellm_adapter, "completion") else None
+    litellm_adapter.completion = fake_completion_factory(calls)
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            db = str(Path(tmp) / "cache.sqlite")
+            adapter = make_adapter(ResponseCache(path=db))
+
+            first = adapter.generate("Rank P001 and P005", system="You are a scheduler", temperature=0.3)
+            second = adapter.generate("Rank P001 and P005  \n", system="You are a scheduler", temperature=0.3)
+
+            assert len(calls) == 1
+            assert second.content == first.content
+            assert second.cached is True and first.cached is False
+            assert second.usage["total_tokens"] == 0
+            assert second.usage["cached_total_tokens"] == 120
+
+            # Different max_tokens is a different request
+            adapter.generate("Rank P001 and P005", system="You are a scheduler", temperature=0.3, max_tokens=50)
+            assert len(calls) == 2
+
+            # Explicit opt-out
+            adapter.generate("Rank P001 and P005", system="You are a scheduler", temperature=0.3, use_cache=False)
+            assert len(calls) == 3
+
+            stats = adapter.get_cache_stats()
+            assert stats["hits"] == 1 and stats["misses"] == 2
+            assert stats["tokens_saved"] == 120
+
+            # New process: memory tier empty, disk tier still answers
+            restarted = make_adapter(ResponseCache(path=db))
+            third = restarted.generate("Rank P001 and P005", system="You are a scheduler", temperature=0.3)
+            assert len(calls) == 3
+            assert third.content == first.content
+            assert restarted.get_cache_stats()["disk_hits"] == 1
+            print(f"✅ Cache stats: {stats}")
+    finally:
+        if original is not None:
+            litellm_adapter.completion = original
+
+
+def test_high_temperature_bypasses_cache():
+    """Creative (high-temperature) requests always go to the provider."""
+    calls = []
+    original = litellm_adapter.completion if hasattr(litellm_adapter, "completion") else None
+    litellm_adapter.completion = fake_completion_factory(calls)
+    try:
+        adapter = make_adapter(ResponseCache(max_temperature=0.5))
+        adapter.generate("Write a friendly email", temperature=0.7)
+        adapter.generate("Write a friendly email", temperature=0.7)
+        assert len(calls) == 2
+        assert adapter.get_cache_stats()["bypassed"] == 2
+    finally:
+        if original is not None:
+            litellm_adapter.completion = original
+
+
+def test_ttl_and_disk_eviction():
+    """Expired entries miss; the disk tier keeps at most max_disk_entries rows."""
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = ResponseCache(path=str(Path(tmp) / "cache.sqlite"), ttl_seconds=1,
+                              max_memory_entries=2, max_disk_entries=3)
+        payload = {"content": "x", "usage": {"total_tokens": 10}}
+
+        for i in range(5):
+            cache.put(f"k{i}", payload)
+        stats = cache.get_stats()
+        assert stats["disk_entries"] == 3
+        assert stats["memory_entries"] == 2
+        assert stats["evictions"] == 2
+        assert cache.get("k0") is None  # Evicted everywhere
+        assert cache.get("k2") is not None  # Still on disk
+
+        time.sleep(1.1)
+        assert cache.get("k4") is None
+        assert cache.get_stats()["expired"] >= 1
+
+
+def test_key_normalization():
+    """Key ignores trailing whitespace and model case, but not content."""
+    base = make_cache_key("GPT-4o", "sys", "prompt", 0.3, 100)
+    assert make_cache_key("gpt-4o", "sys ", "prompt\n", 0.3, 100) == base
+    assert make_cache_key("gpt-4o", "sys", "prompt!", 0.3, 100) != base
+    assert make_cache_key("gpt-4o", "sys", "prompt", 0.3, 100, tools=[{"name": "t"}]) != base
+    assert make_cache_key("gpt-4o", "sys", "prompt", 0.3, 100, api_base="http://other:4000") != base
+
+
+def test_routed_answers_not_cached_for_configured_model():
+    """A downgraded answer is never served to a later call that can afford the configured model."""
+    limits = {
+        "daily_budget": {"total_limit": 1.00},
+        "per_model_budgets": {
+            "big": {"litellm_model": "vendor/big-v1", "daily_limit": 0.50,
+                    "cost_per_1k_tokens": {"input": 0.01, "output": 0.02}},
+            "small": {"litellm_model": "vendor/small-v1", "daily_limit": 0.80,
+                      "cost_per_1k_tokens": {"input": 0.001, "output": 0.002}},
+        },
+        "optimization": {"fallback_chain": {"primary": "big", "fallback_1": "small"}},
+    }
+    calls = []
+    original = litellm_adapter.completion
+    litellm_adapter.completion = fake_completion_factory(calls)
+    try:
+        cache = ResponseCache()
+        governor = BudgetGovernor(limits)
+        governor.record("vendor/big-v1", {"prompt_tokens": 49990, "completion_tokens": 0})
+        adapter = LiteLLMAdapter(model="vendor/big-v1", api_base="http://localhost:4000", api_key="test",
+                                 response_cache=cache, budget=governor)
+        assert adapter.generate("Rank P001", max_tokens=1000, temperature=0.3).model == "vendor/small-v1"
+
+        # Next day (fresh budget): the configured model is called, not the cached small-model answer
+        adapter.budget = BudgetGovernor(limits)
+        response = adapter.generate("Rank P001", max_tokens=1000, temperature=0.3)
+        assert [c["model"] for c in calls] == ["vendor/small-v1", "vendor/big-v1"] and not response.cached
+        assert adapter.generate("Rank P001", max_tokens=1000, temperature=0.3).cached
+
+        # Same model name behind another endpoint does not share entries
+        other = LiteLLMAdapter(model="vendor/big-v1", api_base="http://other:4000", api_key="test",
+                               response_cache=cache, budget=BudgetGovernor(limits))
+        assert not other.generate("Rank P001", max_tokens=1000, temperature=0.3).cached
+        assert len(calls) == 3
+        print("✅ Cache keyed on the model and endpoint that answered")
+    finally:
+        litellm_adapter.completion = original
+
+
+if __name__ == "__main__":
+    test_identical_requests_hit_cache()
+    test_high_temperature_bypasses_cache()
+    test_ttl_and_disk_eviction()
+    test_key_normalization()
+    test_routed_answers_not_cached_for_configured_model()
+    print("\n✅ ALL RESPONSE CACHE TESTS PASSED!")
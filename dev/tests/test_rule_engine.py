@@ -0,0 +1,174 @@
+"""Test Rule Engine Fast Path.
+
+Tests:
+1. Each hard rule eliminates with its own reason
+2. Clear passes are qualified without the LLM
+3. Only ambiguous candidates reach the LLM
+4. filters_applied accounts for every candidate exactly once per rule reached
+"""
+
+import sys
+from pathlib import Path
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from agents.rule_engine import RuleEngine
+from agents.smart_scheduling_agent import SmartSchedulingAgent
+from mcp_servers.domain.geo import haversine_miles
+
+
+CENTROIDS = {"00001": (42.80, -73.90), "00002": (42.82, -73.90), "00003": (43.50, -73.90)}
+
+PATIENT = {
+    "patient_id": "PAT001", "zip": "00001", "max_distance_miles": 10,
+    "condition_specialty_required": "orthopedic", "gender_preference": "female",
+    "preferred_days": "Tuesday,Thursday"
+}
+
+WEEKDAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday"]
+
+
+def provider(pid, **overrides):
+    record = {"provider_id": pid, "zip": "00002", "status": "active", "gender": "female",
+              "specialty": "Orthopedic Physical Therapy", "available_days": WEEKDAYS}
+    record.update(overrides)
+    return record
+
+
+CANDIDATES = [
+    provider("GOOD"),
+    provider("INACTIVE", status="inactive"),
+    provider("FAR", zip="00003"),
+    provider("WRONG_SPECIALTY", specialty="Acupuncture & Manual Therapy"),
+    provider("MALE", gender="male"),
+    provider("WEEKENDS", available_days=["Saturday", "Sunday"]),
+    provider("SPORTS_PT", specialty="Sports Physical Therapy"),
+    provider("NO_ZIP", zip="99999"),
+]
+
+
+def distance(zip1, zip2):
+    if zip1 in CENTROIDS and zip2 in CENTROIDS:
+        return haversine_miles(*CENTROIDS[zip1], *CENTROIDS[zip2])
+    return 15.0
+
+
+def make_engine():
+    return RuleEngine(distance_fn=distance, locate_fn=CENTROIDS.get)
+
+
+def test_rule_verdicts():
+    """Every hard constraint is decided by its own rule."""
+    result = make_engine().evaluate(PATIENT, CANDIDATES)
+    eliminated = result["eliminated_providers"]
+
+    assert result["qualified"] == ["GOOD"]
+    assert eliminated["INACTIVE"]["rule"] == "Status"
+    assert eliminated["FAR"]["rule"] == "Distance"
+    assert eliminated["WRONG_SPECIALTY"]["rule"] == "Specialty"
+    assert eliminated["MALE"]["rule"] == "Gender Preference"
+    assert eliminated["WEEKENDS"]["rule"] == "Day Availability"
+    assert sorted(result["ambiguous"]) == ["NO_ZIP", "SPORTS_PT"]
+    assert result["decided"] == 6
+    assert result["llm_avoidance_rate"] == 0.75
+    print(f"✅ Rule verdicts: {eliminated}")
+
+
+def test_filters_applied_accounting():
+    """A candidate appears under each rule until (and including) its first FAIL."""
+    result = make_engine().evaluate(PATIENT, CANDIDATES)
+    by_rule = {f["filter"]: f for f in result["filters_applied"]}
+
+    # Everyone is checked for status; only INACTIVE fails it
+    status = by_rule["Status"]
+    assert len(status["passed"]) + len(status["eliminated"]) + len(status["undecided"]) == len(CANDIDATES)
+    assert status["eliminated"] == ["INACTIVE"]
+
+    # Distance is checked for everyone still standing; unknown zip stays undecided
+    assert by_rule["Distance"]["eliminated"] == ["FAR"]
+    assert by_rule["Distance"]["undecided"] == ["NO_ZIP"]
+    assert by_rule["Specialty"]["undecided"] == ["SPORTS_PT"]
+    assert by_rule["Day Availability"]["eliminated"] == ["WEEKENDS"]
+
+
+def test_preferred_gender_waived_when_unavailable():
+    """A 'preferred' gender only binds if some candidate can satisfy it."""
+    engine = make_engine()
+    result = engine.evaluate(PATIENT, [provider("M1", gender="male"), provider("M2", gender="male")])
+    assert result["qualified"] == ["M1", "M2"]
+
+    required = dict(PATIENT, gender_preference_strength="required")
+    result = engine.evaluate(required, [provider("M1", gender="male")])
+    assert result["eliminated_providers"]["M1"]["rule"] == "Gender Preference"
+
+    # A female provider out of range is not an option - preference still waived
+    result = engine.evaluate(PATIENT, [provider("M1", gender="male"), provider("F_FAR", zip="00003")])
+    assert result["qualified"] == ["M1"]
+    assert result["eliminated_providers"]["F_FAR"]["rule"] == "Distance"
+
+
+class RecordingLLM:
+    """Captures prompts; approves every candidate ID it sees."""
+
+    def __init__(self):
+        self.prompts = []
+
+    def generate(self, prompt, **kwargs):
+        self.prompts.append(prompt)
+
+        class Response:
+            content = '["SPORTS_PT", "NO_ZIP", "GOOD"]'
+        return Response()
+
+
+class StubKnowledge:
+    def search_knowledge(self, query, source="all"):
+        return "policy text"
+
+
+class StubDomain:
+    def __init__(self):
+        self.providers = {c["provider_id"]: c for c in CANDIDATES}
+
+    def get_patient(self, patient_id):
+        return PATIENT
+
+    def get_provider(self, provider_id):
+        return self.providers.get(provider_id)
+
+    def get_affected_appointments(self, provider_id):
+        return [{"appointment_id": "A001", "patient_id": "PAT001", "date": "2025-12-09T09:00:00"}]
+
+
+def test_only_ambiguous_candidates_reach_llm():
+    """The LLM prompt lists only undecided candidates; rule results are kept."""
+    llm = RecordingLLM()
+    agent = SmartSchedulingAgent(llm=llm, knowledge_server=StubKnowledge(), domain_server=StubDomain())
+    agent.rule_engine = make_engine()
+
+    result = agent.filter_candidates("PAT001", "A001", [c["provider_id"] for c in CANDIDATES])
+
+    assert len(llm.prompts) == 1
+    candidates_section = llm.prompts[0].split("CANDIDATES")[1].split("UNDECIDED")[0]
+    assert "SPORTS_PT" in candidates_section and "NO_ZIP" in candidates_section
+    assert "'GOOD'" not in candidates_section and "WEEKENDS" not in candidates_section
+
+    assert sorted(result["qualified_providers"]) == ["GOOD", "NO_ZIP", "SPORTS_PT"]
+    assert result["eliminated_providers"]["FAR"]["rule"] == "Distance"
+    assert result["rule_engine"]["llm_called"] is True
+    assert result["rule_engine"]["sent_to_llm"] == 2
+
+    # All candidates decided by rules → no LLM call at all
+    agent.filter_candidates("PAT001", "A001", ["GOOD", "FAR"])
+    assert len(llm.prompts) == 1
+    assert agent.rule_engine.get_stats()["llm_calls_avoided"] == 1
+    print(f"✅ LLM avoidance: {agent.rule_engine.get_stats()}")
+
+
+if __name__ == "__main__":
+    test_rule_verdicts()
+    test_filters_applied_accounting()
+    test_preferred_gender_waived_when_unavailable()
+    test_only_ambiguous_candidates_reach_llm()
+    print("\n✅ ALL RULE ENGINE TESTS PASSED!")
@@ -0,0 +1,135 @@
+"""Test Score Cache.
+
+Tests:
+1. Repeat scoring of the same pair is a cache hit
+2. Editing a patient/provider record invalidates its cached scores
+3. LRU eviction respects max_entries
+"""
+
+import sys
+import copy
+from pathlib import Path
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from agents.score_cache import ScoreCache, record_version
+from agents.smart_scheduling_agent import SmartSchedulingAgent
+from adapters.llm.mock_llm import MockLLM
+
+
+class StubJSONClient:
+    appointments_file = "appointments.json"
+
+    def __init__(self, appointments):
+        self.appointments = appointments
+
+    def _load_json(self, path):
+        return self.appointments
+
+
+class StubDomain:
+    """In-memory domain server with the subset of JSONDomainServer used for scoring."""
+
+    def __init__(self):
+        self.patients = {
+            "PAT001": {"patient_id": "PAT001", "zip": "12340", "gender_preference": "female",
+                       "condition_specialty_required": "Orthopedic", "prior_providers": ["P001"],
+                       "preferred_days": "Monday,Tuesday", "max_distance_miles": 10}
+        }
+        self.providers = {
+            "P001": {"provider_id": "P001", "zip": "12340", "gender": "female",
+                     "specialty": "Orthopedic Physical Therapy", "years_experience": 8,
+                     "current_patient_load": 10, "max_patient_capacity": 25,
+                     "available_days": ["Monday", "Tuesday"],
+                     "available_slots": [{"time": "09:00", "available": True}]}
+        }
+        self.json_client = StubJSONClient([
+            {"appointment_id": "A001", "patient_id": "PAT001", "provider_id": "T001",
+             "date": "2025-12-08T09:00:00"}
+        ])
+
+    def get_patient(self, patient_id):
+        return copy.deepcopy(self.patients.get(patient_id))
+
+    def get_provider(self, provider_id):
+        return copy.deepcopy(self.providers.get(provider_id))
+
+    def calculate_distance_between_zips(self, zip1, zip2):
+        return 0.0
+
+
+def make_agent(cache):
+    return SmartSchedulingAgent(llm=MockLLM(), knowledge_server=object(),
+                                domain_server=StubDomain(), score_cache=cache)
+
+
+def test_repeat_pair_hits_cache():
+    """Scoring the same pair twice computes once."""
+    cache = ScoreCache(max_entries=100)
+    agent = make_agent(cache)
+
+    first = agent.calculate_match_score("PAT001", "P001", appointment_id="A001")
+    second = agent.calculate_match_score("PAT001", "P001", appointment_id="A001")
+
+    assert first == second
+    assert first["total_score"] > 0
+    stats = cache.get_stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    print(f"✅ Repeat pair cached: {stats}")
+
+
+def test_record_change_invalidates():
+    """Editing either record produces a new version and drops stale entries."""
+    cache = ScoreCache(max_entries=100)
+    agent = make_agent(cache)
+
+    before = agent.calculate_match_score("PAT001", "P001", appointment_id="A001")
+
+    # Provider now at capacity → load balance score should drop
+    agent.domain.providers["P001"]["current_patient_load"] = 24
+    after = agent.calculate_match_score("PAT001", "P001", appointment_id="A001")
+
+    assert after["total_score"] < before["total_score"]
+    assert cache.get_stats()["invalidations"] == 1
+    assert cache.get_stats()["size"] == 1
+
+    # Patient edit is picked up too
+    agent.domain.patients["PAT001"]["prior_providers"] = []
+    changed = agent.calculate_match_score("PAT001", "P001", appointment_id="A001")
+    assert changed["breakdown"]["prior_provider_continuity"] == 0
+    assert cache.get_stats()["hits"] == 0
+    print(f"✅ Record edits invalidate cache: {cache.get_stats()}")
+
+
+def test_explicit_version_field():
+    """An explicit version field wins over the content fingerprint."""
+    assert record_version({"provider_id": "P001", "version": 3}) == "3"
+    assert record_version({"a": 1}) == record_version({"a": 1})
+    assert record_version({"a": 1}) != record_version({"a": 2})
+
+
+def test_lru_eviction():
+    """Least recently used entries are evicted first."""
+    cache = ScoreCache(max_entries=2)
+    patient = {"patient_id": "PAT001"}
+    keys = [cache.make_key(patient, {"provider_id": pid}) for pid in ("P001", "P002", "P003")]
+
+    cache.put(keys[0], {"total_score": 1})
+    cache.put(keys[1], {"total_score": 2})
+    cache.get(keys[0])  # P001 now most recent
+    cache.put(keys[2], {"total_score": 3})
+
+    assert cache.get(keys[1]) is None
+    assert cache.get(keys[0]) == {"total_score": 1}
+    assert cache.get_stats()["evictions"] == 1
+    print(f"✅ LRU eviction: {cache.get_stats()}")
+
+
+if __name__ == "__main__":
+    test_repeat_pair_hits_cache()
+    test_record_change_invalidates()
+    test_explicit_version_field()
+    test_lru_eviction()
+    print("\n✅ ALL SCORE CACHE TESTS PASSED!")
@@ -0,0 +1,169 @@
+"""Test Sharded LLM Planning.
+
+Tests:
+1. CapacityLedger enforces patient capacity and one booking per slot
+2. Long outages are split by token budget, keeping a patient's appointments together
+3. Shards run concurrently and the merged plan never overbooks a provider
+4. HOD-review bookings reserve capacity in the merge like assignments
+"""
+
+import sys
+import json
+import threading
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from config.llm_settings import settings as llm_settings
+from workflows.capacity_ledger import CapacityLedger
+from workflows.template_driven_orchestrator import TemplateDrivenOrchestrator
+
+
+def make_metadata(appointment_count, capacity=5):
+    providers = [
+        {"provider_id": "P1", "name": "Therapist One", "specialty": "orthopedic", "gender": "female",
+         "zip": "12345", "current_patient_load": 10, "max_patient_capacity": 10 + capacity},
+        {"provider_id": "P2", "name": "Therapist Two", "specialty": "orthopedic", "gender": "male",
+         "zip": "12346", "current_patient_load": 0, "max_patient_capacity": 100},
+    ]
+    appointments, patients = [], []
+    for i in range(appointment_count):
+        patient_id = f"PAT{i // 2:03d}"  # Two appointments per patient
+        apt = {"appointment_id": f"A{i:03d}", "patient_id": patient_id,
+               "date": f"2025-11-{20 + i % 2}", "time": f"{8 + i % 9:02d}:00"}
+        appointments.append(apt)
+        patients.append({
+            "appointment_id": apt["appointment_id"],
+            "patient": {"patient_id": patient_id, "condition": "knee", "condition_specialty_required": "orthopedic",
+                        "gender_preference": "any", "preferred_days": "Monday", "zip": "12345"},
+            "original_time": apt["time"],
+            "original_date": apt["date"]
+        })
+    return {
+        "provider_id": "P9", "provider_name": "Out Sick", "date": "2025-11-20",
+        "affected_appointments": appointments, "total_affected": len(appointments),
+        "patients": patients, "available_providers": providers, "has_continuity_option": False
+    }
+
+
+class GreedyLLM:
+    """Assigns every appointment in the prompt to P1 (ignores capacity)."""
+
+    def __init__(self):
+        self.active = 0
+        self.max_active = 0
+        self.lock = threading.Lock()
+
+    def generate(self, prompt, **kwargs):
+        with self.lock:
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        time.sleep(0.05)
+        with self.lock:
+            self.active -= 1
+        shard = json.loads(prompt)
+        assignments = [{"appointment_id": apt_id, "patient_id": patient_id, "action": "assign",
+                        "assigned_to": "P1", "match_quality": "GOOD"} for apt_id, patient_id in shard]
+        return SimpleNamespace(content=json.dumps({"assignments": assignments}))
+
+
+def make_orchestrator(llm):
+    orchestrator = TemplateDrivenOrchestrator(None, None, None, None, llm=llm, use_langfuse=False)
+    orchestrator.get_prompt_with_variables = lambda metadata: json.dumps(
+        [[p["appointment_id"], p["patient"]["patient_id"]] for p in metadata["patients"]]
+    )
+    return orchestrator
+
+
+def test_capacity_ledger():
+    ledger = CapacityLedger([
+        {"provider_id": "P1", "current_patient_load": 8, "max_patient_capacity": 10},
+        {"provider_id": "P2"}
+    ])
+    assert ledger.remaining("P1") == 2 and ledger.remaining("P2") is None
+    assert ledger.reserve("P1", {"date": "2025-11-20T09:00:00", "time": "09:00"}) is None
+    assert ledger.reserve("P1", {"date": "2025-11-20", "time": "09:00"}) == "slot"
+    assert ledger.reserve("P1", {"date": "2025-11-20", "time": "10:00"}) is None
+    assert ledger.reserve("P1", {"date": "2025-11-21", "time": "10:00"}) == "capacity"
+    assert ledger.reserve("PX", {"date": "2025-11-21", "time": "10:00"}) == "unknown_provider"
+    assert ledger.has_room("P2", {"date": "2025-11-21", "time": "10:00"})
+
+    shares = CapacityLedger([{"provider_id": "P1", "max_patient_capacity": 7}]).split([4, 2, 2])
+    assert [s["P1"] for s in shares] == [4, 2, 1]
+
+    stats = ledger.get_stats()
+    assert stats["reserved"] == 2 and stats["rejected_slot"] == 1 and stats["rejected_capacity"] == 1
+    print("✓ Ledger enforces capacity and slots")
+
+
+def test_plan_shards_respects_budgets():
+    orchestrator = make_orchestrator(GreedyLLM())
+    metadata = make_metadata(40)
+
+    original = (llm_settings.SHARD_INPUT_TOKENS, llm_settings.ORCHESTRATOR_MAX_TOKENS)
+    try:
+        llm_settings.SHARD_INPUT_TOKENS = 10 ** 6
+        assert len(orchestrator._plan_shards(metadata)) == 1
+
+        # Output budget: 8 appointments per shard
+        llm_settings.ORCHESTRATOR_MAX_TOKENS = 8 * llm_settings.SHARD_OUTPUT_TOKENS_PER_APPOINTMENT
+        shards = orchestrator._plan_shards(metadata)
+        assert len(shards) == 5 and all(len(s) == 8 for s in shards)
+
+        # Input budget: fixed allowance + a few patient rows
+        llm_settings.ORCHESTRATOR_MAX_TOKENS = 10 ** 6
+        llm_settings.SHARD_INPUT_TOKENS = llm_settings.SHARD_TEMPLATE_TOKENS + 250
+        shards = orchestrator._plan_shards(metadata)
+        assert len(shards) > 1
+        for shard in shards:
+            patient_ids = {p["patient"]["patient_id"] for p in shard}
+            assert all(len([p for p in shard if p["patient"]["patient_id"] == pid]) == 2 for pid in patient_ids)
+        assert sum(len(s) for s in shards) == 40
+    finally:
+        llm_settings.SHARD_INPUT_TOKENS, llm_settings.ORCHESTRATOR_MAX_TOKENS = original
+    print("✓ Shards fit the token budgets")
+
+
+def test_sharded_merge_never_overbooks():
+    llm = GreedyLLM()
+    orchestrator = make_orchestrator(llm)
+    metadata = make_metadata(24, capacity=5)
+    shards = [metadata["patients"][i:i + 6] for i in range(0, 24, 6)]
+
+    decisions, ledger = orchestrator._decide_sharded(metadata, shards)
+
+    assert llm.max_active > 1, "shards should run concurrently"
+    p1 = [a for a in decisions["assignments"] if a["assigned_to"] == "P1"]
+    assert len(p1) == 5
+    assert ledger.remaining("P1") == 0
+    assert decisions["summary"]["capacity_conflicts"] == 19
+    assert orchestrator.shard_stats["shards"] == 4
+    print(f"✓ Merged plan kept {len(p1)} P1 bookings, re-queued {decisions['summary']['capacity_conflicts']}")
+
+
+def test_merge_reserves_hod_reviews():
+    orchestrator = make_orchestrator(GreedyLLM())
+    metadata = make_metadata(4, capacity=2)
+    ledger = CapacityLedger(metadata["available_providers"])
+    shard_decisions = [
+        {"assignments": [{"appointment_id": f"A00{i}", "action": action, "assigned_to": "P1"}
+                         for i, action in pair]}
+        for pair in ([(0, "assign_hod_review"), (1, "assign")], [(2, "assign_hod_review"), (3, "waitlist")])
+    ]
+
+    decisions = orchestrator._merge_shard_decisions(metadata, shard_decisions, ledger)
+
+    assert [a["appointment_id"] for a in decisions["assignments"]] == ["A000", "A001", "A003"]
+    assert decisions["summary"]["capacity_conflicts"] == 1 and ledger.remaining("P1") == 0
+    print("✓ HOD reviews count against capacity in the merge")
+
+
+if __name__ == "__main__":
+    test_capacity_ledger()
+    test_plan_shards_respects_budgets()
+    test_sharded_merge_never_overbooks()
+    test_merge_reserves_hod_reviews()
+    print("\n✅ ALL SHARDED PLANNING TESTS PASSED!")
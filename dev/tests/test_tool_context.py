@@ -0,0 +1,160 @@
+"""Test Bounded Conversation Context in the Tool-Calling Loop.
+
+Tests:
+1. Large tool results are summarized; the full payload is retrievable by ref
+2. Old turns fold into a progress summary that keeps every action
+3. A long action log is capped to counts + recent lines; the full log is retrievable by ref
+4. Per-iteration prompt size stays flat over a 20-iteration session
+"""
+
+import sys
+import json
+from pathlib import Path
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from adapters.llm.litellm_adapter import LLMResponse
+from config.llm_settings import settings as llm_settings
+from workflows.prompt_driven_orchestrator import ToolRegistry, PromptDrivenOrchestrator
+from workflows.tool_context import ToolContext, summarize_result
+
+
+class BigDomain:
+    """Providers with long bios; appointments for every patient."""
+
+    def get_providers(self, provider_ids=None):
+        return [{"provider_id": f"P{i:03d}", "name": f"Dr. {i}", "status": "active",
+                 "bio": "Experienced therapist. " * 40, "specialty": "Orthopedic"} for i in range(30)]
+
+    def get_provider(self, provider_id):
+        return {"provider_id": provider_id, "status": "active", "bio": "x" * 200}
+
+    def get_appointments_in_range(self, provider_id, start_date, end_date):
+        return [{"appointment_id": f"A{i}", "patient_id": f"PAT{i:03d}", "provider_id": provider_id,
+                 "date": start_date, "time": "09:00", "notes": "n" * 100} for i in range(25)]
+
+    def add_to_waitlist(self, patient_id, appointment_id, reason):
+        return True
+
+
+class FakeBooking:
+    def book_appointment(self, appointment_id, new_provider_id):
+        return True
+
+
+def test_large_results_summarized_and_retrievable():
+    registry = ToolRegistry(BigDomain(), None, FakeBooking())
+    full = registry.execute_tool("get_available_providers", {"date": "2025-11-05"})
+    context = ToolContext("system", "task", store=registry.store_result, max_result_chars=2000)
+    context.add_turn([{"id": "c1", "type": "function", "function": {"name": "get_available_providers",
+                                                                   "arguments": "{}"}}],
+                     None, [{"name": "get_available_providers", "arguments": {}}], [full])
+
+    sent = json.loads(context.messages()[-1]["content"])
+    assert sent["truncated"] and sent["ref"] == "ref_1"
+    assert len(context.messages()[-1]["content"]) <= 2000
+    providers = sent["summary"]["providers"]
+    assert len(providers) == 10 and sent["summary"]["providers_total"] == 30
+    assert providers[0] == {"provider_id": "P000", "name": "Dr. 0", "status": "active"}
+
+    assert registry.execute_tool("get_tool_result", {"ref": "ref_1"}) == full
+    page = registry.execute_tool("get_tool_result", {"ref": "ref_1", "field": "providers", "offset": 10, "limit": 5})
+    assert page["total"] == 30 and [p["provider_id"] for p in page["items"]] == [f"P0{i}" for i in range(10, 15)]
+    assert "error" in registry.execute_tool("get_tool_result", {"ref": "ref_99"})
+    assert summarize_result([1, 2, 3]) == {"items": [1, 2, 3], "items_total": 3}
+    print(f"✅ Large result summarized ({len(json.dumps(full))} -> {len(context.messages()[-1]['content'])} chars)")
+
+
+def test_old_turns_fold_into_summary():
+    stored = []
+    context = ToolContext("system", "task", store=lambda r: stored.append(r) or f"ref_{len(stored)}",
+                          keep_turns=1, summary_lines=3)
+    for i in range(6):
+        name = "assign_appointment" if i % 2 else "get_provider_details"
+        args = {"appointment_id": f"A{i}", "new_provider_id": "P2"} if i % 2 else {"provider_id": f"P{i}"}
+        context.add_turn([{"id": f"c{i}", "type": "function", "function": {"name": name, "arguments": "{}"}}],
+                         None, [{"name": name, "arguments": args}], [{"success": True, "n": i}])
+
+    messages = context.messages()
+    assert [m["role"] for m in messages] == ["system", "user", "user", "assistant", "tool"]
+    summary = messages[2]["content"]
+    assert "5 earlier turns folded" in summary
+    assert all(f"assign_appointment(appointment_id=A{i}" in summary for i in (1, 3))
+    assert "[ref_1]" in summary and "get_provider_details(provider_id=P0)" in summary
+    assert messages[3]["tool_calls"][0]["id"] == "c5"
+    print("✅ Old turns folded, actions kept")
+
+
+def test_action_log_capped():
+    registry = ToolRegistry(BigDomain(), None, FakeBooking())
+    context = ToolContext("system", "task", store=registry.store_result, keep_turns=1, summary_lines=3)
+    for i in range(12):
+        name, args = (("add_to_waitlist", {"patient_id": f"PAT{i}", "appointment_id": f"A{i}", "reason": "full"})
+                      if i % 4 == 3 else ("assign_appointment", {"appointment_id": f"A{i}", "new_provider_id": f"P{i % 2}"}))
+        context.add_turn([{"id": f"c{i}", "type": "function", "function": {"name": name, "arguments": "{}"}}],
+                         None, [{"name": name, "arguments": args}], [{"success": True}])
+
+    summary = context.messages()[2]["content"]
+    ref = context.actions_ref
+    assert (f"Actions taken (11: add_to_waitlist: 2, assign_appointment -> P0: 6, "
+            f"assign_appointment -> P1: 3; full log [{ref}])") in summary
+    assert all(f"appointment_id=A{i}," in summary for i in (8, 9, 10))
+    assert "appointment_id=A7," not in summary
+    full_log = registry.execute_tool("get_tool_result", {"ref": ref})
+    assert len(full_log) == 11 and full_log[0].startswith("assign_appointment(appointment_id=A0")
+
+    # The stored log keeps growing under the same reference
+    context.add_turn([{"id": "c12", "type": "function", "function": {"name": "get_provider", "arguments": "{}"}}],
+                     None, [{"name": "get_provider", "arguments": {}}], [{}])
+    assert context.messages() and context.actions_ref == ref
+    assert len(registry.execute_tool("get_tool_result", {"ref": ref})) == 12
+    print(f"✅ Action log capped, full log at {ref}")
+
+
+class LongSessionLLM:
+    """Looks up data for 19 turns, then finishes; records prompt sizes."""
+
+    def __init__(self):
+        self.prompt_chars = []
+
+    def generate_with_tools(self, messages, tools, **kwargs):
+        self.prompt_chars.append(len(json.dumps(messages)))
+        turn = len(self.prompt_chars)
+        if turn >= 20:
+            return LLMResponse(content=json.dumps({"done": True}))
+        calls = [("get_available_providers", {"date": f"2025-11-{turn:02d}"}),
+                 ("get_affected_appointments", {"provider_id": "P001", "date": f"2025-11-{turn:02d}"}),
+                 ("assign_appointment", {"appointment_id": f"A{turn}", "new_provider_id": "P002"})]
+        return LLMResponse(content="", tool_calls=[
+            {"id": f"call_{turn}_{i}", "type": "function", "function": {"name": n, "arguments": json.dumps(a)}}
+            for i, (n, a) in enumerate(calls)
+        ])
+
+
+def test_prompt_size_bounded():
+    llm = LongSessionLLM()
+    orchestrator = PromptDrivenOrchestrator(BigDomain(), None, FakeBooking(), llm=llm, use_langfuse=False)
+    original = llm_settings.TOOL_CONTEXT_SUMMARY_LINES
+    llm_settings.TOOL_CONTEXT_SUMMARY_LINES = 6
+    try:
+        result = orchestrator.execute_workflow("P001", "2025-11-01")
+    finally:
+        llm_settings.TOOL_CONTEXT_SUMMARY_LINES = original
+    assert result.pop("trace")["name"] == "prompt.execute_workflow"
+    assert result == {"done": True} and len(llm.prompt_chars) == 20
+
+    sizes = llm.prompt_chars
+    # Once read and action lines are capped, the prompt stops growing
+    per_turn = [b - a for a, b in zip(sizes[10:], sizes[11:])]
+    assert max(per_turn) < 20, per_turn
+    assert max(sizes) < 2 * llm_settings.TOOL_RESULT_MAX_CHARS + 8000, sizes
+    print(f"✅ Prompt size: iteration 3 {sizes[2]}, iteration 20 {sizes[-1]} chars")
+
+
+if __name__ == "__main__":
+    test_large_results_summarized_and_retrievable()
+    test_old_turns_fold_into_summary()
+    test_action_log_capped()
+    test_prompt_size_bounded()
+    print("\n✅ ALL TOOL CONTEXT TESTS PASSED!")
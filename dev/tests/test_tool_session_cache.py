@@ -0,0 +1,164 @@
+"""Test Session-Scoped Tool Result Cache in ToolRegistry.
+
+Tests:
+1. Repeated read-only calls are served from the cache (argument order doesn't matter)
+2. assign_appointment / add_to_waitlist invalidate results for the entities they touch
+3. Identical calls in one turn run once; failed calls are not cached
+4. Cache hits are reported in the tool call history; each workflow run starts empty
+"""
+
+import sys
+import json
+import threading
+from pathlib import Path
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from adapters.llm.litellm_adapter import LLMResponse
+from workflows.prompt_driven_orchestrator import ToolRegistry, PromptDrivenOrchestrator
+
+
+class CountingDomain:
+    """Counts reads per method."""
+
+    def __init__(self):
+        self.reads = {}
+        self.lock = threading.Lock()
+
+    def _count(self, name):
+        with self.lock:
+            self.reads[name] = self.reads.get(name, 0) + 1
+
+    def get_provider(self, provider_id):
+        self._count("get_provider")
+        if provider_id == "P404":
+            return None
+        return {"provider_id": provider_id, "status": "active", "specialty": "Orthopedic"}
+
+    def get_providers(self, provider_ids=None):
+        self._count("get_providers")
+        return [{"provider_id": pid, "status": "active"} for pid in ("P1", "P2")]
+
+    def get_patient(self, patient_id):
+        self._count("get_patient")
+        return {"patient_id": patient_id}
+
+    def get_patients(self, patient_ids):
+        self._count("get_patients")
+        return {pid: {"patient_id": pid} for pid in patient_ids}
+
+    def get_appointments_in_range(self, provider_id, start_date, end_date):
+        self._count("get_appointments_in_range")
+        return [{"appointment_id": "A1", "patient_id": "PAT001", "provider_id": provider_id}]
+
+    def add_to_waitlist(self, patient_id, appointment_id, reason):
+        return True
+
+
+class FakeBooking:
+    def book_appointment(self, appointment_id, new_provider_id):
+        return True
+
+
+def make_registry():
+    domain = CountingDomain()
+    return ToolRegistry(domain, None, FakeBooking()), domain
+
+
+def test_repeated_reads_hit_cache():
+    registry, domain = make_registry()
+    first = registry.execute_tool("get_provider_details", {"provider_id": "P1"})
+    again = registry.execute_tool("get_provider_details", {"provider_id": "P1"})
+    registry.execute_tool("get_available_providers", {"date": "2025-11-05", "specialty": None})
+    registry.execute_tool("get_available_providers", {"date": "2025-11-05"})
+    registry.execute_tool("calculate_match_score", {"patient_id": "PAT001", "provider_id": "P1"})
+    registry.execute_tool("calculate_match_score", {"provider_id": "P1", "patient_id": "PAT001"})
+
+    assert again == first
+    assert domain.reads == {"get_provider": 2, "get_providers": 1, "get_patient": 1}
+    assert registry.get_cache_stats()["hits"] == 3
+    print(f"✅ Repeated reads cached: {registry.get_cache_stats()}")
+
+
+def test_mutations_invalidate_touched_entities():
+    registry, domain = make_registry()
+    for provider_id in ("P1", "P2"):
+        registry.execute_tool("get_provider_details", {"provider_id": provider_id})
+    registry.execute_tool("get_available_providers", {"date": "2025-11-05"})
+    registry.execute_tool("get_affected_appointments", {"provider_id": "P9", "date": "2025-11-05"})
+    registry.execute_tool("get_patient_details", {"patient_id": "PAT001"})
+    registry.execute_tool("get_patient_details", {"patient_id": "PAT002"})
+
+    # Assigning A1 to P2 drops P2, the provider list and P9's affected list
+    registry.execute_tool("assign_appointment", {"appointment_id": "A1", "new_provider_id": "P2"})
+    assert registry.get_cache_stats()["invalidations"] == 3
+    registry.execute_tool("get_provider_details", {"provider_id": "P1"})
+    registry.execute_tool("get_provider_details", {"provider_id": "P2"})
+    registry.execute_tool("get_available_providers", {"date": "2025-11-05"})
+    registry.execute_tool("get_affected_appointments", {"provider_id": "P9", "date": "2025-11-05"})
+    assert domain.reads["get_provider"] == 3
+    assert domain.reads["get_providers"] == 2 and domain.reads["get_appointments_in_range"] == 2
+
+    # Waitlisting PAT001 drops only PAT001
+    registry.execute_tool("add_to_waitlist", {"patient_id": "PAT001", "appointment_id": "A7", "reason": "none"})
+    registry.execute_tool("get_patient_details", {"patient_id": "PAT001"})
+    registry.execute_tool("get_patient_details", {"patient_id": "PAT002"})
+    assert domain.reads["get_patient"] == 3
+    print(f"✅ Mutations invalidate touched entities: {registry.get_cache_stats()}")
+
+
+def test_same_turn_duplicates_and_errors():
+    registry, domain = make_registry()
+    calls = [{"name": "get_provider_details", "arguments": {"provider_id": "P1"}} for _ in range(3)]
+    calls += [{"name": "get_provider_details", "arguments": {"provider_id": "P404"}} for _ in range(2)]
+    calls.append({"name": "no_such_tool", "arguments": {}})
+    calls.append({"name": "no_such_tool", "arguments": {}})
+    results = registry.execute_tools(calls)
+
+    assert [c["cached"] for c in calls] == [False, True, True, False, True, False, False]
+    assert results[0] == results[1] == results[2]
+    assert results[3] == results[4] and "error" in results[3]
+    assert domain.reads["get_provider"] == 2
+
+    registry.execute_tool("get_provider_details", {"provider_id": "P404"})
+    assert domain.reads["get_provider"] == 3  # errors are never cached
+    print("✅ Same-turn duplicates run once, errors not cached")
+
+
+class RepeatingLLM:
+    """Asks for the same provider in two consecutive turns, then finishes."""
+
+    def __init__(self):
+        self.turn = 0
+
+    def generate_with_tools(self, messages, tools, **kwargs):
+        self.turn += 1
+        if self.turn > 2:
+            self.turn = 0
+            return LLMResponse(content="done")
+        return LLMResponse(content="", tool_calls=[{
+            "id": f"call_{self.turn}", "type": "function",
+            "function": {"name": "get_provider_details", "arguments": json.dumps({"provider_id": "P1"})}
+        }])
+
+
+def test_history_reports_hits_per_session():
+    domain = CountingDomain()
+    orchestrator = PromptDrivenOrchestrator(domain, None, FakeBooking(), llm=RepeatingLLM(), use_langfuse=False)
+    history = orchestrator.execute_workflow("P9", "2025-11-05")["tool_call_history"]
+    assert [h["cached"] for h in history] == [False, True]
+
+    # A new run starts with an empty cache
+    history = orchestrator.execute_workflow("P9", "2025-11-06")["tool_call_history"]
+    assert [h["cached"] for h in history] == [False, True]
+    assert domain.reads["get_provider"] == 2
+    print("✅ Cache hits reported in tool call history")
+
+
+if __name__ == "__main__":
+    test_repeated_reads_hit_cache()
+    test_mutations_invalidate_touched_entities()
+    test_same_turn_duplicates_and_errors()
+    test_history_reports_hits_per_session()
+    print("\n✅ ALL TOOL CACHE TESTS PASSED!")
@@ -0,0 +1,261 @@
+"""Test Stage-Level Tracing Across the Orchestrators.
+
+Tests:
+1. Spans nest, record wall/CPU time and attributes, and export one JSONL line per trace
+2. Export is off unless TRACE_EXPORT_PATH (or export_path) is set
+3. Spans opened in worker threads attach to their parent through Tracer.bind()
+4. Template-driven, simple and LangGraph (fan-out) results carry their span tree
+5. The streaming LLM path records an "llm" span with tokens, and times the
+   bookings made while streaming separately
+6. /metrics totals are aggregated per span name
+"""
+
+import os
+import sys
+import json
+import time
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+import agents.tracing as tracing
+from agents.tracing import Tracer, get_tracer
+from dev.tests.fakes import (FakeBooking, FakeDomain, FakeScheduler, FakeSchedulingAgent, make_domain,
+                             make_template_orchestrator)
+
+
+DAY = "2025-11-05"
+SCORES = {"P1": 90, "P2": 70}
+
+# P_OUT has 5 appointments on DAY; P1 has room for 2 patients, P2 is unlimited; PAT_LOW scores 40
+APPOINTMENTS = [
+    {"appointment_id": f"A{i}", "patient_id": f"PAT00{i}", "provider_id": "P_OUT",
+     "date": DAY, "time": f"{9 + i:02d}:00", "status": "scheduled"}
+    for i in range(4)
+] + [{"appointment_id": "A_LOW", "patient_id": "PAT_LOW", "provider_id": "P_OUT",
+      "date": DAY, "time": "15:00", "status": "scheduled"}]
+PROVIDERS = [
+    {"provider_id": "P_OUT", "name": "Dr. Out", "status": "active"},
+    {"provider_id": "P1", "name": "Dr. One", "status": "active", "specialty": "Orthopedic",
+     "max_patient_capacity": 3, "current_patient_load": 1},
+    {"provider_id": "P2", "name": "Dr. Two", "status": "active", "specialty": "Orthopedic"},
+]
+
+
+def use_tracer(export_path=""):
+    """Fresh process-wide tracer for one test (no export unless export_path is given)."""
+    tracing._default_tracer = Tracer(export_path=export_path)
+    return tracing._default_tracer
+
+
+def test_nested_spans_exported():
+    path = Path(tempfile.mkdtemp()) / "traces.jsonl"
+    tracer = use_tracer(str(path))
+    with tracer.span("workflow", provider_id="P1") as root:
+        with tracer.span("metadata") as span:
+            sum(range(200000))
+            span.set(appointments=12)
+        with tracer.span("llm"):
+            time.sleep(0.05)
+        try:
+            with tracer.span("book"):
+                raise ValueError("slot taken")
+        except ValueError:
+            pass
+
+    tree = root.to_dict()
+    assert [c["name"] for c in tree["children"]] == ["metadata", "llm", "book"]
+    metadata, llm, book = tree["children"]
+    assert metadata["attributes"] == {"appointments": 12} and metadata["cpu_ms"] > 0
+    assert llm["wall_ms"] >= 50 and llm["cpu_ms"] < 25  # waiting, not computing
+    assert book["attributes"]["error"] == "ValueError: slot taken"
+    assert tree["wall_ms"] >= llm["wall_ms"] and tracer.current() is None
+
+    lines = path.read_text().splitlines()
+    assert len(lines) == 1 and json.loads(lines[0]) == tree
+
+    stats = tracer.get_stats()
+    assert stats["traces"] == 1 and stats["exported"] == 1
+    assert stats["spans"]["book"]["errors"] == 1 and stats["spans"]["llm"]["count"] == 1
+    print(f"✅ Nested spans: llm {llm['wall_ms']}ms wall / {llm['cpu_ms']}ms CPU")
+
+
+def test_export_off_by_default():
+    original = os.environ.pop("TRACE_EXPORT_PATH", None)
+    try:
+        tracer = Tracer()
+        with tracer.span("workflow"):
+            pass
+        assert tracer.export_path is None and tracer.get_stats()["exported"] == 0
+
+        path = Path(tempfile.mkdtemp()) / "traces.jsonl"
+        os.environ["TRACE_EXPORT_PATH"] = str(path)
+        assert Tracer().export_path == path
+    finally:
+        os.environ.pop("TRACE_EXPORT_PATH", None)
+        if original is not None:
+            os.environ["TRACE_EXPORT_PATH"] = original
+    print("✅ Trace export is opt-in via TRACE_EXPORT_PATH")
+
+
+def test_bind_nests_worker_spans():
+    tracer = use_tracer()
+
+    def shard(i):
+        with tracer.span("llm", shard=i):
+            time.sleep(0.01)
+
+    with tracer.span("decide") as root:
+        with ThreadPoolExecutor(max_workers=3) as pool:
+            list(pool.map(tracer.bind(shard), range(3)))
+
+    assert sorted(c["attributes"]["shard"] for c in root.to_dict()["children"]) == [0, 1, 2]
+    assert tracer.get_stats()["traces"] == 1
+    print("✅ Worker-thread spans nest under their parent")
+
+
+def test_template_driven_result_has_span_tree():
+    tracer = use_tracer()
+    scheduler = FakeScheduler(SCORES, patient_scores={"PAT_LOW": 40})
+    orchestrator = make_template_orchestrator(make_domain(APPOINTMENTS, PROVIDERS), scheduler)
+    result = orchestrator.execute_workflow("P_OUT", start_date=DAY, end_date=DAY)
+    orchestrator.wait_for_explanations(timeout=5)
+
+    trace = result["trace"]
+    assert trace["name"] == "template.execute_workflow"
+    assert [c["name"] for c in trace["children"]] == ["mark_unavailable", "metadata", "decide", "execute", "save_plan"]
+    children = {c["name"]: c for c in trace["children"]}
+    assert children["metadata"]["attributes"]["appointments"] == 5
+    assert children["execute"]["attributes"] == {"assigned": 4, "waitlisted": 1, "auto_processed": 0}
+    # Background narratives are their own trace
+    assert "template.explain_batch" in tracer.get_stats()["spans"]
+    print(f"✅ Template-driven span tree: {[c['name'] for c in trace['children']]}")
+
+
+class StreamingPlanLLM:
+    """Streams an assignment for every appointment in the prompt, then returns its usage."""
+
+    def stream(self, prompt, **kwargs):
+        assignments = [{"appointment_id": apt_id, "patient_id": patient_id, "action": "assign",
+                        "assigned_to": "P2", "match_score": 70} for apt_id, patient_id in json.loads(prompt)]
+        text = json.dumps({"assignments": assignments, "summary": {"method": "llm-streaming"}})
+        for i in range(0, len(text), 20):
+            time.sleep(0.005)
+            yield text[i:i + 20]
+        return {"prompt_tokens": 120, "completion_tokens": 80, "total_tokens": 200}
+
+
+class SlowBooking(FakeBooking):
+    def book_appointment(self, *args, **kwargs):
+        time.sleep(0.02)
+        return super().book_appointment(*args, **kwargs)
+
+
+def test_streaming_llm_span():
+    use_tracer()
+    domain = make_domain(APPOINTMENTS, PROVIDERS)
+    orchestrator = make_template_orchestrator(domain, FakeScheduler(SCORES), llm=StreamingPlanLLM(),
+                                              decision_first=False)
+    orchestrator.booking_agent = SlowBooking(domain)
+    orchestrator.get_prompt_with_variables = lambda metadata: json.dumps(
+        [[p["appointment_id"], p["patient"]["patient_id"]] for p in metadata["patients"]]
+    )
+    result = orchestrator.execute_workflow("P_OUT", start_date=DAY, end_date=DAY)
+
+    assert result["successful_assignments"] == 5
+    children = {c["name"]: c for c in result["trace"]["children"]}
+    (llm,) = children["decide"]["children"][1:]
+    assert [c["name"] for c in children["decide"]["children"]] == ["prompt", "llm"]
+    attributes = llm["attributes"]
+    assert attributes["streaming"] and attributes["prompt_chars"] > 0 and attributes["response_chars"] > 0
+    assert attributes["total_tokens"] == 200 and attributes["prompt_tokens"] == 120
+    assert attributes["executed"] == 5 and attributes["execute_ms"] >= 100  # 5 bookings x 20ms
+    assert attributes["execute_ms"] < llm["wall_ms"]
+    assert children["execute"]["attributes"]["streamed"] == 5
+    print(f"✅ Streaming llm span: {llm['wall_ms']}ms wall, {attributes['execute_ms']}ms of it booking")
+
+
+class SimpleScheduling:
+    def trigger_handler(self, therapist_id):
+        return {"affected_count": 1, "appointments": [
+            {"appointment_id": "A1", "patient_id": "PAT1", "date": "2025-11-05", "time": "09:00"}]}
+
+    def filter_candidates(self, appointment, candidate_ids):
+        return {"qualified_providers": candidate_ids[:2]}
+
+    def score_and_rank_providers(self, appointment, qualified_ids):
+        return {"recommended_provider_id": qualified_ids[0]}
+
+    def create_audit_log(self, session_data):
+        return {"session_id": session_data["session_id"]}
+
+
+class SimpleEngagement:
+    def send_offer(self, **kwargs):
+        return {"patient_response": "YES", "consent_granted": True}
+
+    def send_confirmation(self, **kwargs):
+        return {"confirmation_sent": True}
+
+
+class SimpleDomain:
+    def book_appointment(self, booking):
+        return {"status": "SUCCESS"}
+
+
+def test_simple_workflow_stages_traced():
+    from orchestrator.workflow import SimpleWorkflowOrchestrator
+
+    use_tracer()
+    orchestrator = SimpleWorkflowOrchestrator(SimpleScheduling(), SimpleEngagement(), SimpleDomain())
+    result = orchestrator.process_therapist_departure("T001")
+
+    assert result["final_status"] == "SUCCESS"
+    stages = result["trace"]["children"]
+    assert [s["name"] for s in stages] == [f"stage_{i}_{n}" for i, n in enumerate(
+        ["trigger", "filtering", "scoring", "consent", "booking", "audit"], start=1)]
+    assert stages[0]["attributes"]["affected"] == 1 and stages[4]["attributes"]["status"] == "SUCCESS"
+    print("✅ Simple workflow: six stage spans")
+
+
+def test_langgraph_nodes_traced_and_metrics():
+    from orchestrator.langgraph_workflow import LangGraphWorkflowOrchestrator
+
+    use_tracer()
+    appointments = [{"appointment_id": f"A{i}", "patient_id": f"PAT{i}", "date": DAY, "time": f"{9 + i:02d}:00"}
+                    for i in range(5)]
+    orchestrator = LangGraphWorkflowOrchestrator(
+        smart_scheduling_agent=FakeSchedulingAgent(appointments, ["P1", "P2"]),
+        patient_engagement_agent=SimpleEngagement(),
+        domain_server=FakeDomain([{"provider_id": "P1", "status": "active"}, {"provider_id": "P2", "status": "active"}]),
+        fused_scoring=True,
+        checkpoint_path="",
+        fan_out=True,
+        max_concurrent_appointments=3
+    )
+    result = orchestrator.process_therapist_departure("T001")
+
+    trace = result["trace"]
+    branches = [c for c in trace["children"] if c["name"] == "branch"]
+    assert trace["children"][0]["name"] == "node.trigger" and len(branches) == 5
+    assert all(b["children"][0]["name"] == "node.filter" for b in branches)
+    assert any(c["name"] == "node.book" for c in branches[0]["children"])
+
+    spans = get_tracer().get_stats()["spans"]
+    assert spans["branch"]["count"] == 5 and spans["node.filter"]["count"] == 5
+    assert spans["langgraph.process_therapist_departure"]["count"] == 1
+    print(f"✅ LangGraph fan-out: {len(branches)} branches traced; metrics for {len(spans)} span names")
+
+
+if __name__ == "__main__":
+    test_nested_spans_exported()
+    test_export_off_by_default()
+    test_bind_nests_worker_spans()
+    test_template_driven_result_has_span_tree()
+    test_streaming_llm_span()
+    test_simple_workflow_stages_traced()
+    test_langgraph_nodes_traced_and_metrics()
+    print("\n✅ ALL TRACING TESTS PASSED!")
@@ -0,0 +1,231 @@
+"""
+Zip code geodistance for provider matching.
+
+Replaces the "numeric zip difference" guess with straight-line distance
+between zip centroids:
+- Offline centroid table (data/zip_centroids.csv, or ZIP_CENTROIDS_PATH)
+- Haversine distance with a memoized pair cache
+- Grid spatial index over provider locations so candidates outside a
+  patient's max_distance_miles are dropped before scoring or any LLM call
+
+The centroid loader accepts either the demo CSV (zip,latitude,longitude) or
+the US Census ZCTA gazetteer file (tab separated GEOID, INTPTLAT, INTPTLONG),
+so a full national table can be dropped in without code changes.
+Zips missing from the table fall back to the legacy heuristic.
+"""
+import csv
+import math
+import os
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+EARTH_RADIUS_MILES = 3958.8
+MILES_PER_DEGREE_LAT = 69.05
+
+DEFAULT_CENTROIDS_PATH = Path(__file__).parent.parent.parent / "data" / "zip_centroids.csv"
+
+# Patient records use max_distance_miles = 999 to mean "will travel any distance"
+NO_DISTANCE_LIMIT_MILES = 999
+
+
+def distance_limit(patient: Optional[Dict]) -> Optional[float]:
+    """Patient's max_distance_miles, or None when they have no distance limit."""
+    max_distance = patient.get("max_distance_miles") if patient else None
+    if not max_distance or max_distance >= NO_DISTANCE_LIMIT_MILES:
+        return None
+    return max_distance
+
+
+def haversine_miles(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Great-circle distance between two points in miles."""
+    phi1 = math.radians(lat1)
+    phi2 = math.radians(lat2)
+    dphi = math.radians(lat2 - lat1)
+    dlambda = math.radians(lon2 - lon1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    return 2 * EARTH_RADIUS_MILES * math.asin(math.sqrt(a))
+
+
+def legacy_zip_distance(zip1: str, zip2: str) -> float:
+    """Numeric zip-difference estimate (used only for zips without a centroid)."""
+    try:
+        zip_diff = abs(int(zip1) - int(zip2))
+        estimated_distance = zip_diff * 2.0
+        if zip_diff == 0:
+            return 0.0
+        elif zip_diff <= 5:
+            return min(estimated_distance, 5.0)
+        elif zip_diff <= 10:
+            return min(estimated_distance, 12.0)
+        else:
+            return min(estimated_distance, 15.0)
+    except (TypeError, ValueError):
+        return 10.0
+
+
+def load_zip_centroids(path: Optional[str] = None) -> Dict[str, Tuple[float, float]]:
+    """Load zip → (lat, lon) from a demo CSV or Census gazetteer file."""
+    path = Path(path or os.getenv("ZIP_CENTROIDS_PATH") or DEFAULT_CENTROIDS_PATH)
+    centroids = {}
+
+    if not path.exists():
+        print(f"[GEO] Warning: zip centroid file not found ({path}), using heuristic distances")
+        return centroids
+
+    with open(path, newline="") as f:
+        sample = f.readline()
+        f.seek(0)
+        delimiter = "\t" if "\t" in sample else ","
+        reader = csv.DictReader(f, delimiter=delimiter)
+
+        for row in reader:
+            row = {(k or "").strip().lower(): (v or "").strip() for k, v in row.items()}
+            zip_code = row.get("zip") or row.get("geoid") or row.get("zcta5")
+            lat = row.get("latitude") or row.get("intptlat")
+            lon = row.get("longitude") or row.get("intptlong")
+            if not zip_code or not lat or not lon:
+                continue
+            try:
+                centroids[zip_code.zfill(5)] = (float(lat), float(lon))
+            except ValueError:
+                continue
+
+    return centroids
+
+
+class ZipGeo:
+    """Zip centroid lookup with a memoized distance cache."""
+
+    def __init__(self, centroids: Dict[str, Tuple[float, float]] = None):
+        self.centroids = centroids if centroids is not None else load_zip_centroids()
+        self._distance_cache: Dict[Tuple[str, str], float] = {}
+        self._lock = threading.Lock()
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def locate(self, zip_code: str) -> Optional[Tuple[float, float]]:
+        """Return (lat, lon) for a zip, or None if unknown."""
+        if not zip_code:
+            return None
+        return self.centroids.get(str(zip_code).strip().zfill(5))
+
+    def distance(self, zip1: str, zip2: str) -> float:
+        """Distance in miles between two zips (cached, order-independent)."""
+        zip1 = str(zip1 or "").strip()
+        zip2 = str(zip2 or "").strip()
+        if zip1 == zip2 and zip1:
+            return 0.0
+
+        key = (zip1, zip2) if zip1 <= zip2 else (zip2, zip1)
+        cached = self._distance_cache.get(key)
+        if cached is not None:
+            self.cache_hits += 1
+            return cached
+
+        self.cache_misses += 1
+        p1 = self.locate(zip1)
+        p2 = self.locate(zip2)
+        if p1 and p2:
+            miles = haversine_miles(p1[0], p1[1], p2[0], p2[1])
+        else:
+            miles = legacy_zip_distance(zip1, zip2)
+
+        with self._lock:
+            self._distance_cache[key] = miles
+        return miles
+
+    def precompute(self, zips_a: List[str], zips_b: List[str] = None) -> int:
+        """Fill the distance cache for every pair (e.g. patient zips × provider zips).
+
+        Returns:
+            Number of pairs cached
+        """
+        zips_a = sorted({z for z in zips_a if z})
+        zips_b = zips_a if zips_b is None else sorted({z for z in zips_b if z})
+        for z1 in zips_a:
+            for z2 in zips_b:
+                self.distance(z1, z2)
+        return len(self._distance_cache)
+
+    def get_stats(self) -> Dict[str, int]:
+        """Get distance cache statistics."""
+        return {
+            "known_zips": len(self.centroids),
+            "cached_pairs": len(self._distance_cache),
+            "cache_hits": self.cache_hits,
+            "cache_misses": self.cache_misses
+        }
+
+
+class ProviderSpatialIndex:
+    """Uniform lat/lon grid over provider locations for radius queries."""
+
+    def __init__(self, geo: ZipGeo, providers: List[Dict], cell_miles: float = 10.0):
+        """
+        Args:
+            geo: Zip lookup
+            providers: Provider records (must have provider_id and zip)
+            cell_miles: Grid cell edge length in miles
+        """
+        self.geo = geo
+        self.cell_deg = cell_miles / MILES_PER_DEGREE_LAT
+        self.providers = {p.get("provider_id"): p for p in providers}
+        self.cells: Dict[Tuple[int, int], List[Tuple[str, float, float]]] = {}
+        self.unlocated: List[str] = []  # Providers whose zip has no centroid
+
+        for provider_id, provider in self.providers.items():
+            point = geo.locate(provider.get("zip"))
+            if point is None:
+                self.unlocated.append(provider_id)
+                continue
+            self.cells.setdefault(self._cell(*point), []).append((provider_id, point[0], point[1]))
+
+    def _cell(self, lat: float, lon: float) -> Tuple[int, int]:
+        return (math.floor(lat / self.cell_deg), math.floor(lon / self.cell_deg))
+
+    def query(self, zip_code: str, radius_miles: float) -> List[Tuple[str, float]]:
+        """Providers within radius of a zip, as (provider_id, miles) sorted by distance."""
+        origin = self.geo.locate(zip_code)
+        results = []
+
+        if origin is None:
+            # No centroid for the patient - check every provider with the fallback estimate
+            for provider_id, provider in self.providers.items():
+                miles = self.geo.distance(zip_code, provider.get("zip"))
+                if miles <= radius_miles:
+                    results.append((provider_id, miles))
+            return sorted(results, key=lambda r: r[1])
+
+        lat, lon = origin
+        row, col = self._cell(lat, lon)
+        span_lat = math.ceil(radius_miles / MILES_PER_DEGREE_LAT / self.cell_deg)
+        # Longitude degrees shrink toward the poles - widen the scan accordingly
+        lon_scale = max(math.cos(math.radians(min(abs(lat) + radius_miles / MILES_PER_DEGREE_LAT, 89.0))), 0.01)
+        span_lon = math.ceil(radius_miles / (MILES_PER_DEGREE_LAT * lon_scale) / self.cell_deg)
+
+        for r in range(row - span_lat, row + span_lat + 1):
+            for c in range(col - span_lon, col + span_lon + 1):
+                for provider_id, p_lat, p_lon in self.cells.get((r, c), ()):
+                    miles = self.geo.distance(zip_code, self.providers[provider_id].get("zip"))
+                    if miles <= radius_miles:
+                        results.append((provider_id, miles))
+
+        for provider_id in self.unlocated:
+            miles = self.geo.distance(zip_code, self.providers[provider_id].get("zip"))
+            if miles <= radius_miles:
+                results.append((provider_id, miles))
+
+        return sorted(results, key=lambda r: r[1])
+
+
+# Shared lookup so the domain server and UI helpers use the same table and cache
+_default_geo: Optional[ZipGeo] = None
+
+
+def get_zip_geo() -> ZipGeo:
+    """Return the process-wide zip geo lookup."""
+    global _default_geo
+    if _default_geo is None:
+        _default_geo = ZipGeo()
+    return _default_geo
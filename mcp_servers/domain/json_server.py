@@ -6,22 +6,39 @@ import json
 import os
 from typing import Dict, List, Optional
 from api.json_client import JSONClient
+from mcp_servers.domain.geo import ProviderSpatialIndex, distance_limit, get_zip_geo
 
 class JSONDomainServer:
     """JSON-based Domain Server for patient, provider, and appointment data."""
     
     def __init__(self):
         self.json_client = JSONClient()
+        self.geo = get_zip_geo()
+        self._provider_index = None
+        self._provider_index_version = None
+        self.prune_stats = {"checked": 0, "pruned": 0}
         print("✅ JSONDomainServer initialized (using JSON data)")
     
     def get_patient(self, patient_id: str) -> Optional[Dict]:
         """Get a single patient by ID."""
         return self.json_client.get_patient(patient_id)
     
+    def get_patients(self, patient_ids: List[str]) -> Dict[str, Dict]:
+        """Get several patients by ID with one read (patient_id -> patient)."""
+        return self.json_client.get_patients(patient_ids)
+    
     def get_provider(self, provider_id: str) -> Optional[Dict]:
         """Get a single provider by ID."""
         return self.json_client.get_provider(provider_id)
     
+    def get_providers(self, provider_ids: Optional[List[str]] = None) -> List[Dict]:
+        """Get all providers (any status), or just the given IDs, with one read."""
+        providers = self.json_client._load_json(self.json_client.providers_file)
+        if provider_ids is None:
+            return providers
+        wanted = set(provider_ids)
+        return [p for p in providers if p.get("provider_id") in wanted]
+    
     def get_appointment(self, appointment_id: str) -> Optional[Dict]:
         """Get a single appointment by ID."""
         return self.json_client.get_appointment(appointment_id)
@@ -31,6 +48,18 @@ class JSONDomainServer:
         all_appointments = self.json_client._load_json(self.json_client.appointments_file)
         return [a for a in all_appointments if a.get("provider_id") == provider_id]
     
+    def get_appointments_in_range(self, provider_id: str, start_date: str, end_date: str) -> List[Dict]:
+        """Get a provider's appointments dated start_date..end_date (YYYY-MM-DD, inclusive).
+        
+        ISO dates compare as strings, so no per-appointment date parsing.
+        """
+        all_appointments = self.json_client._load_json(self.json_client.appointments_file)
+        return [
+            a for a in all_appointments
+            if a.get("provider_id") == provider_id
+            and start_date <= (a.get("date") or "")[:10] <= end_date
+        ]
+    
     def get_affected_appointments(self, provider_id: str) -> List[Dict]:
         """Get all affected appointments for a departing provider (alias for get_appointments_for_provider)."""
         return self.get_appointments_for_provider(provider_id)
@@ -111,37 +140,80 @@ class JSONDomainServer:
         """
         Calculate distance between two zip codes.
         
-        In a real system, this would call a geocoding API like:
+        Straight-line (haversine) miles between zip centroids from the
+        offline table in data/zip_centroids.csv. Zips not in the table fall
+        back to the old numeric-difference estimate.
+        
+        In a real system, driving distance would come from a routing API like:
         - Google Maps Distance Matrix API
         - Mapbox Distance API
-        - Here.com Routing API
+        """
+        return self.geo.distance(zip1, zip2)
+    
+    def prune_candidates_by_distance(self, patient: Dict, providers: List[Dict]) -> Dict:
+        """Drop providers outside the patient's max_distance_miles.
         
-        For demo, we use a simple approximation based on zip code proximity.
+        Queries a grid index over every provider in providers.json (only nearby
+        cells are checked) and keeps the hits that are among the candidates.
+        Candidates not in providers.json are checked directly. Patients without
+        a distance limit keep every candidate.
+        
+        Returns:
+            Dict with "kept" providers (nearest first) and "pruned" {provider_id: miles}
         """
-        # Simple heuristic: Calculate numeric distance between zips
-        # In reality, you'd call an external API
-        try:
-            z1 = int(zip1)
-            z2 = int(zip2)
-            zip_diff = abs(z1 - z2)
-            
-            # Rough approximation: 1 zip unit ≈ 2 miles
-            # This is a VERY rough estimate for demo purposes
-            estimated_distance = zip_diff * 2.0
+        max_distance = distance_limit(patient)
+        self.prune_stats["checked"] += len(providers)
+        
+        if max_distance is None:
+            return {"kept": list(providers), "pruned": {}}
+        
+        patient_zip = patient.get('zip')
+        index = self._get_provider_index()
+        in_range = dict(index.query(patient_zip, max_distance))
+        
+        kept, pruned = [], {}
+        for provider in providers:
+            provider_id = provider.get('provider_id')
+            indexed = index.providers.get(provider_id)
+            if indexed is not None and indexed.get('zip') == provider.get('zip'):
+                miles = in_range.get(provider_id)
+            else:
+                miles = self.geo.distance(patient_zip, provider.get('zip'))
+                miles = miles if miles <= max_distance else None
             
-            # Add some variance to make it realistic
-            if zip_diff == 0:
-                return 0.0
-            elif zip_diff <= 5:
-                return min(estimated_distance, 5.0)
-            elif zip_diff <= 10:
-                return min(estimated_distance, 12.0)
+            if miles is None:
+                pruned[provider_id] = round(self.geo.distance(patient_zip, provider.get('zip')), 1)
             else:
-                return min(estimated_distance, 15.0)
-        except:
-            # If zips can't be parsed as numbers, return a default
-            return 10.0
-
+                kept.append((miles, provider))
+        self.prune_stats["pruned"] += len(pruned)
+        
+        kept.sort(key=lambda k: k[0])
+        return {"kept": [provider for _, provider in kept], "pruned": pruned}
+    
+    def get_geo_stats(self) -> Dict:
+        """Get distance cache and candidate pruning statistics."""
+        checked = self.prune_stats["checked"]
+        return {
+            **self.geo.get_stats(),
+            "candidates_checked": checked,
+            "candidates_pruned": self.prune_stats["pruned"],
+            "prune_rate": round(self.prune_stats["pruned"] / checked, 3) if checked else 0.0
+        }
+    
+    def _get_provider_index(self) -> ProviderSpatialIndex:
+        """Spatial index over providers.json, rebuilt only when the file changes."""
+        providers_file = self.json_client.providers_file
+        try:
+            stat = providers_file.stat()
+            version = (str(providers_file), stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            version = (str(providers_file), None, None)
+        
+        if version != self._provider_index_version:
+            providers = self.json_client._load_json(providers_file)
+            self._provider_index = ProviderSpatialIndex(self.geo, providers)
+            self._provider_index_version = version
+        return self._provider_index
 
 def create_json_domain_server():
     """Factory function to create JSON domain server."""
@@ -0,0 +1,186 @@
+"""Durable checkpoints for LangGraph workflow sessions.
+
+A session can sit for up to patient_consent_hours waiting for the patient to
+click accept/decline. Instead of holding its WorkflowState in memory, the
+orchestrator writes a compact copy to SQLite after every node and drops the
+session from memory once it is waiting; /confirm loads it back and resumes.
+
+One row per (session_id, appointment_id) - fan-out branches of one session
+are checkpointed separately. Rows of finished sessions are deleted.
+
+Fan-out sessions also keep their capacity ledger (the slots held by offers
+still out) in a second table, so a resumed branch cannot take a slot another
+waiting branch holds.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+
+# Bulky fields that are re-derivable or not needed after the node that set them
+_DROPPED_FIELDS = ("appointments", "candidate_provider_ids", "fused_score_result")
+_RANKED_FIELDS = ("provider_id", "provider_name", "score", "match_score")
+
+
+def default_checkpoint_path() -> str:
+    """LANGGRAPH_CHECKPOINT_PATH, or .cache/langgraph_sessions.sqlite in the project."""
+    return os.getenv(
+        "LANGGRAPH_CHECKPOINT_PATH",
+        str(Path(__file__).parent.parent / ".cache" / "langgraph_sessions.sqlite")
+    )
+
+
+def compact_state(state: Dict[str, Any]) -> Dict[str, Any]:
+    """Copy of a WorkflowState without the fields a resumed session never reads."""
+    compact = {k: v for k, v in state.items() if k not in _DROPPED_FIELDS}
+    compact["ranked_providers"] = [
+        {k: p[k] for k in _RANKED_FIELDS if k in p} for p in state.get("ranked_providers") or []
+    ]
+    return compact
+
+
+def expand_state(compact: Dict[str, Any]) -> Dict[str, Any]:
+    """Restore dropped fields with empty values so the state is a full WorkflowState."""
+    state = dict(compact)
+    state.setdefault("appointments", [])
+    state.setdefault("candidate_provider_ids", [])
+    state.setdefault("fused_score_result", {})
+    return state
+
+
+class CheckpointStore:
+    """SQLite store of compact workflow states."""
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path: SQLite file (created if missing)
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False, timeout=5)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS sessions ("
+            " session_id TEXT NOT NULL,"
+            " appointment_id TEXT NOT NULL,"
+            " node TEXT NOT NULL,"
+            " status TEXT NOT NULL,"
+            " state TEXT NOT NULL,"
+            " updated_at REAL NOT NULL,"
+            " PRIMARY KEY (session_id, appointment_id))"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS idx_appointment ON sessions(appointment_id, status)")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS ledgers ("
+            " session_id TEXT PRIMARY KEY,"
+            " ledger TEXT NOT NULL,"
+            " updated_at REAL NOT NULL)"
+        )
+        self._db.commit()
+
+        self.saves = 0
+        self.loads = 0
+
+    def save(self, node: str, state: Dict[str, Any]) -> None:
+        """Checkpoint a state after a node."""
+        appointment_id = (state.get("current_appointment") or {}).get("appointment_id") or ""
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO sessions (session_id, appointment_id, node, status, state, updated_at)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (state["session_id"], appointment_id, node, state.get("status", ""),
+                 json.dumps(compact_state(state), default=str), time.time())
+            )
+            self._db.commit()
+            self.saves += 1
+
+    def load(self, session_id: str, appointment_id: str) -> Optional[Dict[str, Any]]:
+        """Full WorkflowState of a checkpointed session, or None."""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT state FROM sessions WHERE session_id = ? AND appointment_id = ?",
+                (session_id, appointment_id)
+            ).fetchone()
+            self.loads += 1
+        return expand_state(json.loads(row[0])) if row else None
+
+    def find_waiting(self, appointment_id: str) -> Optional[str]:
+        """Session waiting for consent on this appointment (most recent), or None."""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT session_id FROM sessions WHERE appointment_id = ? AND status = 'awaiting_consent'"
+                " ORDER BY updated_at DESC LIMIT 1",
+                (appointment_id,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def waiting_older_than(self, seconds: float) -> List[Dict[str, str]]:
+        """(session_id, appointment_id) of sessions waiting longer than seconds."""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT session_id, appointment_id FROM sessions"
+                " WHERE status = 'awaiting_consent' AND updated_at < ?",
+                (time.time() - seconds,)
+            ).fetchall()
+        return [{"session_id": s, "appointment_id": a} for s, a in rows]
+
+    def has_waiting(self, session_id: str) -> bool:
+        """True if any branch of the session is waiting for consent."""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT 1 FROM sessions WHERE session_id = ? AND status = 'awaiting_consent' LIMIT 1",
+                (session_id,)
+            ).fetchone()
+        return row is not None
+
+    def save_ledger(self, session_id: str, ledger: Dict[str, Any]) -> None:
+        """Store a session's capacity ledger (CapacityLedger.snapshot())."""
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO ledgers (session_id, ledger, updated_at) VALUES (?, ?, ?)",
+                (session_id, json.dumps(ledger), time.time())
+            )
+            self._db.commit()
+
+    def load_ledger(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """Stored capacity ledger of a session, or None."""
+        with self._lock:
+            row = self._db.execute("SELECT ledger FROM ledgers WHERE session_id = ?", (session_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def delete_ledger(self, session_id: str) -> None:
+        """Forget a session's ledger once no branch is waiting."""
+        with self._lock:
+            self._db.execute("DELETE FROM ledgers WHERE session_id = ?", (session_id,))
+            self._db.commit()
+
+    def delete(self, session_id: str, appointment_id: str) -> None:
+        """Forget a finished session."""
+        with self._lock:
+            self._db.execute(
+                "DELETE FROM sessions WHERE session_id = ? AND appointment_id = ?",
+                (session_id, appointment_id)
+            )
+            self._db.commit()
+
+    def close(self) -> None:
+        """Close the SQLite connection."""
+        with self._lock:
+            self._db.close()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get stored sessions by status, stored ledgers and save/load counts."""
+        with self._lock:
+            rows = self._db.execute("SELECT status, COUNT(*) FROM sessions GROUP BY status").fetchall()
+            ledgers = self._db.execute("SELECT COUNT(*) FROM ledgers").fetchone()[0]
+        return {
+            "sessions": dict(rows),
+            "ledgers": ledgers,
+            "saves": self.saves,
+            "loads": self.loads
+        }
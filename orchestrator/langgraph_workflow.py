@@ -8,11 +8,27 @@ This implementation uses LangGraph for:
 
 Branching scenarios:
 1. Patient says NO → Offer next ranked provider
-2. No candidates found → Escalate to HOD
+2. No candidates found → Escalate to HOD (manual review if the HOD's slot is taken)
 3. All candidates declined → Manual review
+
+Fan-out mode runs the filter → ... → audit sub-graph for every affected
+appointment concurrently (bounded by workflow.session.max_concurrent_appointments
+in config/workflow_config.yaml). Branches share a CapacityLedger: a provider
+slot is reserved when it is offered and released on decline, so two branches
+never book the same slot. While any branch waits for consent the ledger is
+checkpointed too, and resumed branches claim and release against it.
+
+Consent waits are durable: state is checkpointed to SQLite after every node
+(orchestrator/checkpoint_store.py). When an offer is out the session ends in
+"awaiting_consent" and leaves memory; resume_consent() (called by /confirm)
+loads it and continues from the patient's answer.
 """
 
-from typing import Dict, Any, List, Literal
+from typing import Dict, Any, List, Literal, Optional
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import yaml
 from langgraph.graph import StateGraph, END
 from typing_extensions import TypedDict
 import sys
@@ -24,7 +40,28 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 from agents.smart_scheduling_agent import SmartSchedulingAgent
 from agents.patient_engagement_agent import PatientEngagementAgent
 from agents.backfill_agent import BackfillAgent
+from agents.tracing import get_tracer, traced
 from mcp_servers.domain.json_server import create_json_domain_server
+from workflows.capacity_ledger import CapacityLedger
+from orchestrator.checkpoint_store import CheckpointStore, default_checkpoint_path
+
+WORKFLOW_CONFIG_PATH = Path(__file__).parent.parent / "config" / "workflow_config.yaml"
+
+
+def load_workflow_config(path: Optional[str] = None) -> Dict[str, Any]:
+    """Load workflow_config.yaml (empty dict if missing)."""
+    path = Path(path or WORKFLOW_CONFIG_PATH)
+    if not path.exists():
+        print(f"[ORCHESTRATOR] Warning: {path} not found, using defaults")
+        return {}
+    with open(path) as f:
+        return yaml.safe_load(f) or {}
+
+
+def consent_timeout_hours(config: Optional[Dict[str, Any]] = None) -> float:
+    """How long an offer may wait for the patient (timeouts.patient_consent_hours)."""
+    workflow_config = (config if config is not None else load_workflow_config()).get("workflow", {})
+    return workflow_config.get("timeouts", {}).get("patient_consent_hours", 24)
 
 
 class WorkflowState(TypedDict):
@@ -43,6 +80,7 @@ class WorkflowState(TypedDict):
     qualified_provider_ids: List[str]
     
     # Stage 3: Score
+    fused_score_result: Dict[str, Any]  # Set by filter in fused mode, reused by score
     ranked_providers: List[Dict[str, Any]]
     current_provider_index: int
     current_provider_id: str
@@ -75,6 +113,13 @@ class LangGraphWorkflowOrchestrator:
                                           └─ [TIMEOUT] → manual_review → END
     
     If no candidates: filter → hod_fallback → book → audit → END
+        (hod_fallback → manual_review when the HOD's slot is already claimed)
+    
+    Offer sent, no answer yet: consent → END (awaiting_consent), then
+    resume_consent() → consent_received → book / next_provider / manual_review
+    
+    Fan-out: trigger once, then one filter → ... → audit branch per
+    appointment, run concurrently with a shared capacity ledger.
     """
     
     def __init__(
@@ -82,40 +127,107 @@ class LangGraphWorkflowOrchestrator:
         smart_scheduling_agent=None,
         patient_engagement_agent=None,
         backfill_agent=None,
-        domain_server=None
+        domain_server=None,
+        fused_scoring: bool = None,
+        fan_out: bool = None,
+        max_concurrent_appointments: int = None,
+        checkpoint_path: str = None,
+        hod_provider_id: str = None
     ):
-        """Initialize orchestrator with agents and build workflow graph."""
+        """Initialize orchestrator with agents and build workflow graph.
+        
+        Args:
+            fused_scoring: Filter and score in one LLM call per appointment
+                (default: LANGGRAPH_FUSED_SCORING env, true)
+            fan_out: Process all affected appointments concurrently
+                (default: LANGGRAPH_FAN_OUT env, false)
+            max_concurrent_appointments: Fan-out concurrency (default:
+                workflow.session.max_concurrent_appointments in workflow_config.yaml)
+            checkpoint_path: SQLite file for session checkpoints (default:
+                LANGGRAPH_CHECKPOINT_PATH env, .cache/langgraph_sessions.sqlite;
+                "" disables checkpointing)
+            hod_provider_id: Provider booked when no ranked provider can be offered
+                (default: LANGGRAPH_HOD_PROVIDER_ID env, P001)
+        """
+        if fused_scoring is None:
+            fused_scoring = os.getenv("LANGGRAPH_FUSED_SCORING", "true").lower() == "true"
+        if fan_out is None:
+            fan_out = os.getenv("LANGGRAPH_FAN_OUT", "false").lower() == "true"
+        config = load_workflow_config()
+        workflow_config = config.get("workflow", {})
+        if max_concurrent_appointments is None:
+            max_concurrent_appointments = workflow_config.get("session", {}).get("max_concurrent_appointments", 50)
+        if checkpoint_path is None:
+            checkpoint_path = default_checkpoint_path()
+        if hod_provider_id is None:
+            hod_provider_id = os.getenv("LANGGRAPH_HOD_PROVIDER_ID", "P001")
+        self.hod_provider_id = hod_provider_id
+        self.fused_scoring = fused_scoring
+        self.fan_out = fan_out
+        self.max_concurrent_appointments = max(1, int(max_concurrent_appointments))
+        self.consent_timeout_hours = consent_timeout_hours(config)
+        self.checkpoints = CheckpointStore(checkpoint_path) if checkpoint_path else None
         self.scheduling_agent = smart_scheduling_agent or SmartSchedulingAgent()
         self.engagement_agent = patient_engagement_agent or PatientEngagementAgent()
         self.backfill_agent = backfill_agent or BackfillAgent()
         self.domain_server = domain_server or create_json_domain_server()
         
-        # Build the workflow graph
+        # Shared capacity per fan-out session (kept out of the graph state), with
+        # the number of runs (fan-out or resumed branches) currently using it
+        self._ledgers: Dict[str, CapacityLedger] = {}
+        self._ledger_users: Dict[str, int] = {}
+        self._ledgers_lock = threading.Lock()
+        # Bookings and backfills rewrite the JSON data files - one writer at a time
+        self._write_lock = threading.Lock()
+        # States of sessions currently running a node (waiting sessions live only in checkpoints)
+        self._active_sessions: Dict[tuple, WorkflowState] = {}
+        self._sessions_lock = threading.Lock()
+        
+        # Build the workflow graph (+ per-appointment sub-graph for fan-out)
         self.workflow = self._build_workflow()
+        self.appointment_workflow = self._build_workflow(entry="filter")
+        self.resume_workflow = self._build_workflow(entry="consent_received")
         
         print(f"\n[ORCHESTRATOR] LangGraph Workflow Orchestrator initialized")
         print(f"[ORCHESTRATOR] Mode: State machine with conditional branching + backfill")
+        print(f"[ORCHESTRATOR] Filter/score: {'fused (1 LLM call)' if self.fused_scoring else 'separate (2 LLM calls)'}")
+        if self.fan_out:
+            print(f"[ORCHESTRATOR] Fan-out: up to {self.max_concurrent_appointments} appointments concurrently")
     
-    def _build_workflow(self) -> StateGraph:
-        """Build the LangGraph workflow with conditional edges."""
+    def _build_workflow(self, entry: str = "trigger") -> StateGraph:
+        """Build the LangGraph workflow with conditional edges.
+        
+        Args:
+            entry: "trigger" for the full workflow, "filter" for the
+                per-appointment sub-graph used by fan-out, "consent_received"
+                to resume a session waiting for the patient
+        """
         workflow = StateGraph(WorkflowState)
         
-        # Add nodes (stages)
-        workflow.add_node("trigger", self._node_trigger)
-        workflow.add_node("filter", self._node_filter)
-        workflow.add_node("score", self._node_score)
-        workflow.add_node("consent", self._node_consent)
-        workflow.add_node("next_provider", self._node_next_provider)
-        workflow.add_node("hod_fallback", self._node_hod_fallback)
-        workflow.add_node("book", self._node_book)
-        workflow.add_node("audit", self._node_audit)
-        workflow.add_node("manual_review", self._node_manual_review)
+        # Add nodes (stages), each checkpointed after it runs
+        nodes = {
+            "filter": self._node_filter,
+            "score": self._node_score,
+            "consent": self._node_consent,
+            "next_provider": self._node_next_provider,
+            "hod_fallback": self._node_hod_fallback,
+            "book": self._node_book,
+            "audit": self._node_audit,
+            "manual_review": self._node_manual_review,
+        }
+        if entry == "trigger":
+            nodes["trigger"] = self._node_trigger
+        if entry == "consent_received":
+            nodes["consent_received"] = self._node_consent_received
+        for name, node in nodes.items():
+            workflow.add_node(name, self._checkpointed(name, node))
         
         # Set entry point
-        workflow.set_entry_point("trigger")
+        workflow.set_entry_point(entry)
         
         # Add edges
-        workflow.add_edge("trigger", "filter")
+        if entry == "trigger":
+            workflow.add_edge("trigger", "filter")
         
         # Conditional: After filter, check if we have candidates
         workflow.add_conditional_edges(
@@ -127,19 +239,27 @@ class LangGraphWorkflowOrchestrator:
             }
         )
         
-        workflow.add_edge("score", "consent")
-        
-        # Conditional: After consent, check patient response
+        # Conditional: After score, check we could claim a provider to offer
         workflow.add_conditional_edges(
-            "consent",
-            self._route_after_consent,
+            "score",
+            self._route_after_score,
             {
-                "book": "book",
-                "next_provider": "next_provider",
-                "manual_review": "manual_review"
+                "consent": "consent",
+                "hod_fallback": "hod_fallback"
             }
         )
         
+        # Conditional: After consent, check patient response (no answer yet → wait)
+        consent_routes = {
+            "book": "book",
+            "next_provider": "next_provider",
+            "manual_review": "manual_review",
+            "wait": END
+        }
+        workflow.add_conditional_edges("consent", self._route_after_consent, consent_routes)
+        if entry == "consent_received":
+            workflow.add_conditional_edges("consent_received", self._route_after_consent, consent_routes)
+        
         # If patient declined, try next provider
         workflow.add_conditional_edges(
             "next_provider",
@@ -151,8 +271,15 @@ class LangGraphWorkflowOrchestrator:
             }
         )
         
-        # HOD fallback goes straight to booking
-        workflow.add_edge("hod_fallback", "book")
+        # HOD fallback books unless another branch holds the HOD's slot
+        workflow.add_conditional_edges(
+            "hod_fallback",
+            self._route_after_hod_fallback,
+            {
+                "book": "book",
+                "manual_review": "manual_review"
+            }
+        )
         
         # After booking, create audit log
         workflow.add_edge("book", "audit")
@@ -173,11 +300,28 @@ class LangGraphWorkflowOrchestrator:
             print(f"[ROUTING] No qualified candidates found → HOD fallback")
             return "hod_fallback"
     
-    def _route_after_consent(self, state: WorkflowState) -> Literal["book", "next_provider", "manual_review"]:
+    def _route_after_score(self, state: WorkflowState) -> Literal["consent", "hod_fallback"]:
+        """Route based on whether a provider could be offered."""
+        if state["current_provider_id"]:
+            return "consent"
+        print(f"[ROUTING] No ranked provider has capacity → HOD fallback")
+        return "hod_fallback"
+    
+    def _route_after_hod_fallback(self, state: WorkflowState) -> Literal["book", "manual_review"]:
+        """Route based on whether the HOD's slot could be claimed."""
+        if state["current_provider_id"]:
+            return "book"
+        print(f"[ROUTING] HOD slot already claimed → Manual review")
+        return "manual_review"
+    
+    def _route_after_consent(self, state: WorkflowState) -> Literal["book", "next_provider", "manual_review", "wait"]:
         """Route based on patient response."""
         response = state["patient_response"]
         
-        if response == "YES":
+        if response == "PENDING":
+            print(f"[ROUTING] Offer sent → Waiting for patient (session checkpointed)")
+            return "wait"
+        elif response == "YES":
             print(f"[ROUTING] Patient said YES → Book appointment")
             return "book"
         elif response == "NO":
@@ -232,18 +376,40 @@ class LangGraphWorkflowOrchestrator:
         appointment = state["current_appointment"]
         
         # Get all available provider IDs (excluding the unavailable one)
-        candidate_ids = ["P001", "P003", "P004"]
+        candidate_ids = [
+            p["provider_id"] for p in self.domain_server.get_available_providers()
+            if p["provider_id"] != state["therapist_id"]
+        ]
         state["candidate_provider_ids"] = candidate_ids
         
-        filter_result = self.scheduling_agent.filter_candidates(appointment, candidate_ids)
+        usage_before = dict(self.scheduling_agent.llm_stats)
+        if self.fused_scoring:
+            fused = self.scheduling_agent.filter_and_score(
+                appointment["patient_id"],
+                appointment["appointment_id"],
+                candidate_ids
+            )
+            filter_result = fused["filter_result"]
+            state["fused_score_result"] = fused["score_result"]
+        else:
+            filter_result = self.scheduling_agent.filter_candidates(
+                appointment["patient_id"],
+                appointment["appointment_id"],
+                candidate_ids
+            )
+            state["fused_score_result"] = {}
         
         state["qualified_provider_ids"] = filter_result["qualified_providers"]
         
         state["events"].append({
             "stage": "filter",
             "status": "success",
+            "mode": "fused" if self.fused_scoring else "separate",
             "candidates": len(candidate_ids),
-            "qualified": len(filter_result["qualified_providers"])
+            "qualified": len(filter_result["qualified_providers"]),
+            "eliminated_providers": filter_result["eliminated_providers"],
+            "rule_engine": filter_result.get("rule_engine", {}),
+            "llm": self._llm_usage_since(usage_before)
         })
         
         print(f"[STAGE 2] ✅ {len(filter_result['qualified_providers'])} providers qualified")
@@ -255,25 +421,41 @@ class LangGraphWorkflowOrchestrator:
         
         appointment = state["current_appointment"]
         qualified_ids = state["qualified_provider_ids"]
-        
-        score_result = self.scheduling_agent.score_and_rank_providers(appointment, qualified_ids)
-        
-        state["ranked_providers"] = score_result["ranked_providers"]
+        usage_before = dict(self.scheduling_agent.llm_stats)
+        
+        if state.get("offers_sent", 0) > 0 and state["ranked_providers"]:
+            # Looped back from next_provider - ranking is unchanged, just move down it
+            source = "reused"
+        elif state.get("fused_score_result"):
+            # Fused mode - filter already scored everyone in the same LLM call
+            state["ranked_providers"] = state["fused_score_result"]["ranked_providers"]
+            source = "fused"
+        else:
+            score_result = self.scheduling_agent.score_and_rank_providers(
+                appointment["patient_id"],
+                appointment["appointment_id"],
+                qualified_ids
+            )
+            state["ranked_providers"] = score_result["ranked_providers"]
+            source = "scored"
         
         # If this is first scoring, set index to 0, otherwise keep current
         if "current_provider_index" not in state or state.get("offers_sent", 0) == 0:
             state["current_provider_index"] = 0
         
-        if state["ranked_providers"]:
+        if state["ranked_providers"] and source != "reused":
+            self._claim_provider(state)
+        
+        if state["current_provider_id"]:
             current_index = state["current_provider_index"]
-            state["current_provider_id"] = score_result["recommended_provider_id"]
-            
             print(f"[STAGE 3] ✅ Offering provider #{current_index + 1}: {state['current_provider_id']}")
         
         state["events"].append({
             "stage": "score",
             "status": "success",
-            "ranked_count": len(state["ranked_providers"])
+            "source": source,
+            "ranked_count": len(state["ranked_providers"]),
+            "llm": self._llm_usage_since(usage_before)
         })
         
         return state
@@ -287,38 +469,58 @@ class LangGraphWorkflowOrchestrator:
         
         consent_result = self.engagement_agent.send_offer(
             patient_id=appointment["patient_id"],
-            provider_id=provider_id,
-            appointment=appointment,
-            original_provider_name="Dr. Sarah Johnson"
+            appointment_id=appointment["appointment_id"],
+            new_provider_id=provider_id,
+            date=appointment.get("date"),
+            time=appointment.get("time")
         )
         
-        state["patient_response"] = consent_result["patient_response"]
-        state["consent_granted"] = consent_result["consent_granted"]
+        # A sent offer is answered later via /confirm (resume_consent); agents that
+        # answer inline (simulations) return patient_response directly
+        if consent_result.get("status") == "error":
+            response = "TIMEOUT"
+        else:
+            response = consent_result.get("patient_response", "PENDING")
+        state["patient_response"] = response
+        state["consent_granted"] = consent_result.get("consent_granted", False)
         state["offers_sent"] = state.get("offers_sent", 0) + 1
+        if response == "PENDING":
+            state["status"] = "awaiting_consent"
         
         state["events"].append({
             "stage": "consent",
             "status": "success",
             "provider_offered": provider_id,
-            "response": consent_result["patient_response"]
+            "response": response
         })
         
-        print(f"[STAGE 4] ✅ Patient response: {consent_result['patient_response']}")
+        print(f"[STAGE 4] ✅ Patient response: {response}")
+        return state
+    
+    def _node_consent_received(self, state: WorkflowState) -> WorkflowState:
+        """Resume point: the patient answered an offer (see resume_consent)."""
+        print(f"\n[STAGE 4] 💬 Consent - Patient answered: {state['patient_response']}")
+        state["status"] = "in_progress"
+        state["events"].append({
+            "stage": "consent_received",
+            "status": "success",
+            "provider_offered": state["current_provider_id"],
+            "response": state["patient_response"]
+        })
         return state
     
     def _node_next_provider(self, state: WorkflowState) -> WorkflowState:
         """Move to next provider in ranked list."""
         print(f"\n[BRANCHING] ➡️ Next Provider - Patient declined, trying alternative...")
         
+        self._release_provider(state)
         state["current_provider_index"] = state.get("current_provider_index", 0) + 1
         
         ranked_providers = state["ranked_providers"]
-        current_index = state["current_provider_index"]
         
-        if current_index < len(ranked_providers):
-            next_provider = ranked_providers[current_index]
-            state["current_provider_id"] = next_provider["provider_id"]
-            print(f"[BRANCHING] ✅ Next provider: {next_provider['name']} ({next_provider['provider_id']})")
+        if self._claim_provider(state):
+            next_provider = ranked_providers[state["current_provider_index"]]
+            print(f"[BRANCHING] ✅ Next provider: {next_provider['provider_name']} ({next_provider['provider_id']})")
         else:
             print(f"[BRANCHING] ⚠️ No more providers to try")
         
@@ -328,10 +530,16 @@ class LangGraphWorkflowOrchestrator:
         """Fallback: Assign to Head of Department."""
         print(f"\n[FALLBACK] 👨‍⚕️ HOD Assignment - No suitable providers, escalating...")
         
-        # In a real system, this would assign to HOD
-        # For demo, we'll use P001 as HOD fallback
-        hod_provider_id = "P001"
-        state["current_provider_id"] = hod_provider_id
+        hod_provider_id = self.hod_provider_id
+        if not self._claim_hod(state):
+            state["events"].append({
+                "stage": "hod_fallback",
+                "status": "failed",
+                "hod_id": hod_provider_id,
+                "reason": "HOD slot already claimed by another appointment"
+            })
+            print(f"[FALLBACK] ⚠️ HOD {hod_provider_id} not free at this time")
+            return state
         state["consent_granted"] = True  # HOD assignment is automatic
         
         state["events"].append({
@@ -359,7 +567,8 @@ class LangGraphWorkflowOrchestrator:
             "time": appointment["time"]
         }
         
-        booking_result = self.domain_server.book_appointment(booking_data)
+        with self._write_lock:
+            booking_result = self.domain_server.book_appointment(booking_data)
         
         if booking_result["status"] == "SUCCESS":
             self.engagement_agent.send_confirmation(
@@ -412,18 +621,20 @@ class LangGraphWorkflowOrchestrator:
         
         appointment = state["current_appointment"]
         patient_id = appointment["patient_id"]
+        self._release_provider(state)
         
-        # Step 1: Handle freed slot - try to backfill
-        backfill_result = self.backfill_agent.handle_slot_freed(
-            appointment=appointment,
-            reason="Patient declined all providers"
-        )
-        
-        # Step 2: Reschedule original patient
-        reschedule_result = self.backfill_agent.reschedule_declined_patient(
-            original_patient_id=patient_id,
-            original_appointment=appointment
-        )
+        with self._write_lock:
+            # Step 1: Handle freed slot - try to backfill
+            backfill_result = self.backfill_agent.handle_slot_freed(
+                appointment=appointment,
+                reason="Patient declined all providers"
+            )
+            
+            # Step 2: Reschedule original patient
+            reschedule_result = self.backfill_agent.reschedule_declined_patient(
+                original_patient_id=patient_id,
+                original_appointment=appointment
+            )
         
         state["status"] = "backfilled" if backfill_result["status"] == "SUCCESS" else "manual_review"
         state["events"].append({
@@ -443,8 +654,123 @@ class LangGraphWorkflowOrchestrator:
         
         return state
     
+    def _checkpointed(self, name: str, node):
+        """Wrap a node so the session is tracked in memory and checkpointed after it."""
+        def run(state: WorkflowState) -> WorkflowState:
+            key = (state["session_id"], (state.get("current_appointment") or {}).get("appointment_id"))
+            with self._sessions_lock:
+                self._active_sessions[key] = state
+            tracer = get_tracer()
+            with tracer.span(f"node.{name}", appointment_id=key[1]):
+                state = node(state)
+            if self.checkpoints and (state.get("current_appointment") or {}).get("appointment_id"):
+                with tracer.span("checkpoint", node=name):
+                    self.checkpoints.save(name, state)
+            return state
+        return run
+    
+    def _session_done(self, state: WorkflowState) -> None:
+        """Drop a session from memory; keep its checkpoint only while it waits for consent."""
+        appointment_id = (state.get("current_appointment") or {}).get("appointment_id")
+        with self._sessions_lock:
+            self._active_sessions.pop((state["session_id"], appointment_id), None)
+            self._active_sessions.pop((state["session_id"], None), None)
+        if self.checkpoints and appointment_id and state.get("status") != "awaiting_consent":
+            self.checkpoints.delete(state["session_id"], appointment_id)
+    
+    def _claim_provider(self, state: WorkflowState) -> bool:
+        """Set current_provider_id to the first ranked provider (from the current
+        index) whose slot is free, reserving it in the session's ledger.
+        
+        Without a ledger (sequential mode) this is just the provider at the index.
+        Returns False if none is left.
+        """
+        ledger = self._ledgers.get(state["session_id"])
+        ranked = state["ranked_providers"]
+        index = state.get("current_provider_index", 0)
+        while index < len(ranked):
+            provider_id = ranked[index]["provider_id"]
+            reason = ledger.reserve(provider_id, state["current_appointment"]) if ledger else None
+            if reason is None:
+                state["current_provider_index"] = index
+                state["current_provider_id"] = provider_id
+                return True
+            print(f"[LEDGER] {provider_id} skipped for {state['current_appointment'].get('appointment_id')} ({reason})")
+            index += 1
+        state["current_provider_index"] = index
+        state["current_provider_id"] = ""
+        return False
+    
+    def _claim_hod(self, state: WorkflowState) -> bool:
+        """Set current_provider_id to the HOD, reserving the slot in the session's ledger.
+        
+        A HOD outside the ledger (not among the available providers) is not
+        tracked and always claimable. Returns False if the slot is taken.
+        """
+        ledger = self._ledgers.get(state["session_id"])
+        reason = ledger.reserve(self.hod_provider_id, state["current_appointment"]) if ledger else None
+        if reason not in (None, "unknown_provider"):
+            print(f"[LEDGER] HOD {self.hod_provider_id} skipped for "
+                  f"{state['current_appointment'].get('appointment_id')} ({reason})")
+            state["current_provider_id"] = ""
+            return False
+        state["current_provider_id"] = self.hod_provider_id
+        return True
+    
+    def _release_provider(self, state: WorkflowState) -> None:
+        """Return the offered provider's reservation (declined / manual review)."""
+        ledger = self._ledgers.get(state["session_id"])
+        if ledger and state.get("current_provider_id"):
+            ledger.release(state["current_provider_id"], state["current_appointment"])
+    
+    def _open_ledger(self, session_id: str, ledger: Optional[CapacityLedger] = None) -> Optional[CapacityLedger]:
+        """Register a run using the session's ledger.
+        
+        A new fan-out passes its fresh ledger; a resumed branch shares the one
+        in memory (another branch of the session is running) or restores it
+        from the checkpoint store. Sequential sessions have none.
+        """
+        with self._ledgers_lock:
+            if ledger is None:
+                ledger = self._ledgers.get(session_id)
+            if ledger is None and self.checkpoints:
+                snapshot = self.checkpoints.load_ledger(session_id)
+                ledger = CapacityLedger.restore(snapshot) if snapshot else None
+            if ledger is None:
+                return None
+            self._ledgers[session_id] = ledger
+            self._ledger_users[session_id] = self._ledger_users.get(session_id, 0) + 1
+            return ledger
+    
+    def _close_ledger(self, session_id: str) -> None:
+        """End a run's use of the session ledger.
+        
+        The ledger is checkpointed while any branch still waits for consent
+        (deleted once none does) and leaves memory with the last running run.
+        """
+        with self._ledgers_lock:
+            ledger = self._ledgers.get(session_id)
+            if ledger is None:
+                return
+            if self.checkpoints:
+                if self.checkpoints.has_waiting(session_id):
+                    self.checkpoints.save_ledger(session_id, ledger.snapshot())
+                else:
+                    self.checkpoints.delete_ledger(session_id)
+            users = self._ledger_users.pop(session_id, 1) - 1
+            if users > 0:
+                self._ledger_users[session_id] = users
+            else:
+                self._ledgers.pop(session_id)
+    
+    def _llm_usage_since(self, before: Dict[str, Any]) -> Dict[str, Any]:
+        """LLM calls/tokens/latency spent by the scheduling agent since a snapshot."""
+        after = self.scheduling_agent.llm_stats
+        return {k: round(after[k] - before[k], 1) for k in after}
+    
     # ========== PUBLIC API ==========
     
+    @traced("langgraph.process_therapist_departure")
     def process_therapist_departure(self, therapist_id: str) -> Dict[str, Any]:
         """Execute complete workflow for therapist departure using LangGraph.
         
@@ -457,14 +783,114 @@ class LangGraphWorkflowOrchestrator:
         import uuid
         
         # Initialize state
-        initial_state: WorkflowState = {
+        initial_state = self._initial_state(therapist_id, f"SESSION-{therapist_id}-{uuid.uuid4().hex[:6]}")
+        
+        if self.fan_out:
+            return self._process_fan_out(initial_state)
+        
+        print(f"\n{'='*70}")
+        print(f"[LANGGRAPH WORKFLOW] Starting session: {initial_state['session_id']}")
+        print(f"{'='*70}")
+        
+        # Execute workflow
+        try:
+            final_state = self.workflow.invoke(initial_state)
+            self._session_done(final_state)
+            
+            print(f"\n{'='*70}")
+            print(f"[WORKFLOW] ✅ Workflow complete - {final_state['status'].upper()}")
+            print(f"{'='*70}")
+            
+            # Convert state to result format
+            return {
+                "final_status": final_state["status"].upper(),
+                "session_id": final_state["session_id"],
+                "booking_result": final_state.get("booking_result", {}),
+                "events": final_state["events"],
+                "score_cache": self.scheduling_agent.score_cache.get_stats()
+            }
+            
+        except Exception as e:
+            self._session_done(initial_state)
+            print(f"\n[WORKFLOW] ❌ Error: {str(e)}")
+            return {
+                "final_status": "FAILED",
+                "session_id": initial_state["session_id"],
+                "error": str(e),
+                "events": initial_state["events"]
+            }
+    
+    def resume_consent(self, appointment_id: str, accepted: bool) -> Optional[Dict[str, Any]]:
+        """Continue the session waiting on this appointment's offer.
+        
+        Args:
+            appointment_id: Appointment the patient answered (the /confirm token)
+            accepted: True for accept, False for decline
+            
+        Returns:
+            Workflow result (as process_therapist_departure), or None if no
+            session is waiting for this appointment
+        """
+        if not self.checkpoints:
+            return None
+        session_id = self.checkpoints.find_waiting(appointment_id)
+        if not session_id:
+            return None
+        return self._resume(session_id, appointment_id, "YES" if accepted else "NO")
+    
+    def expire_consent_waits(self) -> List[Dict[str, Any]]:
+        """Resume sessions waiting longer than patient_consent_hours as TIMEOUT (→ manual review)."""
+        if not self.checkpoints:
+            return []
+        stale = self.checkpoints.waiting_older_than(self.consent_timeout_hours * 3600)
+        return [self._resume(s["session_id"], s["appointment_id"], "TIMEOUT") for s in stale]
+    
+    def get_session_stats(self) -> Dict[str, Any]:
+        """Sessions in memory vs checkpointed (waiting for patients)."""
+        return {
+            "active_in_memory": len(self._active_sessions),
+            "checkpoints": self.checkpoints.get_stats() if self.checkpoints else None
+        }
+    
+    @traced("langgraph.resume")
+    def _resume(self, session_id: str, appointment_id: str, response: str) -> Dict[str, Any]:
+        state = self.checkpoints.load(session_id, appointment_id)
+        state["patient_response"] = response
+        state["consent_granted"] = response == "YES"
+        print(f"\n[LANGGRAPH WORKFLOW] Resuming session {session_id} ({appointment_id}: {response})")
+        # Fan-out branch: release/claim against the slots other waiting branches hold
+        self._open_ledger(session_id)
+        try:
+            final_state = self.resume_workflow.invoke(state)
+            self._session_done(final_state)
+        except Exception as e:
+            print(f"\n[WORKFLOW] ❌ Error: {str(e)}")
+            return {
+                "final_status": "FAILED",
+                "session_id": session_id,
+                "error": str(e),
+                "events": state["events"]
+            }
+        finally:
+            self._close_ledger(session_id)
+        return {
+            "final_status": final_state["status"].upper(),
+            "session_id": session_id,
+            "booking_result": final_state.get("booking_result", {}),
+            "events": final_state["events"]
+        }
+    
+    def _initial_state(self, therapist_id: str, session_id: str) -> WorkflowState:
+        """Empty workflow state for a session."""
+        return {
             "therapist_id": therapist_id,
-            "session_id": f"SESSION-{therapist_id}-{uuid.uuid4().hex[:6]}",
+            "session_id": session_id,
             "appointments": [],
             "current_appointment": {},
             "current_appointment_index": 0,
             "candidate_provider_ids": [],
             "qualified_provider_ids": [],
+            "fused_score_result": {},
             "ranked_providers": [],
             "current_provider_index": 0,
             "current_provider_id": "",
@@ -477,35 +903,83 @@ class LangGraphWorkflowOrchestrator:
             "error_message": "",
             "events": []
         }
+    
+    def _process_fan_out(self, state: WorkflowState) -> Dict[str, Any]:
+        """Trigger once, then run one sub-graph per affected appointment concurrently.
         
+        Returns the usual result fields plus per-appointment results and the
+        capacity ledger's stats. final_status is SUCCESS if every branch
+        succeeded, otherwise PARTIAL (or the single status shared by all).
+        """
+        session_id = state["session_id"]
         print(f"\n{'='*70}")
-        print(f"[LANGGRAPH WORKFLOW] Starting session: {initial_state['session_id']}")
+        print(f"[LANGGRAPH WORKFLOW] Starting fan-out session: {session_id}")
         print(f"{'='*70}")
         
-        # Execute workflow
         try:
-            final_state = self.workflow.invoke(initial_state)
+            with get_tracer().span("node.trigger"):
+                state = self._node_trigger(state)
+            appointments = [(i, a) for i, a in enumerate(state["appointments"]) if a]
+            ledger = self._open_ledger(session_id, CapacityLedger(self.domain_server.get_available_providers()))
+            workers = min(self.max_concurrent_appointments, len(appointments)) or 1
+            print(f"[FAN-OUT] {len(appointments)} appointments, {workers} concurrent branches")
             
-            print(f"\n{'='*70}")
-            print(f"[WORKFLOW] ✅ Workflow complete - {final_state['status'].upper()}")
-            print(f"{'='*70}")
-            
-            # Convert state to result format
-            return {
-                "final_status": final_state["status"].upper(),
-                "session_id": final_state["session_id"],
-                "booking_result": final_state.get("booking_result", {}),
-                "events": final_state["events"]
-            }
+            def run_branch(indexed_appointment):
+                index, appointment = indexed_appointment
+                branch = self._initial_state(state["therapist_id"], session_id)
+                branch["appointments"] = state["appointments"]
+                branch["current_appointment"] = appointment
+                branch["current_appointment_index"] = index
+                try:
+                    with get_tracer().span("branch", appointment_id=appointment.get('appointment_id')):
+                        final = self.appointment_workflow.invoke(branch)
+                except Exception as e:
+                    print(f"[FAN-OUT] ❌ {appointment.get('appointment_id')}: {e}")
+                    branch["status"] = "failed"
+                    branch["error_message"] = str(e)
+                    self._release_provider(branch)
+                    final = branch
+                self._session_done(final)
+                return final
             
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                finals = list(pool.map(get_tracer().bind(run_branch), appointments))
         except Exception as e:
             print(f"\n[WORKFLOW] ❌ Error: {str(e)}")
             return {
                 "final_status": "FAILED",
-                "session_id": initial_state["session_id"],
+                "session_id": session_id,
                 "error": str(e),
-                "events": initial_state["events"]
+                "events": state["events"]
             }
+        finally:
+            # Waiting branches keep their reservations in the checkpoint store
+            self._close_ledger(session_id)
+        
+        statuses = {final["status"] for final in finals} or {"success"}
+        final_status = statuses.pop().upper() if len(statuses) == 1 else "PARTIAL"
+        print(f"\n{'='*70}")
+        print(f"[WORKFLOW] ✅ Fan-out complete - {final_status} ({len(finals)} appointments)")
+        print(f"{'='*70}")
+        
+        return {
+            "final_status": final_status,
+            "session_id": session_id,
+            "booking_result": finals[0].get("booking_result", {}) if finals else {},
+            "events": state["events"] + [event for final in finals for event in final["events"]],
+            "appointments": [
+                {
+                    "appointment_id": final["current_appointment"].get("appointment_id"),
+                    "status": final["status"],
+                    "provider_id": final["current_provider_id"],
+                    "booking_result": final.get("booking_result", {}),
+                    "error": final.get("error_message", "")
+                }
+                for final in finals
+            ],
+            "capacity": ledger.get_stats(),
+            "score_cache": self.scheduling_agent.score_cache.get_stats()
+        }
 
 
 # Convenience function
@@ -16,6 +16,7 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 from agents.smart_scheduling_agent import SmartSchedulingAgent
 from agents.patient_engagement_agent import PatientEngagementAgent
 from mcp_servers.domain.json_server import create_json_domain_server as create_domain_server
+from agents.tracing import get_tracer, traced
 
 
 class SimpleWorkflowOrchestrator:
@@ -49,6 +50,7 @@ class SimpleWorkflowOrchestrator:
         print(f"\n[ORCHESTRATOR] Simple Workflow Orchestrator initialized")
         print(f"[ORCHESTRATOR] Mode: Sequential execution (no LangGraph)")
     
+    @traced("simple.process_therapist_departure")
     def process_therapist_departure(self, therapist_id: str) -> Dict[str, Any]:
         """Execute complete workflow for therapist departure.
         
@@ -133,27 +135,35 @@ class SimpleWorkflowOrchestrator:
     def _stage_1_trigger(self, therapist_id: str) -> Dict[str, Any]:
         """Stage 1: Identify affected appointments."""
         print(f"\n[STAGE 1] Trigger: Identifying affected appointments...")
-        return self.scheduling_agent.trigger_handler(therapist_id)
+        with get_tracer().span("stage_1_trigger", therapist_id=therapist_id) as span:
+            result = self.scheduling_agent.trigger_handler(therapist_id)
+            span.set(affected=result.get('affected_count'))
+        return result
     
     def _stage_2_filtering(self, appointment: Dict[str, Any], candidate_ids: List[str]) -> Dict[str, Any]:
         """Stage 2: Filter candidates."""
         print(f"\n[STAGE 2] Filtering: Applying hard filters...")
-        return self.scheduling_agent.filter_candidates(appointment, candidate_ids)
+        with get_tracer().span("stage_2_filtering", candidates=len(candidate_ids)) as span:
+            result = self.scheduling_agent.filter_candidates(appointment, candidate_ids)
+            span.set(qualified=len(result.get('qualified_providers', [])))
+        return result
     
     def _stage_3_scoring(self, appointment: Dict[str, Any], qualified_ids: List[str]) -> Dict[str, Any]:
         """Stage 3: Score and rank."""
         print(f"\n[STAGE 3] Scoring: Ranking qualified providers...")
-        return self.scheduling_agent.score_and_rank_providers(appointment, qualified_ids)
+        with get_tracer().span("stage_3_scoring", providers=len(qualified_ids)):
+            return self.scheduling_agent.score_and_rank_providers(appointment, qualified_ids)
     
     def _stage_4_consent(self, appointment: Dict[str, Any], provider_id: str) -> Dict[str, Any]:
         """Stage 4: Get patient consent."""
         print(f"\n[STAGE 4] Consent: Requesting patient approval...")
-        return self.engagement_agent.send_offer(
-            patient_id=appointment['patient_id'],
-            provider_id=provider_id,
-            appointment=appointment,
-            original_provider_name=appointment.get('original_provider_name', 'your therapist')
-        )
+        with get_tracer().span("stage_4_consent", provider_id=provider_id):
+            return self.engagement_agent.send_offer(
+                patient_id=appointment['patient_id'],
+                provider_id=provider_id,
+                appointment=appointment,
+                original_provider_name=appointment.get('original_provider_name', 'your therapist')
+            )
     
     def _stage_5_booking(self, appointment: Dict[str, Any], provider_id: str) -> Dict[str, Any]:
         """Stage 5: Book appointment."""
@@ -167,16 +177,18 @@ class SimpleWorkflowOrchestrator:
             "time": appointment['time']
         }
         
-        book_result = self.domain_server.book_appointment(booking_data)
-        
-        # Send confirmation to patient
-        if book_result['status'] == "SUCCESS":
-            confirm_result = self.engagement_agent.send_confirmation(
-                patient_id=appointment['patient_id'],
-                provider_id=provider_id,
-                appointment=booking_data
-            )
-            book_result['confirmation_sent'] = confirm_result['confirmation_sent']
+        with get_tracer().span("stage_5_booking", provider_id=provider_id) as span:
+            book_result = self.domain_server.book_appointment(booking_data)
+            
+            # Send confirmation to patient
+            if book_result['status'] == "SUCCESS":
+                confirm_result = self.engagement_agent.send_confirmation(
+                    patient_id=appointment['patient_id'],
+                    provider_id=provider_id,
+                    appointment=booking_data
+                )
+                book_result['confirmation_sent'] = confirm_result['confirmation_sent']
+            span.set(status=book_result['status'])
         
         # Include booking data for reference
         book_result['booking_data'] = booking_data
@@ -190,7 +202,8 @@ class SimpleWorkflowOrchestrator:
         session_data['appointments_processed'] = 1
         session_data['appointments_rebooked'] = 1
         
-        return self.scheduling_agent.create_audit_log(session_data)
+        with get_tracer().span("stage_6_audit"):
+            return self.scheduling_agent.create_audit_log(session_data)
     
     def _finalize_session(self, session_data: Dict[str, Any], status: str) -> Dict[str, Any]:
         """Finalize workflow session."""
@@ -5,7 +5,7 @@ Serves both HTML pages and provides all necessary API endpoints.
 """
 
 from fastapi import FastAPI, HTTPException, Query, Request, Form, Depends
-from fastapi.responses import FileResponse, HTMLResponse, RedirectResponse
+from fastapi.responses import FileResponse, HTMLResponse, RedirectResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
@@ -14,10 +14,12 @@ import uvicorn
 from pathlib import Path
 import os
 import json
+import asyncio
 from datetime import datetime, timedelta
 import random
 import sys
 import secrets
+from contextlib import asynccontextmanager
 from starlette.middleware.sessions import SessionMiddleware
 
 # Load environment variables from .env file
@@ -49,11 +51,30 @@ sys.path.insert(0, str(Path(__file__).parent))
 from demo.email_preview import mock_send_email
 from config.email_templates import EmailTemplates
 from config.llm_settings import LLMSettings
+from adapters.llm.http_pool import get_azure_openai_client, close_http_clients, aclose_async_http_client
+from adapters.llm.cassette import CASSETTE_MODES, wrap_with_cassette
+from agents.email_cleanup import clean_email_body, StreamingEmailCleaner
+from agents.prompt_codec import encode_providers, encode_table, compare_prompt_sizes
+from workflows.plan_store import PlanStore, default_plan_path
 
 # Demo protection settings
 DEMO_PASSWORD = os.getenv("DEMO_PASSWORD", "balance")  # Change this!
 SESSION_SECRET = os.getenv("SESSION_SECRET", secrets.token_urlsafe(32))
 
+# Seconds between sweeps that time out LangGraph offers nobody answered
+CONSENT_SWEEP_SECONDS = int(os.getenv("CONSENT_SWEEP_SECONDS", "600"))
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Sweep expired consent waits while running; release connections on shutdown."""
+    sweeper = asyncio.create_task(_sweep_consent_waits(CONSENT_SWEEP_SECONDS)) if CONSENT_SWEEP_SECONDS > 0 else None
+    yield
+    if sweeper:
+        sweeper.cancel()
+    _close_checkpoint_store()
+    await aclose_async_http_client()
+    close_http_clients()
+
 # Create FastAPI app
 app = FastAPI(
     title="WebPT Demo - Unified Server",
@@ -73,7 +94,8 @@ app = FastAPI(
     """,
     version="1.0.0",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    lifespan=lifespan
 )
 
 # Data Models
@@ -311,6 +333,90 @@ async def health_check():
     """Health check endpoint."""
     return {"status": "healthy", "message": "WebPT Demo is running"}
 
+@app.get("/metrics")
+async def metrics():
+    """Tracing totals by span name (e.g. LangGraph sessions resumed by /confirm)."""
+    from agents.tracing import get_tracer
+    return {"tracing": get_tracer().get_stats()}
+
+_langgraph_orchestrator = None
+_checkpoint_store = None  # Read handle until the orchestrator (with its own store) exists
+
+def _get_checkpoint_store():
+    """The LangGraph checkpoint store, or None if no session was ever checkpointed.
+    
+    Waiting sessions live only in this store, so the orchestrator is created
+    on the first answer that has one; until then one shared connection is
+    used to look them up.
+    """
+    global _checkpoint_store
+    if _langgraph_orchestrator is not None:
+        return _langgraph_orchestrator.checkpoints
+    if _checkpoint_store is None:
+        from orchestrator.checkpoint_store import CheckpointStore, default_checkpoint_path
+        if not Path(default_checkpoint_path()).exists():
+            return None
+        _checkpoint_store = CheckpointStore(default_checkpoint_path())
+    return _checkpoint_store
+
+def _close_checkpoint_store():
+    global _checkpoint_store
+    if _checkpoint_store is not None:
+        _checkpoint_store.close()
+        _checkpoint_store = None
+    if _langgraph_orchestrator is not None and _langgraph_orchestrator.checkpoints:
+        _langgraph_orchestrator.checkpoints.close()
+
+def _get_langgraph_orchestrator():
+    global _langgraph_orchestrator
+    if _langgraph_orchestrator is None:
+        from orchestrator.langgraph_workflow import LangGraphWorkflowOrchestrator
+        _close_checkpoint_store()
+        _langgraph_orchestrator = LangGraphWorkflowOrchestrator()
+    return _langgraph_orchestrator
+
+def _workflow_session_waiting(token: str) -> bool:
+    """True if a LangGraph session is checkpointed waiting on this offer."""
+    try:
+        store = _get_checkpoint_store()
+        return bool(store and store.find_waiting(token.split("_")[0]))
+    except Exception as e:
+        print(f"⚠️  Could not look up workflow session for {token}: {e}")
+        return False
+
+def _resume_workflow_session(token: str, action: str):
+    """Continue the LangGraph session waiting on this offer, if any."""
+    appointment_id = token.split("_")[0]
+    try:
+        if not _workflow_session_waiting(token):
+            return None
+        result = _get_langgraph_orchestrator().resume_consent(appointment_id, accepted=(action == "accept"))
+        if result:
+            print(f"🔁 Resumed workflow session {result['session_id']}: {result['final_status']}")
+        return result
+    except Exception as e:
+        print(f"⚠️  Could not resume workflow session for {token}: {e}")
+        return None
+
+def _expire_workflow_sessions():
+    """Time out LangGraph offers older than patient_consent_hours (→ manual review)."""
+    try:
+        from orchestrator.langgraph_workflow import consent_timeout_hours
+        store = _get_checkpoint_store()
+        if not store or not store.waiting_older_than(consent_timeout_hours() * 3600):
+            return []
+        results = _get_langgraph_orchestrator().expire_consent_waits()
+        print(f"⏰ Expired {len(results)} unanswered workflow offers")
+        return results
+    except Exception as e:
+        print(f"⚠️  Could not expire workflow sessions: {e}")
+        return []
+
+async def _sweep_consent_waits(interval: float):
+    while True:
+        await asyncio.sleep(interval)
+        await asyncio.to_thread(_expire_workflow_sessions)
+
 @app.get("/confirm")
 async def confirm_appointment(token: str, action: str = "accept"):
     """Handle appointment confirmation or decline."""
@@ -340,6 +446,9 @@ async def confirm_appointment(token: str, action: str = "accept"):
             with open(emails_file, 'r') as f:
                 emails = json.load(f)
         
+        # A LangGraph session waiting on this offer decides what a decline means
+        session_waiting = await asyncio.to_thread(_workflow_session_waiting, token)
+        
         # Update appointment and email status based on action
         if action == "accept":
             appointment['confirmation_status'] = "confirmed"
@@ -353,6 +462,15 @@ async def confirm_appointment(token: str, action: str = "accept"):
             
             message = f"✅ Appointment {token} confirmed successfully!"
             
+        elif action == "decline" and session_waiting:
+            # The resumed session offers the next provider - nothing to cancel or waitlist
+            appointment['confirmation_status'] = "declined"
+            for email in emails:
+                if email.get('appointment_id') == token:
+                    email['status'] = "declined"
+                    break
+            message = f"❌ Appointment {token} declined. We'll offer you another provider shortly."
+            
         elif action == "decline":
             appointment['confirmation_status'] = "declined"
             appointment['status'] = "cancelled"
@@ -403,6 +521,10 @@ async def confirm_appointment(token: str, action: str = "accept"):
             with open(emails_file, 'w') as f:
                 json.dump(emails, f, indent=2)
         
+        # Continue a LangGraph session that was checkpointed waiting for this answer
+        if session_waiting:
+            await asyncio.to_thread(_resume_workflow_session, token, action)
+        
         # Return a simple HTML response
         html_content = f"""
         <!DOCTYPE html>
@@ -509,6 +631,82 @@ async def get_emails():
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error reading emails: {str(e)}")
 
+@app.get("/api/emails/draft/stream")
+async def stream_email_draft(
+    appointment_id: str = Query(..., description="Appointment being rescheduled"),
+    provider_id: str = Query(..., description="New provider ID"),
+    reason: str = Query("Provider unavailable", description="Reason for the change")
+):
+    """Stream an AI-personalized rescheduling email draft as Server-Sent Events.
+    
+    Events: `data: {"delta": "..."}` per cleaned chunk, then `event: done`.
+    Falls back to the template email if the LLM is unavailable.
+    """
+    def load(name):
+        path = DATA_DIR / name
+        if not path.exists():
+            return []
+        with open(path, 'r') as f:
+            return json.load(f)
+    
+    appointment = next((a for a in load("appointments.json") if a.get('appointment_id') == appointment_id), None)
+    if not appointment:
+        raise HTTPException(status_code=404, detail=f"Appointment {appointment_id} not found")
+    providers = {p.get('provider_id'): p for p in load("providers.json")}
+    if provider_id not in providers:
+        raise HTTPException(status_code=404, detail=f"Provider {provider_id} not found")
+    patient = next((p for p in load("patients.json") if p.get('patient_id') == appointment.get('patient_id')), {})
+    old_provider = providers.get(appointment.get('original_provider_id') or appointment.get('provider_id'), {})
+    new_provider = providers[provider_id]
+    
+    def sse(data, event=None):
+        prefix = f"event: {event}\n" if event else ""
+        return f"{prefix}data: {json.dumps(data)}\n\n"
+    
+    def events():
+        cleaner = StreamingEmailCleaner()
+        sent = 0
+        template = 'ai_personalized'
+        try:
+            for delta in _stream_ai_personalized_email(appointment, patient, old_provider, new_provider, reason):
+                chunk = cleaner.feed(delta)
+                if chunk:
+                    sent += len(chunk)
+                    yield sse({"delta": chunk})
+            chunk = cleaner.finish()
+            if chunk:
+                sent += len(chunk)
+                yield sse({"delta": chunk})
+        except Exception as e:
+            print(f"AI email streaming failed: {e}")
+            if not sent:
+                # Nothing shown yet - send the template email instead
+                template = 'template'
+                body = EmailTemplates.render_offer(
+                    patient_name=patient.get('name', 'Patient'),
+                    patient_email=patient.get('email', 'patient@example.com'),
+                    date=appointment.get('date', '').split('T')[0],
+                    time=appointment.get('time', ''),
+                    reason=reason,
+                    original_provider=old_provider.get('name', 'Previous Provider'),
+                    new_provider=new_provider.get('name', 'New Provider'),
+                    specialty=new_provider.get('specialty', 'Healthcare'),
+                    location=new_provider.get('primary_location', 'Clinic'),
+                    condition=patient.get('condition', 'your condition'),
+                    confirmation_link=f"/confirm?token={appointment_id}",
+                    clinic_name="Renew Physical Therapy",
+                    clinic_phone="(555) 123-4567"
+                )['body']
+                sent = len(body)
+                yield sse({"delta": body})
+        yield sse({"template": template, "chars": sent}, event="done")
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @app.get("/api/waitlist")
 async def get_waitlist():
     """Get waitlist entries."""
@@ -809,11 +1007,11 @@ def _batch_provider_matching_with_llm(appointment_patient_pairs, unavailable_pro
     # Create batched LLM prompt
     prompt = f"""You are a healthcare scheduling assistant. Multiple patients need to be reassigned to new providers due to their original provider being unavailable.
 
-AVAILABLE PROVIDERS:
 """
     
+    verbose_sections = "AVAILABLE PROVIDERS:\n"
     for i, provider in enumerate(available_providers, 1):
-        prompt += f"""
+        verbose_sections += f"""
 Provider {i}: {provider.get('name', 'Unknown')} (ID: {provider.get('provider_id')})
 - Specialty: {provider.get('specialty', 'Unknown')}
 - Gender: {provider.get('gender', 'Unknown')}
@@ -823,10 +1021,10 @@ Provider {i}: {provider.get('name', 'Unknown')} (ID: {provider.get('provider_id'
 - Certifications: {', '.join(provider.get('certifications', []))}
 """
     
-    prompt += "\nPATIENTS TO MATCH:\n"
+    verbose_sections += "\nPATIENTS TO MATCH:\n"
     
     for i, (appointment, patient) in enumerate(appointment_patient_pairs):
-        prompt += f"""
+        verbose_sections += f"""
 Patient {i+1}:
 - Patient ID: {patient.get('patient_id', 'Unknown')}
 - Condition: {patient.get('condition', 'Unknown')}
@@ -837,6 +1035,31 @@ Patient {i+1}:
 - Age: {patient.get('age', 'Unknown')}
 """
     
+    if LLMSettings.PROMPT_ENCODING == "compact":
+        # One header + one row per entity; patient_index is the idx column
+        providers_table = encode_providers(available_providers, title="AVAILABLE PROVIDERS", extra_columns=[
+            ("location", lambda p: p.get('primary_location')),
+            ("utilization", lambda p: p.get('capacity_utilization')),
+            ("certs", lambda p: p.get('certifications', [])),
+        ])
+        patients_table = encode_table("PATIENTS TO MATCH", [
+            {**patient, "_idx": i} for i, (appointment, patient) in enumerate(appointment_patient_pairs, 1)
+        ], [
+            ("idx", lambda p: p["_idx"]),
+            ("id", lambda p: p.get('patient_id')),
+            ("condition", lambda p: p.get('condition')),
+            ("specialty_needed", lambda p: p.get('condition_specialty_required', 'Physical Therapy')),
+            ("gender_pref", lambda p: p.get('gender_preference', 'any')),
+            ("location", lambda p: p.get('preferred_location', 'Any')),
+            ("insurance", lambda p: p.get('insurance_provider')),
+            ("age", lambda p: p.get('age')),
+        ])
+        compact_sections = f"{providers_table}\n\n{patients_table}\n"
+        compare_prompt_sizes(verbose_sections, compact_sections, label="batch provider matching")
+        prompt += compact_sections
+    else:
+        prompt += verbose_sections
+    
     prompt += """
 TASK:
 For each patient, analyze their needs and choose the BEST provider match considering:
@@ -1028,6 +1251,27 @@ If no provider is suitable, respond with:
         # Fallback to rule-based matching
         return _fallback_provider_matching(patient, available_providers)
 
+_matching_cassette_llm = None
+
+def _get_matching_cassette_llm():
+    """CassetteLLM for the batch matching call when LLM_CASSETTE_MODE is set (else None).
+    
+    Records through the Azure orchestration model; replay needs no credentials.
+    """
+    global _matching_cassette_llm
+    if _matching_cassette_llm is None and LLMSettings.CASSETTE_MODE in CASSETTE_MODES:
+        inner = None
+        if LLMSettings.CASSETTE_MODE != "replay":
+            from adapters.llm.litellm_adapter import LiteLLMAdapter
+            inner = LiteLLMAdapter(
+                model=f"azure/{os.getenv('ORCHESTRATION_LLM_MODEL', 'gpt-5-chat')}",
+                api_base=os.getenv("ORCHESTRATION_LLM_AZURE_ENDPOINT"),
+                api_key=os.getenv("ORCHESTRATION_LLM_AZURE_API_KEY"),
+                enable_langfuse=False
+            )
+        _matching_cassette_llm = wrap_with_cassette(inner)
+    return _matching_cassette_llm
+
 def _call_llm_for_matching(prompt):
     """Call LLM for provider matching decision with Langfuse tracing."""
     try:
@@ -1038,6 +1282,20 @@ def _call_llm_for_matching(prompt):
         print(prompt[:500] + "..." if len(prompt) > 500 else prompt)
         print("\n🔄 Calling LLM...")
         
+        # Record/replay mode: the cassette answers (or records) the call - offline benchmarks
+        cassette_llm = _get_matching_cassette_llm()
+        if cassette_llm:
+            response = cassette_llm.generate(
+                prompt=prompt,
+                system="You are a healthcare scheduling assistant. Respond only with valid JSON.",
+                max_tokens=LLMSettings.SCHEDULING_MAX_TOKENS,
+                temperature=LLMSettings.SCHEDULING_TEMPERATURE
+            )
+            result = json.loads(response.content.strip())
+            print(f"📼 Cassette {cassette_llm.mode}: {len(result.get('matches', []))} matches")
+            print("="*80 + "\n")
+            return result
+        
         # Langfuse tracing will be handled automatically by the wrapped OpenAI client
         print("🔍 Langfuse tracing enabled via OpenAI wrapper")
         
@@ -1055,14 +1313,10 @@ def _call_llm_for_matching(prompt):
             
             # Configure Azure OpenAI client with Langfuse wrapper
             if azure_endpoint and azure_key:
-                from langfuse.openai import AzureOpenAI
                 print("✅ Using Langfuse-wrapped Azure OpenAI client")
                 
-                azure_client = AzureOpenAI(
-                    azure_endpoint=azure_endpoint,
-                    api_key=azure_key,
-                    api_version="2024-02-01"
-                )
+                # Shared client: reuses pooled keep-alive connections across requests
+                azure_client = get_azure_openai_client(azure_endpoint, azure_key)
                 
                 response = azure_client.chat.completions.create(
                     model=azure_model,
@@ -1314,15 +1568,14 @@ def _reschedule_different_provider(appointment, new_provider_id, appointments):
     
     return False
 
-def _generate_ai_personalized_email(appointment, patient, old_provider, new_provider, reason):
-    """Generate AI-personalized email content."""
-    try:
-        from langfuse.openai import openai
-        
-        appointment_date = appointment.get('date', '').split('T')[0]
-        appointment_time = appointment.get('time', '')
-        
-        prompt = f"""Write a personalized, empathetic email to reschedule a patient's appointment.
+PERSONALIZED_EMAIL_SYSTEM = "You are a compassionate healthcare communication specialist. Write warm, professional emails that put patients at ease."
+
+def _build_personalized_email_prompt(appointment, patient, old_provider, new_provider, reason):
+    """Build the prompt for an AI-personalized rescheduling email."""
+    appointment_date = appointment.get('date', '').split('T')[0]
+    appointment_time = appointment.get('time', '')
+    
+    return f"""Write a personalized, empathetic email to reschedule a patient's appointment.
 
 Patient Details:
 - Name: {patient.get('name')}
@@ -1348,6 +1601,13 @@ Requirements:
 
 Write only the email body (no subject line)."""
 
+def _generate_ai_personalized_email(appointment, patient, old_provider, new_provider, reason):
+    """Generate AI-personalized email content."""
+    try:
+        from langfuse.openai import openai
+        
+        prompt = _build_personalized_email_prompt(appointment, patient, old_provider, new_provider, reason)
+
         # Get Azure configuration
         azure_model = os.getenv("ORCHESTRATION_LLM_MODEL", "gpt-5-chat")
         azure_endpoint = os.getenv("ORCHESTRATION_LLM_AZURE_ENDPOINT")
@@ -1355,18 +1615,13 @@ Write only the email body (no subject line)."""
         
         if azure_endpoint and azure_key:
             print(f"✅ Using Azure {azure_model} for personalized email")
-            # Create Langfuse-wrapped Azure OpenAI client
-            from langfuse.openai import AzureOpenAI
-            azure_client = AzureOpenAI(
-                azure_endpoint=azure_endpoint,
-                api_key=azure_key,
-                api_version="2024-02-01"
-            )
+            # Shared Langfuse-wrapped Azure OpenAI client (pooled connections)
+            azure_client = get_azure_openai_client(azure_endpoint, azure_key)
             
             response = azure_client.chat.completions.create(
                 model=azure_model,
                 messages=[
-                    {"role": "system", "content": "You are a compassionate healthcare communication specialist. Write warm, professional emails that put patients at ease."},
+                    {"role": "system", "content": PERSONALIZED_EMAIL_SYSTEM},
                     {"role": "user", "content": prompt}
                 ],
                 temperature=0.7,
@@ -1392,7 +1647,7 @@ Write only the email body (no subject line)."""
             response = openai.chat.completions.create(
                 model=os.getenv("OPENAI_MODEL", "gpt-4o-mini"),
                 messages=[
-                    {"role": "system", "content": "You are a compassionate healthcare communication specialist. Write warm, professional emails that put patients at ease."},
+                    {"role": "system", "content": PERSONALIZED_EMAIL_SYSTEM},
                     {"role": "user", "content": prompt}
                 ],
                 temperature=0.7,
@@ -1410,25 +1665,8 @@ Write only the email body (no subject line)."""
                 except Exception as flush_e:
                     print(f"⚠️  Email trace flush failed: {flush_e}")
             
-            # Process the AI-generated email
-            email_content = response.choices[0].message.content.strip()
-            
-            # Clean up excessive markdown formatting
-            import re
-            # Reduce multiple consecutive ** to single **
-            email_content = re.sub(r'\*\*+', '**', email_content)
-            # Limit bold formatting to key terms only
-            email_content = re.sub(r'\*\*(.*?)\*\*', lambda m: f"**{m.group(1)}**" if len(m.group(1)) < 30 else m.group(1), email_content)
-            
-            # Remove any confirmation links that might have been generated despite instructions
-            email_content = re.sub(r'[Pp]lease confirm.*?(?:clicking|link).*?[./]', '', email_content)
-            email_content = re.sub(r'[Cc]lick here.*?[./]', '', email_content)
-            email_content = re.sub(r'\[.*?[Cc]onfirm.*?\]\(.*?\)', '', email_content)  # Remove markdown links
-            email_content = re.sub(r'http[s]?://[^\s]+', '', email_content)  # Remove any URLs
-            
-            # Clean up extra whitespace and line breaks
-            email_content = re.sub(r'\n\s*\n\s*\n', '\n\n', email_content)  # Remove triple+ line breaks
-            email_content = email_content.strip()
+            # Process the AI-generated email (strip links, excess markdown, extra breaks)
+            email_content = clean_email_body(response.choices[0].message.content)
             
             return email_content
             
@@ -1437,6 +1675,47 @@ Write only the email body (no subject line)."""
     
     return None
 
+def _stream_ai_personalized_email(appointment, patient, old_provider, new_provider, reason):
+    """Stream raw token deltas for an AI-personalized email.
+    
+    Uses the shared Azure OpenAI client if configured, otherwise
+    LiteLLMAdapter.stream() with the orchestrator model.
+    """
+    prompt = _build_personalized_email_prompt(appointment, patient, old_provider, new_provider, reason)
+    messages = [
+        {"role": "system", "content": PERSONALIZED_EMAIL_SYSTEM},
+        {"role": "user", "content": prompt}
+    ]
+    
+    azure_model = os.getenv("ORCHESTRATION_LLM_MODEL", "gpt-5-chat")
+    azure_endpoint = os.getenv("ORCHESTRATION_LLM_AZURE_ENDPOINT")
+    azure_key = os.getenv("ORCHESTRATION_LLM_AZURE_API_KEY")
+    
+    if azure_endpoint and azure_key:
+        print(f"✅ Streaming Azure {azure_model} personalized email")
+        azure_client = get_azure_openai_client(azure_endpoint, azure_key)
+        response = azure_client.chat.completions.create(
+            model=azure_model,
+            messages=messages,
+            temperature=0.7,
+            max_tokens=500,
+            stream=True,
+            name="personalized-email-stream",
+            metadata={"type": "personalized_email", "patient": patient.get('name')}
+        )
+        for chunk in response:
+            if chunk.choices and chunk.choices[0].delta and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+    else:
+        from adapters.llm.litellm_adapter import LiteLLMAdapter
+        print(f"✅ Streaming {LLMSettings.ORCHESTRATOR_MODEL} personalized email via LiteLLM")
+        llm = LiteLLMAdapter(
+            model=LLMSettings.ORCHESTRATOR_MODEL,
+            api_base=LLMSettings.LITELLM_BASE_URL,
+            api_key=LLMSettings.LITELLM_API_KEY
+        )
+        yield from llm.stream(prompt=prompt, system=PERSONALIZED_EMAIL_SYSTEM, max_tokens=500, temperature=0.7)
+
 def _send_rescheduling_email(appointment, patient, old_provider, new_provider, reason):
     """Send rescheduling notification email to patient."""
     try:
@@ -1501,6 +1780,7 @@ def _send_rescheduling_email(appointment, patient, old_provider, new_provider, r
                 "template": email_data['template'],
                 "appointment_id": appointment.get('appointment_id'),
                 "patient_name": patient.get('name'),
+                "provider_id": new_provider.get('provider_id'),
                 "provider_name": new_provider.get('name'),
                 "date": appointment_date,
                 "time": appointment_time,
@@ -1725,6 +2005,9 @@ async def reset_demo_data(request_obj: DemoResetRequest):
         with open(providers_file, 'w') as f:
             json.dump(providers, f, indent=2)
         
+        # Forget stored re-plan windows (they describe the data just replaced)
+        PlanStore(default_plan_path()).clear()
+        
         return {
             "success": True,
             "message": "Demo data reset successfully",
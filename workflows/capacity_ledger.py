@@ -0,0 +1,157 @@
+"""Capacity Ledger - provider capacity shared across sharded planning.
+
+When a long outage is planned in several LLM shards, each shard sees the same
+provider list and may hand out the same spare capacity or the same time slot.
+The ledger is the single source of truth while merging shard plans (and
+for the LangGraph fan-out mode, where appointment branches hold a
+reservation while an offer is out and release it on decline; the ledger is
+checkpointed with snapshot()/restore() while offers wait for patients):
+
+- Patient capacity: max_patient_capacity - current_patient_load per provider
+- Slots: one booking per (provider, date, time)
+
+reserve() is atomic, so shards can be merged from several threads. Providers
+without max_patient_capacity are treated as unlimited (slot checks still apply).
+"""
+
+import threading
+from typing import Dict, Any, List, Optional, Tuple
+
+
+def _slot_key(appointment: Dict[str, Any]) -> Tuple[str, str]:
+    """(date, time) of an appointment; date is taken from ISO datetimes too."""
+    date = (appointment.get("date") or "").split("T")[0]
+    return date, appointment.get("time") or ""
+
+
+class CapacityLedger:
+    """Tracks provider capacity consumed by a merged plan."""
+
+    _COUNTERS = ("reserved", "rejected_capacity", "rejected_slot", "released")
+
+    def __init__(self, providers: List[Dict[str, Any]]):
+        """
+        Args:
+            providers: Provider records (available_providers from the metadata)
+        """
+        self._lock = threading.Lock()
+        self._remaining: Dict[str, Optional[int]] = {}
+        self._booked_slots: Dict[str, set] = {}
+        for provider in providers:
+            provider_id = provider.get("provider_id")
+            capacity = provider.get("max_patient_capacity")
+            self._remaining[provider_id] = (
+                max(0, capacity - provider.get("current_patient_load", 0)) if capacity else None
+            )
+            self._booked_slots[provider_id] = set()
+
+        self.reserved = 0
+        self.rejected_capacity = 0
+        self.rejected_slot = 0
+        self.released = 0
+
+    def remaining(self, provider_id: str) -> Optional[int]:
+        """Spare patient capacity (None = unlimited, 0 for unknown providers)."""
+        return self._remaining.get(provider_id, 0)
+
+    def has_room(self, provider_id: str, appointment: Dict[str, Any]) -> bool:
+        """True if the provider can still take this appointment."""
+        with self._lock:
+            return self._check(provider_id, appointment) is None
+
+    def reserve(self, provider_id: str, appointment: Dict[str, Any]) -> Optional[str]:
+        """
+        Reserve capacity and the appointment's slot for a provider.
+
+        Returns:
+            None on success, otherwise the reason it was rejected
+        """
+        with self._lock:
+            reason = self._check(provider_id, appointment)
+            if reason == "capacity":
+                self.rejected_capacity += 1
+            elif reason == "slot":
+                self.rejected_slot += 1
+            if reason:
+                return reason
+
+            if self._remaining[provider_id] is not None:
+                self._remaining[provider_id] -= 1
+            self._booked_slots[provider_id].add(_slot_key(appointment))
+            self.reserved += 1
+            return None
+
+    def release(self, provider_id: str, appointment: Dict[str, Any]) -> None:
+        """Give back a reservation (e.g. the patient declined the offer)."""
+        with self._lock:
+            slot = _slot_key(appointment)
+            if slot not in self._booked_slots.get(provider_id, set()):
+                return
+            self._booked_slots[provider_id].discard(slot)
+            if self._remaining[provider_id] is not None:
+                self._remaining[provider_id] += 1
+            self.reserved -= 1
+            self.released += 1
+
+    def split(self, shard_sizes: List[int]) -> List[Dict[str, Optional[int]]]:
+        """
+        Apportion each provider's spare capacity across shards by shard size.
+
+        Used to show every shard a fair share up front so conflicts at merge
+        time are rare. Returns one {provider_id: capacity} dict per shard.
+        """
+        total = sum(shard_sizes) or 1
+        shares = [{} for _ in shard_sizes]
+        with self._lock:
+            for provider_id, remaining in self._remaining.items():
+                if remaining is None:
+                    for share in shares:
+                        share[provider_id] = None
+                    continue
+                given = 0
+                for i, size in enumerate(shard_sizes):
+                    portion = remaining * size // total
+                    shares[i][provider_id] = portion
+                    given += portion
+                # Hand out the rounding remainder to the first shards
+                for i in range(remaining - given):
+                    shares[i % len(shares)][provider_id] += 1
+        return shares
+
+    def snapshot(self) -> Dict[str, Any]:
+        """JSON-serializable copy of the ledger (see restore)."""
+        with self._lock:
+            return {
+                "remaining": dict(self._remaining),
+                "booked_slots": {pid: sorted(list(slot) for slot in slots) for pid, slots in self._booked_slots.items()},
+                "counters": {name: getattr(self, name) for name in self._COUNTERS}
+            }
+
+    @classmethod
+    def restore(cls, snapshot: Dict[str, Any]) -> "CapacityLedger":
+        """Rebuild a ledger from snapshot(), reservations included."""
+        ledger = cls([])
+        ledger._remaining = dict(snapshot["remaining"])
+        ledger._booked_slots = {pid: {tuple(slot) for slot in slots} for pid, slots in snapshot["booked_slots"].items()}
+        for name, value in (snapshot.get("counters") or {}).items():
+            setattr(ledger, name, value)
+        return ledger
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get reservations and rejections."""
+        return {
+            "reserved": self.reserved,
+            "rejected_capacity": self.rejected_capacity,
+            "rejected_slot": self.rejected_slot,
+            "released": self.released,
+            "remaining": dict(self._remaining)
+        }
+
+    def _check(self, provider_id: str, appointment: Dict[str, Any]) -> Optional[str]:
+        if provider_id not in self._remaining:
+            return "unknown_provider"
+        if self._remaining[provider_id] is not None and self._remaining[provider_id] <= 0:
+            return "capacity"
+        if _slot_key(appointment) in self._booked_slots[provider_id]:
+            return "slot"
+        return None
@@ -0,0 +1,82 @@
+"""Plan Store - the last processed unavailability window per provider.
+
+When a provider's leave is extended (2 -> 5 days), re-running the whole
+workflow would re-mark dates, re-fetch everything and re-prompt the LLM for
+patients that were already rebooked. TemplateDrivenOrchestrator saves what
+each run did here, and replan() diffs the new window against it:
+
+- dates: every date already processed for the provider
+- decisions: one compact record per handled appointment
+- reservations: (provider, date, time) of each booking, replayed into a
+  CapacityLedger so new decisions only see the capacity that is left
+
+Stored as one JSON file (small: one entry per provider with an open window).
+"""
+
+import json
+import os
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Any, Optional
+
+
+def default_plan_path() -> str:
+    """ORCHESTRATOR_PLAN_PATH, or .cache/orchestrator_plans.json in the project."""
+    return os.getenv(
+        "ORCHESTRATOR_PLAN_PATH",
+        str(Path(__file__).parent.parent / ".cache" / "orchestrator_plans.json")
+    )
+
+
+class PlanStore:
+    """JSON file of stored plans keyed by provider_id."""
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path: JSON file (created on first save)
+        """
+        self.path = Path(path)
+        self._lock = threading.Lock()
+
+    def _read(self) -> Dict[str, Any]:
+        if not self.path.exists():
+            return {}
+        try:
+            return json.loads(self.path.read_text())
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"[PLAN STORE] ⚠️  Ignoring unreadable plan file {self.path}: {e}")
+            return {}
+
+    def get(self, provider_id: str) -> Optional[Dict[str, Any]]:
+        """Stored plan for a provider, or None."""
+        with self._lock:
+            return self._read().get(provider_id)
+
+    def save(self, provider_id: str, plan: Dict[str, Any]) -> None:
+        """Replace a provider's plan (written atomically)."""
+        with self._lock:
+            plans = self._read()
+            plans[provider_id] = dict(plan, updated_at=datetime.now().isoformat())
+            self._write(plans)
+
+    def delete(self, provider_id: str) -> None:
+        """Forget a provider's plan (e.g. the provider is back)."""
+        with self._lock:
+            plans = self._read()
+            if plans.pop(provider_id, None) is not None:
+                self._write(plans)
+
+    def clear(self) -> None:
+        """Forget every plan (e.g. the demo data was reset)."""
+        with self._lock:
+            if self.path.exists():
+                self._write({})
+
+    def _write(self, plans: Dict[str, Any]) -> None:
+        """Write the whole file atomically (callers hold the lock)."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(plans, default=str))
+        tmp.replace(self.path)
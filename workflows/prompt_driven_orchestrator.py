@@ -12,6 +12,8 @@ Benefits:
 
 import json
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Dict, Any, Callable, Optional
 from datetime import datetime
 
@@ -23,6 +25,11 @@ except ImportError:
     LANGFUSE_AVAILABLE = False
     print("[ORCHESTRATOR] Warning: LangFuse not available, using local prompts")
 
+from agents.score_cache import get_score_cache, record_version
+from agents.tracing import get_tracer, traced
+from config.llm_settings import settings as llm_settings
+from workflows.tool_context import ToolContext
+
 # LLM adapter
 try:
     from adapters.llm.litellm_adapter import LiteLLMAdapter
@@ -34,21 +41,48 @@ except ImportError:
 class ToolRegistry:
     """Registry of tools available to the LLM for orchestration."""
     
-    def __init__(self, domain_server, patient_engagement_agent, booking_agent):
+    # Tools that change data; they run in call order, everything else may run concurrently
+    MUTATING_TOOLS = {"assign_appointment", "send_patient_notification", "add_to_waitlist"}
+    # Mutating tools whose entities drop out of the session cache
+    INVALIDATING_TOOLS = {"assign_appointment", "add_to_waitlist"}
+    # Argument name -> entity kind, for cache dependencies and invalidation
+    _ENTITY_ARGS = {
+        "patient_id": "patient", "patient_ids": "patient",
+        "provider_id": "provider", "provider_ids": "provider",
+        "original_provider_id": "provider", "new_provider_id": "provider",
+        "appointment_id": "appointment",
+    }
+    
+    def __init__(self, domain_server, patient_engagement_agent, booking_agent, max_parallel: int = None):
         self.domain = domain_server
         self.patient_agent = patient_engagement_agent
         self.booking_agent = booking_agent
+        self.score_cache = get_score_cache()
+        self.max_parallel = max_parallel or llm_settings.TOOL_MAX_PARALLEL
+        
+        # Session-scoped results of read-only tools: key -> (result, entities)
+        self._session_cache: Dict[str, Any] = {}
+        self._cache_lock = threading.Lock()
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.cache_invalidations = 0
+        
+        # Full tool results of the session, by reference (see workflows/tool_context.py)
+        self._payloads: Dict[str, Any] = {}
         
         # Tool function mapping
         self.tools = {
             "get_affected_appointments": self.get_affected_appointments,
             "get_patient_details": self.get_patient_details,
+            "get_patients": self.get_patients,
             "get_available_providers": self.get_available_providers,
             "get_provider_details": self.get_provider_details,
             "calculate_match_score": self.calculate_match_score,
+            "score_matrix": self.score_matrix,
             "assign_appointment": self.assign_appointment,
             "send_patient_notification": self.send_patient_notification,
             "add_to_waitlist": self.add_to_waitlist,
+            "get_tool_result": self.get_tool_result,
         }
     
     def get_tool_definitions(self) -> List[Dict[str, Any]]:
@@ -83,6 +117,20 @@ class ToolRegistry:
                     }
                 }
             },
+            {
+                "type": "function",
+                "function": {
+                    "name": "get_patients",
+                    "description": "Get details of several patients in one call (prefer over repeated get_patient_details)",
+                    "parameters": {
+                        "type": "object",
+                        "properties": {
+                            "patient_ids": {"type": "array", "items": {"type": "string"}, "description": "Patient IDs"}
+                        },
+                        "required": ["patient_ids"]
+                    }
+                }
+            },
             {
                 "type": "function",
                 "function": {
@@ -128,6 +176,22 @@ class ToolRegistry:
                     }
                 }
             },
+            {
+                "type": "function",
+                "function": {
+                    "name": "score_matrix",
+                    "description": "Match scores for every patient x provider pair in one call (prefer over repeated calculate_match_score)",
+                    "parameters": {
+                        "type": "object",
+                        "properties": {
+                            "patient_ids": {"type": "array", "items": {"type": "string"}, "description": "Patient IDs"},
+                            "provider_ids": {"type": "array", "items": {"type": "string"}, "description": "Candidate provider IDs"},
+                            "original_provider_id": {"type": "string", "description": "Original provider ID for comparison"}
+                        },
+                        "required": ["patient_ids", "provider_ids"]
+                    }
+                }
+            },
             {
                 "type": "function",
                 "function": {
@@ -175,13 +239,30 @@ class ToolRegistry:
                         "required": ["patient_id", "appointment_id", "reason"]
                     }
                 }
+            },
+            {
+                "type": "function",
+                "function": {
+                    "name": "get_tool_result",
+                    "description": "Fetch the full result of an earlier tool call by its ref (results that were truncated or folded into the progress summary)",
+                    "parameters": {
+                        "type": "object",
+                        "properties": {
+                            "ref": {"type": "string", "description": "Result reference, e.g. ref_3"},
+                            "field": {"type": "string", "description": "Only this top-level field of the result"},
+                            "offset": {"type": "integer", "description": "First item when the value is a list/map"},
+                            "limit": {"type": "integer", "description": "Max items when the value is a list/map"}
+                        },
+                        "required": ["ref"]
+                    }
+                }
             }
         ]
     
     # Tool implementations
     def get_affected_appointments(self, provider_id: str, date: str) -> Dict[str, Any]:
         """Get appointments affected by provider unavailability."""
-        appointments = self.domain.get_affected_appointments(provider_id, date)
+        appointments = self.domain.get_appointments_in_range(provider_id, date, date)
         return {"appointments": appointments, "count": len(appointments)}
     
     def get_patient_details(self, patient_id: str) -> Dict[str, Any]:
@@ -189,6 +270,12 @@ class ToolRegistry:
         patient = self.domain.get_patient(patient_id)
         return patient if patient else {"error": f"Patient {patient_id} not found"}
     
+    def get_patients(self, patient_ids: List[str]) -> Dict[str, Any]:
+        """Get several patients with one read."""
+        patients = self.domain.get_patients(patient_ids)
+        missing = [pid for pid in dict.fromkeys(patient_ids) if pid not in patients]
+        return {"patients": patients, "count": len(patients), "missing": missing}
+    
     def get_available_providers(self, date: str, specialty: str = None) -> Dict[str, Any]:
         """Get available providers."""
         providers = self.domain.get_providers()
@@ -212,6 +299,41 @@ class ToolRegistry:
         if not patient or not provider:
             return {"error": "Patient or provider not found", "score": 0}
         
+        return self._match_score(patient, provider, original, original_provider_id)
+    
+    def score_matrix(self, patient_ids: List[str], provider_ids: List[str], original_provider_id: str = None) -> Dict[str, Any]:
+        """Match scores for every patient x provider pair (records fetched once)."""
+        patients = self.domain.get_patients(patient_ids)
+        lookup_ids = list(provider_ids) + ([original_provider_id] if original_provider_id else [])
+        providers = {p.get("provider_id"): p for p in self.domain.get_providers(lookup_ids)}
+        original = providers.get(original_provider_id) if original_provider_id else None
+        
+        scores = []
+        for patient_id in dict.fromkeys(patient_ids):
+            patient = patients.get(patient_id)
+            for provider_id in dict.fromkeys(provider_ids):
+                provider = providers.get(provider_id)
+                if not patient or not provider:
+                    scores.append({"patient_id": patient_id, "provider_id": provider_id,
+                                   "error": "Patient or provider not found", "score": 0})
+                    continue
+                result = self._match_score(patient, provider, original, original_provider_id)
+                scores.append({"patient_id": patient_id, "provider_id": provider_id, **result})
+        return {"scores": scores, "count": len(scores)}
+    
+    def _match_score(self, patient: Dict[str, Any], provider: Dict[str, Any],
+                     original: Optional[Dict[str, Any]], original_provider_id: Optional[str]) -> Dict[str, Any]:
+        """6-factor score of one patient/provider pair (score-cached)."""
+        # LLM often re-requests the same pair across iterations
+        cache_key = self.score_cache.make_key(
+            patient,
+            provider,
+            context=("tool", original_provider_id or "", record_version(original))
+        )
+        cached = self.score_cache.get(cache_key)
+        if cached is not None:
+            return cached
+        
         score = 50  # Base score
         factors = {}
         
@@ -261,11 +383,13 @@ class ToolRegistry:
             score += 10
             factors['capacity'] = 10
         
-        return {
+        result = {
             "score": score,
             "factors": factors,
             "recommendation": "EXCELLENT" if score >= 80 else "GOOD" if score >= 60 else "POOR"
         }
+        self.score_cache.put(cache_key, result)
+        return result
     
     def assign_appointment(self, appointment_id: str, new_provider_id: str, reason: str = None) -> Dict[str, Any]:
         """Assign appointment to new provider."""
@@ -289,17 +413,162 @@ class ToolRegistry:
         success = self.domain.add_to_waitlist(patient_id, appointment_id, reason)
         return {"success": success, "patient_id": patient_id, "reason": reason}
     
-    def execute_tool(self, tool_name: str, arguments: Dict[str, Any]) -> Any:
-        """Execute a tool by name with arguments."""
+    def get_tool_result(self, ref: str, field: str = None, offset: int = 0, limit: int = None) -> Any:
+        """Full (or paged) result of an earlier tool call."""
+        if ref not in self._payloads:
+            return {"error": f"Unknown result reference {ref}"}
+        value = self._payloads[ref]
+        if field:
+            if not isinstance(value, dict) or field not in value:
+                return {"error": f"Result {ref} has no field {field}"}
+            value = value[field]
+        if isinstance(value, (list, dict)) and (offset or limit):
+            items = value if isinstance(value, list) else list(value.items())
+            page = items[offset:offset + limit if limit else None]
+            value = page if isinstance(value, list) else dict(page)
+            return {"ref": ref, "field": field, "offset": offset, "total": len(items), "items": value}
+        return value
+    
+    def store_result(self, result: Any) -> str:
+        """Keep a full tool result for get_tool_result; returns its reference."""
+        with self._cache_lock:
+            ref = f"ref_{len(self._payloads) + 1}"
+            self._payloads[ref] = result
+        return ref
+    
+    def start_session(self) -> None:
+        """Forget cached and stored tool results (called at the start of each workflow run)."""
+        with self._cache_lock:
+            self._session_cache.clear()
+            self._payloads.clear()
+    
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """Get session cache statistics."""
+        total = self.cache_hits + self.cache_misses
+        return {
+            "entries": len(self._session_cache),
+            "hits": self.cache_hits,
+            "misses": self.cache_misses,
+            "invalidations": self.cache_invalidations,
+            "hit_rate": f"{self.cache_hits / total * 100:.1f}%" if total else "0.0%"
+        }
+    
+    def _entities(self, tool_name: str, arguments: Dict[str, Any], result: Any = None) -> set:
+        """(kind, id) pairs a tool call reads or writes."""
+        entities = set()
+        for arg, kind in self._ENTITY_ARGS.items():
+            value = arguments.get(arg)
+            if isinstance(value, list):
+                entities.update((kind, v) for v in value)
+            elif value:
+                entities.add((kind, value))
+        if tool_name == "get_available_providers":
+            entities.add(("provider", "*"))  # any provider change can alter the list
+        if tool_name == "get_affected_appointments" and isinstance(result, dict):
+            entities.update(("appointment", a.get("appointment_id")) for a in result.get("appointments", []))
+        return entities
+    
+    def _lookup(self, tool_name: str, arguments: Dict[str, Any]):
+        """(cache_key, hit, result) for a call; cache_key is None for mutating tools."""
+        if tool_name in self.MUTATING_TOOLS or tool_name not in self.tools:
+            return None, False, None
+        canonical = {k: v for k, v in arguments.items() if v is not None}
+        key = f"{tool_name}:{json.dumps(canonical, sort_keys=True, default=str)}"
+        with self._cache_lock:
+            entry = self._session_cache.get(key)
+            if entry is not None:
+                self.cache_hits += 1
+                return key, True, entry[0]
+            self.cache_misses += 1
+        return key, False, None
+    
+    def _execute(self, tool_name: str, arguments: Dict[str, Any], cache_key: Optional[str]) -> Any:
+        """Run a tool, then cache its result or invalidate what it changed."""
         if tool_name not in self.tools:
             return {"error": f"Tool {tool_name} not found"}
         
         tool_func = self.tools[tool_name]
         try:
             result = tool_func(**arguments)
-            return result
         except Exception as e:
             return {"error": str(e)}
+        
+        if cache_key and not (isinstance(result, dict) and "error" in result):
+            with self._cache_lock:
+                self._session_cache[cache_key] = (result, self._entities(tool_name, arguments, result))
+        elif tool_name in self.INVALIDATING_TOOLS:
+            self._invalidate(self._entities(tool_name, arguments))
+        return result
+    
+    def _invalidate(self, touched: set) -> None:
+        """Drop cached results that depend on any touched entity."""
+        kinds = {kind for kind, _ in touched}
+        with self._cache_lock:
+            stale = [
+                key for key, (_, entities) in self._session_cache.items()
+                if entities & touched or any((kind, "*") in entities for kind in kinds)
+            ]
+            for key in stale:
+                del self._session_cache[key]
+            self.cache_invalidations += len(stale)
+    
+    def execute_tool(self, tool_name: str, arguments: Dict[str, Any]) -> Any:
+        """Execute a tool by name with arguments (read-only tools are session-cached)."""
+        cache_key, hit, result = self._lookup(tool_name, arguments)
+        if hit:
+            return result
+        return self._execute(tool_name, arguments, cache_key)
+    
+    def execute_tools(self, calls: List[Dict[str, Any]]) -> List[Any]:
+        """
+        Execute one turn's tool calls; results are returned in call order.
+        
+        Consecutive read-only calls run concurrently; a mutating call waits
+        for the reads before it and runs alone, so writes keep their order.
+        Reads answered from the session cache (or by an identical call in the
+        same turn) are marked with call["cached"] = True.
+        
+        Args:
+            calls: [{"name": tool_name, "arguments": {...}}, ...]
+        """
+        results = [None] * len(calls)
+        batch = []
+        
+        def flush():
+            pending, duplicates = {}, {}
+            for i in batch:
+                cache_key, hit, result = self._lookup(calls[i]["name"], calls[i]["arguments"])
+                calls[i]["cached"] = hit or (cache_key is not None and cache_key in pending)
+                if hit:
+                    results[i] = result
+                elif calls[i]["cached"]:
+                    duplicates[i] = pending[cache_key]
+                else:
+                    pending[cache_key if cache_key is not None else ("uncached", i)] = i
+            
+            run = {i: (key if isinstance(key, str) else None) for key, i in pending.items()}
+            if len(run) == 1:
+                (i, key), = run.items()
+                results[i] = self._execute(calls[i]["name"], calls[i]["arguments"], key)
+            elif run:
+                with ThreadPoolExecutor(max_workers=min(self.max_parallel, len(run))) as pool:
+                    futures = {i: pool.submit(self._execute, calls[i]["name"], calls[i]["arguments"], key)
+                               for i, key in run.items()}
+                    for i, future in futures.items():
+                        results[i] = future.result()
+            for i, source in duplicates.items():
+                results[i] = results[source]
+            batch.clear()
+        
+        for i, call in enumerate(calls):
+            if call["name"] in self.MUTATING_TOOLS:
+                flush()
+                call["cached"] = False
+                results[i] = self._execute(call["name"], call["arguments"], None)
+            else:
+                batch.append(i)
+        flush()
+        return results
 
 
 class PromptDrivenOrchestrator:
@@ -366,6 +635,7 @@ class PromptDrivenOrchestrator:
         
         return "You are a healthcare orchestrator. Handle provider unavailability using available tools."
     
+    @traced("prompt.execute_workflow")
     def execute_workflow(self, provider_id: str, date: str, reason: str = "unavailable") -> Dict[str, Any]:
         """Execute the workflow using LLM + tool calling."""
         print(f"\n{'='*60}")
@@ -373,9 +643,6 @@ class PromptDrivenOrchestrator:
         print(f"Provider: {provider_id}, Date: {date}, Reason: {reason}")
         print(f"{'='*60}\n")
         
-        # Get orchestrator prompt
-        system_prompt = self.get_orchestrator_prompt()
-        
         # Create initial message
         user_message = f"""
 Provider {provider_id} is unavailable on {date} due to: {reason}
@@ -383,65 +650,111 @@ Provider {provider_id} is unavailable on {date} due to: {reason}
 Please handle the reassignment of all affected patients using the available tools.
 Follow the workflow steps defined in your instructions.
 """
+        return self._run_tool_loop(user_message)
+    
+    @traced("prompt.multi_provider")
+    def execute_multi_provider_workflow(self, outages: List[Dict[str, Any]], reason: str = "unavailable") -> Dict[str, Any]:
+        """Handle several providers' outages (e.g. a clinic closure) in one tool-calling session.
+        
+        One conversation sees every unavailable provider up front, so it never
+        reassigns a patient to a provider who is also out, and the session
+        cache shares provider lookups across all outages.
+        
+        Args:
+            outages: [{"provider_id", "start_date", "end_date"(optional)}, ...]
+            reason: Reason for unavailability (weather, holiday, ...)
+        """
+        print(f"\n{'='*60}")
+        print(f"[PROMPT-DRIVEN ORCHESTRATOR] Starting multi-provider workflow")
+        print(f"Providers: {', '.join(o['provider_id'] for o in outages)}, Reason: {reason}")
+        print(f"{'='*60}\n")
+        
+        lines = "\n".join(
+            f"- Provider {o['provider_id']}: {o['start_date']} to {o.get('end_date') or o['start_date']}"
+            for o in outages
+        )
+        user_message = f"""
+The following providers are unavailable due to: {reason}
+{lines}
+
+Please handle the reassignment of all affected patients of every provider above using the available tools.
+Never assign a patient to a provider in this list on a date they are unavailable.
+Follow the workflow steps defined in your instructions.
+"""
+        return self._run_tool_loop(user_message)
+    
+    def _run_tool_loop(self, user_message: str) -> Dict[str, Any]:
+        """LLM + tool calling loop for one task message."""
+        # Get orchestrator prompt
+        system_prompt = self.get_orchestrator_prompt()
         
-        # Track tool calls
+        # Track tool calls (cached results are per workflow run)
+        self.tool_registry.start_session()
         tool_call_history = []
         max_iterations = 20  # Prevent infinite loops
         iteration = 0
         
-        # LLM conversation loop with tool calling
-        messages = [
-            {"role": "system", "content": system_prompt},
-            {"role": "user", "content": user_message}
-        ]
+        # LLM conversation loop with tool calling (bounded context)
+        context = ToolContext(
+            system_prompt,
+            user_message,
+            store=self.tool_registry.store_result,
+            max_result_chars=llm_settings.TOOL_RESULT_MAX_CHARS,
+            keep_turns=llm_settings.TOOL_CONTEXT_KEEP_TURNS,
+            summary_lines=llm_settings.TOOL_CONTEXT_SUMMARY_LINES
+        )
         
+        tracer = get_tracer()
         while iteration < max_iterations:
             iteration += 1
             print(f"\n--- Iteration {iteration} ---")
             
             # Call LLM with tools
-            response = self.llm.generate_with_tools(
-                messages=messages,
-                tools=self.tool_registry.get_tool_definitions(),
-                temperature=0.3
-            )
+            with tracer.span("llm", iteration=iteration) as span:
+                response = self.llm.generate_with_tools(
+                    messages=context.messages(),
+                    tools=self.tool_registry.get_tool_definitions(),
+                    temperature=0.3
+                )
+                usage = response.usage or {}
+                span.set(prompt_chars=context.last_prompt_chars, tool_calls=len(response.tool_calls),
+                         **{k: usage[k] for k in ("prompt_tokens", "completion_tokens", "total_tokens") if k in usage})
             
             # Check if LLM wants to call a tool
             if response.tool_calls:
-                # Execute each tool call
+                calls = []
                 for tool_call in response.tool_calls:
-                    tool_name = tool_call['function']['name']
-                    tool_args = json.loads(tool_call['function']['arguments'])
-                    
-                    print(f"  🔧 Tool Call: {tool_name}({tool_args})")
-                    
-                    # Execute tool
-                    result = self.tool_registry.execute_tool(tool_name, tool_args)
-                    print(f"  ✅ Result: {json.dumps(result, indent=2)[:200]}...")
+                    try:
+                        tool_args = json.loads(tool_call['function']['arguments'] or "{}")
+                    except json.JSONDecodeError:
+                        tool_args = {}
+                    calls.append({"name": tool_call['function']['name'], "arguments": tool_args})
+                    print(f"  🔧 Tool Call: {calls[-1]['name']}({tool_args})")
+                
+                # Execute the turn's calls (independent reads concurrently)
+                with tracer.span("tools", iteration=iteration, calls=len(calls)) as span:
+                    results = self.tool_registry.execute_tools(calls)
+                    span.set(cached=len([c for c in calls if c.get('cached')]))
+                
+                # One assistant message carrying all calls, then one tool message per call
+                context.add_turn(response.tool_calls, response.content, calls, results)
+                for call, result in zip(calls, results):
+                    print(f"  ✅ {call['name']}{' (cached)' if call['cached'] else ''}: {json.dumps(result, default=str)[:200]}...")
                     
                     # Add to history
                     tool_call_history.append({
-                        "tool": tool_name,
-                        "arguments": tool_args,
-                        "result": result
-                    })
-                    
-                    # Add tool response to messages
-                    messages.append({
-                        "role": "assistant",
-                        "content": None,
-                        "tool_calls": [tool_call]
-                    })
-                    messages.append({
-                        "role": "tool",
-                        "tool_call_id": tool_call['id'],
-                        "content": json.dumps(result)
+                        "tool": call['name'],
+                        "arguments": call['arguments'],
+                        "result": result,
+                        "cached": call['cached']
                     })
             
             else:
                 # LLM is done, return final response
                 print(f"\n✅ Workflow complete after {iteration} iterations")
                 print(f"   Total tool calls: {len(tool_call_history)}")
+                print(f"   Tool cache: {self.tool_registry.get_cache_stats()}")
+                print(f"   Context: {context.get_stats()}")
                 
                 # Parse final response
                 try:
@@ -15,8 +15,10 @@ Benefits:
 
 import json
 import os
-from typing import Dict, Any, List, Optional
-from datetime import datetime
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional, Tuple
+from datetime import datetime, timedelta
 
 # LangFuse imports
 try:
@@ -41,6 +43,16 @@ try:
 except ImportError:
     LITELLM_AVAILABLE = False
 
+from agents.score_cache import get_score_cache
+from agents.match_scoring import to_percent
+from agents.parallel_scoring import ParallelScorer
+from agents.prompt_codec import encode_patients, encode_providers, compare_prompt_sizes, count_tokens
+from agents.tracing import get_tracer, traced
+from workflows.capacity_ledger import CapacityLedger
+from workflows.plan_store import PlanStore, default_plan_path
+from adapters.llm.json_stream import StreamingArrayParser
+from adapters.llm.cassette import wrap_with_cassette
+
 # Configuration
 from config.llm_settings import settings as llm_settings
 
@@ -48,6 +60,30 @@ from config.llm_settings import settings as llm_settings
 class TemplateDrivenOrchestrator:
     """Orchestrator using LangFuse prompt templates with variables."""
     
+    # Scoring rules (for LLM reference)
+    SCORING_RULES = {
+        "gender_preference": 15,
+        "time_slot_priority": 15,
+        "same_provider_earlier_slot": 30,
+        "prior_provider_continuity": 25,
+        "experience_match": 20,
+        "preferred_day_match": 10,
+        "specialty_match": 30,
+        "proximity_same_zip": 20,
+        "capacity_bonus": 10
+    }
+    
+    # Decision thresholds (based on 165 point max from USE_CASES.md)
+    THRESHOLDS = {
+        "excellent": 100,  # 60% of 165
+        "good": 80,        # 48% of 165
+        "acceptable": 60,  # 36% of 165
+        "poor": 0
+    }
+    
+    # Rule-based decisions rank 0-100 scores (the LLM ranking scale), so the same thresholds as percentages
+    PERCENT_THRESHOLDS = {name: to_percent(points) for name, points in THRESHOLDS.items()}
+    
     def __init__(
         self,
         domain_server,
@@ -55,12 +91,27 @@ class TemplateDrivenOrchestrator:
         booking_agent,
         smart_scheduling_agent,
         llm: Optional[Any] = None,
-        use_langfuse: bool = True
+        use_langfuse: bool = True,
+        decision_first: Optional[bool] = None,
+        plan_path: Optional[str] = None
     ):
         self.domain = domain_server
         self.patient_agent = patient_engagement_agent
         self.booking_agent = booking_agent
         self.scheduling_agent = smart_scheduling_agent
+        self.parallel_scorer = ParallelScorer()  # Used only for large outages
+        self.prompt_encoding = llm_settings.PROMPT_ENCODING
+        self.prompt_size = {}  # Tokens before/after compact encoding (last prompt)
+        self.shard_stats = {"shards": 1}  # Shards used by the last workflow run
+        
+        # Decision-first mode: deterministic decisions now, LLM narratives in the background
+        self.decision_first = llm_settings.ORCHESTRATOR_DECISION_FIRST if decision_first is None else decision_first
+        self.explanations: Dict[str, Dict[str, Any]] = {}  # appointment_id -> {"status", "narrative"}
+        self._explanation_futures = []
+        self._explainer: Optional[ThreadPoolExecutor] = None
+        
+        # Last processed window per provider, for replan() (ORCHESTRATOR_PLAN_PATH; "" disables)
+        self.plans = PlanStore(plan_path or default_plan_path()) if plan_path != "" else None
         
         # Initialize LangFuse (optional)
         self.langfuse = None
@@ -113,8 +164,19 @@ class TemplateDrivenOrchestrator:
                 print("[ORCHESTRATOR] Local LiteLLM initialized")
         else:
             raise Exception("LLM required for template-driven orchestration")
+        
+        # Record/replay through a cassette when LLM_CASSETTE_MODE is set
+        self.llm = wrap_with_cassette(self.llm)
     
     def prepare_metadata(self, provider_id: str, start_date: str, end_date: str) -> Dict[str, Any]:
+        """Fetch all data needed for the prompt template (timed as the "metadata" span)."""
+        with get_tracer().span("metadata") as span:
+            metadata = self._prepare_metadata(provider_id, start_date, end_date)
+            span.set(appointments=metadata['total_affected'], patients=len(metadata['patients']),
+                     providers=metadata['available_providers_count'])
+        return metadata
+    
+    def _prepare_metadata(self, provider_id: str, start_date: str, end_date: str) -> Dict[str, Any]:
         """Fetch all data needed for the prompt template with date range support.
         
         This is done ONCE upfront, then passed as variables to the prompt.
@@ -125,7 +187,7 @@ class TemplateDrivenOrchestrator:
             start_date: Start date of unavailability (YYYY-MM-DD)
             end_date: End date of unavailability (YYYY-MM-DD)
         """
-        from datetime import datetime, timedelta
+        from datetime import datetime
         
         if start_date == end_date:
             print(f"\n[METADATA] Preparing data for provider {provider_id} on {start_date}...")
@@ -133,30 +195,15 @@ class TemplateDrivenOrchestrator:
             print(f"\n[METADATA] Preparing data for provider {provider_id}")
             print(f"[METADATA] Date range: {start_date} to {end_date}")
         
-        # 1. Get ALL appointments for this provider in the date range
-        all_provider_appointments = self.domain.get_affected_appointments(provider_id)
-        
-        # Filter to only appointments in the date range
-        start_dt = datetime.strptime(start_date, "%Y-%m-%d")
-        end_dt = datetime.strptime(end_date, "%Y-%m-%d")
-        
-        affected_appointments = []
-        for apt in all_provider_appointments:
-            apt_date_str = apt.get('date', '').split('T')[0]  # Extract YYYY-MM-DD
-            try:
-                apt_dt = datetime.strptime(apt_date_str, "%Y-%m-%d")
-                if start_dt <= apt_dt <= end_dt:
-                    affected_appointments.append(apt)
-            except:
-                pass  # Skip appointments with invalid dates
-        
-        print(f"  ✓ Found {len(affected_appointments)} affected appointments in range ({len(all_provider_appointments)} total)")
+        # 1. Get this provider's appointments in the date range (one read, no date parsing)
+        affected_appointments = self.domain.get_appointments_in_range(provider_id, start_date, end_date)
+        print(f"  ✓ Found {len(affected_appointments)} affected appointments in range")
         
-        # 2. Get patient details for each appointment
+        # 2. Get patient details for each appointment (one bulk read; repeat patients fetched once)
+        patients_by_id = self.domain.get_patients([apt.get('patient_id') for apt in affected_appointments])
         patients_data = []
         for apt in affected_appointments:
-            patient_id = apt.get('patient_id')
-            patient = self.domain.get_patient(patient_id)
+            patient = patients_by_id.get(apt.get('patient_id'))
             if patient:
                 patients_data.append({
                     "appointment_id": apt.get('appointment_id'),
@@ -173,23 +220,7 @@ class TemplateDrivenOrchestrator:
         # This is key: patients prefer their existing doctor on a different day!
         same_provider_future_slots = []
         if unavailable_provider:
-            # Check if provider has available_slots on OTHER days
-            provider_slots = unavailable_provider.get('available_slots', [])
-            unavailable_dates = unavailable_provider.get('unavailable_dates', [])
-            
-            # Generate list of dates in unavailable range
-            unavailable_range = []
-            current_dt = start_dt
-            while current_dt <= end_dt:
-                unavailable_range.append(current_dt.strftime("%Y-%m-%d"))
-                current_dt += timedelta(days=1)
-            
-            # Find slots NOT in the unavailable date range
-            for slot in provider_slots:
-                slot_date = slot.get('date', '')
-                if slot_date not in unavailable_range and slot_date not in unavailable_dates:
-                    same_provider_future_slots.append(slot)
-            
+            same_provider_future_slots = self._continuity_slots(unavailable_provider, start_date, end_date)
             if same_provider_future_slots:
                 print(f"  ✓ Found {len(same_provider_future_slots)} future slots for {unavailable_provider.get('name')} (continuity option!)")
         
@@ -235,25 +266,110 @@ class TemplateDrivenOrchestrator:
             # Note: No pre-calculated scores - LLM reasons autonomously
             
             # Scoring rules (for LLM reference)
-            "scoring_rules": {
-                "gender_preference": 15,
-                "time_slot_priority": 15,
-                "same_provider_earlier_slot": 30,
-                "prior_provider_continuity": 25,
-                "experience_match": 20,
-                "preferred_day_match": 10,
-                "specialty_match": 30,
-                "proximity_same_zip": 20,
-                "capacity_bonus": 10
-            },
+            "scoring_rules": dict(self.SCORING_RULES),
             
             # Decision thresholds (based on 165 point max from USE_CASES.md)
-            "thresholds": {
-                "excellent": 100,  # 60% of 165
-                "good": 80,        # 48% of 165
-                "acceptable": 60,  # 36% of 165
-                "poor": 0
+            "thresholds": dict(self.THRESHOLDS)
+        }
+        
+        print(f"[METADATA] ✅ Complete!")
+        return metadata
+    
+    @staticmethod
+    def _continuity_slots(provider: Dict[str, Any], start_date: str, end_date: str) -> List[Dict[str, Any]]:
+        """The provider's available_slots outside the outage and their unavailable_dates."""
+        unavailable_dates = set(provider.get('unavailable_dates', []))
+        # ISO dates compare as strings, so the check costs the same however long the outage is
+        return [
+            slot for slot in provider.get('available_slots', [])
+            if not (start_date <= slot.get('date', '') <= end_date) and slot.get('date', '') not in unavailable_dates
+        ]
+    
+    def prepare_combined_metadata(self, outages: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Combined metadata for several outages (timed as the "metadata" span)."""
+        with get_tracer().span("metadata", providers_out=len(outages)) as span:
+            metadata = self._prepare_combined_metadata(outages)
+            span.set(appointments=metadata['total_affected'], patients=len(metadata['patients']),
+                     providers=metadata['available_providers_count'])
+        return metadata
+    
+    def _prepare_combined_metadata(self, outages: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Metadata for several providers' outages as ONE assignment problem.
+        
+        Same shape as prepare_metadata, so the planning steps (LLM prompt,
+        shards, decision-first, capacity ledger) run once over every affected
+        appointment. Each appointment keeps its own provider_id as the
+        original provider; every provider in the outage set is excluded from
+        the alternatives.
+        
+        Args:
+            outages: [{"provider_id", "start_date", "end_date"}, ...]
+        """
+        from datetime import datetime
+        
+        provider_ids = [o['provider_id'] for o in outages]
+        print(f"\n[METADATA] Preparing combined data for {len(outages)} providers: {', '.join(provider_ids)}")
+        
+        # 1. Affected appointments of every provider in its own window
+        affected_appointments, seen = [], set()
+        for outage in outages:
+            for apt in self.domain.get_appointments_in_range(outage['provider_id'], outage['start_date'], outage['end_date']):
+                if apt.get('appointment_id') not in seen:
+                    seen.add(apt.get('appointment_id'))
+                    affected_appointments.append(apt)
+        print(f"  ✓ Found {len(affected_appointments)} affected appointments across {len(outages)} providers")
+        
+        # 2. Patient details (one bulk read for all providers)
+        patients_by_id = self.domain.get_patients([apt.get('patient_id') for apt in affected_appointments])
+        patients_data = [
+            {
+                "appointment_id": apt.get('appointment_id'),
+                "patient": patients_by_id[apt.get('patient_id')],
+                "original_time": apt.get('time'),
+                "original_date": apt.get('date')
             }
+            for apt in affected_appointments if patients_by_id.get(apt.get('patient_id'))
+        ]
+        print(f"  ✓ Loaded {len(patients_data)} patient records")
+        
+        # 3. Unavailable providers and their slots outside their own window (continuity)
+        unavailable = {p.get('provider_id'): p for p in self.domain.get_providers(provider_ids)}
+        continuity_slots = []
+        for outage in outages:
+            provider = unavailable.get(outage['provider_id'])
+            if provider:
+                continuity_slots.extend(
+                    dict(slot, provider_id=outage['provider_id'])
+                    for slot in self._continuity_slots(provider, outage['start_date'], outage['end_date'])
+                )
+        
+        # 4. Alternatives: active providers not in the outage set
+        out = set(provider_ids)
+        available_providers = [p for p in self.domain.get_available_providers() if p.get('provider_id') not in out]
+        print(f"  ✓ Found {len(available_providers)} available alternative providers")
+        
+        start_date = min(o['start_date'] for o in outages)
+        end_date = max(o['end_date'] for o in outages)
+        metadata = {
+            # Context (provider_id lists every provider for display; see provider_ids / outages)
+            "provider_id": ",".join(provider_ids),
+            "provider_ids": provider_ids,
+            "provider_name": ", ".join(unavailable.get(pid, {}).get('name', pid) for pid in provider_ids),
+            "outages": outages,
+            "start_date": start_date,
+            "end_date": end_date,
+            "date": start_date,
+            "reason": "unavailable",
+            "timestamp": datetime.now().isoformat(),
+            "total_affected": len(affected_appointments),
+            "affected_appointments": affected_appointments,
+            "patients": patients_data,
+            "has_continuity_option": len(continuity_slots) > 0,
+            "continuity_slots": continuity_slots,
+            "available_providers": available_providers,
+            "available_providers_count": len(available_providers),
+            "scoring_rules": dict(self.SCORING_RULES),
+            "thresholds": dict(self.THRESHOLDS)
         }
         
         print(f"[METADATA] ✅ Complete!")
@@ -270,6 +386,13 @@ class TemplateDrivenOrchestrator:
                 # These are formatted here so they can be used as simple variables in LangFuse
                 patients_section = self._format_patients_section(metadata['patients'])
                 providers_section = self._format_providers_section(metadata['available_providers'])
+                if self.prompt_encoding == "compact":
+                    self.prompt_size = compare_prompt_sizes(
+                        self._format_patients_section_verbose(metadata['patients'])
+                        + self._format_providers_section_verbose(metadata['available_providers']),
+                        patients_section + providers_section,
+                        label="patients + providers sections"
+                    )
                 continuity_info = self._format_continuity_info(metadata)
                 
                 # Add formatted sections to metadata for LangFuse
@@ -295,8 +418,38 @@ class TemplateDrivenOrchestrator:
                 print(f"[PROMPT] ❌ LangFuse fetch failed: {e}")
                 raise Exception(f"Failed to fetch prompt from LangFuse: {e}. Please check LangFuse configuration.")
     
+    def _compile_prompt(self, metadata: Dict[str, Any]) -> str:
+        """get_prompt_with_variables, timed as the "prompt" span."""
+        with get_tracer().span("prompt", appointments=metadata.get('total_affected')) as span:
+            prompt = self.get_prompt_with_variables(metadata)
+            span.set(prompt_chars=len(prompt or ""), prompt_tokens=self.prompt_size.get("compact_tokens"))
+        return prompt
+    
+    @staticmethod
+    def _usage_attributes(usage: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """Token counts from an LLM response's usage, for span attributes."""
+        usage = usage or {}
+        return {k: usage[k] for k in ("prompt_tokens", "completion_tokens", "total_tokens") if k in usage}
+    
     def _format_patients_section(self, patients_data: List[Dict[str, Any]]) -> str:
-        """Format patients section for prompt."""
+        """Format patients section for prompt (compact table unless PROMPT_ENCODING=verbose)."""
+        if self.prompt_encoding != "compact":
+            return self._format_patients_section_verbose(patients_data)
+        rows = [dict(p['patient'], appointment_id=p['appointment_id'], original_time=p['original_time'])
+                for p in patients_data]
+        return encode_patients(rows, extra_columns=[
+            ("appointment_id", lambda r: r['appointment_id']),
+            ("original_time", lambda r: r['original_time']),
+        ])
+    
+    def _format_providers_section(self, providers_data: List[Dict[str, Any]]) -> str:
+        """Format providers section for prompt (compact table unless PROMPT_ENCODING=verbose)."""
+        if self.prompt_encoding != "compact":
+            return self._format_providers_section_verbose(providers_data)
+        return encode_providers(providers_data)
+    
+    def _format_patients_section_verbose(self, patients_data: List[Dict[str, Any]]) -> str:
+        """Format patients section as one prose line per attribute."""
         return "\n".join([
             f"""
 Patient {i+1}: {p['patient']['name']} (ID: {p['patient']['patient_id']})
@@ -312,8 +465,8 @@ Patient {i+1}: {p['patient']['name']} (ID: {p['patient']['patient_id']})
             for i, p in enumerate(patients_data)
         ])
     
-    def _format_providers_section(self, providers_data: List[Dict[str, Any]]) -> str:
-        """Format providers section for prompt."""
+    def _format_providers_section_verbose(self, providers_data: List[Dict[str, Any]]) -> str:
+        """Format providers section as one prose line per attribute."""
         return "\n".join([
             f"""
 Provider {i+1}: {p['name']} (ID: {p['provider_id']})
@@ -337,13 +490,15 @@ Provider {i+1}: {p['name']} (ID: {p['provider_id']})
                 return f"""
 CONTINUITY OPTION:
 The original provider ({metadata['provider_name']}) has future available slots:
-{chr(10).join([f"  • {slot.get('date')} at {slot.get('time')}" for slot in continuity_slots[:3]])}
+{chr(10).join([f"  • {slot.get('date')} at {slot.get('time')}" + (f" ({slot['provider_id']})" if slot.get('provider_id') else "")
+                for slot in continuity_slots[:3 * len(metadata.get('provider_ids', [None]))]])}
 
 Consider offering these slots to patients who value continuity of care.
 """
         return ""
     
     
+    @traced("template.execute_workflow")
     def execute_workflow(self, provider_id: str, start_date: str = None, end_date: str = None, 
                          date: str = None, reason: str = "unavailable") -> Dict[str, Any]:
         """Execute the workflow using template-driven approach with date range support.
@@ -359,8 +514,12 @@ Consider offering these slots to patients who value continuity of care.
         1. Mark provider unavailable for date range
         2. Fetch all appointments in date range (grouped by patient)
         3. Compile prompt with metadata variables
-        4. Single LLM call to make all decisions
+        4. Single LLM call to make all decisions (concurrent shards for long outages)
         5. Execute assignments (ONE email per patient)
+        
+        In decision-first mode steps 3-4 are replaced by the deterministic
+        scorer, and the LLM writes the narrative explanations after the
+        bookings are committed (see wait_for_explanations).
         """
         # Support backward compatibility: if only "date" is provided
         if date and not start_date:
@@ -374,34 +533,924 @@ Consider offering these slots to patients who value continuity of care.
         print(f"Reason: {reason}")
         print(f"{'='*60}\n")
         
+        tracer = get_tracer()
+        tracer.current().set(provider_id=provider_id, start_date=start_date, end_date=end_date)
+        
         # Step 0: Mark provider as unavailable for ALL dates in range
-        self._mark_provider_unavailable_range(provider_id, start_date, end_date, reason)
+        with tracer.span("mark_unavailable"):
+            self._mark_provider_unavailable_range(provider_id, start_date, end_date, reason)
         
         # Step 1: Prepare all metadata for date range
         metadata = self.prepare_metadata(provider_id, start_date, end_date)
         
-        # Step 2: Get compiled prompt with variables
-        prompt = self.get_prompt_with_variables(metadata)
+        # Steps 2-5: Decide and execute
+        decisions, executed_assignments, waitlist_entries, explanations = self._plan_and_execute(metadata)
+        
+        # Remember what was processed so a changed window can be re-planned incrementally
+        with tracer.span("save_plan"):
+            self._save_plan(provider_id, start_date, end_date, reason, metadata, executed_assignments + waitlist_entries)
+        
+        # Step 6: Return results with method indicator
+        assignment_method = decisions.get('summary', {}).get('method', 'llm-template-driven')
+        
+        result = {
+            "success": True,
+            "provider_id": provider_id,
+            "start_date": start_date,
+            "end_date": end_date,
+            "date": start_date,  # Legacy field for backward compatibility
+            "date_range_days": (datetime.strptime(end_date, "%Y-%m-%d") - datetime.strptime(start_date, "%Y-%m-%d")).days + 1,
+            "total_affected": metadata['total_affected'],
+            "successful_assignments": len(executed_assignments),
+            "waitlist_entries": len(waitlist_entries),
+            "assignments": executed_assignments,
+            "waitlist": waitlist_entries,
+            "summary": decisions.get('summary', {}),
+            "metadata": metadata,  # Include for audit
+            "assignment_method": assignment_method,  # NEW: Shows which method was used
+            "used_fallback": assignment_method == "rule-based-fallback",  # NEW: Flag for fallback
+            "score_cache": get_score_cache().get_stats(),
+            "prompt_size": self.prompt_size,
+            "sharding": self.shard_stats,
+            "explanations": explanations
+        }
+        
+        print(f"\n[WORKFLOW] ✅ Complete!")
+        print(f"  Date Range: {start_date} to {end_date} ({result['date_range_days']} day(s))")
+        print(f"  Method: {assignment_method.upper()}")
+        print(f"  Assigned: {len(executed_assignments)}")
+        print(f"  Waitlist: {len(waitlist_entries)}")
+        
+        return result
+    
+    @traced("template.multi_provider")
+    def execute_multi_provider_workflow(self, outages: List[Dict[str, Any]],
+                                        reason: str = "unavailable") -> Dict[str, Any]:
+        """Handle several providers' outages (e.g. a clinic closure) in one planning pass.
+        
+        Every provider is marked unavailable before anything is planned, then
+        all affected appointments form one assignment problem (see
+        prepare_combined_metadata) decided against one capacity ledger, so
+        providers in the outage set are never used as replacements and
+        replacements are not handed out twice.
+        
+        Args:
+            outages: [{"provider_id", "start_date", "end_date"(optional)}, ...],
+                at most one window per provider
+            reason: Reason for unavailability (weather, holiday, ...)
+        
+        Returns:
+            execute_workflow-style result, plus "provider_ids", "outages" and
+            a per-provider breakdown in "by_provider"
+        
+        Raises:
+            ValueError: If a provider appears in more than one outage
+        """
+        outages = [
+            {"provider_id": o['provider_id'], "start_date": o['start_date'],
+             "end_date": o.get('end_date') or o['start_date']}
+            for o in outages
+        ]
+        provider_ids = [o['provider_id'] for o in outages]
+        duplicates = sorted({pid for pid in provider_ids if provider_ids.count(pid) > 1})
+        if duplicates:
+            raise ValueError(f"One outage per provider; repeated: {', '.join(duplicates)}")
+        print(f"\n{'='*60}")
+        print(f"[TEMPLATE-DRIVEN ORCHESTRATOR] Starting multi-provider workflow")
+        for outage in outages:
+            print(f"Provider: {outage['provider_id']} ({outage['start_date']} to {outage['end_date']})")
+        print(f"Reason: {reason}")
+        print(f"{'='*60}\n")
+        
+        tracer = get_tracer()
+        tracer.current().set(provider_ids=provider_ids)
+        
+        # Earlier plans are extended, not replaced (checked before marking, so
+        # a stale plan's dates are not made to look current again)
+        previous_plans = {pid: self._current_plan(pid) for pid in provider_ids}
+        
+        # Step 0: Mark every provider first, so planning sees the whole closure
+        with tracer.span("mark_unavailable", providers=len(outages)):
+            for outage in outages:
+                self._mark_provider_unavailable_range(outage['provider_id'], outage['start_date'], outage['end_date'], reason)
+        
+        # Step 1: One combined problem
+        metadata = self.prepare_combined_metadata(outages)
+        
+        # Steps 2-5: Decide and execute once, with shared capacity accounting
+        # (a fresh ledger so LLM plans are merged against capacity too, not just decision-first ones)
+        decisions, executed_assignments, waitlist_entries, explanations = self._plan_and_execute(
+            metadata, CapacityLedger(metadata['available_providers'])
+        )
+        
+        # Per provider: plan (for incremental re-planning) and counts
+        original = {apt.get('appointment_id'): apt.get('provider_id') for apt in metadata['affected_appointments']}
+        by_provider = {}
+        with tracer.span("save_plan", providers=len(outages)):
+            for outage in outages:
+                provider_id = outage['provider_id']
+                assigned = [a for a in executed_assignments if original.get(a.get('appointment_id')) == provider_id]
+                waitlisted = [w for w in waitlist_entries if original.get(w.get('appointment_id')) == provider_id]
+                self._save_plan(provider_id, outage['start_date'], outage['end_date'], reason, metadata,
+                                assigned + waitlisted, previous_plans[provider_id])
+                by_provider[provider_id] = {
+                    "total_affected": len([p for p in original.values() if p == provider_id]),
+                    "successful_assignments": len(assigned),
+                    "waitlist_entries": len(waitlisted)
+                }
+        
+        assignment_method = decisions.get('summary', {}).get('method', 'llm-template-driven')
+        result = {
+            "success": True,
+            "provider_id": metadata['provider_id'],
+            "provider_ids": provider_ids,
+            "outages": outages,
+            "start_date": metadata['start_date'],
+            "end_date": metadata['end_date'],
+            "date": metadata['start_date'],
+            "date_range_days": len(self._dates_in_range(metadata['start_date'], metadata['end_date'])),
+            "total_affected": metadata['total_affected'],
+            "successful_assignments": len(executed_assignments),
+            "waitlist_entries": len(waitlist_entries),
+            "assignments": executed_assignments,
+            "waitlist": waitlist_entries,
+            "by_provider": by_provider,
+            "summary": decisions.get('summary', {}),
+            "metadata": metadata,
+            "assignment_method": assignment_method,
+            "used_fallback": assignment_method == "rule-based-fallback",
+            "score_cache": get_score_cache().get_stats(),
+            "prompt_size": self.prompt_size,
+            "sharding": self.shard_stats,
+            "explanations": explanations
+        }
+        
+        print(f"\n[WORKFLOW] ✅ Complete! {len(outages)} providers in one pass")
+        print(f"  Method: {assignment_method.upper()}")
+        print(f"  Assigned: {len(executed_assignments)}")
+        print(f"  Waitlist: {len(waitlist_entries)}")
+        
+        return result
+    
+    def _plan_and_execute(
+        self,
+        metadata: Dict[str, Any],
+        ledger: Optional[CapacityLedger] = None
+    ) -> Tuple[Dict[str, Any], List[Dict[str, Any]], List[Dict[str, Any]], Optional[Dict[str, Any]]]:
+        """Steps 2-5.6 of execute_workflow for the appointments in metadata.
+        
+        Args:
+            metadata: From prepare_metadata
+            ledger: Capacity already used by earlier runs (incremental re-plan)
+        
+        Returns:
+            (decisions, executed_assignments, waitlist_entries, explanations)
+        """
+        executed_assignments = []
+        waitlist_entries = []
+        executed_count = 0  # Assignments already executed while streaming
+        
+        tracer = get_tracer()
+        with tracer.span("decide") as span:
+            # Steps 2-4: One LLM call, or concurrent shards when the outage is too big for one prompt
+            shards = [] if self.decision_first else self._plan_shards(metadata)
+            if self.decision_first:
+                # Deterministic scorer decides; no LLM on the critical path
+                self.shard_stats = {"shards": 0}
+                decisions, ledger = self._decide_deterministic(metadata, ledger)
+            elif len(shards) <= 1 and ledger is not None:
+                # Re-plan: the LLM sees only the capacity earlier runs left; merge drops any overbooking
+                self.shard_stats = {"shards": 1}
+                (share,) = ledger.split([1])
+                shard_metadata = self._shard_metadata(metadata, metadata['patients'], share)
+                decisions = self._decide_assignments(shard_metadata, self._compile_prompt(shard_metadata))
+                decisions = self._merge_shard_decisions(metadata, [decisions], ledger)
+            elif len(shards) <= 1:
+                self.shard_stats = {"shards": 1}
+                prompt = self._compile_prompt(metadata)
+                if llm_settings.ORCHESTRATOR_STREAMING and hasattr(self.llm, "stream"):
+                    decisions, executed_count = self._stream_assignments(
+                        metadata, prompt, executed_assignments, waitlist_entries
+                    )
+                else:
+                    decisions = self._decide_assignments(metadata, prompt)
+            else:
+                decisions, ledger = self._decide_sharded(metadata, shards, ledger)
+            span.set(method=decisions.get('summary', {}).get('method', 'llm-template-driven'),
+                     decisions=len(decisions.get('assignments', [])), shards=self.shard_stats.get('shards'))
+        
+        with tracer.span("execute") as span:
+            # Step 5: Execute assignments based on LLM decisions
+            print(f"\n[EXECUTION] Executing {len(decisions.get('assignments', [])) - executed_count} assignments...")
+            
+            for assignment in decisions.get('assignments', [])[executed_count:]:
+                self._execute_assignment(assignment, metadata, executed_assignments, waitlist_entries)
+            
+            # Step 5.5: Handle any patients that LLM didn't include in response
+            # Use pre-calculated match scores to process them automatically
+            assigned_patient_ids = {a.get('patient_id') for a in decisions.get('assignments', [])}
+            affected_patient_ids = {apt['patient_id'] for apt in metadata['affected_appointments']}
+            missing_patient_ids = affected_patient_ids - assigned_patient_ids
+            
+            if missing_patient_ids:
+                print(f"\n[AUTO-PROCESS] {len(missing_patient_ids)} patients not in LLM response")
+                print(f"  Missing: {', '.join(missing_patient_ids)}")
+                print(f"  → Calculating scores on-demand for missing patients")
+            
+                for missing_patient_id in missing_patient_ids:
+                    print(f"\n  [AUTO] Processing {missing_patient_id}...")
+                
+                    # Find the appointment for this patient
+                    apt = next((a for a in metadata['affected_appointments'] if a['patient_id'] == missing_patient_id), None)
+                    if not apt:
+                        print(f"  [AUTO] ✗ No appointment found for {missing_patient_id}")
+                        continue
+                
+                    apt_id = apt['appointment_id']
+                    print(f"  [AUTO] Found appointment {apt_id}")
+                
+                    # Calculate scores on-demand for this patient (agentic fallback)
+                    # Providers beyond the patient's travel limit are skipped up front
+                    patient_scores = []
+                    in_range = self.domain.prune_candidates_by_distance(
+                        self.domain.get_patient(missing_patient_id), metadata['available_providers']
+                    )["kept"]
+                    if ledger is not None:
+                        # Sharded plan: skip providers whose capacity other shards already used
+                        in_range = [p for p in in_range if ledger.has_room(p['provider_id'], apt)]
+                    for provider in in_range:
+                        score_result = self.scheduling_agent.calculate_match_score(
+                            patient_id=missing_patient_id,
+                            provider_id=provider['provider_id'],
+                            original_provider_id=apt.get('provider_id') or metadata['provider_id'],
+                            appointment_id=apt_id
+                        )
+                        patient_scores.append({
+                            'provider_id': provider['provider_id'],
+                            'provider_name': provider['name'],
+                            'score': to_percent(score_result.get('total_score', 0)),
+                            'factors': score_result.get('breakdown', {})
+                        })
+                
+                    print(f"  [AUTO] Calculated {len(patient_scores)} match scores for {missing_patient_id}")
+                
+                    if not patient_scores:
+                        print(f"  [AUTO] ⚠️  No providers available for {missing_patient_id} - waitlisting")
+                        # Add to waitlist
+                        patient_data = self.domain.get_patient(missing_patient_id)
+                        waitlist_entry = {
+                            "patient_id": missing_patient_id,
+                            "name": patient_data.get('name', missing_patient_id),
+                            "condition": patient_data.get('condition', 'N/A'),
+                            "no_show_risk": patient_data.get('no_show_risk', 0.5),
+                            "priority": "HIGH",
+                            "requested_specialty": patient_data.get('condition_specialty_required', 'Physical Therapy'),
+                            "requested_location": patient_data.get('preferred_location', 'Any'),
+                            "availability_windows": {
+                                "days": patient_data.get('preferred_days', '').split(',') if patient_data.get('preferred_days') else ['Any'],
+                                "times": ["Morning", "Afternoon"]
+                            },
+                            "insurance": patient_data.get('insurance_provider', 'Unknown'),
+                            "current_appointment": apt_id,
+                            "willing_to_move_up": True,
+                            "added_to_waitlist": datetime.now().isoformat() + "Z",
+                            "waitlist_reason": "❌ LLM didn't process this patient - no providers available",
+                            "notes": "Patient was not included in LLM response"
+                        }
+                        self.domain.add_to_waitlist(waitlist_entry)
+                        continue
+                
+                    # Find best match
+                    best_match = max(patient_scores, key=lambda x: x['score'])
+                    best_provider_id = best_match['provider_id']
+                    best_score = best_match['score']
+                    match_factors = best_match.get('factors', {})
+                
+                    print(f"  📊 {missing_patient_id}: Best match = {best_match['provider_name']} (Score: {best_score})")
+                
+                    # Apply same logic as LLM would:
+                    # - Score >= acceptable: Assign
+                    # - Score < acceptable: Waitlist
+                
+                    if best_score >= self.PERCENT_THRESHOLDS['acceptable']:
+                        # Good match - assign
+                        if ledger is not None:
+                            ledger.reserve(best_provider_id, apt)  # Room was checked when filtering
+                        auto_reasoning = f"Auto-assigned using on-demand score calculation (LLM didn't include in response)"
+                        auto_quality = self._match_quality(best_score)
+                    
+                        success = self.booking_agent.book_appointment(
+                            apt_id,
+                            best_provider_id,
+                            match_score=best_score,
+                            match_factors=match_factors,
+                            match_quality=auto_quality,
+                            reasoning=auto_reasoning
+                        )
+                    
+                        if success:
+                            # Send notification
+                            apt_details = next((a for a in metadata['affected_appointments'] if a['appointment_id'] == apt_id), {})
+                        
+                            self.patient_agent.send_offer(
+                                patient_id=missing_patient_id,
+                                appointment_id=apt_id,
+                                new_provider_id=best_provider_id,
+                                date=apt_details.get('date', metadata['date']),
+                                time=apt_details.get('time', 'TBD')
+                            )
+                        
+                            executed_assignments.append({
+                                "appointment_id": apt_id,
+                                "patient_id": missing_patient_id,
+                                "assigned_to": best_provider_id,
+                                "assigned_to_name": best_match['provider_name'],
+                                "match_score": best_score,
+                                "match_factors": match_factors,
+                                "match_quality": auto_quality,
+                                "action": "assign",
+                                "reasoning": auto_reasoning
+                            })
+                            print(f"  ✅ {apt_id} → {best_match['provider_name']} (Score: {best_score})")
+                        else:
+                            print(f"  ✗ Failed to assign {apt_id}")
+                
+                    else:
+                        # Low score - add to waitlist with reason
+                        print(f"  ⚠️  Low score ({best_score}) → Waitlist")
+                    
+                        patient_data = self.domain.get_patient(missing_patient_id)
+                        waitlist_entry = {
+                            "patient_id": missing_patient_id,
+                            "name": patient_data.get('name', missing_patient_id),
+                            "condition": patient_data.get('condition', 'N/A'),
+                            "no_show_risk": patient_data.get('no_show_risk', 0.5),
+                            "priority": "HIGH" if best_score < to_percent(40) else "MEDIUM",
+                            "requested_specialty": patient_data.get('condition_specialty_required', 'Physical Therapy'),
+                            "requested_location": patient_data.get('preferred_location', 'Any'),
+                            "availability_windows": {
+                                "days": patient_data.get('preferred_days', '').split(',') if patient_data.get('preferred_days') else ['Any'],
+                                "times": ["Morning", "Afternoon"]
+                            },
+                            "insurance": patient_data.get('insurance_provider', 'Unknown'),
+                            "current_appointment": apt_id,
+                            "willing_to_move_up": True,
+                            "added_to_waitlist": datetime.now().isoformat() + "Z",
+                            "waitlist_reason": f"❌ No suitable match found - Best score: {best_score}/100 (threshold: {self.PERCENT_THRESHOLDS['acceptable']})",
+                            "notes": f"Best available provider: {best_match['provider_name']} (score {best_score}) - below acceptable threshold"
+                        }
+                        self.domain.add_to_waitlist(waitlist_entry)
+                    
+                        waitlist_entries.append({
+                            "appointment_id": apt_id,
+                            "patient_id": missing_patient_id,
+                            "action": "waitlist",
+                            "match_score": best_score,
+                            "reasoning": f"No suitable match - best score {best_score} below threshold 60"
+                        })
+                        print(f"  ⏳ {apt_id} → Waitlist (Score: {best_score})")
+            span.set(assigned=len(executed_assignments), waitlisted=len(waitlist_entries),
+                     auto_processed=len(missing_patient_ids))
+            if executed_count:
+                # Executed while streaming: timed on the "llm" span (execute_ms), not here
+                span.set(streamed=executed_count)
+        
+        # Step 5.6: Decision-first - explain the committed decisions in the background
+        explanations = None
+        if self.decision_first:
+            explanations = self._explain_later(executed_assignments + waitlist_entries, metadata)
+        
+        return decisions, executed_assignments, waitlist_entries, explanations
+    
+    @traced("template.replan")
+    def replan(self, provider_id: str, start_date: str, end_date: str,
+               reason: str = "unavailable") -> Dict[str, Any]:
+        """Re-plan after a provider's unavailability window changed (e.g. leave extended).
+        
+        Only dates not processed before are marked, and only appointments no
+        earlier run handled are decided; earlier decisions are reused and the
+        capacity earlier bookings consumed is replayed into the ledger. Falls
+        back to execute_workflow when there is no stored plan or the window
+        does not overlap / touch the stored one. Dates dropped from the window
+        are reported but their bookings are kept.
+        
+        Returns:
+            execute_workflow-style result for the new appointments, plus an
+            "incremental" section (new_dates, dropped_dates, reused_decisions)
+        """
+        window = self._dates_in_range(start_date, end_date)
+        previous = self._current_plan(provider_id)
+        if not previous or not self._windows_touch(window, previous['dates']):
+            print(f"[REPLAN] No stored plan for {provider_id} overlapping {start_date}..{end_date} - full run")
+            return self.execute_workflow(provider_id, start_date=start_date, end_date=end_date, reason=reason)
+        
+        processed = set(previous['dates'])
+        new_dates = [d for d in window if d not in processed]
+        dropped_dates = sorted(processed - set(window))
+        print(f"\n{'='*60}")
+        print(f"[REPLAN] {provider_id}: {previous['start_date']}..{previous['end_date']} → {start_date}..{end_date}")
+        print(f"[REPLAN] {len(new_dates)} new date(s), {len(previous['decisions'])} earlier decisions reused")
+        if dropped_dates:
+            print(f"[REPLAN] ⚠️  {len(dropped_dates)} date(s) left the window - earlier bookings are kept")
+        print(f"{'='*60}\n")
+        
+        tracer = get_tracer()
+        tracer.current().set(provider_id=provider_id, start_date=start_date, end_date=end_date,
+                             new_dates=len(new_dates), reused_decisions=len(previous['decisions']))
+        
+        # Step 0: Mark only the new dates
+        with tracer.span("mark_unavailable", dates=len(new_dates)):
+            for run_start, run_end in self._date_runs(new_dates):
+                self._mark_provider_unavailable_range(provider_id, run_start, run_end, reason)
+        
+        # Step 1: One bulk fetch for the window; keep appointments no earlier run handled
+        # (the new dates, plus any booked into already-processed dates since)
+        metadata = self.prepare_metadata(provider_id, start_date, end_date)
+        handled = previous['decisions']
+        metadata['affected_appointments'] = [
+            apt for apt in metadata['affected_appointments'] if apt.get('appointment_id') not in handled
+        ]
+        new_ids = {apt['appointment_id'] for apt in metadata['affected_appointments']}
+        metadata['patients'] = [p for p in metadata['patients'] if p['appointment_id'] in new_ids]
+        metadata['total_affected'] = len(new_ids)
+        
+        # Capacity left after the earlier bookings
+        ledger = CapacityLedger(metadata['available_providers'])
+        for reservation in previous['reservations']:
+            ledger.reserve(reservation['provider_id'], reservation)
+        
+        decisions = {"summary": {"method": "incremental-no-change"}}
+        executed_assignments, waitlist_entries, explanations = [], [], None
+        if new_ids:
+            decisions, executed_assignments, waitlist_entries, explanations = self._plan_and_execute(metadata, ledger)
+        
+        with tracer.span("save_plan"):
+            self._save_plan(provider_id, start_date, end_date, reason, metadata,
+                            executed_assignments + waitlist_entries, previous)
+        
+        assignment_method = decisions.get('summary', {}).get('method', 'llm-template-driven')
+        result = {
+            "success": True,
+            "provider_id": provider_id,
+            "start_date": start_date,
+            "end_date": end_date,
+            "date": start_date,
+            "date_range_days": len(window),
+            "total_affected": metadata['total_affected'],
+            "successful_assignments": len(executed_assignments),
+            "waitlist_entries": len(waitlist_entries),
+            "assignments": executed_assignments,
+            "waitlist": waitlist_entries,
+            "summary": decisions.get('summary', {}),
+            "metadata": metadata,
+            "assignment_method": assignment_method,
+            "used_fallback": assignment_method == "rule-based-fallback",
+            "score_cache": get_score_cache().get_stats(),
+            "sharding": self.shard_stats,
+            "explanations": explanations,
+            "incremental": {
+                "new_dates": new_dates,
+                "dropped_dates": dropped_dates,
+                "reused_decisions": len(previous['decisions']),
+                "new_decisions": len(executed_assignments) + len(waitlist_entries)
+            }
+        }
+        
+        print(f"\n[REPLAN] ✅ Complete! Assigned: {len(executed_assignments)}, Waitlist: {len(waitlist_entries)}")
+        return result
+    
+    def _save_plan(
+        self,
+        provider_id: str,
+        start_date: str,
+        end_date: str,
+        reason: str,
+        metadata: Dict[str, Any],
+        handled: List[Dict[str, Any]],
+        previous: Optional[Dict[str, Any]] = None
+    ) -> None:
+        """Store the processed window, decisions and capacity reservations (see workflows/plan_store.py)."""
+        if self.plans is None:
+            return
+        appointments = {apt.get('appointment_id'): apt for apt in metadata['affected_appointments']}
+        decisions = dict(previous['decisions']) if previous else {}
+        reservations = list(previous['reservations']) if previous else []
+        
+        for decision in handled:
+            apt_id = decision.get('appointment_id')
+            decisions[apt_id] = {k: decision.get(k) for k in ("patient_id", "action", "assigned_to", "match_score")}
+            if decision.get('action') in ('assign', 'assign_hod_review') and decision.get('assigned_to'):
+                apt = appointments.get(apt_id, {})
+                reservations.append({"provider_id": decision['assigned_to'], "appointment_id": apt_id,
+                                     "date": apt.get('date'), "time": apt.get('time')})
+        
+        dates = set(previous['dates']) if previous else set()
+        dates.update(self._dates_in_range(start_date, end_date))
+        try:
+            self.plans.save(provider_id, {
+                "start_date": start_date,
+                "end_date": end_date,
+                "reason": reason,
+                "dates": sorted(dates),
+                "decisions": decisions,
+                "reservations": reservations
+            })
+        except OSError as e:
+            print(f"[PLAN STORE] ⚠️  Could not save plan for {provider_id}: {e}")
+    
+    def _current_plan(self, provider_id: str) -> Optional[Dict[str, Any]]:
+        """The stored plan for provider_id, or None (a plan the data no longer reflects is discarded)."""
+        previous = self.plans.get(provider_id) if self.plans else None
+        if previous and not self._plan_is_current(provider_id, previous):
+            print(f"[PLAN STORE] Stored plan for {provider_id} no longer matches the data (reset?) - discarding")
+            self.plans.delete(provider_id)
+            previous = None
+        return previous
+    
+    def _plan_is_current(self, provider_id: str, plan: Dict[str, Any]) -> bool:
+        """True if the data still reflects a stored plan.
+        
+        Its dates must still be marked unavailable for the provider, and the
+        appointments it rebooked must no longer sit on that provider (a demo
+        reset or a manual edit undoes both).
+        """
+        provider = next(iter(self.domain.get_providers([provider_id])), None)
+        unavailable = set((provider or {}).get('unavailable_dates') or [])
+        if not set(plan['dates']) <= unavailable:
+            return False
+        for reservation in plan['reservations']:
+            apt = self.domain.get_appointment(reservation['appointment_id'])
+            if not apt or apt.get('provider_id') == provider_id:
+                return False
+        return True
+    
+    @staticmethod
+    def _dates_in_range(start_date: str, end_date: str) -> List[str]:
+        """ISO dates from start_date to end_date inclusive."""
+        start = datetime.strptime(start_date, "%Y-%m-%d")
+        days = (datetime.strptime(end_date, "%Y-%m-%d") - start).days
+        return [(start + timedelta(days=i)).strftime("%Y-%m-%d") for i in range(days + 1)]
+    
+    @staticmethod
+    def _date_runs(dates: List[str]) -> List[Tuple[str, str]]:
+        """Sorted ISO dates grouped into contiguous (start, end) runs."""
+        runs = []
+        for date in dates:
+            if runs and (datetime.strptime(date, "%Y-%m-%d") - datetime.strptime(runs[-1][1], "%Y-%m-%d")).days == 1:
+                runs[-1] = (runs[-1][0], date)
+            else:
+                runs.append((date, date))
+        return runs
+    
+    @staticmethod
+    def _windows_touch(window: List[str], processed: List[str]) -> bool:
+        """True if the new window overlaps or is adjacent to the processed dates."""
+        if not window or not processed:
+            return False
+        day = timedelta(days=1)
+        first = datetime.strptime(min(processed), "%Y-%m-%d") - day
+        last = datetime.strptime(max(processed), "%Y-%m-%d") + day
+        return datetime.strptime(window[0], "%Y-%m-%d") <= last and datetime.strptime(window[-1], "%Y-%m-%d") >= first
+    
+    def _execute_assignment(
+        self,
+        assignment: Dict[str, Any],
+        metadata: Dict[str, Any],
+        executed_assignments: List[Dict[str, Any]],
+        waitlist_entries: List[Dict[str, Any]]
+    ) -> None:
+        """Book / notify / waitlist one LLM assignment (appends to the result lists)."""
+        apt_id = assignment.get('appointment_id')
+        action = assignment.get('action')
+        
+        if action == 'assign':
+            # Assign to provider
+            new_provider_id = assignment.get('assigned_to')
+            match_score = assignment.get('match_score', 0)
+            match_quality = assignment.get('match_quality')
+            reasoning = assignment.get('reasoning')
+            
+            # Minimal execution safety check: Only verify provider exists (don't fix LLM decisions)
+            if not new_provider_id:
+                print(f"  ⚠️  {apt_id}: No provider specified - LLM should have waitlisted. Skipping.")
+                return
+            
+            # Verify provider exists in available providers (execution safety)
+            provider_exists = any(p.get('provider_id') == new_provider_id for p in metadata.get('available_providers', []))
+            if not provider_exists:
+                print(f"  ⚠️  {apt_id}: Provider {new_provider_id} not found - LLM should have waitlisted. Skipping.")
+                return
+            
+            # Proceed with assignment (LLM made the decision)
+            # Use LLM-provided match factors (autonomous reasoning)
+            match_factors = assignment.get('match_factors', {})
+            
+            success = self.booking_agent.book_appointment(
+                apt_id, 
+                new_provider_id,
+                match_score=match_score,
+                match_factors=match_factors,
+                match_quality=match_quality,
+                reasoning=reasoning
+            )
+            
+            if success:
+                # Send notification with appointment details
+                patient_id = assignment.get('patient_id')
+                new_provider_id = assignment.get('assigned_to')
+                
+                # Get appointment details for email
+                apt_details = next((apt for apt in metadata['affected_appointments'] if apt['appointment_id'] == apt_id), {})
+                
+                self.patient_agent.send_offer(
+                    patient_id=patient_id,
+                    appointment_id=apt_id,
+                    new_provider_id=new_provider_id,
+                    date=apt_details.get('date', metadata['date']),
+                    time=apt_details.get('time', 'TBD')
+                )
+                
+                executed_assignments.append(assignment)
+                print(f"  ✓ {apt_id} → {assignment.get('assigned_to_name')} (Score: {assignment.get('match_score')})")
+            else:
+                print(f"  ✗ Failed to assign {apt_id} - booking failed")
+        
+        # Handle waitlist (either original action or converted from failed assign)
+        if action == 'waitlist':
+            # Add to waitlist
+            patient_id = assignment.get('patient_id')
+            reason = assignment.get('reasoning', 'No suitable provider found')
+            match_score = assignment.get('match_score', 0)
+            
+            # Get full patient details for waitlist entry
+            patient_data = self.domain.get_patient(patient_id)
+            waitlist_entry = {
+                "patient_id": patient_id,
+                "name": patient_data.get('name', patient_id),
+                "condition": patient_data.get('condition', 'N/A'),
+                "no_show_risk": patient_data.get('no_show_risk', 0.5),
+                "priority": "HIGH" if match_score < 40 else "MEDIUM",
+                "requested_specialty": patient_data.get('condition_specialty_required', 'Physical Therapy'),
+                "requested_location": patient_data.get('preferred_location', 'Any'),
+                "availability_windows": {
+                    "days": patient_data.get('preferred_days', '').split(',') if patient_data.get('preferred_days') else ['Any'],
+                    "times": ["Morning", "Afternoon"]
+                },
+                "insurance": patient_data.get('insurance_provider', 'Unknown'),
+                "current_appointment": apt_id,
+                "willing_to_move_up": True,
+                "added_to_waitlist": datetime.now().isoformat() + "Z",
+                "waitlist_reason": f"No suitable match found (Score: {match_score}) - {reason}",
+                "notes": reason
+            }
+            self.domain.add_to_waitlist(waitlist_entry)
+            
+            waitlist_entries.append(assignment)
+            print(f"  ⏳ {apt_id} → Waitlist (Score: {assignment.get('match_score')})")
+        
+        elif action == 'assign_hod_review':
+            # UC6 Fallback: Assign to HOD for manual review
+            new_provider_id = assignment.get('assigned_to')
+            match_score = assignment.get('match_score', 0)
+            match_quality = assignment.get('match_quality')
+            reasoning = assignment.get('reasoning')
+            
+            # Use LLM-provided match factors (autonomous reasoning)
+            match_factors = assignment.get('match_factors', {})
+            
+            success = self.booking_agent.book_appointment(
+                apt_id, 
+                new_provider_id,
+                status='needs_review',  # Mark as needs manual review
+                match_score=match_score,
+                match_factors=match_factors,
+                match_quality=match_quality,
+                reasoning=reasoning
+            )
+            
+            if success:
+                # Don't send email - HOD will manually review and contact patient
+                executed_assignments.append(assignment)
+                print(f"  ⚠️  {apt_id} → HOD REVIEW: {assignment.get('assigned_to_name')} (Score: {assignment.get('match_score')})")
+            else:
+                print(f"  ✗ Failed to assign {apt_id} to HOD")
+        
+        elif action == 'waitlist':
+            # Add to waitlist
+            patient_id = assignment.get('patient_id')
+            reason = assignment.get('reasoning', 'No suitable provider found')
+            match_score = assignment.get('match_score', 0)
+            
+            # Get full patient details for waitlist entry
+            patient_data = self.domain.get_patient(patient_id)
+            waitlist_entry = {
+                "patient_id": patient_id,
+                "name": patient_data.get('name', patient_id),
+                "condition": patient_data.get('condition', 'N/A'),
+                "no_show_risk": patient_data.get('no_show_risk', 0.5),
+                "priority": "HIGH" if match_score < 40 else "MEDIUM",
+                "requested_specialty": patient_data.get('condition_specialty_required', 'Physical Therapy'),
+                "requested_location": patient_data.get('preferred_location', 'Any'),
+                "availability_windows": {
+                    "days": patient_data.get('preferred_days', '').split(',') if patient_data.get('preferred_days') else ['Any'],
+                    "times": ["Morning", "Afternoon"]
+                },
+                "insurance": patient_data.get('insurance_provider', 'Unknown'),
+                "current_appointment": apt_id,
+                "willing_to_move_up": True,
+                "added_to_waitlist": datetime.now().isoformat() + "Z",
+                "waitlist_reason": f"No suitable match found (Score: {match_score}) - {reason}",
+                "notes": reason
+            }
+            self.domain.add_to_waitlist(waitlist_entry)
+            
+            waitlist_entries.append(assignment)
+            print(f"  ⏳ {apt_id} → Waitlist (Score: {assignment.get('match_score')})")
+            
+            # NEW: Trigger automatic backfill
+            if BACKFILL_AVAILABLE:
+                try:
+                    backfill_agent = BackfillAgent(self.domain.json_client)
+                    appointment = self.domain.get_appointment(apt_id)
+                    
+                    if appointment:
+                        print(f"  🔄 Attempting auto-backfill for {apt_id}...")
+                        backfill_result = backfill_agent.handle_slot_freed(
+                            appointment,
+                            reason="Patient declined all providers - added to waitlist"
+                        )
+                        
+                        if backfill_result.get('status') == 'BACKFILLED':
+                            backfilled_patient = backfill_result.get('patient_id')
+                            print(f"  🎉 Auto-backfilled with waitlist patient {backfilled_patient}")
+                        else:
+                            print(f"  ℹ️  No immediate backfill match (status: {backfill_result.get('status')})")
+                except Exception as e:
+                    print(f"  ⚠️  Backfill attempt failed: {str(e)}")
+                    # Continue without failing the workflow
+    
+    def _plan_shards(self, metadata: Dict[str, Any]) -> List[List[Dict[str, Any]]]:
+        """Split affected patients into shards that fit one prompt and one response.
+        
+        Input budget: SHARD_INPUT_TOKENS minus the providers section and template
+        allowance. Output budget: ORCHESTRATOR_MAX_TOKENS at
+        SHARD_OUTPUT_TOKENS_PER_APPOINTMENT per assignment. All appointments of a
+        patient stay in the same shard (one email per patient).
+        """
+        patients = metadata.get('patients', [])
+        fixed_tokens = (
+            llm_settings.SHARD_TEMPLATE_TOKENS
+            + count_tokens(self._format_providers_section(metadata.get('available_providers', [])))
+            + count_tokens(self._format_continuity_info(metadata))
+            + count_tokens(self._format_patients_section([]))  # Table header
+        )
+        input_budget = llm_settings.SHARD_INPUT_TOKENS - fixed_tokens
+        max_appointments = max(1, llm_settings.ORCHESTRATOR_MAX_TOKENS // llm_settings.SHARD_OUTPUT_TOKENS_PER_APPOINTMENT)
+        
+        # Group appointments by patient, preserving order
+        groups: Dict[str, List[Dict[str, Any]]] = {}
+        for entry in patients:
+            groups.setdefault(entry['patient'].get('patient_id'), []).append(entry)
+        
+        header_tokens = count_tokens(self._format_patients_section([]))
+        shards, current, current_tokens = [], [], 0
+        for group in groups.values():
+            group_tokens = count_tokens(self._format_patients_section(group)) - header_tokens
+            too_big = current and (
+                current_tokens + group_tokens > input_budget
+                or len(current) + len(group) > max_appointments
+            )
+            if too_big:
+                shards.append(current)
+                current, current_tokens = [], 0
+            current.extend(group)
+            current_tokens += group_tokens
+        if current:
+            shards.append(current)
+        
+        if len(shards) > 1:
+            print(f"[SHARDING] {len(patients)} appointments → {len(shards)} shards "
+                  f"(input budget {input_budget} tokens, ≤{max_appointments} appointments/shard)")
+        return shards or [[]]
+    
+    def _shard_metadata(
+        self,
+        metadata: Dict[str, Any],
+        shard: List[Dict[str, Any]],
+        capacity_share: Dict[str, Optional[int]]
+    ) -> Dict[str, Any]:
+        """Metadata restricted to one shard, with providers' load showing only this shard's capacity share."""
+        appointment_ids = {entry['appointment_id'] for entry in shard}
+        providers = []
+        for provider in metadata['available_providers']:
+            share = capacity_share.get(provider.get('provider_id'))
+            if share is not None and provider.get('max_patient_capacity'):
+                provider = dict(provider, current_patient_load=provider['max_patient_capacity'] - share)
+            providers.append(provider)
+        
+        shard_metadata = metadata.copy()
+        shard_metadata['patients'] = shard
+        shard_metadata['affected_appointments'] = [
+            apt for apt in metadata['affected_appointments'] if apt.get('appointment_id') in appointment_ids
+        ]
+        shard_metadata['total_affected'] = len(shard_metadata['affected_appointments'])
+        shard_metadata['available_providers'] = providers
+        return shard_metadata
+    
+    def _decide_sharded(
+        self,
+        metadata: Dict[str, Any],
+        shards: List[List[Dict[str, Any]]],
+        ledger: Optional[CapacityLedger] = None
+    ) -> Tuple[Dict[str, Any], CapacityLedger]:
+        """Plan each shard concurrently, then merge without overbooking.
+        
+        Each shard sees a proportional share of every provider's spare capacity.
+        The merge replays assignments in shard order against a CapacityLedger;
+        assignments that no longer fit are dropped so Step 5.5 re-scores those
+        patients against the capacity that is actually left.
+        """
+        if ledger is None:
+            ledger = CapacityLedger(metadata['available_providers'])
+        shares = ledger.split([len(shard) for shard in shards])
+        shard_metadata = [self._shard_metadata(metadata, shard, share) for shard, share in zip(shards, shares)]
+        
+        # Prompts are compiled up front (sequentially), only the LLM calls overlap
+        prompts = []
+        prompt_size = {"verbose_tokens": 0, "compact_tokens": 0, "tokens_saved": 0}
+        for sm in shard_metadata:
+            prompts.append(self._compile_prompt(sm))
+            for key in prompt_size:
+                prompt_size[key] += self.prompt_size.get(key, 0)
+        if self.prompt_encoding == "compact":
+            self.prompt_size = prompt_size
+        
+        start = time.time()
+        workers = max(1, min(llm_settings.SHARD_MAX_PARALLEL, len(shards)))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            shard_decisions = list(pool.map(get_tracer().bind(self._decide_assignments), shard_metadata, prompts))
+        elapsed_ms = (time.time() - start) * 1000
+        
+        decisions = self._merge_shard_decisions(metadata, shard_decisions, ledger)
+        self.shard_stats = {
+            "shards": len(shards),
+            "shard_sizes": [len(shard) for shard in shards],
+            "parallel": workers,
+            "elapsed_ms": round(elapsed_ms, 1),
+            "capacity_conflicts": decisions['summary']['capacity_conflicts'],
+            "ledger": ledger.get_stats()
+        }
+        print(f"[SHARDING] ✅ {len(shards)} shards planned in {elapsed_ms:.0f}ms "
+              f"({decisions['summary']['capacity_conflicts']} capacity conflicts re-queued)")
+        return decisions, ledger
+    
+    def _merge_shard_decisions(
+        self,
+        metadata: Dict[str, Any],
+        shard_decisions: List[Dict[str, Any]],
+        ledger: CapacityLedger
+    ) -> Dict[str, Any]:
+        """Merge shard plans, reserving provider capacity/slots as bookings (incl. HOD review) are accepted."""
+        appointments = {apt.get('appointment_id'): apt for apt in metadata['affected_appointments']}
+        assignments = []
+        conflicts = 0
+        methods = []
         
+        for decisions in shard_decisions:
+            methods.append(decisions.get('summary', {}).get('method', 'llm-template-driven'))
+            for assignment in decisions.get('assignments', []):
+                if assignment.get('action') in ('assign', 'assign_hod_review') and assignment.get('assigned_to'):
+                    apt = appointments.get(assignment.get('appointment_id'), {})
+                    reason = ledger.reserve(assignment['assigned_to'], apt)
+                    if reason in ("capacity", "slot"):
+                        conflicts += 1
+                        print(f"  ⚠️  {assignment.get('appointment_id')}: {assignment['assigned_to']} "
+                              f"{'full' if reason == 'capacity' else 'slot taken'} after merge - re-queued")
+                        continue
+                assignments.append(assignment)
+        
+        method = methods[0] if len(set(methods)) == 1 else "llm-template-driven-sharded-mixed"
+        return {
+            "assignments": assignments,
+            "summary": {
+                "method": method,
+                "shards": len(shard_decisions),
+                "shard_methods": methods,
+                "capacity_conflicts": conflicts
+            }
+        }
+    
+    def _decide_assignments(self, metadata: Dict[str, Any], prompt: str) -> Dict[str, Any]:
+        """Single LLM call for the appointments in metadata; falls back to rule-based assignment."""
         # Step 3: Single LLM call to make decisions
         print(f"\n[LLM] Making assignment decisions...")
         print(f"[LLM] Prompt length: {len(prompt)} chars")
         
         try:
-            # Adjust temperature for GPT-5 (only supports 1.0)
-            temperature = llm_settings.ORCHESTRATOR_TEMPERATURE
-            model = os.getenv("ORCHESTRATION_LLM_MODEL", "gpt-4")
-            if "gpt-5" in model.lower():
-                temperature = 1.0
-                print(f"[LLM] Using temperature=1.0 for {model} (GPT-5 requirement)")
-            
-            response = self.llm.generate(
-                prompt=prompt,
-                system="You are a healthcare scheduling assistant. You MUST return ONLY valid JSON with an 'assignments' array. Do not include any text before or after the JSON. The JSON must start with '{' and end with '}'.",
-                max_tokens=llm_settings.ORCHESTRATOR_MAX_TOKENS,
-                temperature=temperature,
-                timeout=llm_settings.REQUEST_TIMEOUT
-            )
+            with get_tracer().span("llm", appointments=metadata.get('total_affected'), prompt_chars=len(prompt or "")) as span:
+                response = self.llm.generate(prompt=prompt, **self._llm_call_kwargs())
+                span.set(response_chars=len(response.content or ""),
+                         **self._usage_attributes(getattr(response, "usage", None)))
             
             print(f"[LLM] Response received: {len(response.content) if response.content else 0} chars")
             if response.content:
@@ -437,38 +1486,13 @@ Consider offering these slots to patients who value continuity of care.
                         # LLM provides match_factors and reasoning - no need to enrich from pre-calculated scores
                         # The LLM's autonomous reasoning is what we use
                         for assignment in decisions['assignments']:
-                            # Ensure match_factors exists (LLM should provide this)
-                            if 'match_factors' not in assignment:
-                                assignment['match_factors'] = {}
-                            
-                            # Convert match_quality to numeric score for backward compatibility
-                            quality_map = {
-                                "EXCELLENT": 100,
-                                "GOOD": 75,
-                                "ACCEPTABLE": 60,
-                                "POOR": 40
-                            }
-                            if 'match_quality' in assignment and 'match_score' not in assignment:
-                                assignment['match_score'] = quality_map.get(assignment['match_quality'], 50)
-                            
-                            # Minimal validation: Only ensure required fields exist for execution
-                            # The LLM should handle all decision-making via the prompt
-                            if 'appointment_id' not in assignment:
-                                print(f"  ⚠️  Assignment missing appointment_id - skipping")
-                                continue
+                            self._normalize_assignment(assignment)
                                 
                 except json.JSONDecodeError as e:
                     print(f"[ERROR] Failed to parse LLM response: {e}")
                     print(f"Response: {response.content[:500]}")
                     
-                    # Try hardcoded LLM-style response first (for demo purposes)
-                    print(f"[FALLBACK] Attempting hardcoded LLM-style response...")
-                    decisions = self._create_hardcoded_llm_response(metadata)
-                    
-                    # If hardcoded response fails, use rule-based
-                    if not decisions or not decisions.get('assignments'):
-                        print(f"[FALLBACK] Using rule-based assignment")
-                        decisions = self._fallback_assignment(metadata)
+                    decisions = self._unparseable_response_fallback(metadata)
                     
         except Exception as e:
             print(f"[ERROR] LLM call failed: {e}")
@@ -476,365 +1500,129 @@ Consider offering these slots to patients who value continuity of care.
             print(f"[FALLBACK] Using rule-based assignment")
             decisions = self._fallback_assignment(metadata)
         
-        # Step 5: Execute assignments based on LLM decisions
-        print(f"\n[EXECUTION] Executing {len(decisions.get('assignments', []))} assignments...")
+        return decisions
+    
+    def _stream_assignments(
+        self,
+        metadata: Dict[str, Any],
+        prompt: str,
+        executed_assignments: List[Dict[str, Any]],
+        waitlist_entries: List[Dict[str, Any]]
+    ) -> Tuple[Dict[str, Any], int]:
+        """Stream the LLM response and execute each assignment as soon as it is complete.
         
-        executed_assignments = []
-        waitlist_entries = []
+        Booking/email/waitlist work for one assignment overlaps with generation of
+        the next. If the response is cut off or turns invalid, the assignments that
+        already closed are kept; patients the LLM never reached are picked up by
+        Step 5.5.
         
-        for assignment in decisions.get('assignments', []):
-            apt_id = assignment.get('appointment_id')
-            action = assignment.get('action')
-            
-            if action == 'assign':
-                # Assign to provider
-                new_provider_id = assignment.get('assigned_to')
-                match_score = assignment.get('match_score', 0)
-                match_quality = assignment.get('match_quality')
-                reasoning = assignment.get('reasoning')
-                
-                # Minimal execution safety check: Only verify provider exists (don't fix LLM decisions)
-                if not new_provider_id:
-                    print(f"  ⚠️  {apt_id}: No provider specified - LLM should have waitlisted. Skipping.")
-                    continue
-                
-                # Verify provider exists in available providers (execution safety)
-                provider_exists = any(p.get('provider_id') == new_provider_id for p in metadata.get('available_providers', []))
-                if not provider_exists:
-                    print(f"  ⚠️  {apt_id}: Provider {new_provider_id} not found - LLM should have waitlisted. Skipping.")
-                    continue
-                
-                # Proceed with assignment (LLM made the decision)
-                # Use LLM-provided match factors (autonomous reasoning)
-                match_factors = assignment.get('match_factors', {})
-                
-                success = self.booking_agent.book_appointment(
-                    apt_id, 
-                    new_provider_id,
-                    match_score=match_score,
-                    match_factors=match_factors,
-                    match_quality=match_quality,
-                    reasoning=reasoning
-                )
-                
-                if success:
-                    # Send notification with appointment details
-                    patient_id = assignment.get('patient_id')
-                    new_provider_id = assignment.get('assigned_to')
-                    
-                    # Get appointment details for email
-                    apt_details = next((apt for apt in metadata['affected_appointments'] if apt['appointment_id'] == apt_id), {})
-                    
-                    self.patient_agent.send_offer(
-                        patient_id=patient_id,
-                        appointment_id=apt_id,
-                        new_provider_id=new_provider_id,
-                        date=apt_details.get('date', metadata['date']),
-                        time=apt_details.get('time', 'TBD')
-                    )
-                    
-                    executed_assignments.append(assignment)
-                    print(f"  ✓ {apt_id} → {assignment.get('assigned_to_name')} (Score: {assignment.get('match_score')})")
-                else:
-                    print(f"  ✗ Failed to assign {apt_id} - booking failed")
-            
-            # Handle waitlist (either original action or converted from failed assign)
-            if action == 'waitlist':
-                # Add to waitlist
-                patient_id = assignment.get('patient_id')
-                reason = assignment.get('reasoning', 'No suitable provider found')
-                match_score = assignment.get('match_score', 0)
-                
-                # Get full patient details for waitlist entry
-                patient_data = self.domain.get_patient(patient_id)
-                waitlist_entry = {
-                    "patient_id": patient_id,
-                    "name": patient_data.get('name', patient_id),
-                    "condition": patient_data.get('condition', 'N/A'),
-                    "no_show_risk": patient_data.get('no_show_risk', 0.5),
-                    "priority": "HIGH" if match_score < 40 else "MEDIUM",
-                    "requested_specialty": patient_data.get('condition_specialty_required', 'Physical Therapy'),
-                    "requested_location": patient_data.get('preferred_location', 'Any'),
-                    "availability_windows": {
-                        "days": patient_data.get('preferred_days', '').split(',') if patient_data.get('preferred_days') else ['Any'],
-                        "times": ["Morning", "Afternoon"]
-                    },
-                    "insurance": patient_data.get('insurance_provider', 'Unknown'),
-                    "current_appointment": apt_id,
-                    "willing_to_move_up": True,
-                    "added_to_waitlist": datetime.now().isoformat() + "Z",
-                    "waitlist_reason": f"No suitable match found (Score: {match_score}) - {reason}",
-                    "notes": reason
-                }
-                self.domain.add_to_waitlist(waitlist_entry)
-                
-                waitlist_entries.append(assignment)
-                print(f"  ⏳ {apt_id} → Waitlist (Score: {assignment.get('match_score')})")
-            
-            elif action == 'assign_hod_review':
-                # UC6 Fallback: Assign to HOD for manual review
-                new_provider_id = assignment.get('assigned_to')
-                match_score = assignment.get('match_score', 0)
-                match_quality = assignment.get('match_quality')
-                reasoning = assignment.get('reasoning')
-                
-                # Use LLM-provided match factors (autonomous reasoning)
-                match_factors = assignment.get('match_factors', {})
-                
-                success = self.booking_agent.book_appointment(
-                    apt_id, 
-                    new_provider_id,
-                    status='needs_review',  # Mark as needs manual review
-                    match_score=match_score,
-                    match_factors=match_factors,
-                    match_quality=match_quality,
-                    reasoning=reasoning
-                )
-                
-                if success:
-                    # Don't send email - HOD will manually review and contact patient
-                    executed_assignments.append(assignment)
-                    print(f"  ⚠️  {apt_id} → HOD REVIEW: {assignment.get('assigned_to_name')} (Score: {assignment.get('match_score')})")
-                else:
-                    print(f"  ✗ Failed to assign {apt_id} to HOD")
-            
-            elif action == 'waitlist':
-                # Add to waitlist
-                patient_id = assignment.get('patient_id')
-                reason = assignment.get('reasoning', 'No suitable provider found')
-                match_score = assignment.get('match_score', 0)
-                
-                # Get full patient details for waitlist entry
-                patient_data = self.domain.get_patient(patient_id)
-                waitlist_entry = {
-                    "patient_id": patient_id,
-                    "name": patient_data.get('name', patient_id),
-                    "condition": patient_data.get('condition', 'N/A'),
-                    "no_show_risk": patient_data.get('no_show_risk', 0.5),
-                    "priority": "HIGH" if match_score < 40 else "MEDIUM",
-                    "requested_specialty": patient_data.get('condition_specialty_required', 'Physical Therapy'),
-                    "requested_location": patient_data.get('preferred_location', 'Any'),
-                    "availability_windows": {
-                        "days": patient_data.get('preferred_days', '').split(',') if patient_data.get('preferred_days') else ['Any'],
-                        "times": ["Morning", "Afternoon"]
-                    },
-                    "insurance": patient_data.get('insurance_provider', 'Unknown'),
-                    "current_appointment": apt_id,
-                    "willing_to_move_up": True,
-                    "added_to_waitlist": datetime.now().isoformat() + "Z",
-                    "waitlist_reason": f"No suitable match found (Score: {match_score}) - {reason}",
-                    "notes": reason
-                }
-                self.domain.add_to_waitlist(waitlist_entry)
-                
-                waitlist_entries.append(assignment)
-                print(f"  ⏳ {apt_id} → Waitlist (Score: {assignment.get('match_score')})")
-                
-                # NEW: Trigger automatic backfill
-                if BACKFILL_AVAILABLE:
-                    try:
-                        backfill_agent = BackfillAgent(self.domain.json_client)
-                        appointment = self.domain.get_appointment(apt_id)
-                        
-                        if appointment:
-                            print(f"  🔄 Attempting auto-backfill for {apt_id}...")
-                            backfill_result = backfill_agent.handle_slot_freed(
-                                appointment,
-                                reason="Patient declined all providers - added to waitlist"
-                            )
-                            
-                            if backfill_result.get('status') == 'BACKFILLED':
-                                backfilled_patient = backfill_result.get('patient_id')
-                                print(f"  🎉 Auto-backfilled with waitlist patient {backfilled_patient}")
-                            else:
-                                print(f"  ℹ️  No immediate backfill match (status: {backfill_result.get('status')})")
-                    except Exception as e:
-                        print(f"  ⚠️  Backfill attempt failed: {str(e)}")
-                        # Continue without failing the workflow
-        
-        # Step 5.5: Handle any patients that LLM didn't include in response
-        # Use pre-calculated match scores to process them automatically
-        assigned_patient_ids = {a.get('patient_id') for a in decisions.get('assignments', [])}
-        affected_patient_ids = {apt['patient_id'] for apt in metadata['affected_appointments']}
-        missing_patient_ids = affected_patient_ids - assigned_patient_ids
-        
-        if missing_patient_ids:
-            print(f"\n[AUTO-PROCESS] {len(missing_patient_ids)} patients not in LLM response")
-            print(f"  Missing: {', '.join(missing_patient_ids)}")
-            print(f"  → Calculating scores on-demand for missing patients")
-            
-            for missing_patient_id in missing_patient_ids:
-                print(f"\n  [AUTO] Processing {missing_patient_id}...")
-                
-                # Find the appointment for this patient
-                apt = next((a for a in metadata['affected_appointments'] if a['patient_id'] == missing_patient_id), None)
-                if not apt:
-                    print(f"  [AUTO] ✗ No appointment found for {missing_patient_id}")
-                    continue
-                
-                apt_id = apt['appointment_id']
-                print(f"  [AUTO] Found appointment {apt_id}")
-                
-                # Calculate scores on-demand for this patient (agentic fallback)
-                patient_scores = []
-                for provider in metadata['available_providers']:
-                    score_result = self.scheduling_agent.calculate_match_score(
-                        patient_id=missing_patient_id,
-                        provider_id=provider['provider_id'],
-                        original_provider_id=metadata['provider_id'],
-                        appointment_id=apt_id
-                    )
-                    patient_scores.append({
-                        'provider_id': provider['provider_id'],
-                        'provider_name': provider['name'],
-                        'score': score_result.get('total_score', 0),
-                        'factors': score_result.get('breakdown', {})
-                    })
-                
-                print(f"  [AUTO] Calculated {len(patient_scores)} match scores for {missing_patient_id}")
-                
-                if not patient_scores:
-                    print(f"  [AUTO] ⚠️  No providers available for {missing_patient_id} - waitlisting")
-                    # Add to waitlist
-                    patient_data = self.domain.get_patient(missing_patient_id)
-                    waitlist_entry = {
-                        "patient_id": missing_patient_id,
-                        "name": patient_data.get('name', missing_patient_id),
-                        "condition": patient_data.get('condition', 'N/A'),
-                        "no_show_risk": patient_data.get('no_show_risk', 0.5),
-                        "priority": "HIGH",
-                        "requested_specialty": patient_data.get('condition_specialty_required', 'Physical Therapy'),
-                        "requested_location": patient_data.get('preferred_location', 'Any'),
-                        "availability_windows": {
-                            "days": patient_data.get('preferred_days', '').split(',') if patient_data.get('preferred_days') else ['Any'],
-                            "times": ["Morning", "Afternoon"]
-                        },
-                        "insurance": patient_data.get('insurance_provider', 'Unknown'),
-                        "current_appointment": apt_id,
-                        "willing_to_move_up": True,
-                        "added_to_waitlist": datetime.now().isoformat() + "Z",
-                        "waitlist_reason": "❌ LLM didn't process this patient - no providers available",
-                        "notes": "Patient was not included in LLM response"
-                    }
-                    self.domain.add_to_waitlist(waitlist_entry)
-                    continue
-                
-                # Find best match
-                best_match = max(patient_scores, key=lambda x: x['score'])
-                best_provider_id = best_match['provider_id']
-                best_score = best_match['score']
-                match_factors = best_match.get('factors', {})
-                
-                print(f"  📊 {missing_patient_id}: Best match = {best_match['provider_name']} (Score: {best_score})")
-                
-                # Apply same logic as LLM would:
-                # - Score >= 60: Assign
-                # - Score < 60: Waitlist
-                
-                if best_score >= 60:
-                    # Good match - assign
-                    auto_reasoning = f"Auto-assigned using on-demand score calculation (LLM didn't include in response)"
-                    auto_quality = "GOOD" if best_score >= 75 else "ACCEPTABLE"
-                    
-                    success = self.booking_agent.book_appointment(
-                        apt_id,
-                        best_provider_id,
-                        match_score=best_score,
-                        match_factors=match_factors,
-                        match_quality=auto_quality,
-                        reasoning=auto_reasoning
-                    )
-                    
-                    if success:
-                        # Send notification
-                        apt_details = next((a for a in metadata['affected_appointments'] if a['appointment_id'] == apt_id), {})
-                        
-                        self.patient_agent.send_offer(
-                            patient_id=missing_patient_id,
-                            appointment_id=apt_id,
-                            new_provider_id=best_provider_id,
-                            date=apt_details.get('date', metadata['date']),
-                            time=apt_details.get('time', 'TBD')
-                        )
-                        
-                        executed_assignments.append({
-                            "appointment_id": apt_id,
-                            "patient_id": missing_patient_id,
-                            "assigned_to": best_provider_id,
-                            "assigned_to_name": best_match['provider_name'],
-                            "match_score": best_score,
-                            "match_factors": match_factors,
-                            "match_quality": auto_quality,
-                            "action": "assign",
-                            "reasoning": auto_reasoning
-                        })
-                        print(f"  ✅ {apt_id} → {best_match['provider_name']} (Score: {best_score})")
-                    else:
-                        print(f"  ✗ Failed to assign {apt_id}")
-                
-                else:
-                    # Low score - add to waitlist with reason
-                    print(f"  ⚠️  Low score ({best_score}) → Waitlist")
-                    
-                    patient_data = self.domain.get_patient(missing_patient_id)
-                    waitlist_entry = {
-                        "patient_id": missing_patient_id,
-                        "name": patient_data.get('name', missing_patient_id),
-                        "condition": patient_data.get('condition', 'N/A'),
-                        "no_show_risk": patient_data.get('no_show_risk', 0.5),
-                        "priority": "HIGH" if best_score < 40 else "MEDIUM",
-                        "requested_specialty": patient_data.get('condition_specialty_required', 'Physical Therapy'),
-                        "requested_location": patient_data.get('preferred_location', 'Any'),
-                        "availability_windows": {
-                            "days": patient_data.get('preferred_days', '').split(',') if patient_data.get('preferred_days') else ['Any'],
-                            "times": ["Morning", "Afternoon"]
-                        },
-                        "insurance": patient_data.get('insurance_provider', 'Unknown'),
-                        "current_appointment": apt_id,
-                        "willing_to_move_up": True,
-                        "added_to_waitlist": datetime.now().isoformat() + "Z",
-                        "waitlist_reason": f"❌ No suitable match found - Best score: {best_score}/165 points (threshold: 60)",
-                        "notes": f"Best available provider: {best_match['provider_name']} ({best_score} points) - below acceptable threshold"
-                    }
-                    self.domain.add_to_waitlist(waitlist_entry)
-                    
-                    waitlist_entries.append({
-                        "appointment_id": apt_id,
-                        "patient_id": missing_patient_id,
-                        "action": "waitlist",
-                        "match_score": best_score,
-                        "reasoning": f"No suitable match - best score {best_score} below threshold 60"
-                    })
-                    print(f"  ⏳ {apt_id} → Waitlist (Score: {best_score})")
+        The stream is timed as the "llm" span; the execution done inside it is
+        accumulated separately (executed, execute_ms) so generation time is
+        wall_ms - execute_ms.
         
-        # Step 6: Return results with method indicator
-        assignment_method = decisions.get('summary', {}).get('method', 'llm-template-driven')
+        Returns:
+            (decisions, number of assignments already executed)
+        """
+        print(f"\n[LLM] Streaming assignment decisions...")
+        print(f"[LLM] Prompt length: {len(prompt)} chars")
         
-        result = {
-            "success": True,
-            "provider_id": provider_id,
-            "start_date": start_date,
-            "end_date": end_date,
-            "date": start_date,  # Legacy field for backward compatibility
-            "date_range_days": (datetime.strptime(end_date, "%Y-%m-%d") - datetime.strptime(start_date, "%Y-%m-%d")).days + 1,
-            "total_affected": metadata['total_affected'],
-            "successful_assignments": len(executed_assignments),
-            "waitlist_entries": len(waitlist_entries),
-            "assignments": executed_assignments,
-            "waitlist": waitlist_entries,
-            "summary": decisions.get('summary', {}),
-            "metadata": metadata,  # Include for audit
-            "assignment_method": assignment_method,  # NEW: Shows which method was used
-            "used_fallback": assignment_method == "rule-based-fallback"  # NEW: Flag for fallback
+        parser = StreamingArrayParser("assignments")
+        stream_error = None
+        usage, response_chars, execute_seconds = None, 0, 0.0
+        with get_tracer().span("llm", appointments=metadata.get('total_affected'), prompt_chars=len(prompt or ""),
+                               streaming=True) as span:
+            chunks = iter(self.llm.stream(prompt=prompt, **self._llm_call_kwargs()))
+            while True:
+                try:
+                    delta = next(chunks)
+                except StopIteration as done:
+                    usage = done.value
+                    break
+                except Exception as e:
+                    stream_error = e
+                    print(f"[ERROR] LLM stream failed: {e}")
+                    break
+                response_chars += len(delta or "")
+                for assignment in parser.feed(delta):
+                    self._normalize_assignment(assignment)
+                    print(f"[LLM] Assignment {len(parser.items)} received → executing")
+                    started = time.perf_counter()
+                    self._execute_assignment(assignment, metadata, executed_assignments, waitlist_entries)
+                    execute_seconds += time.perf_counter() - started
+            span.set(response_chars=response_chars, executed=len(parser.items),
+                     execute_ms=round(execute_seconds * 1000, 2), **self._usage_attributes(usage))
+            if stream_error is not None:
+                span.set(error=f"{type(stream_error).__name__}: {stream_error}"[:200])
+        
+        document = parser.finish()
+        streamed = parser.items
+        if streamed:
+            decisions = document if document is not None else {}
+            decisions['assignments'] = streamed
+            if document is None:
+                print(f"[LLM] ⚠️  Response incomplete - salvaged {len(streamed)} completed assignments")
+            return decisions, len(streamed)
+        
+        # Nothing usable arrived - same fallbacks as the non-streaming path
+        if stream_error is not None:
+            print(f"[FALLBACK] Using rule-based assignment")
+            return self._fallback_assignment(metadata), 0
+        if document is None:
+            print(f"[ERROR] Failed to parse streamed LLM response")
+            return self._unparseable_response_fallback(metadata), 0
+        print(f"[ERROR] LLM response has no usable assignments")
+        print(f"[FALLBACK] Using rule-based assignment")
+        return self._fallback_assignment(metadata), 0
+    
+    def _llm_call_kwargs(self) -> Dict[str, Any]:
+        """System prompt and generation settings for the orchestrator call."""
+        # Adjust temperature for GPT-5 (only supports 1.0)
+        temperature = llm_settings.ORCHESTRATOR_TEMPERATURE
+        model = os.getenv("ORCHESTRATION_LLM_MODEL", "gpt-4")
+        if "gpt-5" in model.lower():
+            temperature = 1.0
+            print(f"[LLM] Using temperature=1.0 for {model} (GPT-5 requirement)")
+        
+        return {
+            "system": "You are a healthcare scheduling assistant. You MUST return ONLY valid JSON with an 'assignments' array. Do not include any text before or after the JSON. The JSON must start with '{' and end with '}'.",
+            "max_tokens": llm_settings.ORCHESTRATOR_MAX_TOKENS,
+            "temperature": temperature,
+            "timeout": llm_settings.REQUEST_TIMEOUT
         }
+    
+    def _normalize_assignment(self, assignment: Dict[str, Any]) -> None:
+        """Fill in fields execution expects from an LLM assignment."""
+        # LLM provides match_factors and reasoning - no need to enrich from pre-calculated scores
+        # Ensure match_factors exists (LLM should provide this)
+        if 'match_factors' not in assignment:
+            assignment['match_factors'] = {}
         
-        print(f"\n[WORKFLOW] ✅ Complete!")
-        print(f"  Date Range: {start_date} to {end_date} ({result['date_range_days']} day(s))")
-        print(f"  Method: {assignment_method.upper()}")
-        print(f"  Assigned: {len(executed_assignments)}")
-        print(f"  Waitlist: {len(waitlist_entries)}")
+        # Convert match_quality to numeric score for backward compatibility
+        quality_map = {
+            "EXCELLENT": 100,
+            "GOOD": 75,
+            "ACCEPTABLE": 60,
+            "POOR": 40
+        }
+        if 'match_quality' in assignment and 'match_score' not in assignment:
+            assignment['match_score'] = quality_map.get(assignment['match_quality'], 50)
         
-        return result
+        # Minimal validation: Only ensure required fields exist for execution
+        # The LLM should handle all decision-making via the prompt
+        if 'appointment_id' not in assignment:
+            print(f"  ⚠️  Assignment missing appointment_id - skipping")
+    
+    def _unparseable_response_fallback(self, metadata: Dict[str, Any]) -> Dict[str, Any]:
+        """Decisions to use when the LLM response is not valid JSON."""
+        # Try hardcoded LLM-style response first (for demo purposes)
+        print(f"[FALLBACK] Attempting hardcoded LLM-style response...")
+        decisions = self._create_hardcoded_llm_response(metadata)
+        
+        # If hardcoded response fails, use rule-based
+        if not decisions or not decisions.get('assignments'):
+            print(f"[FALLBACK] Using rule-based assignment")
+            decisions = self._fallback_assignment(metadata)
+        return decisions
     
     def _create_hardcoded_llm_response(self, metadata: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -954,27 +1742,15 @@ Consider offering these slots to patients who value continuity of care.
         Uses on-demand score calculation (still agentic, just simpler).
         """
         assignments = []
+        score_patient = self._rank_providers(metadata)
+        patient_names = self._patient_names(metadata)
         
         for patient in metadata['affected_appointments']:
             apt_id = patient['appointment_id']
             patient_id = patient['patient_id']
-            patient_name = patient.get('patient_name', 'Unknown')
+            patient_name = patient_names.get(apt_id, 'Unknown')
             
-            # Calculate scores on-demand for this patient
-            patient_scores = []
-            for provider in metadata['available_providers']:
-                score_result = self.scheduling_agent.calculate_match_score(
-                    patient_id=patient_id,
-                    provider_id=provider['provider_id'],
-                    original_provider_id=metadata['provider_id'],
-                    appointment_id=apt_id
-                )
-                patient_scores.append({
-                    'provider_id': provider['provider_id'],
-                    'provider_name': provider['name'],
-                    'score': score_result.get('total_score', 0),
-                    'factors': score_result.get('breakdown', {})
-                })
+            patient_scores = score_patient(patient_id, apt_id)
             
             if patient_scores:
                 # Sort by score
@@ -982,7 +1758,7 @@ Consider offering these slots to patients who value continuity of care.
                 best_match = patient_scores[0]
                 
                 # If score is good enough, assign
-                if best_match['score'] >= 60:  # Use simple threshold
+                if best_match['score'] >= self.PERCENT_THRESHOLDS['acceptable']:
                     assignments.append({
                         "appointment_id": apt_id,
                         "patient_id": patient_id,
@@ -991,7 +1767,7 @@ Consider offering these slots to patients who value continuity of care.
                         "assigned_to_name": best_match['provider_name'],
                         "match_score": best_match['score'],
                         "match_factors": best_match.get('factors', {}),
-                        "match_quality": "GOOD" if best_match['score'] >= 75 else "ACCEPTABLE",
+                        "match_quality": self._match_quality(best_match['score']),
                         "reasoning": f"Fallback: Best match with score {best_match['score']}",
                         "action": "assign"
                     })
@@ -1035,6 +1811,260 @@ Consider offering these slots to patients who value continuity of care.
             }
         }
     
+    def _rank_providers(self, metadata: Dict[str, Any]):
+        """Scoring function (patient_id, apt_id) -> provider scores for this outage.
+        
+        Network-wide outages score every patient up front in worker processes;
+        smaller ones score on demand (cached per pair). Rule scores are
+        returned as 0-100 percentages (see PERCENT_THRESHOLDS).
+        """
+        pair_count = len(metadata['affected_appointments']) * len(metadata['available_providers'])
+        if self.parallel_scorer.should_parallelize(pair_count):
+            parallel_rankings = self._score_all_in_parallel(metadata)
+            return lambda patient_id, apt_id: list(parallel_rankings.get(apt_id, []))
+        # Each appointment's own provider is the original (combined multi-provider outages)
+        originals = {apt['appointment_id']: apt.get('provider_id') for apt in metadata['affected_appointments']}
+        return lambda patient_id, apt_id: self._score_patient_sequential(
+            patient_id, apt_id, metadata, originals.get(apt_id)
+        )
+    
+    def _decide_deterministic(
+        self,
+        metadata: Dict[str, Any],
+        ledger: Optional[CapacityLedger] = None
+    ) -> Tuple[Dict[str, Any], CapacityLedger]:
+        """Decision-first: best-scoring provider with room for each appointment.
+        
+        Same threshold as the rule-based fallback, but capacity and slots
+        are reserved on a CapacityLedger so the plan never overbooks. The
+        reasoning is a short factual placeholder until the LLM narrative arrives.
+        """
+        start = time.time()
+        score_patient = self._rank_providers(metadata)
+        if ledger is None:
+            ledger = CapacityLedger(metadata['available_providers'])
+        patient_names = self._patient_names(metadata)
+        assignments = []
+        
+        for apt in metadata['affected_appointments']:
+            apt_id = apt['appointment_id']
+            ranked = sorted(score_patient(apt['patient_id'], apt_id), key=lambda x: x['score'], reverse=True)
+            best = next(
+                (r for r in ranked if r['score'] >= self.PERCENT_THRESHOLDS['acceptable']
+                 and ledger.reserve(r['provider_id'], apt) is None),
+                None
+            )
+            assignment = {
+                "appointment_id": apt_id,
+                "patient_id": apt['patient_id'],
+                "patient_name": patient_names.get(apt_id, 'Unknown'),
+                "assigned_to": best['provider_id'] if best else None,
+                "assigned_to_name": best['provider_name'] if best else None,
+                "match_score": (best or (ranked[0] if ranked else {})).get('score', 0),
+                "match_factors": (best or (ranked[0] if ranked else {})).get('factors', {}),
+                "action": "assign" if best else "waitlist"
+            }
+            if best:
+                assignment["match_quality"] = self._match_quality(best['score'])
+                assignment["reasoning"] = (f"Best available match (score {best['score']}; "
+                                           f"{self._top_factors(best.get('factors', {}))}). Explanation pending.")
+            else:
+                assignment["match_quality"] = "POOR"
+                assignment["reasoning"] = (f"No provider with room scored {self.PERCENT_THRESHOLDS['acceptable']}+ "
+                                           f"(best score {assignment['match_score']}). Explanation pending.")
+            assignments.append(assignment)
+        
+        elapsed_ms = (time.time() - start) * 1000
+        print(f"[DECISION-FIRST] ✅ {len(assignments)} decisions in {elapsed_ms:.0f}ms (no LLM call)")
+        return {
+            "assignments": assignments,
+            "summary": {
+                "total": len(assignments),
+                "assigned": len([a for a in assignments if a['action'] == 'assign']),
+                "waitlisted": len([a for a in assignments if a['action'] == 'waitlist']),
+                "method": "decision-first",
+                "decision_ms": round(elapsed_ms, 1)
+            }
+        }, ledger
+    
+    @staticmethod
+    def _patient_names(metadata: Dict[str, Any]) -> Dict[str, str]:
+        """appointment_id -> patient name (appointments themselves carry only patient_id)."""
+        return {p['appointment_id']: p['patient'].get('name', 'Unknown') for p in metadata.get('patients', [])}
+    
+    @classmethod
+    def _match_quality(cls, score: float) -> str:
+        """EXCELLENT / GOOD / ACCEPTABLE / POOR for a 0-100 score."""
+        for quality in ("excellent", "good", "acceptable"):
+            if score >= cls.PERCENT_THRESHOLDS[quality]:
+                return quality.upper()
+        return "POOR"
+    
+    @staticmethod
+    def _top_factors(factors: Dict[str, Any], limit: int = 3) -> str:
+        """Highest-scoring factor names, e.g. "continuity, specialty"."""
+        values = {
+            name: value.get('score', 0) if isinstance(value, dict) else value
+            for name, value in factors.items()
+        }
+        top = [name for name, value in sorted(values.items(), key=lambda x: -(x[1] or 0))
+               if isinstance(value, (int, float)) and value > 0]
+        return ", ".join(top[:limit]) or "no standout factors"
+    
+    def _explain_later(self, decisions: List[Dict[str, Any]], metadata: Dict[str, Any]) -> Dict[str, Any]:
+        """Queue LLM narratives for committed decisions; returns immediately."""
+        if not decisions:
+            return {"status": "none", "pending": 0}
+        for decision in decisions:
+            self.explanations[decision['appointment_id']] = {"status": "pending", "narrative": None}
+        if self._explainer is None:
+            self._explainer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="explainer")
+        
+        batch_size = max(1, llm_settings.EXPLANATION_BATCH_SIZE)
+        for i in range(0, len(decisions), batch_size):
+            batch = decisions[i:i + batch_size]
+            self._explanation_futures.append(self._explainer.submit(self._explain_batch, batch, metadata))
+        print(f"[DECISION-FIRST] 📝 {len(decisions)} explanations queued")
+        return {"status": "pending", "pending": len(decisions)}
+    
+    def _explain_batch(self, decisions: List[Dict[str, Any]], metadata: Dict[str, Any]) -> int:
+        """One LLM call writing narratives for a batch; attaches them to the records."""
+        providers = {p.get('provider_id'): p for p in metadata.get('available_providers', [])}
+        patients = {p.get('appointment_id'): p.get('patient', {}) for p in metadata.get('patients', [])}
+        lines = []
+        for d in decisions:
+            patient = patients.get(d['appointment_id'], {})
+            provider = providers.get(d.get('assigned_to'), {})
+            outcome = (f"assigned to {provider.get('name', d.get('assigned_to'))} ({provider.get('specialty', 'N/A')})"
+                       if d.get('action') != 'waitlist' else "waitlisted")
+            lines.append(
+                f"- {d['appointment_id']}: patient {patient.get('name', d.get('patient_id'))} "
+                f"(condition: {patient.get('condition', 'N/A')}, gender preference: {patient.get('gender_preference', 'any')}) "
+                f"{outcome}; score {d.get('match_score', 0)}; factors {json.dumps(d.get('match_factors', {}), default=str)}"
+            )
+        prompt = (
+            f"Provider {metadata.get('provider_name', metadata.get('provider_id'))} is unavailable. "
+            f"These rebooking decisions are final. For each one, write a 1-3 sentence explanation "
+            f"for the audit trail and the patient-facing UI, based only on the facts given.\n\n"
+            + "\n".join(lines)
+            + '\n\nReturn ONLY a JSON object mapping appointment_id to explanation.'
+        )
+        
+        try:
+            # Runs after the workflow returned, so it is its own trace
+            with get_tracer().span("template.explain_batch", decisions=len(decisions)) as span:
+                response = self.llm.generate(
+                    prompt=prompt,
+                    system="You explain healthcare scheduling decisions. Return ONLY valid JSON.",
+                    max_tokens=len(decisions) * llm_settings.SHARD_OUTPUT_TOKENS_PER_APPOINTMENT,
+                    temperature=llm_settings.ORCHESTRATOR_TEMPERATURE,
+                    timeout=llm_settings.REQUEST_TIMEOUT
+                )
+                span.set(**self._usage_attributes(getattr(response, "usage", None)))
+            narratives = json.loads((response.content or "").strip())
+            if not isinstance(narratives, dict):
+                raise ValueError("explanations are not a JSON object")
+        except Exception as e:
+            print(f"[DECISION-FIRST] ⚠️  Explanations failed, keeping deterministic reasoning: {e}")
+            for d in decisions:
+                self.explanations[d['appointment_id']] = {"status": "failed", "narrative": None}
+            return 0
+        
+        attached = 0
+        for d in decisions:
+            narrative = narratives.get(d['appointment_id'])
+            if not narrative:
+                self.explanations[d['appointment_id']] = {"status": "failed", "narrative": None}
+                continue
+            d['reasoning'] = narrative
+            self.explanations[d['appointment_id']] = {"status": "ready", "narrative": narrative}
+            if d.get('action') != 'waitlist':
+                # JSONClient serializes this with booking writes from the workflow thread
+                self.domain.update_appointment(d['appointment_id'], {"reasoning": narrative})
+            attached += 1
+        print(f"[DECISION-FIRST] ✅ {attached}/{len(decisions)} explanations attached")
+        return attached
+    
+    def wait_for_explanations(self, timeout: Optional[float] = None) -> Dict[str, Any]:
+        """Block until queued explanations are written (tests, scripts, shutdown)."""
+        futures, self._explanation_futures = self._explanation_futures, []
+        for future in futures:
+            future.result(timeout=timeout)
+        return self.get_explanation_stats()
+    
+    def get_explanation_stats(self) -> Dict[str, Any]:
+        """Count of explanations by status."""
+        stats = {"pending": 0, "ready": 0, "failed": 0}
+        for entry in list(self.explanations.values()):
+            stats[entry['status']] += 1
+        return stats
+    
+    def _score_patient_sequential(self, patient_id: str, apt_id: str, metadata: Dict[str, Any],
+                                  original_provider_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Score one patient against in-range providers (cached per pair)."""
+        patient_scores = []
+        in_range = self.domain.prune_candidates_by_distance(
+            self.domain.get_patient(patient_id), metadata['available_providers']
+        )["kept"]
+        for provider in in_range:
+            score_result = self.scheduling_agent.calculate_match_score(
+                patient_id=patient_id,
+                provider_id=provider['provider_id'],
+                original_provider_id=original_provider_id or metadata['provider_id'],
+                appointment_id=apt_id
+            )
+            patient_scores.append({
+                'provider_id': provider['provider_id'],
+                'provider_name': provider['name'],
+                'score': to_percent(score_result.get('total_score', 0)),
+                'factors': score_result.get('breakdown', {})
+            })
+        return patient_scores
+    
+    def _score_all_in_parallel(self, metadata: Dict[str, Any]) -> Dict[str, List[Dict[str, Any]]]:
+        """Rank providers for every affected appointment using the process pool."""
+        providers = metadata['available_providers']
+        names = {p['provider_id']: p.get('name', p['provider_id']) for p in providers}
+        
+        patients = {}
+        jobs = []
+        for apt in metadata['affected_appointments']:
+            patient_id = apt['patient_id']
+            if patient_id not in patients:
+                patients[patient_id] = self.domain.get_patient(patient_id)
+            if not patients[patient_id]:
+                continue
+            jobs.append({
+                "appointment_id": apt['appointment_id'],
+                "patient": patients[patient_id],
+                "appointment_date": apt.get('date'),
+                "original_provider_id": apt.get('provider_id') or metadata['provider_id']
+            })
+        
+        original_ids = sorted({job['original_provider_id'] for job in jobs})
+        result = self.parallel_scorer.score_and_rank(
+            jobs,
+            providers,
+            originals={p.get('provider_id'): p for p in self.domain.get_providers(original_ids)},
+            top_k=len(providers)  # Every in-range provider: capacity may rule out the best few
+        )
+        stats = result['stats']
+        print(f"[PARALLEL] Scored {stats['pairs_scored']} pairs ({stats['pairs_pruned']} pruned) "
+              f"with {stats['workers']} worker(s) in {stats['elapsed_ms']}ms")
+        
+        return {
+            apt_id: [
+                {
+                    'provider_id': r['provider_id'],
+                    'provider_name': names.get(r['provider_id']),
+                    'score': to_percent(r['total_score']),
+                    'factors': r['breakdown']
+                }
+                for r in ranking
+            ]
+            for apt_id, ranking in result['rankings'].items()
+        }
+    
     def _mark_provider_unavailable_range(self, provider_id: str, start_date: str, end_date: str, reason: str = "sick"):
         """Mark provider as unavailable for a DATE RANGE.
         
@@ -1123,7 +2153,9 @@ def create_template_driven_orchestrator(
     booking_agent,
     smart_scheduling_agent,
     llm=None,
-    use_langfuse=True
+    use_langfuse=True,
+    decision_first=None,
+    plan_path=None
 ):
     """Create a template-driven orchestrator instance."""
     return TemplateDrivenOrchestrator(
@@ -1132,6 +2164,8 @@ def create_template_driven_orchestrator(
         booking_agent=booking_agent,
         smart_scheduling_agent=smart_scheduling_agent,
         llm=llm,
-        use_langfuse=use_langfuse
+        use_langfuse=use_langfuse,
+        decision_first=decision_first,
+        plan_path=plan_path
     )
 
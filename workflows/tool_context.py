@@ -0,0 +1,206 @@
+"""Tool Context - bounded conversation for the tool-calling loop.
+
+PromptDrivenOrchestrator used to resend every assistant turn and the full
+json.dumps() of every tool result on each of up to 20 iterations, so prompt
+size (and cost/latency) grew with the session. ToolContext keeps it bounded:
+
+- Every tool result is stored under a reference ("ref_3"); the model can
+  fetch it again with the get_tool_result tool
+- Results larger than max_result_chars are sent as a summary: scalar fields,
+  list items projected to their id/name/score/status fields, item counts
+- Only the last keep_turns turns are sent verbatim; older turns are folded
+  into a running "progress so far" message: one line per call, with reads
+  and actions (assignments, waitlist entries, notifications) each capped at
+  summary_lines. Actions also get per-tool/provider counts, and their full
+  log is stored under a reference of its own
+"""
+
+import json
+from collections import Counter
+from typing import Dict, Any, List, Callable, Optional, Tuple
+
+# Fields kept when list items are summarized
+_KEY_FIELDS = ("name", "score", "recommendation", "status", "date", "time", "count", "success", "reason")
+_MAX_ITEMS = 10
+_MAX_STRING = 80
+_ACTIONS = ("assign_appointment", "add_to_waitlist", "send_patient_notification")
+
+
+def _project(item: Any) -> Any:
+    """Only the identifying / decision fields of a record."""
+    if not isinstance(item, dict):
+        return item if not isinstance(item, str) else item[:_MAX_STRING]
+    return {k: v for k, v in item.items() if k.endswith("_id") or k in _KEY_FIELDS}
+
+
+def summarize_result(result: Any) -> Any:
+    """Compact form of a large tool result (see module docstring)."""
+    if isinstance(result, list):
+        return {"items": [_project(item) for item in result[:_MAX_ITEMS]], "items_total": len(result)}
+    if not isinstance(result, dict):
+        return str(result)[:_MAX_STRING * 4]
+
+    summary = {}
+    for key, value in result.items():
+        if isinstance(value, list):
+            summary[key] = [_project(item) for item in value[:_MAX_ITEMS]]
+            if len(value) > _MAX_ITEMS:
+                summary[f"{key}_total"] = len(value)
+        elif isinstance(value, dict):
+            # e.g. get_patients: {patient_id: record}
+            items = list(value.items())
+            summary[key] = {k: _project(v) for k, v in items[:_MAX_ITEMS]}
+            if len(items) > _MAX_ITEMS:
+                summary[f"{key}_total"] = len(items)
+        elif isinstance(value, str):
+            summary[key] = value[:_MAX_STRING]
+        else:
+            summary[key] = value
+    return summary
+
+
+def brief_result(result: Any) -> str:
+    """One-line description of a tool result for the progress summary."""
+    if not isinstance(result, dict):
+        return str(result)[:_MAX_STRING]
+    if "error" in result:
+        return f"error: {str(result['error'])[:_MAX_STRING]}"
+    parts = []
+    for key, value in result.items():
+        if isinstance(value, (list, dict)):
+            parts.append(f"{key}: {len(value)}")
+        elif len(parts) < 6:
+            parts.append(f"{key}={str(value)[:40]}")
+    return ", ".join(parts)
+
+
+class ToolContext:
+    """Messages sent to the LLM on each iteration of the tool-calling loop."""
+
+    def __init__(
+        self,
+        system_prompt: str,
+        user_message: str,
+        store: Callable[[Any], str],
+        max_result_chars: int = 4000,
+        keep_turns: int = 2,
+        summary_lines: int = 40
+    ):
+        """
+        Args:
+            system_prompt: Orchestrator instructions
+            user_message: The task (provider, date, reason)
+            store: Saves a full tool result and returns its reference
+            max_result_chars: Results longer than this (as JSON) are summarized
+            keep_turns: Most recent turns sent verbatim
+            summary_lines: Max read-call and action lines kept in the progress summary
+        """
+        self.head = [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_message}
+        ]
+        self.store = store
+        self.max_result_chars = max_result_chars
+        self.keep_turns = keep_turns
+        self.summary_lines = summary_lines
+
+        self.turns: List[Tuple[List[Dict[str, Any]], list]] = []  # (messages, folded lines)
+        self.actions: List[str] = []   # assignments / waitlist / notifications (full log)
+        self.action_counts: Counter = Counter()  # "assign_appointment -> P002": 3, ...
+        self.actions_ref: Optional[str] = None   # Reference to self.actions once it is capped
+        self.reads: List[str] = []     # most recent read calls
+        self.folded_turns = 0
+        self.summarized_results = 0
+        self.last_prompt_chars = 0
+        self.max_prompt_chars = 0
+
+    def add_turn(self, tool_calls: List[Dict[str, Any]], content: Optional[str],
+                 calls: List[Dict[str, Any]], results: List[Any]) -> None:
+        """
+        Record one assistant turn and its tool results.
+
+        Args:
+            tool_calls: OpenAI-format tool calls from the LLM response
+            content: Assistant text accompanying the calls
+            calls: Parsed calls ({"name", "arguments"}), same order
+            results: Tool results, same order
+        """
+        turn = [{"role": "assistant", "content": content or None, "tool_calls": tool_calls}]
+        lines = []
+        for tool_call, call, result in zip(tool_calls, calls, results):
+            ref = self.store(result) if call["name"] != "get_tool_result" else None
+            turn.append({"role": "tool", "tool_call_id": tool_call["id"], "content": self._render(result, ref)})
+            lines.append((call, result, ref))
+        self.turns.append((turn, lines))
+
+        while len(self.turns) > self.keep_turns:
+            _, folded = self.turns.pop(0)
+            self._fold(folded)
+
+    def _render(self, result: Any, ref: Optional[str]) -> str:
+        """Tool message content: full JSON, or a summary with its reference."""
+        text = json.dumps(result, default=str)
+        if len(text) <= self.max_result_chars:
+            return text
+        self.summarized_results += 1
+        full_chars = len(text)
+        text = json.dumps({"ref": ref, "truncated": True, "full_chars": full_chars,
+                           "summary": summarize_result(result)}, default=str)
+        if len(text) > self.max_result_chars:
+            text = json.dumps({"ref": ref, "truncated": True, "full_chars": full_chars,
+                               "preview": text[:self.max_result_chars // 2]})
+        return text
+
+    def _fold(self, lines) -> None:
+        """Move a turn's calls into the progress summary."""
+        self.folded_turns += 1
+        for call, result, ref in lines:
+            args = ", ".join(f"{k}={v}" for k, v in call["arguments"].items())
+            line = f"{call['name']}({args[:120]}) -> {brief_result(result)}"
+            if ref:
+                line += f" [{ref}]"
+            if call["name"] in _ACTIONS:
+                self.actions.append(line)
+                provider_id = call["arguments"].get("new_provider_id")
+                self.action_counts[f"{call['name']} -> {provider_id}" if provider_id else call["name"]] += 1
+            else:
+                self.reads.append(line)
+        del self.reads[:-self.summary_lines]
+
+    def messages(self) -> List[Dict[str, Any]]:
+        """Messages for the next LLM call."""
+        messages = list(self.head)
+        if self.folded_turns:
+            summary = [f"Progress so far ({self.folded_turns} earlier turns folded; "
+                       f"use get_tool_result(ref) for any full result):"]
+            if len(self.actions) > self.summary_lines:
+                if self.actions_ref is None:
+                    # Stored by reference, so the ref always returns the whole log
+                    self.actions_ref = self.store(self.actions)
+                counts = ", ".join(f"{key}: {n}" for key, n in sorted(self.action_counts.items()))
+                summary.append(f"Actions taken ({len(self.actions)}: {counts}; "
+                               f"full log [{self.actions_ref}]), most recent:")
+                summary.extend(f"- {line}" for line in self.actions[-self.summary_lines:])
+            elif self.actions:
+                summary.append("Actions taken:")
+                summary.extend(f"- {line}" for line in self.actions)
+            if self.reads:
+                summary.append("Data looked up:")
+                summary.extend(f"- {line}" for line in self.reads)
+            messages.append({"role": "user", "content": "\n".join(summary)})
+        for turn, _ in self.turns:
+            messages.extend(turn)
+
+        self.last_prompt_chars = sum(len(json.dumps(m, default=str)) for m in messages)
+        self.max_prompt_chars = max(self.max_prompt_chars, self.last_prompt_chars)
+        return messages
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get context size statistics."""
+        return {
+            "turns": self.folded_turns + len(self.turns),
+            "folded_turns": self.folded_turns,
+            "summarized_results": self.summarized_results,
+            "last_prompt_chars": self.last_prompt_chars,
+            "max_prompt_chars": self.max_prompt_chars
+        }